@@ -8,14 +8,20 @@ from typing import List, Optional
 
 from db.models.order import Order
 
-def get_order_list_keyboard(orders: Optional[List[Order]] = None, page: int = 1, total_pages: int = 1) -> InlineKeyboardMarkup:
+def get_order_list_keyboard(
+    orders: Optional[List[Order]] = None,
+    next_cursor: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+    scope: str = "all",
+) -> InlineKeyboardMarkup:
     """
     ساخت کیبورد نمایش لیست سفارش‌ها با دکمه‌های مدیریت
     
     Args:
         orders (List[Order], optional): لیست سفارش‌ها
-        page (int): شماره صفحه فعلی
-        total_pages (int): تعداد کل صفحات
+        next_cursor (str, optional): cursor صفحه بعد
+        prev_cursor (str, optional): cursor صفحه قبل
+        scope (str): فیلتر فعلی لیست (completed، pending، failed یا all)
         
     Returns:
         InlineKeyboardMarkup: کیبورد ساخته شده با دکمه‌های مدیریت سفارش‌ها
@@ -24,79 +30,47 @@ def get_order_list_keyboard(orders: Optional[List[Order]] = None, page: int = 1,
     
     # اگر لیست سفارش‌ها ارائه شده است
     if orders:
-        # برای هر سفارش یک دکمه مدیریت اضافه می‌کنیم
+        # برای هر سفارش یک دکمه مدیریت در یک ردیف
         for order in orders:
             # نمایش اطلاعات سفارش در دکمه
             status_emoji = "✅" if order.status == "completed" else "⏳" if order.status == "pending" else "❌"
             button_text = f"{status_emoji} سفارش #{order.id} - {order.amount:,} تومان"
             
-            builder.button(
+            builder.row(InlineKeyboardButton(
                 text=button_text,
                 callback_data=f"admin:order:manage:{order.id}"
-            )
-    
-    # دکمه‌های پیمایش صفحات
-    if total_pages > 1:
-        nav_buttons = []
-        
-        # دکمه صفحه قبل
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton(
-                text="◀️ صفحه قبل",
-                callback_data=f"admin:order:page:{page-1}"
             ))
-        
-        # نمایش شماره صفحه فعلی
+    
+    # دکمه‌های پیمایش صفحات (فیلتر و cursor در callback_data)
+    nav_buttons = []
+    if prev_cursor:
         nav_buttons.append(InlineKeyboardButton(
-            text=f"📄 {page} از {total_pages}",
-            callback_data="admin:order:current_page"
+            text="◀️ صفحه قبل",
+            callback_data=f"admin:order:page:{scope}:{prev_cursor}"
         ))
-        
-        # دکمه صفحه بعد
-        if page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(
-                text="▶️ صفحه بعد",
-                callback_data=f"admin:order:page:{page+1}"
-            ))
-            
-        # اضافه کردن دکمه‌های پیمایش به کیبورد
-        for button in nav_buttons:
-            builder.add(button)
+    if next_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="▶️ صفحه بعد",
+            callback_data=f"admin:order:page:{scope}:{next_cursor}"
+        ))
+    if nav_buttons:
+        builder.row(*nav_buttons)
     
-    # دکمه‌های فیلتر
-    builder.button(
-        text="🟢 سفارش‌های تکمیل شده",
-        callback_data="admin:order:filter:completed"
+    # دکمه‌های فیلتر، دو دکمه در هر ردیف
+    builder.row(
+        InlineKeyboardButton(text="🟢 سفارش‌های تکمیل شده", callback_data="admin:order:filter:completed"),
+        InlineKeyboardButton(text="🟡 سفارش‌های در انتظار", callback_data="admin:order:filter:pending"),
     )
-    builder.button(
-        text="🟡 سفارش‌های در انتظار",
-        callback_data="admin:order:filter:pending"
-    )
-    builder.button(
-        text="🔴 سفارش‌های لغو شده",
-        callback_data="admin:order:filter:cancelled"
-    )
-    builder.button(
-        text="🔄 همه سفارش‌ها",
-        callback_data="admin:order:filter:all"
+    builder.row(
+        InlineKeyboardButton(text="🔴 سفارش‌های ناموفق", callback_data="admin:order:filter:failed"),
+        InlineKeyboardButton(text="🔄 همه سفارش‌ها", callback_data="admin:order:filter:all"),
     )
     
     # دکمه بازگشت
-    builder.button(
+    builder.row(InlineKeyboardButton(
         text="🔙 بازگشت به پنل ادمین",
         callback_data="admin:panel"
-    )
-    
-    # تنظیم چیدمان
-    if orders:
-        # یک دکمه در هر ردیف برای سفارش‌ها
-        # دو یا سه دکمه در یک ردیف برای دکمه‌های پیمایش
-        # دو دکمه در هر ردیف برای فیلترها
-        # یک دکمه در ردیف آخر برای بازگشت
-        builder.adjust(1, min(3, total_pages*2-1), 2, 2, 1)
-    else:
-        # بدون سفارش، فقط نمایش دکمه‌های فیلتر و بازگشت
-        builder.adjust(2, 2, 1)
+    ))
     
     return builder.as_markup()
 
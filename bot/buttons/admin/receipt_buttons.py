@@ -21,14 +21,20 @@ def get_admin_receipts_button() -> InlineKeyboardButton:
         callback_data="admin:receipt:pending"
     )
 
-def get_receipt_list_keyboard(receipts: Optional[List[ReceiptLog]] = None, page: int = 1, total_pages: int = 1) -> InlineKeyboardMarkup:
+def get_receipt_list_keyboard(
+    receipts: Optional[List[ReceiptLog]] = None,
+    next_cursor: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+    scope: str = "pending",
+) -> InlineKeyboardMarkup:
     """
     ساخت کیبورد نمایش لیست رسیدها با دکمه‌های مدیریت
     
     Args:
         receipts (List[ReceiptLog], optional): لیست رسیدها
-        page (int): شماره صفحه فعلی
-        total_pages (int): تعداد کل صفحات
+        next_cursor (str, optional): cursor صفحه بعد
+        prev_cursor (str, optional): cursor صفحه قبل
+        scope (str): فیلتر فعلی لیست (pending، approved، rejected یا all)
         
     Returns:
         InlineKeyboardMarkup: کیبورد ساخته شده با دکمه‌های مدیریت رسیدها
@@ -37,79 +43,47 @@ def get_receipt_list_keyboard(receipts: Optional[List[ReceiptLog]] = None, page:
     
     # اگر لیست رسیدها ارائه شده است
     if receipts:
-        # برای هر رسید یک دکمه مدیریت اضافه می‌کنیم
+        # برای هر رسید یک دکمه مدیریت در یک ردیف
         for receipt in receipts:
             # نمایش اطلاعات رسید در دکمه
             status_emoji = "✅" if receipt.is_approved else "⏳" if receipt.is_pending else "❌"
             button_text = f"{status_emoji} رسید #{receipt.id} - {receipt.amount:,} تومان"
             
-            builder.button(
+            builder.row(InlineKeyboardButton(
                 text=button_text,
                 callback_data=f"admin:receipt:manage:{receipt.id}"
-            )
-    
-    # دکمه‌های پیمایش صفحات
-    if total_pages > 1:
-        nav_buttons = []
-        
-        # دکمه صفحه قبل
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton(
-                text="◀️ صفحه قبل",
-                callback_data=f"admin:receipt:page:{page-1}"
             ))
-        
-        # نمایش شماره صفحه فعلی
+    
+    # دکمه‌های پیمایش صفحات (فیلتر و cursor در callback_data)
+    nav_buttons = []
+    if prev_cursor:
         nav_buttons.append(InlineKeyboardButton(
-            text=f"📄 {page} از {total_pages}",
-            callback_data="admin:receipt:current_page"
+            text="◀️ صفحه قبل",
+            callback_data=f"admin:receipt:page:{scope}:{prev_cursor}"
         ))
-        
-        # دکمه صفحه بعد
-        if page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(
-                text="▶️ صفحه بعد",
-                callback_data=f"admin:receipt:page:{page+1}"
-            ))
-            
-        # اضافه کردن دکمه‌های پیمایش به کیبورد
-        for button in nav_buttons:
-            builder.add(button)
+    if next_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="▶️ صفحه بعد",
+            callback_data=f"admin:receipt:page:{scope}:{next_cursor}"
+        ))
+    if nav_buttons:
+        builder.row(*nav_buttons)
     
-    # دکمه‌های فیلتر
-    builder.button(
-        text="🟢 رسیدهای تایید شده",
-        callback_data="admin:receipt:filter:approved"
+    # دکمه‌های فیلتر، دو دکمه در هر ردیف
+    builder.row(
+        InlineKeyboardButton(text="🟢 رسیدهای تایید شده", callback_data="admin:receipt:filter:approved"),
+        InlineKeyboardButton(text="🟡 رسیدهای در انتظار", callback_data="admin:receipt:filter:pending"),
     )
-    builder.button(
-        text="🟡 رسیدهای در انتظار",
-        callback_data="admin:receipt:filter:pending"
-    )
-    builder.button(
-        text="🔴 رسیدهای رد شده",
-        callback_data="admin:receipt:filter:rejected"
-    )
-    builder.button(
-        text="🔄 همه رسیدها",
-        callback_data="admin:receipt:filter:all"
+    builder.row(
+        InlineKeyboardButton(text="🔴 رسیدهای رد شده", callback_data="admin:receipt:filter:rejected"),
+        InlineKeyboardButton(text="🔄 همه رسیدها", callback_data="admin:receipt:filter:all"),
     )
     
     # دکمه بازگشت
-    builder.button(
+    builder.row(InlineKeyboardButton(
         text="🔙 بازگشت به پنل ادمین",
         callback_data="admin:panel"
-    )
-    
-    # تنظیم چیدمان
-    if receipts:
-        # یک دکمه در هر ردیف برای رسیدها
-        # دو یا سه دکمه در یک ردیف برای دکمه‌های پیمایش
-        # دو دکمه در هر ردیف برای فیلترها
-        # یک دکمه در ردیف آخر برای بازگشت
-        builder.adjust(1, min(3, total_pages*2-1), 2, 2, 1)
-    else:
-        # بدون رسید، فقط نمایش دکمه‌های فیلتر و بازگشت
-        builder.adjust(2, 2, 1)
+    ))
     
     return builder.as_markup()
 
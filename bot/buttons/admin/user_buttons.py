@@ -8,14 +8,18 @@ from typing import List, Optional
 
 from db.models.user import User
 
-def get_user_list_keyboard(users: Optional[List[User]] = None, page: int = 1, total_pages: int = 1) -> InlineKeyboardMarkup:
+def get_user_list_keyboard(
+    users: Optional[List[User]] = None,
+    next_cursor: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+) -> InlineKeyboardMarkup:
     """
     ساخت کیبورد نمایش لیست کاربران با دکمه‌های مدیریت
     
     Args:
         users (List[User], optional): لیست کاربران
-        page (int): شماره صفحه فعلی
-        total_pages (int): تعداد کل صفحات
+        next_cursor (str, optional): cursor صفحه بعد
+        prev_cursor (str, optional): cursor صفحه قبل
         
     Returns:
         InlineKeyboardMarkup: کیبورد ساخته شده با دکمه‌های مدیریت کاربران
@@ -24,68 +28,45 @@ def get_user_list_keyboard(users: Optional[List[User]] = None, page: int = 1, to
     
     # اگر لیست کاربران ارائه شده است
     if users:
-        # برای هر کاربر یک دکمه مدیریت اضافه می‌کنیم
+        # برای هر کاربر یک دکمه مدیریت در یک ردیف
         for user in users:
             # نمایش اطلاعات کاربر در دکمه
             user_role = "👑 ادمین" if user.role == "admin" else "👤 کاربر" if user.role == "user" else "🌟 سوپر ادمین"
             button_text = f"{user_role} - {user.full_name} - ID: {user.telegram_id}"
             
-            builder.button(
+            builder.row(InlineKeyboardButton(
                 text=button_text,
                 callback_data=f"admin:user:manage:{user.id}"
-            )
-    
-    # دکمه‌های پیمایش صفحات
-    if total_pages > 1:
-        nav_buttons = []
-        
-        # دکمه صفحه قبل
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton(
-                text="◀️ صفحه قبل",
-                callback_data=f"admin:user:page:{page-1}"
             ))
-        
-        # نمایش شماره صفحه فعلی
+    
+    # دکمه‌های پیمایش صفحات (cursor در callback_data)
+    nav_buttons = []
+    if prev_cursor:
         nav_buttons.append(InlineKeyboardButton(
-            text=f"📄 {page} از {total_pages}",
-            callback_data="admin:user:current_page"
+            text="◀️ صفحه قبل",
+            callback_data=f"admin:user:page:{prev_cursor}"
         ))
-        
-        # دکمه صفحه بعد
-        if page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(
-                text="▶️ صفحه بعد",
-                callback_data=f"admin:user:page:{page+1}"
-            ))
-            
-        # اضافه کردن دکمه‌های پیمایش به کیبورد
-        for button in nav_buttons:
-            builder.add(button)
+    if next_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="▶️ صفحه بعد",
+            callback_data=f"admin:user:page:{next_cursor}"
+        ))
+    if nav_buttons:
+        builder.row(*nav_buttons)
     
-    # دکمه‌های عملیات کلی
-    builder.button(
+    # دکمه‌های عملیات کلی، هر کدام در یک ردیف
+    builder.row(InlineKeyboardButton(
         text="🔍 جستجوی کاربر",
         callback_data="admin:user:search"
-    )
-    builder.button(
+    ))
+    builder.row(InlineKeyboardButton(
         text="➕ افزودن ادمین",
         callback_data="admin:user:add_admin"
-    )
-    builder.button(
+    ))
+    builder.row(InlineKeyboardButton(
         text="🔙 بازگشت به پنل ادمین",
         callback_data="admin:panel"
-    )
-    
-    # تنظیم چیدمان
-    if users:
-        # یک دکمه در هر ردیف برای کاربران
-        # دو دکمه در هر ردیف برای دکمه‌های پیمایش
-        # یک دکمه در هر ردیف برای دکمه‌های عملیات کلی
-        builder.adjust(1, min(3, total_pages*2-1), 1, 1, 1)
-    else:
-        # بدون کاربر، فقط نمایش دکمه‌های عملیات
-        builder.adjust(1)
+    ))
     
     return builder.as_markup()
 
@@ -77,8 +77,8 @@ def register_admin_main_callbacks(router: Router) -> None:
                 return
             
             # دریافت آمار
-            total_users = len(await user_service.get_all_users())
-            admins = len(await user_service.get_users_by_role("admin"))
+            total_users = await user_service.count_users()
+            admins = await user_service.count_users("admin")
             
             stats_text = (
                 "📈 <b>آمار سیستم</b>\n\n"
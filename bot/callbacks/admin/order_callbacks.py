@@ -3,27 +3,51 @@
 """
 
 import logging
+from typing import Optional
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from core.services.order_service import OrderService
 from core.services.user_service import UserService
+from db.query_budget import query_budget_for
+from db.models.order import OrderStatus
 from bot.buttons.admin.order_buttons import get_order_list_keyboard, get_order_manage_buttons
 
 logger = logging.getLogger(__name__)
 
+# بررسی دسترسی + صفحه لیست (+ شمارش) با بارگذاری رابطه‌ها در همان کوئری
+LIST_QUERY_BUDGET = 6
+
+# تعداد سفارشات هر صفحه لیست
+ORDERS_PER_PAGE = 10
+
+# فیلتر لیست -> وضعیت سفارش (None برای همه)
+ORDER_LIST_SCOPES = {
+    "all": None,
+    "completed": OrderStatus.COMPLETED,
+    "pending": OrderStatus.PENDING,
+    "failed": OrderStatus.FAILED,
+}
+
 def register_admin_order_callbacks(router: Router) -> None:
     """ثبت کالبک‌های مدیریت سفارشات در پنل ادمین"""
     
-    @router.callback_query(F.data == "admin:orders")
-    async def admin_orders(callback: CallbackQuery, session: AsyncSession) -> None:
+    async def show_order_page(
+        callback: CallbackQuery,
+        session: AsyncSession,
+        scope: str = "all",
+        cursor: Optional[str] = None,
+    ) -> None:
         """
-        هندلر کلیک روی دکمه مدیریت سفارشات
+        نمایش یک صفحه از لیست سفارشات (صفحه‌بندی keyset)
         
         Args:
             callback (CallbackQuery): کالبک تلگرام
             session (AsyncSession): نشست دیتابیس
+            scope (str): فیلتر لیست (completed، pending، failed یا all)
+            cursor (str, optional): cursor صفحه درخواستی (None برای صفحه اول)
         """
         try:
             # بررسی دسترسی ادمین
@@ -34,13 +58,21 @@ def register_admin_order_callbacks(router: Router) -> None:
                 await callback.answer("⛔️ دسترسی غیرمجاز!", show_alert=True)
                 return
             
+            # دریافت صفحه سفارشات
+            order_service = OrderService(session)
+            status = ORDER_LIST_SCOPES[scope]
+            try:
+                page = await order_service.get_orders_page(status, limit=ORDERS_PER_PAGE, cursor=cursor)
+            except ValueError:
+                # cursor نامعتبر یا قدیمی: بازگشت به صفحه اول
+                page = await order_service.get_orders_page(status, limit=ORDERS_PER_PAGE)
+            
             # ساخت کیبورد لیست سفارشات
-            # ترجیحاً از یک سرویس برای دریافت سفارشات استفاده کنید
-            keyboard = get_order_list_keyboard()
+            keyboard = get_order_list_keyboard(page.items, page.next_cursor, page.prev_cursor, scope)
             
             await callback.message.edit_text(
                 "🛒 <b>مدیریت سفارشات</b>\n\n"
-                "لیست سفارشات اخیر:",
+                + ("لیست سفارشات اخیر:" if page.items else "📝 سفارشی یافت نشد."),
                 reply_markup=keyboard,
                 parse_mode="HTML"
             )
@@ -49,7 +81,39 @@ def register_admin_order_callbacks(router: Router) -> None:
             logger.error(f"خطا در کالبک مدیریت سفارشات: {e}", exc_info=True)
             await callback.answer("⚠️ خطا در اجرای درخواست", show_alert=True)
     
-    @router.callback_query(F.data.startswith("order:manage:"))
+    @router.callback_query(F.data == "admin:orders")
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def admin_orders(callback: CallbackQuery, session: AsyncSession) -> None:
+        """
+        هندلر کلیک روی دکمه مدیریت سفارشات
+        
+        Args:
+            callback (CallbackQuery): کالبک تلگرام
+            session (AsyncSession): نشست دیتابیس
+        """
+        await show_order_page(callback, session)
+    
+    @router.callback_query(F.data.startswith("admin:order:filter:"))
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def admin_orders_filter(callback: CallbackQuery, session: AsyncSession) -> None:
+        """نمایش صفحه اول سفارشات با فیلتر انتخاب شده"""
+        scope = callback.data.split(":")[3]
+        if scope not in ORDER_LIST_SCOPES:
+            await callback.answer("⚠️ فیلتر نامعتبر", show_alert=True)
+            return
+        await show_order_page(callback, session, scope)
+    
+    @router.callback_query(F.data.startswith("admin:order:page:"))
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def admin_orders_page(callback: CallbackQuery, session: AsyncSession) -> None:
+        """پیمایش صفحات لیست سفارشات (admin:order:page:<فیلتر>:<cursor>)"""
+        parts = callback.data.split(":", 4)
+        if len(parts) != 5 or parts[3] not in ORDER_LIST_SCOPES:
+            await callback.answer("⚠️ صفحه نامعتبر", show_alert=True)
+            return
+        await show_order_page(callback, session, parts[3], parts[4])
+    
+    @router.callback_query(F.data.startswith(("order:manage:", "admin:order:manage:")))
     async def order_manage(callback: CallbackQuery, session: AsyncSession) -> None:
         """
         هندلر کلیک روی دکمه مدیریت سفارش خاص
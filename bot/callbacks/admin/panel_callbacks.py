@@ -11,7 +11,7 @@ from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.exceptions import TelegramBadRequest
 
-from core.services.panel_service import PanelService, PanelConnectionError, PanelSyncError
+from core.services.panel_service import PanelService, PanelConnectionError, PanelSyncError, get_failed_sync_panels
 from core.services.inbound_service import InboundService
 from core.services.user_service import UserService
 from db.models.panel import PanelStatus
@@ -153,11 +153,13 @@ def register_admin_panel_callbacks(router: Router) -> None:
             panel_service = PanelService(session)
             sync_results = await panel_service.sync_all_panels_inbounds()
             
-            success_count = len(sync_results)
+            failed_count = len(get_failed_sync_panels(sync_results))
+            success_count = len(sync_results) - failed_count
             
-            logger.info(f"همگام‌سازی {success_count} پنل با موفقیت انجام شد")
+            logger.info(f"همگام‌سازی {success_count} پنل با موفقیت انجام شد ({failed_count} ناموفق)")
             await callback.answer(
-                f"✅ همگام‌سازی {success_count} پنل با موفقیت انجام شد!",
+                f"✅ همگام‌سازی {success_count} پنل با موفقیت انجام شد!"
+                + (f"\n⚠️ {failed_count} پنل ناموفق بود." if failed_count else ""),
                 show_alert=True
             )
             
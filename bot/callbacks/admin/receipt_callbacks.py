@@ -3,6 +3,7 @@
 """
 
 import logging
+from typing import Optional
 from aiogram import Router, F, Bot
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
@@ -10,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.services.receipt_service import ReceiptService
 from core.services.user_service import UserService
+from db.query_budget import query_budget_for
 from db.models.receipt_log import ReceiptStatus
 from bot.states.receipt_states import ReceiptAdminStates
 from bot.buttons.admin.receipt_buttons import get_receipt_list_keyboard, get_receipt_manage_buttons
@@ -17,43 +19,89 @@ from core.services.admin_permission_service import AdminPermissionService
 
 logger = logging.getLogger(__name__)
 
+# بررسی دسترسی + صفحه لیست (+ شمارش) با بارگذاری رابطه‌ها در همان کوئری
+LIST_QUERY_BUDGET = 6
+
+# تعداد رسیدهای هر صفحه لیست
+RECEIPTS_PER_PAGE = 10
+
+# فیلتر لیست -> (وضعیت، مجوز لازم یا None برای نقش ادمین، عنوان، متن لیست خالی، متن عدم دسترسی)
+RECEIPT_LIST_SCOPES = {
+    "pending": (
+        ReceiptStatus.PENDING, None,
+        "🧾 <b>رسیدهای در انتظار تایید</b>",
+        "🎉 <b>هیچ رسید در انتظار تاییدی وجود ندارد!</b>",
+        "⛔️ دسترسی غیرمجاز!",
+    ),
+    "approved": (
+        ReceiptStatus.APPROVED, "can_view_approved_receipts",
+        "✅ <b>رسیدهای تایید شده</b>",
+        "📝 <b>هیچ رسید تایید شده‌ای وجود ندارد!</b>",
+        "⛔️ شما مجوز مشاهده لیست رسیدهای تاییدشده را ندارید!",
+    ),
+    "rejected": (
+        ReceiptStatus.REJECTED, "can_view_rejected_receipts",
+        "❌ <b>رسیدهای رد شده</b>",
+        "📝 <b>هیچ رسید رد شده‌ای وجود ندارد!</b>",
+        "⛔️ شما مجوز مشاهده لیست رسیدهای ردشده را ندارید!",
+    ),
+    "all": (
+        None, "can_view_all_receipts",
+        "📋 <b>همه رسیدها</b>",
+        "📝 <b>هیچ رسیدی وجود ندارد!</b>",
+        "⛔️ شما مجوز مشاهده همه رسیدها را ندارید!",
+    ),
+}
+
 def register_admin_receipt_callbacks(router: Router) -> None:
     """ثبت کالبک‌های مدیریت رسیدها برای ادمین"""
     
-    @router.callback_query(F.data == "admin:receipt:pending")
-    async def receipt_pending_list(callback: CallbackQuery, session: AsyncSession, bot: Bot) -> None:
+    async def show_receipt_page(
+        callback: CallbackQuery,
+        session: AsyncSession,
+        scope: str = "pending",
+        cursor: Optional[str] = None,
+    ) -> None:
         """
-        نمایش لیست رسیدهای در انتظار تایید
+        نمایش یک صفحه از لیست رسیدها (صفحه‌بندی keyset)
         
         Args:
             callback (CallbackQuery): کالبک تلگرام
             session (AsyncSession): نشست دیتابیس
-            bot (Bot): نمونه ربات تلگرام
+            scope (str): فیلتر لیست (pending، approved، rejected یا all)
+            cursor (str, optional): cursor صفحه درخواستی (None برای صفحه اول)
         """
+        status, permission, title, empty_text, denied_text = RECEIPT_LIST_SCOPES[scope]
         try:
             # بررسی دسترسی ادمین
             user_service = UserService(session)
             user = await user_service.get_user_by_telegram_id(callback.from_user.id)
-            
-            if not user or user.role not in ["admin", "superadmin"]:
-                await callback.answer("⛔️ دسترسی غیرمجاز!", show_alert=True)
+            if permission is None:
+                allowed = bool(user) and user.role in ["admin", "superadmin"]
+            else:
+                allowed = bool(user) and await AdminPermissionService(session).has_permission(user, permission)
+            if not allowed:
+                await callback.answer(denied_text, show_alert=True)
                 return
             
-            # دریافت لیست رسیدهای در انتظار تایید
+            # دریافت صفحه رسیدها
             receipt_service = ReceiptService(session)
-            pending_receipts = await receipt_service.get_pending_receipts(limit=10)
+            try:
+                page = await receipt_service.get_receipts_page(status, limit=RECEIPTS_PER_PAGE, cursor=cursor)
+            except ValueError:
+                # cursor نامعتبر یا قدیمی: بازگشت به صفحه اول
+                page = await receipt_service.get_receipts_page(status, limit=RECEIPTS_PER_PAGE)
             
             # ساخت متن پیام
-            if not pending_receipts:
-                text = "🎉 <b>هیچ رسید در انتظار تاییدی وجود ندارد!</b>"
-                await callback.message.edit_text(text, parse_mode="HTML")
+            if not page.items:
+                await callback.message.edit_text(empty_text, parse_mode="HTML")
                 return
             
-            text = f"🧾 <b>رسیدهای در انتظار تایید</b> ({len(pending_receipts)})\n\n"
+            text = f"{title}\n\n"
             text += "لطفاً روی هر رسید کلیک کنید تا جزئیات آن را مشاهده کنید."
             
             # نمایش کیبورد رسیدها
-            keyboard = get_receipt_list_keyboard(pending_receipts)
+            keyboard = get_receipt_list_keyboard(page.items, page.next_cursor, page.prev_cursor, scope)
             
             await callback.message.edit_text(
                 text,
@@ -62,9 +110,21 @@ def register_admin_receipt_callbacks(router: Router) -> None:
             )
             
         except Exception as e:
-            logger.error(f"خطا در نمایش لیست رسیدهای در انتظار: {e}", exc_info=True)
+            logger.error(f"خطا در نمایش لیست رسیدها ({scope}): {e}", exc_info=True)
             await callback.answer("⚠️ خطا در بارگذاری لیست رسیدها", show_alert=True)
     
+    @router.callback_query(F.data == "admin:receipt:pending")
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def receipt_pending_list(callback: CallbackQuery, session: AsyncSession) -> None:
+        """
+        نمایش لیست رسیدهای در انتظار تایید
+        
+        Args:
+            callback (CallbackQuery): کالبک تلگرام
+            session (AsyncSession): نشست دیتابیس
+        """
+        await show_receipt_page(callback, session, "pending")
+    
     @router.callback_query(F.data.startswith("admin:receipt:manage:"))
     async def receipt_manage(callback: CallbackQuery, session: AsyncSession, bot: Bot) -> None:
         """
@@ -395,122 +455,22 @@ def register_admin_receipt_callbacks(router: Router) -> None:
             await callback.answer("⚠️ خطا در بارگذاری اطلاعات کاربر", show_alert=True)
     
     # فیلترهای مختلف رسیدها
-    @router.callback_query(F.data == "admin:receipt:filter:pending")
-    async def receipt_filter_pending(callback: CallbackQuery, session: AsyncSession) -> None:
-        """نمایش رسیدهای در انتظار"""
-        await callback.answer()
-        await receipt_pending_list(callback, session, None)
+    @router.callback_query(F.data.startswith("admin:receipt:filter:"))
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def receipt_filter(callback: CallbackQuery, session: AsyncSession) -> None:
+        """نمایش صفحه اول رسیدها با فیلتر انتخاب شده"""
+        scope = callback.data.split(":")[3]
+        if scope not in RECEIPT_LIST_SCOPES:
+            await callback.answer("⚠️ فیلتر نامعتبر", show_alert=True)
+            return
+        await show_receipt_page(callback, session, scope)
     
-    @router.callback_query(F.data == "admin:receipt:filter:approved")
-    async def receipt_filter_approved(callback: CallbackQuery, session: AsyncSession) -> None:
-        """نمایش رسیدهای تایید شده"""
-        try:
-            # بررسی دسترسی ادمین (مجوز مشاهده رسیدهای تاییدشده)
-            user_service = UserService(session)
-            user = await user_service.get_user_by_telegram_id(callback.from_user.id)
-            perm_service = AdminPermissionService(session)
-            if not user or not await perm_service.has_permission(user, "can_view_approved_receipts"):
-                await callback.answer("⛔️ شما مجوز مشاهده لیست رسیدهای تاییدشده را ندارید!", show_alert=True)
-                return
-            
-            # دریافت لیست رسیدهای تایید شده
-            receipt_service = ReceiptService(session)
-            approved_receipts = await receipt_service.get_receipts_by_status(ReceiptStatus.APPROVED, limit=10)
-            
-            # ساخت متن پیام
-            if not approved_receipts:
-                text = "📝 <b>هیچ رسید تایید شده‌ای وجود ندارد!</b>"
-                await callback.message.edit_text(text, parse_mode="HTML")
-                return
-            
-            text = f"✅ <b>رسیدهای تایید شده</b> ({len(approved_receipts)})\n\n"
-            text += "لطفاً روی هر رسید کلیک کنید تا جزئیات آن را مشاهده کنید."
-            
-            # نمایش کیبورد رسیدها
-            keyboard = get_receipt_list_keyboard(approved_receipts)
-            
-            await callback.message.edit_text(
-                text,
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
-            
-        except Exception as e:
-            logger.error(f"خطا در نمایش لیست رسیدهای تایید شده: {e}", exc_info=True)
-            await callback.answer("⚠️ خطا در بارگذاری لیست رسیدها", show_alert=True)
-    
-    @router.callback_query(F.data == "admin:receipt:filter:rejected")
-    async def receipt_filter_rejected(callback: CallbackQuery, session: AsyncSession) -> None:
-        """نمایش رسیدهای رد شده"""
-        try:
-            # بررسی دسترسی ادمین (مجوز مشاهده رسیدهای ردشده)
-            user_service = UserService(session)
-            user = await user_service.get_user_by_telegram_id(callback.from_user.id)
-            perm_service = AdminPermissionService(session)
-            if not user or not await perm_service.has_permission(user, "can_view_rejected_receipts"):
-                await callback.answer("⛔️ شما مجوز مشاهده لیست رسیدهای ردشده را ندارید!", show_alert=True)
-                return
-            
-            # دریافت لیست رسیدهای رد شده
-            receipt_service = ReceiptService(session)
-            rejected_receipts = await receipt_service.get_receipts_by_status(ReceiptStatus.REJECTED, limit=10)
-            
-            # ساخت متن پیام
-            if not rejected_receipts:
-                text = "📝 <b>هیچ رسید رد شده‌ای وجود ندارد!</b>"
-                await callback.message.edit_text(text, parse_mode="HTML")
-                return
-            
-            text = f"❌ <b>رسیدهای رد شده</b> ({len(rejected_receipts)})\n\n"
-            text += "لطفاً روی هر رسید کلیک کنید تا جزئیات آن را مشاهده کنید."
-            
-            # نمایش کیبورد رسیدها
-            keyboard = get_receipt_list_keyboard(rejected_receipts)
-            
-            await callback.message.edit_text(
-                text,
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
-            
-        except Exception as e:
-            logger.error(f"خطا در نمایش لیست رسیدهای رد شده: {e}", exc_info=True)
-            await callback.answer("⚠️ خطا در بارگذاری لیست رسیدها", show_alert=True)
-    
-    @router.callback_query(F.data == "admin:receipt:filter:all")
-    async def receipt_filter_all(callback: CallbackQuery, session: AsyncSession) -> None:
-        """نمایش همه رسیدها"""
-        try:
-            # بررسی دسترسی ادمین (مجوز مشاهده همه رسیدها)
-            user_service = UserService(session)
-            user = await user_service.get_user_by_telegram_id(callback.from_user.id)
-            perm_service = AdminPermissionService(session)
-            if not user or not await perm_service.has_permission(user, "can_view_all_receipts"):
-                await callback.answer("⛔️ شما مجوز مشاهده همه رسیدها را ندارید!", show_alert=True)
-                return
-            
-            # دریافت لیست همه رسیدها
-            receipt_service = ReceiptService(session)
-            all_receipts = await receipt_service.get_all_receipts(limit=10)
-            
-            # ساخت متن پیام
-            if not all_receipts:
-                text = "📝 <b>هیچ رسیدی وجود ندارد!</b>"
-                await callback.message.edit_text(text, parse_mode="HTML")
-                return
-            
-            text = f"📋 <b>همه رسیدها</b> ({len(all_receipts)})\n\n"
-            text += "لطفاً روی هر رسید کلیک کنید تا جزئیات آن را مشاهده کنید."
-            
-            # نمایش کیبورد رسیدها
-            keyboard = get_receipt_list_keyboard(all_receipts)
-            
-            await callback.message.edit_text(
-                text,
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
-            
-        except Exception as e:
-            logger.error(f"خطا در نمایش لیست همه رسیدها: {e}", exc_info=True)
-            await callback.answer("⚠️ خطا در بارگذاری لیست رسیدها", show_alert=True) 
\ No newline at end of file
+    @router.callback_query(F.data.startswith("admin:receipt:page:"))
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def receipt_page(callback: CallbackQuery, session: AsyncSession) -> None:
+        """پیمایش صفحات لیست رسیدها (admin:receipt:page:<فیلتر>:<cursor>)"""
+        parts = callback.data.split(":", 4)
+        if len(parts) != 5 or parts[3] not in RECEIPT_LIST_SCOPES:
+            await callback.answer("⚠️ صفحه نامعتبر", show_alert=True)
+            return
+        await show_receipt_page(callback, session, parts[3], parts[4])
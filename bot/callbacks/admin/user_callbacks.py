@@ -3,28 +3,36 @@
 """
 
 import logging
+from typing import Optional
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from core.services.user_service import UserService
+from db.query_budget import query_budget_for
 from bot.buttons.admin.user_buttons import get_user_list_keyboard, get_user_manage_buttons
 from bot.buttons.admin.main_buttons import get_admin_panel_keyboard
 
 logger = logging.getLogger(__name__)
 
+# بررسی دسترسی + صفحه لیست (+ شمارش) با بارگذاری رابطه‌ها در همان کوئری
+LIST_QUERY_BUDGET = 6
+
+# تعداد کاربران هر صفحه لیست
+USERS_PER_PAGE = 10
+
 def register_admin_user_callbacks(router: Router) -> None:
     """ثبت کالبک‌های مدیریت کاربران در پنل ادمین"""
     
-    @router.callback_query(F.data == "admin:users")
-    async def admin_users(callback: CallbackQuery, session: AsyncSession) -> None:
+    async def show_user_page(callback: CallbackQuery, session: AsyncSession, cursor: Optional[str] = None) -> None:
         """
-        هندلر کلیک روی دکمه مدیریت کاربران
+        نمایش یک صفحه از لیست کاربران (صفحه‌بندی keyset)
         
         Args:
             callback (CallbackQuery): کالبک تلگرام
             session (AsyncSession): نشست دیتابیس
+            cursor (str, optional): cursor صفحه درخواستی (None برای صفحه اول)
         """
         try:
             # بررسی دسترسی ادمین
@@ -35,15 +43,20 @@ def register_admin_user_callbacks(router: Router) -> None:
                 await callback.answer("⛔️ دسترسی غیرمجاز!", show_alert=True)
                 return
             
-            # دریافت لیست کاربران
-            users = await user_service.get_all_users()
+            # دریافت صفحه کاربران و تعداد کل
+            try:
+                page = await user_service.get_users_page(cursor, limit=USERS_PER_PAGE)
+            except ValueError:
+                # cursor نامعتبر یا قدیمی: بازگشت به صفحه اول
+                page = await user_service.get_users_page(None, limit=USERS_PER_PAGE)
+            total_users = await user_service.count_users()
             
             # ساخت کیبورد لیست کاربران
-            keyboard = get_user_list_keyboard(users[:10])  # نمایش 10 کاربر اول
+            keyboard = get_user_list_keyboard(page.items, page.next_cursor, page.prev_cursor)
             
             await callback.message.edit_text(
                 "👥 <b>مدیریت کاربران</b>\n\n"
-                f"🔢 تعداد کل کاربران: {len(users)}\n\n"
+                f"🔢 تعداد کل کاربران: {total_users}\n\n"
                 "لطفاً کاربر مورد نظر را انتخاب کنید:",
                 reply_markup=keyboard,
                 parse_mode="HTML"
@@ -53,7 +66,25 @@ def register_admin_user_callbacks(router: Router) -> None:
             logger.error(f"خطا در کالبک مدیریت کاربران: {e}", exc_info=True)
             await callback.answer("⚠️ خطا در اجرای درخواست", show_alert=True)
     
-    @router.callback_query(F.data.startswith("user:manage:"))
+    @router.callback_query(F.data.in_({"admin:users", "admin:user:list"}))
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def admin_users(callback: CallbackQuery, session: AsyncSession) -> None:
+        """
+        هندلر کلیک روی دکمه مدیریت کاربران
+        
+        Args:
+            callback (CallbackQuery): کالبک تلگرام
+            session (AsyncSession): نشست دیتابیس
+        """
+        await show_user_page(callback, session)
+    
+    @router.callback_query(F.data.startswith("admin:user:page:"))
+    @query_budget_for(LIST_QUERY_BUDGET)
+    async def admin_users_page(callback: CallbackQuery, session: AsyncSession) -> None:
+        """هندلر پیمایش صفحات لیست کاربران"""
+        await show_user_page(callback, session, callback.data.split(":", 3)[3])
+    
+    @router.callback_query(F.data.startswith(("user:manage:", "admin:user:manage:")))
     async def user_manage(callback: CallbackQuery, session: AsyncSession) -> None:
         """
         هندلر کلیک روی دکمه مدیریت کاربر خاص
@@ -9,16 +9,35 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.filters.command import Command
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from core.integrations.telegram_file_cache import telegram_file_cache
 from core.services.account_service import AccountService
 from core.services.client_service import ClientService
 from core.services.panel_service import PanelService
+from core.services.subscription_service import build_subscription_url
+from core.utils.qr_renderer import qr_renderer
 from db.models.client_account import ClientAccount, AccountStatus
+from db.repositories.user_repo import UserRepository
 
 # تنظیم لاگر
 logger = logging.getLogger(__name__)
 
 _session_pool: async_sessionmaker[AsyncSession] = None
 
+async def _send_subscription_qr(message: Message, account: ClientAccount, url: str) -> None:
+    """ارسال QR Code آدرس اشتراک یک اکانت (پس از اولین آپلود با file_id کش شده)"""
+    try:
+        await telegram_file_cache.send_photo(
+            message.bot,
+            message.chat.id,
+            f"qr:{qr_renderer.content_key(url)}",
+            lambda: qr_renderer.render(url),
+            filename="qr.png",
+            caption=f"QR Code اشتراک {account.client_name}",
+        )
+    except Exception as e:
+        # لیست اکانت‌ها ارسال شده است؛ شکست QR نباید آن را با پیام خطا جایگزین کند
+        logger.warning(f"Could not send subscription QR for account {account.id}: {e}")
+
 async def _display_my_accounts(target: Union[Message, CallbackQuery], session: AsyncSession):
     """منطق اصلی نمایش اشتراک‌های کاربر"""
     user_id = target.from_user.id
@@ -41,19 +60,22 @@ async def _display_my_accounts(target: Union[Message, CallbackQuery], session: A
         )
         account_service = AccountService(session, client_service, panel_service)
         
-        # دریافت اکانت‌های فعال کاربر
-        accounts: List[ClientAccount] = await account_service.get_active_accounts_by_user(user_id)
+        # دریافت اکانت‌های فعال کاربر (پنل هر اکانت در همان کوئری برای نمایش لوکیشن)
+        db_user = await UserRepository(session).get_user_by_telegram_id(user_id)
+        accounts: List[ClientAccount] = (
+            await account_service.get_active_accounts_by_user(db_user.id, profile="account_list") if db_user else []
+        )
         
         if not accounts:
             # کاربر هیچ اکانت فعالی ندارد
             accounts_text = (
-                "📊 اشتراک‌های من:\\n\\n" 
-                "شما هنوز هیچ اشتراکی فعال ندارید.\\n\\n"
+                "📊 اشتراک‌های من:\n\n" 
+                "شما هنوز هیچ اشتراکی فعال ندارید.\n\n"
                 "برای خرید اشتراک از دکمه '🛒 خرید اشتراک' استفاده کنید."
             )
         else:
             # نمایش لیست اکانت‌های فعال
-            accounts_text = "📊 اشتراک‌های من:\\n\\n"
+            accounts_text = "📊 اشتراک‌های من:\n\n"
             
             for i, account in enumerate(accounts, 1):
                 # تبدیل وضعیت به متن فارسی
@@ -70,11 +92,15 @@ async def _display_my_accounts(target: Union[Message, CallbackQuery], session: A
                 
                 # افزودن اطلاعات اکانت به متن
                 accounts_text += (
-                    f"{i}. {account.client_name} - {status_text}\\n"
-                    f"   📆 انقضاء: {account.expires_at.strftime('%Y-%m-%d')}\\n"
-                    f"   📊 ترافیک: {account.traffic_used} از {account.traffic_limit} GB ({remaining_gb} GB باقی‌مانده)\\n"
-                    f"   🔗 {account.panel.location_name or 'بدون لوکیشن'}\\n\\n"
+                    f"{i}. {account.client_name} - {status_text}\n"
+                    f"   📆 انقضاء: {account.expires_at.strftime('%Y-%m-%d')}\n"
+                    f"   📊 ترافیک: {account.traffic_used} از {account.traffic_limit} GB ({remaining_gb} GB باقی‌مانده)\n"
+                    f"   🔗 {account.panel.location_name or 'بدون لوکیشن'}\n"
                 )
+                subscription_url = build_subscription_url(account.sub_token)
+                if subscription_url:
+                    accounts_text += f"   📎 لینک اشتراک: <code>{subscription_url}</code>\n"
+                accounts_text += "\n"
             
             accounts_text += "برای دریافت کانفیگ یا تمدید، بر روی اکانت مورد نظر کلیک کنید."
         
@@ -88,6 +114,12 @@ async def _display_my_accounts(target: Union[Message, CallbackQuery], session: A
         else:
             await message.answer(accounts_text)
 
+        # QR Code آدرس اشتراک هر اکانت (فقط اگر SUBSCRIPTION_BASE_URL تنظیم شده باشد)
+        for account in accounts:
+            subscription_url = build_subscription_url(account.sub_token)
+            if subscription_url:
+                await _send_subscription_qr(message, account, subscription_url)
+
         logger.info(f"Sent my accounts list to user {user_id}")
 
     except Exception as e:
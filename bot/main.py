@@ -11,13 +11,28 @@ from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.redis import RedisStorage
 from redis.asyncio.client import Redis
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from aiogram.client.default import DefaultBotProperties
 
-from core.settings import DATABASE_URL, BOT_TOKEN, REDIS_HOST, REDIS_PORT
+from core.settings import (
+    BOT_TOKEN, REDIS_HOST, REDIS_PORT, STARTUP_SYNC_MODE, TRAFFIC_SYNC_INTERVAL_SECONDS, PANEL_LOAD_CACHE_TTL_SECONDS,
+    WARM_POOL_SIZE, WARM_POOL_REFILL_INTERVAL_SECONDS, PANEL_HANDLER_DEADLINE_SECONDS, SUBSCRIPTION_SERVER_ENABLED,
+    DB_POOL_METRICS_LOG_INTERVAL_SECONDS, QUERY_BUDGET_ENABLED, QUERY_BUDGET_DEFAULT, QUERY_BUDGET_STRICT,
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+)
+from core.integrations.circuit_breaker import CircuitState, panel_circuit_breaker
+from core.integrations.xui_session_store import panel_session_store
+from core.integrations.telegram_file_cache import telegram_file_cache
+from core.integrations.xui_transport import panel_transports
 from core.services.notification_service import NotificationService
-from core.services.panel_service import PanelService
-from bot.middlewares import AuthMiddleware, ErrorMiddleware
+from core.services.notification_dispatcher import notification_dispatcher
+from core.subscription_server import start_subscription_server
+from core.utils.qr_renderer import qr_renderer
+from core.services.panel_service import PanelService, get_failed_sync_panels
+from core.services.traffic_service import TrafficService
+from core.services.warm_pool_service import WarmPoolService
+from bot.middlewares import AuthMiddleware, ErrorMiddleware, FirstUpdateMiddleware, PanelDeadlineMiddleware, QueryBudgetMiddleware
+from bot.startup import startup_state
+from db import async_session_maker, db_pool_metrics, engine, replica_set
 from bot.features.common.handlers import router as common_router
 from bot.features.buy.handlers import router as buy_router
 from bot.features.wallet.handlers import router as wallet_router
@@ -33,18 +48,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# تنظیمات دیتابیس
-engine = create_async_engine(DATABASE_URL)
-SessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
+# تنظیمات دیتابیس: موتور و session maker مشترک (با connection pool)
+SessionLocal = async_session_maker
 
-# سرویس‌های گلوبال
-notification_service: NotificationService | None = None
+# نمونه ربات برای اطلاع‌رسانی‌های پس‌زمینه (پس از راه‌اندازی ربات تنظیم می‌شود)
+notification_bot: Bot | None = None
+
+# عنوان فارسی وظایف راه‌اندازی برای پیام شکست به ادمین‌ها
+STARTUP_TASK_TITLES = {
+    "panel_sync": "همگام‌سازی ورودی‌ها",
+}
 
 async def setup_bot() -> Bot:
     """راه‌اندازی و پیکربندی ربات"""
@@ -64,10 +77,18 @@ async def setup_dispatcher() -> Dispatcher:
     dp = Dispatcher(storage=storage)
     
     # ثبت میدلورها
+    dp.update.outer_middleware(FirstUpdateMiddleware(startup_state))
     dp.message.middleware(AuthMiddleware(SessionLocal))
     dp.callback_query.middleware(AuthMiddleware(SessionLocal))
+    if QUERY_BUDGET_ENABLED:
+        # بعد از AuthMiddleware تا نشست همان handler شمرده شود
+        dp.message.middleware(QueryBudgetMiddleware(QUERY_BUDGET_DEFAULT, QUERY_BUDGET_STRICT))
+        dp.callback_query.middleware(QueryBudgetMiddleware(QUERY_BUDGET_DEFAULT, QUERY_BUDGET_STRICT))
     dp.message.middleware(ErrorMiddleware())
     dp.callback_query.middleware(ErrorMiddleware())
+    if PANEL_HANDLER_DEADLINE_SECONDS > 0:
+        dp.message.middleware(PanelDeadlineMiddleware(PANEL_HANDLER_DEADLINE_SECONDS))
+        dp.callback_query.middleware(PanelDeadlineMiddleware(PANEL_HANDLER_DEADLINE_SECONDS))
     
     # ثبت روترهای جدید ویژگی‌ها
     dp.include_router(common_router)
@@ -81,26 +102,97 @@ async def setup_dispatcher() -> Dispatcher:
     return dp
 
 async def init_services():
-    """راه‌اندازی سرویس‌های هسته"""
-    global notification_service
-    
+    """راه‌اندازی سرویس‌های هسته (بدون کارهای شبکه‌ای سنگین)"""
+    # ثبت وضعیت مدار پنل‌ها در دیتابیس و بازگرداندن مدارهای باز پیش از ری‌استارت
+    panel_circuit_breaker.add_listener(on_panel_circuit_change)
+    try:
+        async with SessionLocal() as session:
+            await PanelService(session).restore_circuit_state()
+    except Exception as e:
+        logger.error(f"خطا در بازگرداندن وضعیت مدار پنل‌ها: {e} (Failed to restore panel circuit state: {e})", exc_info=True)
+
+async def run_initial_panel_sync() -> None:
+    """همگام‌سازی اولیه ورودی‌های پنل‌ها (در حالت background به صورت task پس‌زمینه اجرا می‌شود)"""
     async with SessionLocal() as session:
-        # راه‌اندازی سرویس نوتیفیکیشن
-        notification_service = NotificationService(session)
-        
-        # همگام‌سازی ورودی‌های پنل
         panel_service = PanelService(session)
-        try:
-            sync_results = await panel_service.sync_all_panels_inbounds()
-            logger.info(f"ورودی‌ها برای {len(sync_results)} پنل با موفقیت همگام‌سازی شدند")
-        except Exception as e:
-            logger.error(f"خطا در همگام‌سازی ورودی‌ها: {e}", exc_info=True)
-            await notification_service.notify_admins(
-                f"⚠️ خطا در همگام‌سازی ورودی‌ها:\n{str(e)}"
-            )
+        sync_results = await panel_service.sync_all_panels_inbounds()
+        await session.commit()
+    # sync_all_panels_inbounds خطا پرتاب نمی‌کند؛ پنل‌های ناموفق از روی نتایج گزارش می‌شوند
+    failed = get_failed_sync_panels(sync_results)
+    logger.info(f"ورودی‌ها برای {len(sync_results) - len(failed)} از {len(sync_results)} پنل با موفقیت همگام‌سازی شدند")
+    if failed:
+        details = "\n".join(f"• پنل {panel_id}: {messages[0] if messages else '-'}" for panel_id, messages in failed.items())
+        await notify_admins(
+            f"⚠️ خطا در {STARTUP_TASK_TITLES['panel_sync']} برای {len(failed)} از {len(sync_results)} پنل:\n{details}"
+        )
+
+async def run_traffic_ingestion() -> None:
+    """دریافت دسته‌ای مصرف ترافیک کلاینت‌ها از تمام پنل‌های فعال"""
+    async with SessionLocal() as session:
+        results = await TrafficService(session).ingest_all_panels()
+        logger.info(f"مصرف ترافیک برای {len(results)} پنل به‌روز شد")
+
+async def run_panel_load_refresh() -> None:
+    """به‌روزرسانی کش بار پنل‌ها (شمارش اکانت‌ها و CPU/RAM) برای انتخاب پنل"""
+    async with SessionLocal() as session:
+        await PanelService(session).refresh_panel_load()
+
+async def run_warm_pool_refill() -> None:
+    """پر کردن استخر گرم کلاینت‌های از پیش ساخته شده"""
+    async with SessionLocal() as session:
+        created = await WarmPoolService(session).refill_all()
+        if created:
+            logger.info(f"استخر گرم برای {len(created)} اینباند پر شد")
+
+async def log_db_pool_metrics() -> None:
+    """ثبت آمار connection pool دیتابیس در لاگ"""
+    logger.info(f"آمار pool دیتابیس: {db_pool_metrics.snapshot()}")
+
+async def on_panel_circuit_change(panel_id: int, old_state: CircuitState, new_state: CircuitState) -> None:
+    """
+    ثبت وضعیت مدار پنل در دیتابیس و اطلاع‌رسانی به ادمین‌ها.
+    status پنل (فعال/غیرفعال ادمین) تغییر نمی‌کند؛ انتخاب پنل، پنل‌های با مدار باز را کنار می‌گذارد.
+    """
+    if new_state == CircuitState.OPEN and old_state == CircuitState.CLOSED:
+        is_open, message = True, f"🔴 پنل {panel_id} از دسترس خارج شد و تا بازیابی برای اکانت جدید استفاده نمی‌شود."
+    elif new_state == CircuitState.CLOSED:
+        is_open, message = False, f"🟢 پنل {panel_id} دوباره در دسترس است."
+    else:
+        return
+    try:
+        async with SessionLocal() as session:
+            if await PanelService(session).set_panel_circuit_open(panel_id, is_open):
+                await session.commit()
+    except Exception as e:
+        logger.error(f"خطا در ثبت وضعیت مدار پنل {panel_id}: {e} (Failed to store circuit state of panel {panel_id}: {e})", exc_info=True)
+    await notify_admins(message)
+
+async def notify_admins(message: str) -> None:
+    """
+    ارسال پیام به ادمین‌ها با یک نشست کوتاه‌مدت مخصوص همین پیام؛ لاگ نوتیفیکیشن‌ها commit
+    می‌شود و هیچ اتصالی از pool برای کل عمر پروسه نگه داشته نمی‌شود.
+    """
+    if notification_bot is None:
+        return
+    try:
+        async with SessionLocal() as session:
+            service = NotificationService(session)
+            service.set_bot(notification_bot)
+            await service.notify_admins(message)
+            await session.commit()
+    except Exception as e:
+        # از listener های circuit breaker به صورت task مستقل فراخوانی می‌شود؛ خطا نباید بی‌صدا گم شود
+        logger.error(f"خطا در ارسال پیام به ادمین‌ها: {e} (Failed to notify admins: {e})", exc_info=True)
+
+async def notify_startup_failure(task_name: str, error: BaseException) -> None:
+    """اطلاع‌رسانی شکست یک وظیفه راه‌اندازی به ادمین‌ها"""
+    title = STARTUP_TASK_TITLES.get(task_name, f"وظیفه راه‌اندازی {task_name}")
+    await notify_admins(f"⚠️ خطا در {title}:\n{str(error)}")
 
 async def main():
     """نقطه ورود اصلی برای ربات"""
+    global notification_bot
+    subscription_runner = None
     try:
         logger.info("در حال اجرای ربات MoonVPN...")
         
@@ -111,23 +203,79 @@ async def main():
         bot = await setup_bot()
         dp = await setup_dispatcher()
         
-        # تنظیم نمونه ربات برای سرویس نوتیفیکیشن
-        if notification_service:
-            notification_service.set_bot(bot)
+        # تنظیم نمونه ربات برای اطلاع‌رسانی‌های پس‌زمینه
+        notification_bot = bot
+        # صف ارسال پیام‌های گروهی با نرخ محدود (مثلاً اطلاع‌رسانی تغییر لینک کانفیگ)
+        notification_dispatcher.start(bot)
+        
+        # سرور HTTP اشتراک برای برنامه‌های کاربر
+        if SUBSCRIPTION_SERVER_ENABLED:
+            subscription_runner = await start_subscription_server()
+        
+        # همگام‌سازی پنل‌ها: در حالت blocking قبل از polling، در غیر این صورت در پس‌زمینه
+        if STARTUP_SYNC_MODE == "blocking":
+            try:
+                await run_initial_panel_sync()
+            except Exception as e:
+                logger.error(f"خطا در همگام‌سازی ورودی‌ها: {e}", exc_info=True)
+                await notify_startup_failure("panel_sync", e)
+        else:
+            startup_state.spawn("panel_sync", run_initial_panel_sync, on_failure=notify_startup_failure)
+        
+        # به‌روزرسانی دوره‌ای کش بار پنل‌ها
+        if PANEL_LOAD_CACHE_TTL_SECONDS > 0:
+            startup_state.spawn_periodic("panel_load", run_panel_load_refresh, interval=PANEL_LOAD_CACHE_TTL_SECONDS)
+        
+        # پر کردن دوره‌ای استخر گرم کلاینت‌ها
+        if WARM_POOL_SIZE > 0:
+            startup_state.spawn_periodic("warm_pool", run_warm_pool_refill, interval=WARM_POOL_REFILL_INTERVAL_SECONDS)
+        
+        # دریافت دوره‌ای مصرف ترافیک کلاینت‌ها
+        if TRAFFIC_SYNC_INTERVAL_SECONDS > 0:
+            startup_state.spawn_periodic(
+                "traffic_ingestion",
+                run_traffic_ingestion,
+                interval=TRAFFIC_SYNC_INTERVAL_SECONDS,
+                initial_delay=TRAFFIC_SYNC_INTERVAL_SECONDS,
+            )
+        
+        # ثبت دوره‌ای آمار connection pool دیتابیس
+        if DB_POOL_METRICS_LOG_INTERVAL_SECONDS > 0:
+            startup_state.spawn_periodic(
+                "db_pool_metrics",
+                log_db_pool_metrics,
+                interval=DB_POOL_METRICS_LOG_INTERVAL_SECONDS,
+                initial_delay=DB_POOL_METRICS_LOG_INTERVAL_SECONDS,
+            )
+        
+        # بررسی دوره‌ای سلامت و تأخیر replica های فقط‌خواندنی
+        if replica_set:
+            startup_state.spawn_periodic("replica_health", replica_set.check, interval=REPLICA_HEALTH_CHECK_INTERVAL_SECONDS)
         
         # شروع polling
         logger.info("ربات MoonVPN آماده است!")
         await bot.delete_webhook(drop_pending_updates=True)
+        startup_state.mark_polling_started()
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
         
     except Exception as e:
         logger.critical(f"اجرای ربات با خطا مواجه شد: {e}", exc_info=True)
         raise
     finally:
+        await startup_state.shutdown()
+        await notification_dispatcher.stop()
+        if subscription_runner is not None:
+            await subscription_runner.cleanup()
+        qr_renderer.shutdown()
+        await panel_transports.aclose_all()
+        await panel_session_store.close()
+        await telegram_file_cache.close()
         if 'redis_client' in locals() and redis_client:
             await redis_client.close()
-        if notification_service:
-            await notification_service.cleanup()
+        if notification_bot is not None:
+            await notification_bot.session.close()
+        await replica_set.dispose()
+        await engine.dispose()
 
 if __name__ == "__main__":
     if not REDIS_HOST or not REDIS_PORT:
@@ -10,8 +10,14 @@ Middleware exports
 
 from .auth import AuthMiddleware
 from .error import ErrorMiddleware
+from .first_update import FirstUpdateMiddleware
+from .panel_deadline import PanelDeadlineMiddleware
+from .query_budget import QueryBudgetMiddleware
 
 __all__ = [
     "AuthMiddleware",
     "ErrorMiddleware",
+    "FirstUpdateMiddleware",
+    "PanelDeadlineMiddleware",
+    "QueryBudgetMiddleware",
 ]
@@ -0,0 +1,28 @@
+"""
+میدلور ثبت زمان دریافت اولین آپدیت (time-to-first-update) پس از راه‌اندازی ربات
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.startup import StartupState
+
+
+class FirstUpdateMiddleware(BaseMiddleware):
+    """میدلور سبک که فقط بار اول زمان رسیدن آپدیت را در وضعیت راه‌اندازی ثبت می‌کند."""
+
+    def __init__(self, state: StartupState):
+        super().__init__()
+        self.state = state
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if self.state.first_update_at is None:
+            self.state.mark_first_update()
+        return await handler(event, data)
@@ -0,0 +1,27 @@
+"""
+میدلور تعیین مهلت برای درخواست‌های پنل داخل هر handler
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from core.integrations.xui_transport import panel_deadline
+
+
+class PanelDeadlineMiddleware(BaseMiddleware):
+    """درخواست‌های پنل یک handler پس از `seconds` ثانیه به جای معطل کردن callback فوراً شکست می‌خورند."""
+
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.seconds = seconds
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with panel_deadline(self.seconds):
+            return await handler(event, data)
@@ -0,0 +1,38 @@
+"""
+میدلور شمارش کوئری‌های هر handler برای یافتن الگوهای N+1
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from db.query_budget import BUDGET_ATTRIBUTE, query_budget
+
+
+class QueryBudgetMiddleware(BaseMiddleware):
+    """
+    کوئری‌های نشست `data["session"]` را در طول هر handler می‌شمارد. بودجه اختصاصی با
+    `@query_budget_for(n)` روی handler تعیین می‌شود؛ باید بعد از AuthMiddleware ثبت شود.
+    """
+
+    def __init__(self, default_budget: int, strict: bool = False):
+        super().__init__()
+        self.default_budget = default_budget
+        self.strict = strict
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        session = data.get("session")
+        if session is None:
+            return await handler(event, data)
+
+        callback = getattr(data.get("handler"), "callback", None)
+        budget = getattr(callback, BUDGET_ATTRIBUTE, self.default_budget)
+        label = getattr(callback, "__qualname__", type(event).__name__)
+        with query_budget(session, budget, label, self.strict):
+            return await handler(event, data)
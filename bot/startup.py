@@ -0,0 +1,172 @@
+"""
+مدیریت وظایف راه‌اندازی (warm-up) ربات در پس‌زمینه و وضعیت آمادگی آن‌ها
+
+ربات بلافاصله polling را شروع می‌کند و کارهای سنگین راه‌اندازی (مثل همگام‌سازی
+پنل‌ها) به صورت taskهای تحت نظارت در پس‌زمینه اجرا می‌شوند.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupTaskState:
+    """وضعیت یک وظیفه راه‌اندازی"""
+    name: str
+    status: str = "pending"  # pending | running | done | failed
+    attempts: int = 0
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+@dataclass
+class StartupState:
+    """وضعیت راه‌اندازی پروسه ربات و وظایف پس‌زمینه آن"""
+    process_started_at: float = field(default_factory=time.monotonic)
+    polling_started_at: Optional[float] = None
+    first_update_at: Optional[float] = None
+    tasks: Dict[str, WarmupTaskState] = field(default_factory=dict)
+    _handles: Dict[str, asyncio.Task] = field(default_factory=dict, repr=False)
+
+    def mark_polling_started(self) -> None:
+        """ثبت زمان شروع polling"""
+        self.polling_started_at = time.monotonic()
+        logger.info(f"Polling پس از {self.polling_started_at - self.process_started_at:.2f} ثانیه از شروع پروسه آغاز شد. (Polling started {self.polling_started_at - self.process_started_at:.2f}s after process start.)")
+
+    def mark_first_update(self) -> bool:
+        """
+        ثبت زمان دریافت اولین آپدیت (فقط بار اول).
+
+        Returns:
+            True اگر این اولین آپدیت بوده باشد.
+        """
+        if self.first_update_at is not None:
+            return False
+        self.first_update_at = time.monotonic()
+        logger.info(f"⏱ اولین آپدیت {self.first_update_at - self.process_started_at:.2f} ثانیه پس از شروع پروسه دریافت شد. (Time-to-first-update: {self.first_update_at - self.process_started_at:.2f}s.)")
+        return True
+
+    def spawn(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[None]],
+        retries: int = 0,
+        retry_delay: float = 5.0,
+        on_failure: Optional[Callable[[str, BaseException], Awaitable[None]]] = None,
+    ) -> asyncio.Task:
+        """
+        اجرای یک وظیفه راه‌اندازی به صورت task تحت نظارت در پس‌زمینه.
+
+        Args:
+            name: نام یکتای وظیفه.
+            factory: تابعی که در هر تلاش یک coroutine تازه می‌سازد.
+            retries: تعداد تلاش‌های مجدد پس از شکست.
+            retry_delay: تأخیر پایه بین تلاش‌ها (ثانیه، به صورت نمایی افزایش می‌یابد).
+            on_failure: callback اختیاری برای اطلاع‌رسانی شکست نهایی (مثلاً به ادمین‌ها).
+
+        Returns:
+            task ایجاد شده.
+        """
+        state = WarmupTaskState(name=name)
+        self.tasks[name] = state
+        task = asyncio.create_task(
+            self._supervise(state, factory, retries, retry_delay, on_failure),
+            name=f"warmup:{name}",
+        )
+        # نگه داشتن ارجاع به task تا توسط garbage collector جمع نشود
+        self._handles[name] = task
+        return task
+
+    async def _supervise(
+        self,
+        state: WarmupTaskState,
+        factory: Callable[[], Awaitable[None]],
+        retries: int,
+        retry_delay: float,
+        on_failure: Optional[Callable[[str, BaseException], Awaitable[None]]],
+    ) -> None:
+        """اجرای وظیفه با ثبت وضعیت، تلاش مجدد و اطلاع‌رسانی خطا"""
+        state.status = "running"
+        state.started_at = time.monotonic()
+        last_error: Optional[BaseException] = None
+        for attempt in range(retries + 1):
+            state.attempts = attempt + 1
+            try:
+                await factory()
+                state.status = "done"
+                state.error = None
+                state.finished_at = time.monotonic()
+                logger.info(f"✅ وظیفه راه‌اندازی '{state.name}' در {state.finished_at - state.started_at:.2f} ثانیه کامل شد. (Warm-up task '{state.name}' finished in {state.finished_at - state.started_at:.2f}s.)")
+                return
+            except asyncio.CancelledError:
+                state.status = "failed"
+                state.error = "cancelled"
+                state.finished_at = time.monotonic()
+                raise
+            except Exception as e:
+                last_error = e
+                state.error = str(e)
+                logger.error(f"🔥 وظیفه راه‌اندازی '{state.name}' (تلاش {attempt + 1}/{retries + 1}) ناموفق بود: {e} (Warm-up task '{state.name}' attempt {attempt + 1} failed: {e})", exc_info=True)
+                if attempt < retries:
+                    await asyncio.sleep(retry_delay * (2 ** attempt))
+
+        state.status = "failed"
+        state.finished_at = time.monotonic()
+        if on_failure and last_error is not None:
+            try:
+                await on_failure(state.name, last_error)
+            except Exception as notify_err:
+                logger.error(f"خطا در اطلاع‌رسانی شکست وظیفه '{state.name}': {notify_err} (Failed to report warm-up failure for '{state.name}': {notify_err})")
+
+    def spawn_periodic(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[None]],
+        interval: float,
+        initial_delay: float = 0.0,
+    ) -> asyncio.Task:
+        """
+        اجرای دوره‌ای یک وظیفه پس‌زمینه تا زمان خاموش شدن ربات.
+        این وظایف در tasks ثبت نمی‌شوند و شکست هر دور فقط لاگ می‌شود.
+
+        Args:
+            name: نام یکتای وظیفه.
+            factory: تابعی که در هر دور یک coroutine تازه می‌سازد.
+            interval: فاصله بین دورها (ثانیه).
+            initial_delay: تأخیر قبل از اولین اجرا (ثانیه).
+
+        Returns:
+            task ایجاد شده.
+        """
+        async def _loop() -> None:
+            await asyncio.sleep(initial_delay)
+            while True:
+                try:
+                    await factory()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"🔥 وظیفه دوره‌ای '{name}' ناموفق بود: {e} (Periodic task '{name}' failed: {e})", exc_info=True)
+                await asyncio.sleep(interval)
+
+        task = asyncio.create_task(_loop(), name=f"periodic:{name}")
+        self._handles[name] = task
+        return task
+
+    async def shutdown(self) -> None:
+        """لغو وظایف در حال اجرا هنگام خاموش شدن ربات"""
+        pending = [task for task in self._handles.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+# وضعیت سراسری راه‌اندازی پروسه ربات
+startup_state = StartupState()
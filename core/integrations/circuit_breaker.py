@@ -0,0 +1,236 @@
+"""
+Circuit breaker و امتیاز سلامت به ازای هر پنل
+
+وقتی یک پنل از دسترس خارج است، به جای اینکه هر درخواست کاربر منتظر timeout کامل
+httpx بماند، پس از چند خطای پشت سر هم مدار باز می‌شود و درخواست‌ها فوراً رد می‌شوند.
+پس از مدت `PANEL_CIRCUIT_RESET_SECONDS` فقط یک درخواست آزمایشی (half-open) اجازه
+عبور دارد. امتیاز سلامت (تأخیر و نرخ خطا در پنجره غلتان) بدون هیچ I/O قابل خواندن است.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from core.integrations.xui_client import XuiConnectionError, is_panel_rejection
+from core.settings import PANEL_CIRCUIT_FAILURE_THRESHOLD, PANEL_CIRCUIT_RESET_SECONDS, PANEL_HEALTH_WINDOW
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"  # عادی
+    OPEN = "open"  # پنل خراب؛ درخواست‌ها فوراً رد می‌شوند
+    HALF_OPEN = "half_open"  # یک درخواست آزمایشی در جریان است
+
+
+class CircuitOpenError(XuiConnectionError):
+    """Raised without any network I/O while a panel's circuit is open."""
+    pass
+
+
+# تأخیری که امتیاز سلامت تأخیر را به نصف می‌رساند (ثانیه)
+_LATENCY_HALF_SCORE_SECONDS = 2.0
+
+T = TypeVar("T")
+
+StateListener = Callable[[int, CircuitState, CircuitState], Awaitable[None]]
+
+
+@dataclass
+class PanelHealth:
+    """وضعیت مدار و آمار غلتان یک پنل"""
+    panel_id: int
+    state: CircuitState = CircuitState.CLOSED
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    probe_in_flight: bool = False
+    samples: Deque[Tuple[bool, float]] = field(default_factory=lambda: deque(maxlen=PANEL_HEALTH_WINDOW))
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    @property
+    def avg_latency(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(latency for _, latency in self.samples) / len(self.samples)
+
+    @property
+    def score(self) -> float:
+        """امتیاز سلامت بین 0 (خراب) و 1 (کاملاً سالم)"""
+        if self.state == CircuitState.OPEN:
+            return 0.0
+        latency_factor = _LATENCY_HALF_SCORE_SECONDS / (_LATENCY_HALF_SCORE_SECONDS + self.avg_latency)
+        return (1.0 - self.error_rate) * latency_factor
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate, 3),
+            "avg_latency": round(self.avg_latency, 3),
+            "score": round(self.score, 3),
+        }
+
+
+class PanelCircuitBreaker:
+    """نگهداری مدار و سلامت تمام پنل‌ها در سطح پروسه"""
+
+    def __init__(
+        self,
+        failure_threshold: int = PANEL_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = PANEL_CIRCUIT_RESET_SECONDS,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._health: Dict[int, PanelHealth] = {}
+        self._listeners: List[StateListener] = []
+        self._pending: set = set()
+
+    def health(self, panel_id: int) -> PanelHealth:
+        """دریافت وضعیت سلامت پنل (بدون I/O)"""
+        entry = self._health.get(panel_id)
+        if entry is None:
+            entry = self._health[panel_id] = PanelHealth(panel_id=panel_id)
+        return entry
+
+    def is_open(self, panel_id: int) -> bool:
+        entry = self._health.get(panel_id)
+        return entry is not None and entry.state == CircuitState.OPEN
+
+    def open_panel_ids(self) -> List[int]:
+        """شناسه پنل‌هایی که مدارشان باز یا نیمه‌باز است (برای probe بازیابی)"""
+        return [panel_id for panel_id, entry in self._health.items() if entry.state != CircuitState.CLOSED]
+
+    def add_listener(self, listener: StateListener) -> None:
+        """ثبت callback برای تغییر وضعیت مدار (panel_id, old_state, new_state)"""
+        self._listeners.append(listener)
+
+    def raise_if_open(self, panel_id: int) -> None:
+        """
+        رد فوری درخواست اگر مدار باز است و زمان probe مجدد نرسیده (بدون مصرف probe نیمه‌باز).
+
+        Raises:
+            CircuitOpenError: اگر مدار باز باشد.
+        """
+        entry = self._health.get(panel_id)
+        if entry is not None and entry.state == CircuitState.OPEN and time.monotonic() - entry.opened_at < self.reset_timeout:
+            raise CircuitOpenError(f"پنل {panel_id} موقتاً در دسترس نیست (circuit open).")
+
+    def before_call(self, panel_id: int) -> None:
+        """
+        بررسی اجازه فراخوانی پنل قبل از هر درخواست شبکه.
+
+        Raises:
+            CircuitOpenError: اگر مدار باز باشد یا probe نیمه‌باز در جریان باشد.
+        """
+        entry = self.health(panel_id)
+        if entry.state == CircuitState.CLOSED:
+            return
+        if entry.state == CircuitState.OPEN:
+            if time.monotonic() - entry.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"پنل {panel_id} موقتاً در دسترس نیست (circuit open).")
+            self._transition(entry, CircuitState.HALF_OPEN)
+        if entry.probe_in_flight:
+            raise CircuitOpenError(f"پنل {panel_id} در حال بررسی مجدد است (circuit half-open).")
+        entry.probe_in_flight = True
+
+    def record_success(self, panel_id: int, latency: float) -> None:
+        entry = self.health(panel_id)
+        entry.samples.append((True, latency))
+        entry.consecutive_failures = 0
+        entry.probe_in_flight = False
+        if entry.state != CircuitState.CLOSED:
+            self._transition(entry, CircuitState.CLOSED)
+
+    def record_failure(self, panel_id: int, latency: float) -> None:
+        entry = self.health(panel_id)
+        entry.samples.append((False, latency))
+        entry.consecutive_failures += 1
+        entry.probe_in_flight = False
+        if entry.state == CircuitState.HALF_OPEN or (
+            entry.state == CircuitState.CLOSED and entry.consecutive_failures >= self.failure_threshold
+        ):
+            entry.opened_at = time.monotonic()
+            self._transition(entry, CircuitState.OPEN)
+
+    async def call(
+        self,
+        panel_id: int,
+        factory: Callable[[], Awaitable[T]],
+        failed: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        """
+        اجرای یک فراخوانی شبکه پنل تحت نظارت مدار و ثبت تأخیر/نتیجه آن.
+        رد صریح درخواست توسط پنل (success=false) یعنی پنل پاسخ داده و شکست مدار حساب نمی‌شود.
+
+        Args:
+            panel_id: شناسه پنل.
+            factory: تابع اجرای درخواست.
+            failed: تشخیص شکست از روی نتیجه، برای متدهایی که خطا را در نتیجه برمی‌گردانند
+                (مثلاً نتیجه هر کلاینت در `create_clients`).
+
+        Raises:
+            CircuitOpenError: اگر مدار باز باشد (بدون ارسال درخواست).
+        """
+        self.before_call(panel_id)
+        started = time.monotonic()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self.health(panel_id).probe_in_flight = False
+            raise
+        except Exception as e:
+            if is_panel_rejection(e):
+                self.record_success(panel_id, time.monotonic() - started)
+            else:
+                self.record_failure(panel_id, time.monotonic() - started)
+            raise
+        if failed is not None and failed(result):
+            self.record_failure(panel_id, time.monotonic() - started)
+        else:
+            self.record_success(panel_id, time.monotonic() - started)
+        return result
+
+    def _transition(self, entry: PanelHealth, new_state: CircuitState) -> None:
+        old_state = entry.state
+        if old_state == new_state:
+            return
+        entry.state = new_state
+        logger.warning(f"وضعیت مدار پنل {entry.panel_id}: {old_state.value} → {new_state.value} (Circuit of panel {entry.panel_id}: {old_state.value} -> {new_state.value})")
+        for listener in self._listeners:
+            try:
+                task = asyncio.get_running_loop().create_task(listener(entry.panel_id, old_state, new_state))
+            except RuntimeError:
+                continue
+            # نگه داشتن ارجاع به task تا توسط garbage collector جمع نشود
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def restore_open(self, panel_id: int) -> None:
+        """
+        بازگرداندن مدار باز ثبت شده در دیتابیس پس از ری‌استارت (بدون فراخوانی listenerها).
+        زمان reset گذشته در نظر گرفته می‌شود تا اولین درخواست یا probe، پنل را دوباره بررسی کند.
+        """
+        entry = self.health(panel_id)
+        if entry.state == CircuitState.CLOSED:
+            entry.state = CircuitState.OPEN
+            entry.opened_at = time.monotonic() - self.reset_timeout
+
+    def reset(self, panel_id: Optional[int] = None) -> None:
+        """پاک کردن وضعیت یک پنل (یا همه پنل‌ها)"""
+        if panel_id is None:
+            self._health.clear()
+        else:
+            self._health.pop(panel_id, None)
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+panel_circuit_breaker = PanelCircuitBreaker()
@@ -0,0 +1,86 @@
+"""
+ادغام درخواست‌های خواندنی هم‌زمان و یکسان به پنل‌ها (single-flight)
+
+وقتی چند کاربر هم‌زمان یک درخواست خواندنی یکسان (مثلاً لیست inboundها یا وضعیت سرور)
+به یک پنل می‌فرستند، فقط یک درخواست واقعی ارسال می‌شود و بقیه منتظر همان نتیجه
+می‌مانند. با TTL کوتاه اختیاری، نتیجه تا چند ثانیه برای درخواست‌های بعدی هم استفاده
+می‌شود؛ بنابراین بار هر پنل به یک درخواست برای هر کلید در هر بازه محدود است.
+
+نتیجه بین تمام فراخواننده‌ها مشترک است و نباید تغییر داده شود.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from core.settings import XUI_READ_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """اشتراک یک future در حال اجرا (و در صورت نیاز نتیجه آن) بین درخواست‌های یکسان"""
+
+    def __init__(self, ttl: float = XUI_READ_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def do(self, key: Tuple[str, ...], factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        اجرای `factory` برای کلید داده شده، یا پیوستن به اجرای در حال انجام همان کلید.
+
+        Args:
+            key: کلید درخواست؛ عضو اول آن آدرس پنل است (برای باطل کردن دسته‌ای).
+            factory: تابعی که درخواست واقعی را اجرا می‌کند.
+
+        Returns:
+            نتیجه مشترک درخواست. خطاها به تمام منتظرها منتقل و کش نمی‌شوند.
+        """
+        cached = self._results.get(key)
+        if cached is not None:
+            stored_at, value = cached
+            if time.monotonic() - stored_at < self.ttl:
+                return value
+            self._results.pop(key, None)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._run(key, factory))
+            self._in_flight[key] = task
+        else:
+            logger.debug(f"Coalesced panel read {key}")
+        # لغو شدن یک فراخواننده نباید درخواست مشترک بقیه را لغو کند
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Tuple[str, ...], factory: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await factory()
+            if self.ttl > 0 and self._in_flight.get(key) is asyncio.current_task():
+                self._results[key] = (time.monotonic(), value)
+            return value
+        finally:
+            if self._in_flight.get(key) is asyncio.current_task():
+                self._in_flight.pop(key, None)
+
+    def forget(self, key: Tuple[str, ...]) -> None:
+        """حذف نتیجه کش شده یک کلید تا فراخوانی بعدی حتماً از پنل خوانده شود"""
+        self._results.pop(key, None)
+
+    def invalidate(self, host: str) -> None:
+        """
+        حذف نتایج کش شده و جدا کردن درخواست‌های در جریان یک پنل (پس از عملیات نوشتن)،
+        تا خواندن‌های بعدی وضعیت جدید پنل را ببینند.
+        """
+        for store in (self._results, self._in_flight):
+            for key in [k for k in store if k[0] == host]:
+                store.pop(key, None)
+
+    def clear(self) -> None:
+        self._results.clear()
+        self._in_flight.clear()
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+panel_read_coalescer = SingleFlight()
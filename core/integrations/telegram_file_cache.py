@@ -0,0 +1,120 @@
+"""
+کش file_id تلگرام برای رسانه‌های تکراری (مثل QR Code لینک اشتراک)
+
+پس از اولین آپلود یک محتوا، `file_id` برگردانده شده توسط تلگرام به ازای هش محتوا در Redis
+(و یک LRU درون پروسه) ذخیره می‌شود و ارسال‌های بعدی فقط با `file_id` و بدون آپلود انجام
+می‌شوند. file_id مختص هر ربات است، بنابراین شناسه ربات جزء کلید است. خطاهای Redis
+فقط باعث آپلود دوباره می‌شوند و هرگز ارسال را متوقف نمی‌کنند.
+"""
+
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, Message
+from cachetools import LRUCache
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from core.settings import REDIS_HOST, REDIS_PORT, TELEGRAM_FILE_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "moonvpn:tg_file:"
+
+
+def _cache_key(bot_id: int, content_key: str) -> str:
+    return f"{_KEY_PREFIX}{bot_id}:{hashlib.sha256(content_key.encode('utf-8')).hexdigest()}"
+
+
+class TelegramFileCache:
+    """نگهداری نگاشت هش محتوا به file_id تلگرام در Redis (با اتصال تنبل و fail-soft)"""
+
+    def __init__(self, ttl: int = TELEGRAM_FILE_CACHE_TTL_SECONDS, local_size: int = 4096):
+        self.ttl = ttl
+        self._local: LRUCache = LRUCache(maxsize=local_size)
+        self._redis: Optional[Redis] = None
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, socket_timeout=2, socket_connect_timeout=2)
+        return self._redis
+
+    async def get(self, bot_id: int, content_key: str) -> Optional[str]:
+        key = _cache_key(bot_id, content_key)
+        file_id = self._local.get(key)
+        if file_id is not None:
+            return file_id
+        try:
+            value = await self.redis.get(key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"خواندن file_id از Redis ناموفق بود: {e} (Failed to load Telegram file_id from Redis: {e})")
+            return None
+        if value is None:
+            return None
+        file_id = value.decode("utf-8") if isinstance(value, bytes) else value
+        self._local[key] = file_id
+        return file_id
+
+    async def set(self, bot_id: int, content_key: str, file_id: str) -> None:
+        key = _cache_key(bot_id, content_key)
+        self._local[key] = file_id
+        try:
+            await self.redis.set(key, file_id, ex=self.ttl if self.ttl > 0 else None)
+        except (RedisError, OSError) as e:
+            logger.warning(f"ذخیره file_id در Redis ناموفق بود: {e} (Failed to store Telegram file_id in Redis: {e})")
+
+    async def delete(self, bot_id: int, content_key: str) -> None:
+        key = _cache_key(bot_id, content_key)
+        self._local.pop(key, None)
+        try:
+            await self.redis.delete(key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"حذف file_id از Redis ناموفق بود: {e} (Failed to delete Telegram file_id from Redis: {e})")
+
+    async def send_photo(
+        self,
+        bot: Bot,
+        chat_id: int,
+        content_key: str,
+        loader: Callable[[], Awaitable[bytes]],
+        filename: str = "image.png",
+        **kwargs: Any,
+    ) -> Message:
+        """
+        ارسال تصویر با file_id کش شده؛ در نبود آن (یا نامعتبر بودنش) محتوا آپلود و file_id ذخیره می‌شود.
+
+        Args:
+            bot: نمونه ربات.
+            chat_id: شناسه چت مقصد.
+            content_key: کلید یکتای محتوا (مثلاً هش لینک QR یا هش فایل).
+            loader: تابعی که bytes تصویر را فقط در صورت نیاز به آپلود برمی‌گرداند.
+            filename: نام فایل آپلودی.
+            **kwargs: پارامترهای اضافه `send_photo` (caption، reply_markup، ...).
+        """
+        file_id = await self.get(bot.id, content_key)
+        if file_id:
+            try:
+                return await bot.send_photo(chat_id, file_id, **kwargs)
+            except TelegramBadRequest as e:
+                # file_id منقضی یا نامعتبر است: حذف و آپلود دوباره
+                logger.info(f"file_id کش شده رد شد، آپلود دوباره: {e} (Cached file_id rejected, re-uploading: {e})")
+                await self.delete(bot.id, content_key)
+
+        message = await bot.send_photo(chat_id, BufferedInputFile(await loader(), filename=filename), **kwargs)
+        if message.photo:
+            # بزرگ‌ترین اندازه همان تصویر اصلی است
+            await self.set(bot.id, content_key, message.photo[-1].file_id)
+        return message
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+telegram_file_cache = TelegramFileCache()
@@ -9,6 +9,7 @@ import httpx # Import httpx exceptions
 # Using the vendored SDK with full path for the core API class
 from core.integrations.xui_sdk.py3xui.py3xui import AsyncApi
 # Removed import of non-existent SDK exceptions
+from core.integrations.xui_transport import panel_transports
 
 # Import custom exceptions (These we define and raise ourselves)
 from .exceptions import (
@@ -47,6 +48,8 @@ class BaseApi:
             username=self.username,
             password=self.password
         )
+        # Shared keep-alive transport with timeouts, retry budget and deadlines
+        panel_transports.install(self.api, self.host)
         logger.debug(f"Internal AsyncApi initialized for {self.host}")
 
     async def login(self) -> None:
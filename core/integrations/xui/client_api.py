@@ -10,6 +10,7 @@ import httpx # Import httpx exceptions
 # Import base and custom exceptions
 from .base import BaseApi
 from .exceptions import XuiOperationError, XuiNotFoundError, XuiValidationError, XuiConnectionError
+from core.integrations.xui_snapshot import panel_snapshot_cache
 
 # Using the vendored SDK with full path for Pydantic models etc.
 from core.integrations.xui_sdk.py3xui.py3xui.client import (
@@ -78,16 +79,16 @@ class ClientApi(BaseApi):
         """Fetches clients for an inbound using SDK, handles httpx errors."""
         logger.info(f"Attempting to get clients for inbound {inbound_id} on {self.host}")
         try:
-            # Assuming SDK has get_list() and we filter manually
-            all_clients_sdk: List[SdkClient] = await self.api.client.get_list() 
-            # Careful with attribute names, check SdkClient model definition if possible
-            clients_sdk = [c for c in all_clients_sdk if getattr(c, 'inboundId', None) == inbound_id] # Use inboundId ?
-            
-            logger.info(f"Successfully fetched {len(clients_sdk)} clients for inbound {inbound_id} via SDK.")
-            return [_map_sdk_client_to_dict(c) for c in clients_sdk]
+            # Served from the shared panel snapshot (one inbound list call per TTL) instead of
+            # downloading every client of the panel and filtering here.
+            snapshot = await panel_snapshot_cache.get(self.host, self.api.inbound.get_list)
+            clients = list(snapshot.clients_by_inbound.get(inbound_id, []))
+
+            logger.info(f"Successfully fetched {len(clients)} clients for inbound {inbound_id} from panel snapshot.")
+            return clients
             
         except AttributeError as e:
-             logger.error(f"SDK method get_list or attribute error accessing client data on {self.host}: {e}", exc_info=True)
+             logger.error(f"SDK method get_list or attribute error accessing inbound data on {self.host}: {e}", exc_info=True)
              raise XuiOperationError(f"SDK method/attribute missing for getting client list: {e}") from e
         except httpx.HTTPStatusError as e:
              # 404 for inbound not found? Or just empty list? Assume empty list is success.
@@ -166,6 +167,7 @@ class ClientApi(BaseApi):
             sdk_client_to_add = _map_kwargs_to_sdk_client(**kwargs)
             # Assuming SDK add returns the created client
             created_sdk_client: SdkClient = await self.api.client.add(inbound_id=inbound_id, client=sdk_client_to_add)
+            panel_snapshot_cache.invalidate(self.host)
             logger.info(f"Successfully added client (UUID: {created_sdk_client.id}) to inbound {inbound_id} via SDK.")
             return _map_sdk_client_to_dict(created_sdk_client)
             
@@ -197,6 +199,7 @@ class ClientApi(BaseApi):
             
             # Assuming SDK update returns the updated client
             updated_sdk_client: SdkClient = await self.api.client.update(client_uuid, sdk_client_to_update)
+            panel_snapshot_cache.invalidate(self.host)
             logger.info(f"Successfully updated client {client_uuid} via SDK.")
             return _map_sdk_client_to_dict(updated_sdk_client)
 
@@ -224,6 +227,7 @@ class ClientApi(BaseApi):
         logger.info(f"Attempting to delete client {client_uuid} on {self.host}")
         try:
             await self.api.client.delete(client_uuid)
+            panel_snapshot_cache.invalidate(self.host)
             logger.info(f"Successfully deleted client {client_uuid} via SDK.")
             return True
         except AttributeError as e:
@@ -249,6 +253,7 @@ class ClientApi(BaseApi):
         logger.info(f"Attempting to reset traffic for client {client_uuid} on {self.host}")
         try:
             await self.api.client.reset_traffic(client_uuid)
+            panel_snapshot_cache.invalidate(self.host)
             logger.info(f"Successfully reset traffic for client {client_uuid} via SDK.")
             return True 
         except AttributeError as e:
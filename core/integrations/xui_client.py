@@ -2,6 +2,7 @@
 کلاس کلاینت برای ارتباط با پنل‌های 3x-ui بر پایه AsyncApi
 """
 
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
@@ -14,10 +15,55 @@ from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 import uuid
 
 # استفاده از کلاس AsyncApi از کتابخانه py3xui
-from py3xui import AsyncApi
+from py3xui import AsyncApi, Client
+
+from core.integrations.single_flight import panel_read_coalescer
+from core.integrations.xui_snapshot import PanelSnapshot, panel_snapshot_cache
+from core.integrations.xui_session_store import PanelSession, panel_session_store
+from core.integrations.xui_transport import panel_transports
+from core.settings import XUI_CLIENT_BATCH_SIZE
+from core.utils.config_generator import get_config_template
 
 logger = logging.getLogger(__name__)
 
+
+# نگاشت کلیدهای داده کلاینت (snake_case یا camelCase) به نام فیلدهای API پنل
+_PANEL_CLIENT_FIELDS = {
+    "id": "id", "email": "email", "enable": "enable", "flow": "flow", "password": "password",
+    "expiry_time": "expiryTime", "expiryTime": "expiryTime",
+    "limit_ip": "limitIp", "limitIp": "limitIp",
+    "sub_id": "subId", "subId": "subId",
+    "tg_id": "tgId", "tgId": "tgId", "telegram_id": "tgId",
+    "totalGB": "totalGB",
+}
+
+
+def _to_panel_client(client_data: Dict[str, Any]) -> Client:
+    """
+    تبدیل داده کلاینت به مدل Client کتابخانه py3xui برای addClient.
+    `total_gb` بر حسب گیگابایت است و به بایت (فیلد totalGB پنل) تبدیل می‌شود.
+    """
+    fields = {alias: client_data[key] for key, alias in _PANEL_CLIENT_FIELDS.items() if key in client_data}
+    if client_data.get("total_gb") is not None and "totalGB" not in fields:
+        fields["totalGB"] = int(client_data["total_gb"]) * 1024 ** 3
+    fields.setdefault("enable", True)
+    fields["id"] = str(fields["id"])
+    return Client.model_validate(fields)
+
+def is_panel_rejection(error: Exception) -> bool:
+    """
+    آیا پنل درخواست را صریحاً رد کرده است (پاسخ success=false که py3xui آن را ValueError می‌کند)
+    یا داده کلاینت نامعتبر بوده است؛ در این حالت هیچ چیز در پنل اعمال نشده است.
+    خطاهای انتقال (timeout، قطع اتصال، پاسخ غیر JSON یا HTTP 5xx) مبهم هستند: ممکن است پنل
+    درخواست را اعمال کرده باشد.
+    """
+    return isinstance(error, ValueError) and not isinstance(error, JSONDecodeError)
+
+
+def batch_transport_failed(results: Dict[str, Optional[Exception]]) -> bool:
+    """آیا نتیجه `create_clients` شامل خطای انتقال است (برای ثبت شکست پنل در circuit breaker)"""
+    return any(error is not None and not is_panel_rejection(error) for error in results.values())
+
 # Add specific exceptions
 class XuiAuthenticationError(Exception):
     """Raised when login fails due to authentication issues."""
@@ -55,9 +101,62 @@ class XuiClient:
         
         # ایجاد نمونه AsyncApi
         self.api = AsyncApi(self.host, self.username, self.password, self.token)
+        # استفاده از transport مشترک پنل (keep-alive، timeout، بودجه تکرار و مهلت handler)
+        # و لاگین مجدد خودکار وقتی پنل کوکی سشن را رد کند
+        panel_transports.install(self.api, self.host, on_session_rejected=self.reauthenticate)
+        self._reauth_lock = asyncio.Lock()
         logger.info(f"XuiClient initialized for panel at {self.host}")
     
-    async def login(self) -> bool:
+    async def login(self, force: bool = False) -> bool:
+        """
+        ورود به پنل؛ در صورت وجود، کوکی سشن ذخیره شده در Redis بدون درخواست شبکه استفاده می‌شود.
+
+        Args:
+            force: نادیده گرفتن کوکی ذخیره شده و احراز هویت واقعی با پنل.
+
+        Returns:
+            True در صورت موفقیت
+        """
+        if not force and await self.restore_session():
+            return True
+        result = await self._authenticate()
+        if self.api.session and self.api.cookie_name:
+            await panel_session_store.save(
+                self.host,
+                self.username,
+                PanelSession(self.api.cookie_name, self.api.session, self.api.csrf_token),
+            )
+        return result
+
+    async def restore_session(self) -> bool:
+        """
+        بازیابی سشن ذخیره شده در Redis (نام و مقدار کوکی و توکن CSRF) بدون هیچ درخواست شبکه به پنل.
+
+        Returns:
+            True اگر سشن ذخیره شده‌ای وجود داشت و جایگزین شد.
+        """
+        stored = await panel_session_store.load(self.host, self.username)
+        if stored is None:
+            return False
+        self.api.cookie_name = stored.cookie_name
+        self.api.session = stored.value
+        self.api.csrf_token = stored.csrf_token
+        logger.debug(f"Restored stored session cookie for panel {self.host}")
+        return True
+
+    async def reauthenticate(self, rejected_session: Optional[str] = None) -> None:
+        """
+        لاگین مجدد پس از رد شدن کوکی سشن توسط پنل (فراخوانی شده توسط transport).
+        درخواست‌های هم‌زمانی که همان کوکی را رد شده دیده‌اند فقط یک بار لاگین می‌کنند.
+        """
+        async with self._reauth_lock:
+            if self.api.session and self.api.session != rejected_session:
+                return
+            logger.info(f"Session cookie rejected by panel {self.host}, logging in again")
+            await panel_session_store.delete(self.host, self.username, rejected_session)
+            await self.login(force=True)
+
+    async def _authenticate(self) -> bool:
         """
         احراز هویت و ورود به پنل
         
@@ -146,7 +245,7 @@ class XuiClient:
         """
         logger.debug(f"Checking status for panel {self.host} by attempting login.")
         # Re-uses the login logic including exception handling
-        return await self.login()
+        return await self.login(force=True)
     
     async def logout(self) -> bool:
         """
@@ -188,7 +287,7 @@ class XuiClient:
         logger.info(f"Attempting to get all clients from panel {self.host}")
         try:
             # استفاده از متد get_list از py3xui.async_api.client
-            clients = await self.api.client.get_list()
+            clients = await self._read("client.get_list")
             if clients is None:
                 logger.warning(f"Received None when getting all clients from panel {self.host}. Assuming empty list.")
                 return []
@@ -216,8 +315,7 @@ class XuiClient:
 
     async def create_client(self, inbound_id: int, client_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        ایجاد کلاینت جدید در یک inbound خاص (متد موقت).
-        این پیاده‌سازی فقط داده‌های دریافتی را لاگ می‌کند و یک پاسخ موفق شبیه‌سازی شده برمی‌گرداند.
+        ایجاد کلاینت جدید در یک inbound خاص (همان مسیر دسته‌ای با یک کلاینت).
 
         Args:
             inbound_id: شناسه inbound
@@ -225,21 +323,77 @@ class XuiClient:
 
         Returns:
             اطلاعات کلاینت ایجاد شده به صورت دیکشنری با فرمت {"success": True, "obj": client_uuid}
+
+        Raises:
+            Exception: خطای پنل در صورت شکست ایجاد کلاینت.
         """
-        logger.info(f"[TEMPORARY] Creating client in inbound {inbound_id} with data: {client_data}")
-        
-        # استخراج UUID کلاینت از داده‌های ورودی یا ایجاد یک UUID جدید اگر وجود نداشت
-        client_uuid = client_data.get("id", str(uuid.uuid4()))
-        
-        # بازگرداندن پاسخ موفق شبیه‌سازی شده
-        logger.info(f"[TEMPORARY] Successfully 'created' client with UUID: {client_uuid} (No actual API call was made)")
-        
-        # ساختار پاسخ باید با آنچه ClientService انتظار دارد مطابقت داشته باشد
-        return {
-            "success": True,
-            "msg": "Client created successfully (temporary implementation)",
-            "obj": client_uuid
-        }
+        client_data = {**client_data, "id": client_data.get("id") or str(uuid.uuid4())}
+        results = await self.create_clients(inbound_id, [client_data], isolate_failures=False)
+        client_uuid, error = next(iter(results.items()))
+        if error is not None:
+            raise error
+        return {"success": True, "msg": "Client created successfully", "obj": client_uuid}
+
+    async def create_clients(
+        self,
+        inbound_id: int,
+        clients_data: List[Dict[str, Any]],
+        chunk_size: int = XUI_CLIENT_BATCH_SIZE,
+        isolate_failures: bool = True,
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        ایجاد چند کلاینت در یک inbound با یک درخواست addClient برای هر دسته (settings.clients).
+
+        پنل هر دسته را به صورت همه یا هیچ اعمال می‌کند؛ اگر پنل دسته‌ای را صریحاً رد کند
+        (success=false) و `isolate_failures` فعال باشد، کلاینت‌های همان دسته تک به تک ارسال می‌شوند
+        تا فقط کلاینت‌های مشکل‌دار شکست بخورند. خطای انتقال (timeout یا قطع اتصال) کل دسته را
+        ناموفق می‌کند، چون ممکن است پنل دسته را اعمال کرده باشد و ارسال مجدد فقط خطای ایمیل تکراری
+        می‌دهد؛ در این حالت دسته‌های بعدی هم ارسال نمی‌شوند.
+
+        Args:
+            inbound_id: شناسه inbound در پنل.
+            clients_data: لیست داده‌های کلاینت (هر کدام باید `id` داشته باشد).
+            chunk_size: حداکثر تعداد کلاینت در هر درخواست.
+            isolate_failures: ارسال تک به تک کلاینت‌های دسته رد شده.
+
+        Returns:
+            Dict[str, Optional[Exception]]: نتیجه هر UUID (None = ساخته شد، در غیر این صورت خطا).
+        """
+        results: Dict[str, Optional[Exception]] = {}
+        chunk_size = max(1, chunk_size)
+        transport_error: Optional[Exception] = None
+        for start in range(0, len(clients_data), chunk_size):
+            chunk = clients_data[start:start + chunk_size]
+            if transport_error is not None:
+                # پنل در دسترس نیست: دسته‌های باقی‌مانده بدون درخواست اضافه ناموفق می‌شوند
+                results.update({str(data["id"]): transport_error for data in chunk})
+                continue
+            try:
+                await self.api.client.add(inbound_id, [_to_panel_client(data) for data in chunk])
+                results.update({str(data["id"]): None for data in chunk})
+                logger.info(f"Successfully created {len(chunk)} clients in inbound {inbound_id} on panel {self.host}")
+            except Exception as e:
+                logger.error(f"Failed to create {len(chunk)} clients in inbound {inbound_id} on panel {self.host}: {e}")
+                if not is_panel_rejection(e):
+                    transport_error = e
+                if transport_error is not None or not isolate_failures or len(chunk) == 1:
+                    results.update({str(data["id"]): e for data in chunk})
+                    continue
+                for data in chunk:
+                    if transport_error is not None:
+                        results[str(data["id"])] = transport_error
+                        continue
+                    try:
+                        await self.api.client.add(inbound_id, [_to_panel_client(data)])
+                        results[str(data["id"])] = None
+                    except Exception as single_err:
+                        logger.error(f"Failed to create client {data['id']} in inbound {inbound_id} on panel {self.host}: {single_err}")
+                        results[str(data["id"])] = single_err
+                        if not is_panel_rejection(single_err):
+                            transport_error = single_err
+            finally:
+                self.invalidate_snapshot()
+        return results
 
     async def get_client_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """
@@ -252,7 +406,7 @@ class XuiClient:
             اطلاعات کلاینت یا None اگر پیدا نشد
         """
         try:
-            result = await self.api.client.get_by_email(email)
+            result = await self._read("client.get_by_email", email)
             if result:
                 logger.info(f"Successfully retrieved client with email {email}")
                  # تبدیل به dict اگر آبجکت بود
@@ -279,7 +433,7 @@ class XuiClient:
             اطلاعات کلاینت
         """
         try:
-            result = await self.api.client.get(uuid)
+            result = await self._read("client.get", uuid)
             if result:
                 logger.info(f"Successfully retrieved client with UUID {uuid}")
             else:
@@ -302,25 +456,30 @@ class XuiClient:
         """
         try:
             result = await self.api.client.delete(uuid)
+            self.invalidate_snapshot()
             logger.info(f"Successfully deleted client with UUID {uuid}")
             return result
         except Exception as e:
             logger.error(f"Failed to delete client with UUID {uuid}: {e}")
             raise
     
-    async def update_client(self, uuid: str, client_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_client(self, uuid: str, inbound_id: int, client_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        به‌روزرسانی اطلاعات یک کلاینت
+        به‌روزرسانی اطلاعات یک کلاینت (جایگزینی کامل فیلدهای کلاینت در پنل)
         
         Args:
             uuid: UUID کلاینت
-            client_data: داده‌های جدید کلاینت
+            inbound_id: شناسه inbound کلاینت در پنل (remote_id)
+            client_data: داده‌های جدید کلاینت با همان کلیدهای `create_client` (`total_gb` بر حسب گیگابایت)
             
         Returns:
             اطلاعات به‌روز شده کلاینت
         """
         try:
-            result = await self.api.client.update(uuid, client_data)
+            client = _to_panel_client({**client_data, "id": uuid})
+            client.inbound_id = inbound_id
+            result = await self.api.client.update(uuid, client)
+            self.invalidate_snapshot()
             logger.info(f"Successfully updated client with UUID {uuid}")
             return result
         except Exception as e:
@@ -339,6 +498,7 @@ class XuiClient:
         """
         try:
             result = await self.api.client.reset_traffic(uuid)
+            self.invalidate_snapshot()
             logger.info(f"Successfully reset traffic for client with UUID {uuid}")
             return result
         except Exception as e:
@@ -356,13 +516,77 @@ class XuiClient:
             اطلاعات ترافیک کلاینت
         """
         try:
-            result = await self.api.client.get_traffic(uuid)
+            result = await self._read("client.get_traffic", uuid)
             logger.info(f"Successfully retrieved traffic info for client with UUID {uuid}")
             return result
         except Exception as e:
             logger.error(f"Failed to get traffic info for client with UUID {uuid}: {e}")
             raise
     
+    # --------- Snapshot (جستجوی O(1) بدون درخواست به پنل) ---------
+
+    async def get_snapshot(self, force: bool = False) -> PanelSnapshot:
+        """
+        دریافت snapshot ایندکس شده کلاینت‌ها و inboundهای پنل.
+        snapshot با یک درخواست لیست inboundها ساخته و تا `XUI_SNAPSHOT_TTL_SECONDS` استفاده می‌شود.
+
+        Args:
+            force: بازسازی اجباری snapshot از پنل.
+        """
+        return await panel_snapshot_cache.get(
+            self.host, lambda: self._read("inbound.get_list", fresh=force), force=force
+        )
+
+    def invalidate_snapshot(self) -> None:
+        """باطل کردن snapshot و خواندن‌های کش شده این پنل پس از هر عملیات نوشتن"""
+        panel_snapshot_cache.invalidate(self.host)
+        panel_read_coalescer.invalidate(self.host)
+
+    async def _read(self, operation: str, *args: Any, fresh: bool = False) -> Any:
+        """
+        اجرای یک متد خواندنی AsyncApi (مثلاً "inbound.get_list") از طریق لایه single-flight:
+        درخواست‌های هم‌زمان یکسان به این پنل یک درخواست واقعی را به اشتراک می‌گذارند.
+
+        Args:
+            operation: نام ماژول و متد AsyncApi به صورت "module.method".
+            *args: آرگومان‌های متد (بخشی از کلید ادغام).
+            fresh: نادیده گرفتن نتیجه کش شده (پیوستن به درخواست در جریان همچنان مجاز است).
+        """
+        key = (self.host, operation, *args)
+        if fresh:
+            panel_read_coalescer.forget(key)
+        module_name, method_name = operation.split(".", 1)
+        method = getattr(getattr(self.api, module_name), method_name)
+        return await panel_read_coalescer.do(key, lambda: method(*args))
+
+    async def find_client_by_uuid(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """
+        جستجوی کلاینت با UUID در snapshot (شامل inboundId).
+        در صورت پیدا نشدن، snapshot یک بار بازسازی می‌شود (کلاینت تازه ساخته شده).
+        """
+        client = (await self.get_snapshot()).clients_by_uuid.get(uuid)
+        if client is None:
+            client = (await self.get_snapshot(force=True)).clients_by_uuid.get(uuid)
+        return client
+
+    async def find_client_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """جستجوی کلاینت با ایمیل در snapshot (با یک بار بازسازی در صورت پیدا نشدن)"""
+        client = (await self.get_snapshot()).clients_by_email.get(email)
+        if client is None:
+            client = (await self.get_snapshot(force=True)).clients_by_email.get(email)
+        return client
+
+    async def find_clients_by_inbound(self, inbound_id: int) -> List[Dict[str, Any]]:
+        """لیست کلاینت‌های یک inbound از snapshot"""
+        return list((await self.get_snapshot()).clients_by_inbound.get(inbound_id, []))
+
+    async def find_inbound_by_id(self, inbound_id: int) -> Optional[Dict[str, Any]]:
+        """دریافت inbound از snapshot (settings/streamSettings/sniffing به صورت دیکشنری)"""
+        inbound = (await self.get_snapshot()).inbounds_by_id.get(inbound_id)
+        if inbound is None:
+            inbound = (await self.get_snapshot(force=True)).inbounds_by_id.get(inbound_id)
+        return inbound
+
     async def get_config(self, uuid: str) -> str:
         """
         دریافت لینک کانفیگ یک کلاینت بر اساس UUID آن.
@@ -380,157 +604,42 @@ class XuiClient:
         """
         logger.info(f"Attempting to generate config link for client UUID {uuid} on panel {self.host}")
         try:
-            # دریافت اطلاعات کلاینت
-            client = await self.get_client_by_uuid(uuid)
+            # دریافت کلاینت و inbound مرتبط از snapshot پنل (بدون درخواست جداگانه برای هر کدام)
+            client = await self.find_client_by_uuid(uuid)
             if not client:
                 logger.warning(f"Client with UUID {uuid} not found when trying to get config.")
                 return ""
 
-            # دریافت اطلاعات inbound مرتبط
-            inbound_id = client.get("inboundId") # نام فیلد ممکن است فرق کند!
-            if not inbound_id:
-                 logger.error(f"Could not determine inboundId for client UUID {uuid}. Client data: {client}")
-                 return ""
-
-            inbound = await self.get_inbound_by_id(inbound_id)
+            inbound_id = client.get("inboundId")
+            inbound = await self.find_inbound_by_id(inbound_id)
             if not inbound:
                 logger.error(f"Could not retrieve inbound {inbound_id} for client UUID {uuid}.")
                 return ""
 
-            # استخراج اطلاعات لازم
-            protocol = inbound.get("protocol")
             # استخراج آدرس دامنه/IP از هاست پنل (بدون http/https)
             parsed_host = urlparse(self.host)
             address = parsed_host.hostname if parsed_host.hostname else self.host # اگر hostname نبود، کل هاست را بگذار
-            port = inbound.get("port")
             remark = client.get("email") or uuid # اسم کانفیگ: ایمیل یا اگر نبود، UUID
 
-            # تنظیمات streamSettings و sniffing
-            stream_settings = inbound.get("streamSettings", {})
-            sniffing_settings = inbound.get("sniffing", {})
-            network = stream_settings.get("network", "tcp") # ws, tcp, grpc, etc.
-            security = stream_settings.get("security", "none") # tls, reality, none
-
-            # مقادیر پیش‌فرض
-            config_link = ""
-
-            # --- ساخت لینک VLESS ---
-            if protocol == "vless":
-                base_link = f"vless://{uuid}@{address}:{port}"
-                params = {
-                    "type": network,
-                    "security": security,
-                }
-
-                # پارامترهای خاص شبکه
-                if network == "tcp":
-                    tcp_settings = stream_settings.get("tcpSettings", {})
-                    header = tcp_settings.get("header", {})
-                    if header.get("type") == "http":
-                         params["headerType"] = "http"
-                         # path و host را از request یا host در header استخراج کن
-                         req = header.get("request", {})
-                         path = req.get("path", ["/"])[0] # معمولا لیست است
-                         host_headers = req.get("headers", {}).get("Host", [])
-                         host = host_headers[0] if host_headers else ""
-                         params["path"] = path
-                         if host: params["host"] = host
-                elif network == "ws":
-                    ws_settings = stream_settings.get("wsSettings", {})
-                    params["path"] = ws_settings.get("path", "/")
-                    host = ws_settings.get("headers", {}).get("Host", "")
-                    if host: params["host"] = host
-                elif network == "grpc":
-                    grpc_settings = stream_settings.get("grpcSettings", {})
-                    params["serviceName"] = grpc_settings.get("serviceName", "")
-                    # mode (multi) ?
-
-                # پارامترهای امنیتی
-                if security == "tls":
-                    tls_settings = stream_settings.get("tlsSettings", {})
-                    params["sni"] = tls_settings.get("serverName", address) # SNI
-                    params["fp"] = tls_settings.get("fingerprint", "") # Fingerprint
-                    # alpn? 
-                elif security == "reality":
-                    reality_settings = stream_settings.get("realitySettings", {})
-                    params["sni"] = reality_settings.get("serverNames", [address])[0] # اولین SNI
-                    params["fp"] = reality_settings.get("fingerprints", ["chrome"])[0] # اولین fingerprint
-                    params["pbk"] = reality_settings.get("publicKey", "") # Public Key
-                    params["sid"] = reality_settings.get("shortIds", [""])[0] # اولین Short ID
-                    # spiderX ?
-
-                # اضافه کردن پارامترهای sniffing اگر فعال بود
-                if sniffing_settings.get("enabled", False):
-                    dest_override = sniffing_settings.get("destOverride", [])
-                    if "http" in dest_override: params["flow"] = "xtls-rprx-vision"
-                    # آیا sniffing پارامتر دیگری در لینک دارد؟
-
-                # Encode کردن پارامترها
-                query_string = urlencode({k: v for k, v in params.items() if v is not None and v != ""}) # حذف پارامترهای خالی
-                config_link = f"{base_link}?{query_string}#{remark}"
-
-            # --- ساخت لینک VMess ---
-            elif protocol == "vmess":
-                # ساخت دیکشنری JSON بر اساس فرمت رایج
-                vmess_data = {
-                    "v": "2", # Version
-                    "ps": remark, # Remark
-                    "add": address,
-                    "port": str(port),
-                    "id": uuid,
-                    "aid": str(client.get("alterId", 0)), # AlterId, default 0
-                    "net": network,
-                    "type": "none", # Header type, default none (برای tcp)
-                    "host": "", # Host header
-                    "path": "", # Path (برای ws/grpc)
-                    "tls": "", # tls or reality
-                    "sni": "",
-                    "alpn": "",
-                    "fp": ""
-                }
-
-                # تنظیمات شبکه
-                if network == "tcp":
-                    tcp_settings = stream_settings.get("tcpSettings", {})
-                    header = tcp_settings.get("header", {})
-                    if header.get("type") == "http":
-                        vmess_data["type"] = "http"
-                        req = header.get("request", {})
-                        # path و host را از request یا host در header استخراج کن
-                        paths = req.get("path", ["/"])
-                        vmess_data["path"] = ",".join(paths) if paths else "/" # Join if multiple paths?
-                        host_headers = req.get("headers", {}).get("Host", [])
-                        vmess_data["host"] = host_headers[0] if host_headers else ""
-                elif network == "ws":
-                    ws_settings = stream_settings.get("wsSettings", {})
-                    vmess_data["path"] = ws_settings.get("path", "/")
-                    vmess_data["host"] = ws_settings.get("headers", {}).get("Host", "")
-                elif network == "grpc":
-                    grpc_settings = stream_settings.get("grpcSettings", {})
-                    vmess_data["path"] = grpc_settings.get("serviceName", "")
-                    # mode? ('gun' for grpc?)
-                    vmess_data["type"] = "multi" if grpc_settings.get("multiMode", False) else "gun"
-
-                # تنظیمات امنیتی
-                if security == "tls":
-                    vmess_data["tls"] = "tls"
-                    tls_settings = stream_settings.get("tlsSettings", {})
-                    vmess_data["sni"] = tls_settings.get("serverName", address)
-                    vmess_data["fp"] = tls_settings.get("fingerprint", "")
-                    # alpn?
-                    alpn_list = tls_settings.get("alpn", [])
-                    vmess_data["alpn"] = ",".join(alpn_list) if alpn_list else ""
-                # VMess از Reality پشتیبانی نمی‌کند؟ اگر بکند باید اضافه شود
-
-                # تبدیل به JSON و کد کردن با Base64
-                json_string = json.dumps(vmess_data, separators=(',', ':')) # فشرده‌ترین حالت
-                encoded_bytes = base64.urlsafe_b64encode(json_string.encode('utf-8'))
-                encoded_string = encoded_bytes.decode('utf-8').rstrip('=') # حذف padding =
-                config_link = f"vmess://{encoded_string}"
-
-            else:
-                logger.warning(f"Unsupported protocol '{protocol}' for config generation for client UUID {uuid}.")
+            # فقط تنظیمات پیش‌فرض همین کلاینت (نه لیست کامل کلاینت‌ها) در کلید کش قالب قرار می‌گیرد
+            inbound_settings = inbound.get("settings", {})
+            compact_settings = {
+                "flow": inbound_settings.get("flow", ""),
+                "client_defaults": {"flow": client.get("flow", ""), "alterId": client.get("alterId", 0)},
+            }
+            # قالب کامپایل شده inbound (مشترک با config_generator) از کش خوانده می‌شود
+            template = get_config_template(
+                address,
+                inbound.get("protocol"),
+                inbound.get("port"),
+                inbound.get("streamSettings", {}),
+                inbound.get("sniffing", {}),
+                compact_settings,
+            )
+            if template is None:
+                logger.warning(f"Unsupported protocol '{inbound.get('protocol')}' for config generation for client UUID {uuid}.")
                 return ""
+            config_link = template.render(uuid, remark)
 
             logger.info(f"Successfully generated config link for client UUID {uuid}")
             return config_link
@@ -553,7 +662,7 @@ class XuiClient:
             لیست inbound‌ها
         """
         try:
-            result = await self.api.inbound.get_list()
+            result = await self._read("inbound.get_list")
             logger.info(f"Successfully retrieved inbounds from panel {self.host}")
             return result
         except Exception as e:
@@ -576,7 +685,7 @@ class XuiClient:
         """
         logger.info(f"Syncing inbounds from panel {self.host}")
         try:
-            inbounds = await self.api.inbound.get_list() # Use correct py3xui method
+            inbounds = await self._read("inbound.get_list") # Use correct py3xui method
             if inbounds is None: # Check if API returns None on failure/empty
                  logger.warning(f"Received None when syncing inbounds from panel {self.host}. Assuming empty list.")
                  return []
@@ -603,7 +712,7 @@ class XuiClient:
         try:
             # Assuming py3xui method is 'inbound.get'
             # **اصلاح:** بر اساس مستندات py3xui باید از get_by_id استفاده شود
-            result = await self.api.inbound.get_by_id(inbound_id)
+            result = await self._read("inbound.get_by_id", inbound_id)
             if result:
                 logger.info(f"Successfully retrieved inbound {inbound_id} from panel {self.host}")
                  # تبدیل به dict اگر آبجکت بود
@@ -647,6 +756,7 @@ class XuiClient:
             # --- روش فعلی با فرض اینکه add دیکشنری هم قبول می‌کند (نیاز به تست) ---
             logger.warning("The 'add_inbound' method ideally expects an Inbound object from py3xui, but received a dict. Attempting to pass dict directly.")
             result = await self.api.inbound.add(inbound=inbound_data) # استفاده مستقیم از دیکشنری
+            self.invalidate_snapshot()
             logger.info(f"Successfully added inbound on panel {self.host}")
             # تبدیل نتیجه به dict اگر آبجکت بود
             if hasattr(result, '__dict__'): return result.__dict__
@@ -675,6 +785,7 @@ class XuiClient:
         try:
             # Assuming py3xui method is 'inbound.update'
             result = await self.api.inbound.update(inbound_id, inbound_data)
+            self.invalidate_snapshot()
             logger.info(f"Successfully updated inbound {inbound_id} on panel {self.host}")
             return result
         except Exception as e:
@@ -695,6 +806,7 @@ class XuiClient:
         try:
             # Assuming py3xui method is 'inbound.delete'
             result = await self.api.inbound.delete(inbound_id)
+            self.invalidate_snapshot()
             logger.info(f"Successfully deleted inbound {inbound_id} from panel {self.host}")
             return result
         except Exception as e:
@@ -717,6 +829,7 @@ class XuiClient:
         try:
             # استفاده از متد reset_stats از py3xui.async_api.inbound
             await self.api.inbound.reset_stats()
+            self.invalidate_snapshot()
             logger.info(f"Successfully requested reset of all inbound stats on panel {self.host}")
             return True
         except AttributeError:
@@ -747,6 +860,7 @@ class XuiClient:
         try:
             # استفاده از متد reset_client_stats از py3xui.async_api.inbound
             await self.api.inbound.reset_client_stats(inbound_id=inbound_id)
+            self.invalidate_snapshot()
             logger.info(f"Successfully requested reset of client stats for inbound {inbound_id} on panel {self.host}")
             return True
         except AttributeError:
@@ -818,7 +932,7 @@ class XuiClient:
         logger.info(f"Attempting to get server status from panel {self.host}")
         try:
             # استفاده از متد get_status از py3xui.async_api.server
-            status = await self.api.server.get_status()
+            status = await self._read("server.get_status")
             if status:
                  logger.info(f"Successfully retrieved server status from panel {self.host}")
                  # py3xui ممکن است مستقیماً آبجکت Server برگرداند، نیاز به تبدیل به dict؟
@@ -962,19 +1076,10 @@ class XuiClient:
     def is_logged_in(self) -> bool:
         """
         بررسی اینکه آیا کلاینت احتمالاً لاگین شده است یا خیر.
-        این متد فقط یک حدس آگاهانه بر اساس وجود توکن ارائه می‌دهد
-        و نمی‌تواند اعتبار واقعی سشن را تضمین کند.
+        این متد فقط یک حدس آگاهانه بر اساس وجود کوکی سشن ارائه می‌دهد
+        و نمی‌تواند اعتبار واقعی سشن را تضمین کند (رد شدن کوکی توسط پنل باعث لاگین مجدد خودکار می‌شود).
 
         Returns:
             bool: True اگر کلاینت احتمالاً لاگین شده باشد، False در غیر این صورت.
         """
-        # بررسی اینکه آیا api توکن یا کوکی دارد
-        has_token = bool(getattr(self.api, 'token', None))
-        has_cookie = False
-        
-        # بررسی وجود کوکی در کلاینت httpx داخلی
-        if hasattr(self.api, '_client') and hasattr(self.api._client, 'cookies'):
-            has_cookie = bool(self.api._client.cookies)
-        
-        # اگر توکن یا کوکی داشته باشیم، احتمالاً لاگین هستیم
-        return has_token or has_cookie
+        return bool(getattr(self.api, "session", None))
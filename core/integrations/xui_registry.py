@@ -0,0 +1,154 @@
+"""
+رجیستری سراسری (در سطح پروسه) برای نگهداری کلاینت‌های XuiClient لاگین شده
+
+هر پنل فقط یک XuiClient احراز هویت شده در کل پروسه دارد تا هر آپدیت ربات
+مجبور به ساخت AsyncApi جدید و لاگین مجدد به پنل نباشد.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from core.integrations.circuit_breaker import CircuitState, panel_circuit_breaker
+from core.integrations.xui_client import XuiClient
+from core.settings import XUI_SESSION_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _credentials_fingerprint(url: str, username: str, password: str) -> str:
+    """ساخت اثر انگشت از اطلاعات اتصال پنل (بدون نگهداری رمز به صورت خام در کلید)"""
+    raw = f"{url.rstrip('/')}\x00{username}\x00{password}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+@dataclass
+class _RegistryEntry:
+    """یک کلاینت ثبت شده به همراه متادیتای سشن آن"""
+    client: XuiClient
+    fingerprint: str
+    logged_in_at: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class XuiClientRegistry:
+    """
+    نگهداری یک XuiClient لاگین شده به ازای هر پنل در کل پروسه.
+
+    کلید رجیستری شناسه پنل است و اثر انگشت اطلاعات اتصال (URL، نام کاربری و رمز)
+    کنار آن ذخیره می‌شود؛ اگر اطلاعات اتصال پنل تغییر کند کلاینت قدیمی دور ریخته
+    و کلاینت جدیدی ساخته می‌شود. کوکی سشن به صورت تنبل (lazy) و فقط وقتی
+    منقضی شده یا وجود ندارد تازه‌سازی می‌شود.
+    """
+
+    def __init__(self, session_ttl: float = XUI_SESSION_TTL_SECONDS):
+        """
+        Args:
+            session_ttl: حداکثر عمر سشن لاگین (ثانیه) قبل از لاگین مجدد پیشگیرانه.
+        """
+        self.session_ttl = session_ttl
+        self._entries: Dict[int, _RegistryEntry] = {}
+        self._registry_lock = asyncio.Lock()
+
+    async def get_client(self, panel_id: int, url: str, username: str, password: str) -> XuiClient:
+        """
+        دریافت کلاینت لاگین شده برای یک پنل؛ در صورت نیاز ساخت یا لاگین مجدد.
+
+        Args:
+            panel_id: شناسه پنل.
+            url: آدرس پنل.
+            username: نام کاربری پنل.
+            password: رمز عبور پنل.
+
+        Returns:
+            نمونه XuiClient آماده به کار.
+
+        Raises:
+            XuiAuthenticationError, XuiConnectionError: در صورت شکست لاگین.
+            CircuitOpenError: اگر مدار پنل باز باشد (بدون هیچ درخواست شبکه).
+        """
+        # پنل خراب: رد فوری به جای انتظار برای timeout در هر درخواست
+        panel_circuit_breaker.raise_if_open(panel_id)
+        fingerprint = _credentials_fingerprint(url, username, password)
+
+        async with self._registry_lock:
+            entry = self._entries.get(panel_id)
+            if entry is None or entry.fingerprint != fingerprint:
+                if entry is not None:
+                    logger.info(f"اطلاعات اتصال پنل {panel_id} تغییر کرده، کلاینت جدید ساخته می‌شود. (Credentials changed for panel {panel_id}, rebuilding client.)")
+                entry = _RegistryEntry(
+                    client=XuiClient(host=url, username=username, password=password),
+                    fingerprint=fingerprint,
+                )
+                self._entries[panel_id] = entry
+
+        # قفل مخصوص پنل تا درخواست‌های هم‌زمان فقط یک بار لاگین کنند
+        async with entry.lock:
+            if not self._is_session_fresh(entry):
+                logger.debug(f"لاگین (مجدد) به پنل {panel_id} برای رجیستری... (Logging in to panel {panel_id} for registry...)")
+                try:
+                    await self._login(panel_id, entry.client)
+                except Exception:
+                    # کلاینت خراب را نگه نمی‌داریم تا تلاش بعدی از صفر شروع شود
+                    await self.invalidate(panel_id, expected=entry)
+                    raise
+                entry.logged_in_at = time.monotonic()
+        return entry.client
+
+    async def _login(self, panel_id: int, client: XuiClient) -> None:
+        """
+        لاگین کلاینت پنل؛ فقط لاگین واقعی در circuit breaker ثبت می‌شود.
+
+        بازیابی کوکی از Redis هیچ درخواستی به پنل نمی‌فرستد، پس ثبت آن به عنوان موفقیت،
+        شمارنده خطاها و امتیاز سلامت را بی‌دلیل بازنشانی می‌کند. وقتی مدار بسته نیست
+        (probe نیمه‌باز) کوکی نادیده گرفته می‌شود تا بسته شدن مدار با یک درخواست واقعی باشد.
+        """
+        if panel_circuit_breaker.health(panel_id).state == CircuitState.CLOSED and await client.restore_session():
+            return
+        await panel_circuit_breaker.call(panel_id, lambda: client.login(force=True))
+
+    def _is_session_fresh(self, entry: _RegistryEntry) -> bool:
+        """بررسی معتبر بودن (احتمالی) سشن بدون ارتباط شبکه"""
+        if not entry.logged_in_at:
+            return False
+        if self.session_ttl and time.monotonic() - entry.logged_in_at > self.session_ttl:
+            return False
+        return entry.client.is_logged_in()
+
+    async def invalidate(self, panel_id: int, expected: Optional[_RegistryEntry] = None) -> None:
+        """
+        حذف کلاینت یک پنل از رجیستری (مثلاً پس از تغییر وضعیت یا اطلاعات اتصال).
+
+        Args:
+            panel_id: شناسه پنل.
+            expected: اگر داده شود فقط در صورتی حذف می‌شود که همین ورودی هنوز ثبت باشد.
+        """
+        async with self._registry_lock:
+            entry = self._entries.get(panel_id)
+            if entry is None or (expected is not None and entry is not expected):
+                return
+            del self._entries[panel_id]
+        logger.info(f"کلاینت XUI پنل {panel_id} از رجیستری حذف شد. (Invalidated registry client for panel {panel_id}.)")
+
+    def mark_stale(self, panel_id: int) -> None:
+        """علامت‌گذاری سشن پنل به عنوان منقضی تا در استفاده بعدی لاگین مجدد انجام شود"""
+        entry = self._entries.get(panel_id)
+        if entry is not None:
+            entry.logged_in_at = 0.0
+
+    async def clear(self) -> None:
+        """پاک کردن کامل رجیستری (برای خاموش شدن پروسه یا تست‌ها)"""
+        async with self._registry_lock:
+            self._entries.clear()
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+xui_client_registry = XuiClientRegistry()
+
+
+def get_xui_client_registry() -> XuiClientRegistry:
+    """دریافت رجیستری سراسری کلاینت‌های XUI"""
+    return xui_client_registry
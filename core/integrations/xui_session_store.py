@@ -0,0 +1,114 @@
+"""
+ذخیره کوکی سشن پنل‌ها در Redis
+
+کوکی سشن احراز هویت شده هر پنل (به ازای آدرس و نام کاربری) همراه با نام کوکی و توکن CSRF
+به صورت JSON با زمان انقضا در Redis نگهداری می‌شود تا ری‌استارت ربات، replicaهای دیگر و اسکریپت `scripts/sync_panels.py`
+بدون لاگین مجدد از همان سشن استفاده کنند. لاگین فقط وقتی انجام می‌شود که پنل کوکی را
+رد کند. خطاهای Redis هرگز مانع کار با پنل نمی‌شوند (فقط به لاگین عادی برمی‌گردیم).
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from core.settings import REDIS_HOST, REDIS_PORT, XUI_SESSION_COOKIE_TTL_SECONDS, XUI_SESSION_STORE_ENABLED
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "moonvpn:xui_session:"
+
+
+def _session_key(host: str, username: str) -> str:
+    raw = f"{host.rstrip('/')}\x00{username}".encode("utf-8")
+    return _KEY_PREFIX + hashlib.sha256(raw).hexdigest()
+
+
+@dataclass(frozen=True)
+class PanelSession:
+    """سشن احراز هویت شده پنل: نام و مقدار کوکی و توکن CSRF (در صورت وجود)"""
+
+    cookie_name: str
+    value: str
+    csrf_token: Optional[str] = None
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def loads(cls, raw: str) -> Optional["PanelSession"]:
+        """خواندن سشن ذخیره شده؛ مقدار نامعتبر یا قالب قدیمی (فقط کوکی) None برمی‌گرداند"""
+        try:
+            data = json.loads(raw)
+            session = cls(data["cookie_name"], data["value"], data.get("csrf_token"))
+        except (ValueError, TypeError, KeyError):
+            return None
+        return session if session.cookie_name and session.value else None
+
+
+class PanelSessionStore:
+    """خواندن/نوشتن کوکی سشن پنل‌ها در Redis (با اتصال تنبل و fail-soft)"""
+
+    def __init__(self, ttl: int = XUI_SESSION_COOKIE_TTL_SECONDS, enabled: bool = XUI_SESSION_STORE_ENABLED):
+        self.ttl = ttl
+        self.enabled = enabled and ttl > 0
+        self._redis: Optional[Redis] = None
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, socket_timeout=2, socket_connect_timeout=2)
+        return self._redis
+
+    async def load(self, host: str, username: str) -> Optional[PanelSession]:
+        """دریافت سشن ذخیره شده یا None"""
+        if not self.enabled:
+            return None
+        try:
+            value = await self.redis.get(_session_key(host, username))
+        except (RedisError, OSError) as e:
+            logger.warning(f"خواندن سشن پنل {host} از Redis ناموفق بود: {e} (Failed to load panel session from Redis: {e})")
+            return None
+        if value is None:
+            return None
+        return PanelSession.loads(value.decode("utf-8") if isinstance(value, bytes) else value)
+
+    async def save(self, host: str, username: str, session: PanelSession) -> None:
+        """ذخیره سشن با زمان انقضای `XUI_SESSION_COOKIE_TTL_SECONDS`"""
+        if not self.enabled or not session.value:
+            return
+        try:
+            await self.redis.set(_session_key(host, username), session.dumps(), ex=self.ttl)
+        except (RedisError, OSError) as e:
+            logger.warning(f"ذخیره سشن پنل {host} در Redis ناموفق بود: {e} (Failed to store panel session in Redis: {e})")
+
+    async def delete(self, host: str, username: str, cookie: Optional[str] = None) -> None:
+        """
+        حذف سشن ذخیره شده (پس از رد شدن کوکی توسط پنل).
+        اگر `cookie` داده شود فقط در صورتی حذف می‌شود که هنوز همان کوکی ذخیره باشد،
+        تا سشن تازه‌ای که replica دیگری ذخیره کرده پاک نشود.
+        """
+        if not self.enabled:
+            return
+        key = _session_key(host, username)
+        try:
+            if cookie is not None:
+                stored = await self.load(host, username)
+                if stored is not None and stored.value != cookie:
+                    return
+            await self.redis.delete(key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"حذف سشن پنل {host} از Redis ناموفق بود: {e} (Failed to delete panel session from Redis: {e})")
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+panel_session_store = PanelSessionStore()
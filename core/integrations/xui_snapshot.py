@@ -0,0 +1,143 @@
+"""
+Snapshot درون حافظه‌ای از کلاینت‌ها و inboundهای هر پنل
+
+با یک درخواست لیست inboundها (که clients و clientStats را هم دارد) ایندکس‌هایی بر
+اساس UUID، ایمیل و شناسه inbound ساخته می‌شود تا جستجوهای فقط-خواندنی (ساخت لینک
+کانفیگ، لیست کلاینت‌های یک inbound) بدون درخواست به پنل پاسخ داده شوند. هر عملیات
+نوشتن روی پنل snapshot همان پنل را باطل می‌کند.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+
+from core.settings import XUI_SNAPSHOT_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    """تبدیل مدل‌های py3xui یا دیکشنری به دیکشنری با کلیدهای API پنل (camelCase)"""
+    if obj is None:
+        return {}
+    if isinstance(obj, dict):
+        return obj
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", by_alias=True)
+    if hasattr(obj, "__dict__"):
+        return {k: v for k, v in vars(obj).items() if not k.startswith("_")}
+    return {}
+
+
+def _json_field(value: Any) -> Dict[str, Any]:
+    """فیلدهای JSON پنل ممکن است رشته باشند"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return {}
+    return _as_dict(value)
+
+
+@dataclass
+class PanelSnapshot:
+    """ایندکس‌های کلاینت‌ها و inboundهای یک پنل در یک لحظه"""
+    inbounds_by_id: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    clients_by_uuid: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    clients_by_email: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    clients_by_inbound: Dict[int, List[Dict[str, Any]]] = field(default_factory=dict)
+    built_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def build(cls, inbounds_raw: List[Any]) -> "PanelSnapshot":
+        """ساخت snapshot از پاسخ لیست inboundهای پنل"""
+        snapshot = cls()
+        for raw_inbound in inbounds_raw or []:
+            inbound = _as_dict(raw_inbound)
+            inbound_id = inbound.get("id")
+            if inbound_id is None:
+                continue
+            inbound = dict(inbound)
+            inbound["settings"] = _json_field(inbound.get("settings"))
+            inbound["streamSettings"] = _json_field(inbound.get("streamSettings"))
+            inbound["sniffing"] = _json_field(inbound.get("sniffing"))
+            snapshot.inbounds_by_id[inbound_id] = inbound
+
+            stats_by_email = {
+                stat.get("email"): stat
+                for stat in (_as_dict(s) for s in inbound.get("clientStats") or [])
+                if stat.get("email")
+            }
+            inbound_clients = snapshot.clients_by_inbound.setdefault(inbound_id, [])
+            for raw_client in inbound["settings"].get("clients", []) or []:
+                client = dict(_as_dict(raw_client))
+                client["inboundId"] = inbound_id
+                stat = stats_by_email.get(client.get("email"))
+                if stat:
+                    client["up"] = stat.get("up", 0)
+                    client["down"] = stat.get("down", 0)
+                inbound_clients.append(client)
+                # vless/vmess: id، trojan/shadowsocks: password
+                client_key = client.get("id") or client.get("password")
+                if client_key:
+                    snapshot.clients_by_uuid[str(client_key)] = client
+                if client.get("email"):
+                    snapshot.clients_by_email[client["email"]] = client
+        return snapshot
+
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+
+class PanelSnapshotCache:
+    """نگهداری snapshot هر پنل (کلید: آدرس پنل) با TTL و بارگذاری تک‌باره هم‌زمان"""
+
+    def __init__(self, ttl: float = XUI_SNAPSHOT_TTL_SECONDS):
+        self.ttl = ttl
+        self._snapshots: Dict[str, PanelSnapshot] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get(
+        self,
+        host: str,
+        loader: Callable[[], Awaitable[List[Any]]],
+        force: bool = False,
+    ) -> PanelSnapshot:
+        """
+        دریافت snapshot پنل؛ در صورت منقضی بودن (یا force) با `loader` بازسازی می‌شود.
+
+        Args:
+            host: آدرس پنل.
+            loader: تابعی که لیست خام inboundهای پنل را برمی‌گرداند.
+            force: بازسازی اجباری.
+        """
+        snapshot = self._snapshots.get(host)
+        if not force and snapshot is not None and snapshot.age() < self.ttl:
+            return snapshot
+
+        requested_at = time.monotonic()
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(host)
+            # درخواست هم‌زمان دیگری در همین فاصله snapshot را ساخته است
+            # (برای force فقط snapshotی قابل قبول است که پس از این درخواست ساخته شده باشد)
+            if snapshot is not None and snapshot.age() < self.ttl and (not force or snapshot.built_at >= requested_at):
+                return snapshot
+            snapshot = PanelSnapshot.build(await loader())
+            self._snapshots[host] = snapshot
+            logger.debug(f"Snapshot پنل {host} ساخته شد: {len(snapshot.inbounds_by_id)} inbound، {len(snapshot.clients_by_uuid)} کلاینت. (Built snapshot for {host}.)")
+            return snapshot
+
+    def invalidate(self, host: str) -> None:
+        """باطل کردن snapshot یک پنل (پس از هر عملیات نوشتن)"""
+        self._snapshots.pop(host, None)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+panel_snapshot_cache = PanelSnapshotCache()
@@ -0,0 +1,302 @@
+"""
+لایه انتقال HTTP تنظیم شده برای درخواست‌های پنل‌های 3x-ui
+
+py3xui برای هر درخواست یک httpx.AsyncClient جدید می‌سازد (بدون keep-alive)، timeout
+پیش‌فرض httpx را استفاده می‌کند و حتی درخواست‌های نوشتنی را با تأخیر ثابت تکرار می‌کند.
+این ماژول برای هر پنل یک کلاینت httpx مشترک با محدودیت اتصال، keep-alive، HTTP/2
+اختیاری و timeoutهای جدای اتصال/خواندن نگه می‌دارد و `_request_with_retry` زیر-APIهای
+AsyncApi را با نسخه‌ای جایگزین می‌کند که:
+
+- فقط درخواست‌های خواندنی (idempotent) را با backoff تصادفی (jitter) تکرار می‌کند؛
+- تعداد تکرارها را با یک بودجه (retry budget) به نسبتی از درخواست‌های هر پنل محدود می‌کند؛
+- مهلت (deadline) تعیین شده توسط handler را رعایت می‌کند تا پنل کند، callback تلگرام را معطل نکند.
+"""
+
+import asyncio
+import contextvars
+import importlib.util
+import logging
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, Union
+
+import httpx
+
+from core.settings import (
+    XUI_HTTP2,
+    XUI_HTTP_CONNECT_TIMEOUT,
+    XUI_HTTP_KEEPALIVE_CONNECTIONS,
+    XUI_HTTP_KEEPALIVE_EXPIRY,
+    XUI_HTTP_MAX_CONNECTIONS,
+    XUI_HTTP_MAX_RETRIES,
+    XUI_HTTP_READ_TIMEOUT,
+    XUI_RETRY_BUDGET_RATIO,
+)
+
+logger = logging.getLogger(__name__)
+
+# درخواست‌های POST پنل که تکرار آن‌ها بی‌خطر است (بقیه POSTها فقط یک بار ارسال می‌شوند)
+_IDEMPOTENT_POST_SUFFIXES: Tuple[str, ...] = ("/login", "/onlines", "/server/status")
+_IDEMPOTENT_POST_MARKERS: Tuple[str, ...] = ("/clientIps/",)
+# کدهای HTTP گذرا که برای درخواست‌های خواندنی تکرار می‌شوند
+_RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+# پاسخ‌هایی که نشان می‌دهند پنل کوکی سشن را نپذیرفته است
+_SESSION_REJECTED_STATUS_CODES = frozenset({401, 403, 404})
+_BACKOFF_BASE_SECONDS = 0.2
+_BACKOFF_MAX_SECONDS = 2.0
+
+SessionRejectedHook = Callable[[Optional[str]], Awaitable[None]]
+
+# زمان پایان (time.monotonic) مهلت درخواست‌های پنل در context جاری
+_panel_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("panel_deadline", default=None)
+
+
+class PanelDeadlineExceeded(httpx.TimeoutException):
+    """Raised when a panel request would exceed the caller's deadline."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+@contextmanager
+def panel_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    تعیین مهلت برای تمام درخواست‌های پنل داخل این بلاک (برای handlerها).
+    مهلت‌های تو در تو، مهلت زودتر را نگه می‌دارند. None یا 0 یعنی بدون مهلت جدید.
+
+    Usage:
+        with panel_deadline(10):
+            await panel_service.get_clients_by_inbound(panel_id, inbound_id)
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _panel_deadline.get()
+    token = _panel_deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _panel_deadline.reset(token)
+
+
+def remaining_deadline() -> Optional[float]:
+    """زمان باقی‌مانده تا مهلت context جاری (ثانیه) یا None اگر مهلتی تعیین نشده باشد"""
+    deadline = _panel_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class RetryBudget:
+    """
+    بودجه تکرار درخواست: هر درخواست `ratio` توکن اضافه و هر تکرار یک توکن مصرف می‌کند.
+    وقتی پنل خراب است تکرارها حداکثر به همین نسبت از ترافیک عادی محدود می‌شوند.
+    """
+
+    def __init__(self, ratio: float = XUI_RETRY_BUDGET_RATIO, min_tokens: float = 10.0):
+        self.ratio = max(0.0, ratio)
+        self.max_tokens = min_tokens
+        self._tokens = min_tokens
+
+    def deposit(self) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+
+class PanelTransport:
+    """کلاینت httpx مشترک و سیاست تکرار برای یک پنل (یک host)"""
+
+    def __init__(self, host: str, verify: Union[bool, str] = True):
+        self.host = host
+        self.verify = verify
+        self.budget = RetryBudget()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            http2 = XUI_HTTP2 and _http2_available()
+            if XUI_HTTP2 and not http2:
+                logger.warning("XUI_HTTP2 فعال است اما پکیج h2 نصب نیست؛ استفاده از HTTP/1.1. (XUI_HTTP2 is enabled but h2 is not installed, using HTTP/1.1.)")
+            self._client = httpx.AsyncClient(
+                verify=self.verify,
+                http2=http2,
+                timeout=self._timeout(None),
+                limits=httpx.Limits(
+                    max_connections=XUI_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=XUI_HTTP_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=XUI_HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    @staticmethod
+    def _timeout(remaining: Optional[float]) -> httpx.Timeout:
+        """timeout جدای اتصال و خواندن، محدود شده به زمان باقی‌مانده مهلت"""
+        connect, read = XUI_HTTP_CONNECT_TIMEOUT, XUI_HTTP_READ_TIMEOUT
+        if remaining is not None:
+            connect, read = min(connect, remaining), min(read, remaining)
+        return httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+
+    @staticmethod
+    def is_session_rejected(url: str, response: httpx.Response) -> bool:
+        """آیا پنل درخواست API را به دلیل نامعتبر بودن سشن رد کرده است (کد خطا یا redirect به صفحه ورود)"""
+        if "/panel/api/" not in httpx.URL(url).path:
+            return False
+        return response.status_code in _SESSION_REJECTED_STATUS_CODES or response.is_redirect
+
+    @staticmethod
+    def is_idempotent(method: str, url: str) -> bool:
+        if method.upper() == "GET":
+            return True
+        path = httpx.URL(url).path.rstrip("/")
+        return path.endswith(_IDEMPOTENT_POST_SUFFIXES) or any(marker in path for marker in _IDEMPOTENT_POST_MARKERS)
+
+    @staticmethod
+    def _build_headers(api: Any, headers: Dict[str, str], is_csrf_request: bool) -> Dict[str, str]:
+        """
+        هدرهای درخواست مانند py3xui: هدر Bearer یا X-CSRF-Token از `_generate_headers` و
+        کوکی سشن با نام کوکی دریافت شده از پنل (`api.cookies`).
+        """
+        headers = dict(headers)
+        if not is_csrf_request:
+            headers = api._generate_headers(headers)
+        cookies = getattr(api, "cookies", None) or {}
+        if cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in cookies.items())
+        else:
+            headers.pop("Cookie", None)
+        return headers
+
+    async def request(
+        self,
+        api: Any,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        on_session_rejected: Optional[SessionRejectedHook] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        جایگزین `_request_with_retry` زیر-APIهای py3xui (همان ورودی، خروجی و آرگومان‌های
+        `is_csrf_request` و `skip_check`).
+        اگر پنل کوکی سشن را رد کند و `on_session_rejected` داده شده باشد، یک بار لاگین مجدد
+        انجام و درخواست با کوکی جدید تکرار می‌شود.
+
+        Raises:
+            PanelDeadlineExceeded: اگر مهلت context جاری تمام شده باشد.
+            httpx.RequestError / httpx.HTTPStatusError: مانند py3xui.
+        """
+        # آرگومان‌های داخلی py3xui که نباید به httpx برسند
+        is_csrf_request = kwargs.pop("is_csrf_request", False)
+        skip_check = kwargs.pop("skip_check", False)
+        base_headers = dict(headers or {})
+        headers = self._build_headers(api, base_headers, is_csrf_request)
+        session = getattr(api, "session", None)
+        reauthenticated = False
+
+        idempotent = self.is_idempotent(method, url)
+        max_attempts = 1 + (max(0, XUI_HTTP_MAX_RETRIES) if idempotent else 0)
+        self.budget.deposit()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = remaining_deadline()
+            if remaining is not None and remaining <= 0:
+                raise PanelDeadlineExceeded(f"Deadline exceeded before request to {url}")
+            try:
+                response = await self.client.request(
+                    method.upper(), url, headers=headers, timeout=self._timeout(remaining), **kwargs
+                )
+                # کوکی‌ها به صورت صریح ارسال می‌شوند؛ jar مشترک نباید بین نشست‌ها نشت کند
+                self.client.cookies.clear()
+                if session and on_session_rejected and not reauthenticated and self.is_session_rejected(url, response):
+                    reauthenticated = True
+                    await on_session_rejected(session)
+                    session = getattr(api, "session", None)
+                    headers = self._build_headers(api, base_headers, is_csrf_request)
+                    attempt -= 1
+                    continue
+                if idempotent and response.status_code in _RETRYABLE_STATUS_CODES and attempt < max_attempts:
+                    raise httpx.HTTPStatusError(
+                        f"Transient status {response.status_code}", request=response.request, response=response
+                    )
+                response.raise_for_status()
+                if not skip_check:
+                    await api._check_response(response)
+                return response
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in _RETRYABLE_STATUS_CODES
+                if not retryable or attempt >= max_attempts:
+                    raise
+                if not self.budget.try_withdraw():
+                    logger.warning(f"بودجه تکرار پنل {self.host} تمام شده است؛ درخواست تکرار نمی‌شود. (Retry budget for {self.host} exhausted.)")
+                    raise
+                delay = random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
+                remaining = remaining_deadline()
+                if remaining is not None and delay >= remaining:
+                    raise
+                logger.warning(f"Request to {url} failed: {e}, retry {attempt} of {max_attempts - 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class PanelTransportPool:
+    """نگهداری یک PanelTransport برای هر پنل در سطح پروسه"""
+
+    def __init__(self):
+        self._transports: Dict[Tuple[str, Union[bool, str]], PanelTransport] = {}
+
+    def get(self, host: str, verify: Union[bool, str] = True) -> PanelTransport:
+        key = (host.rstrip("/"), verify)
+        transport = self._transports.get(key)
+        if transport is None:
+            transport = self._transports[key] = PanelTransport(key[0], verify)
+        return transport
+
+    def install(self, api: Any, host: str, on_session_rejected: Optional[SessionRejectedHook] = None) -> None:
+        """
+        جایگزینی `_request_with_retry` تمام زیر-APIهای یک نمونه AsyncApi با transport مشترک پنل.
+
+        Args:
+            api: نمونه AsyncApi.
+            host: آدرس پنل.
+            on_session_rejected: تابع لاگین مجدد وقتی پنل کوکی سشن را رد می‌کند (کوکی رد شده را می‌گیرد).
+        """
+        for sub_api in vars(api).values():
+            if not hasattr(sub_api, "_request_with_retry"):
+                continue
+            if not getattr(sub_api, "_use_tls_verify", True):
+                verify: Union[bool, str] = False
+            else:
+                verify = getattr(sub_api, "_custom_certificate_path", None) or True
+            transport = self.get(host, verify)
+
+            async def _request_with_retry(method, url, headers, _api=sub_api, _transport=transport, **kwargs):
+                return await _transport.request(_api, method, url, headers, on_session_rejected, **kwargs)
+
+            sub_api._request_with_retry = _request_with_retry
+
+    async def aclose_all(self) -> None:
+        """بستن تمام اتصال‌های باز (هنگام خاموش شدن ربات)"""
+        for transport in list(self._transports.values()):
+            await transport.aclose()
+        self._transports.clear()
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+panel_transports = PanelTransportPool()
@@ -4,6 +4,7 @@
 
 import logging
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Tuple, List
 
@@ -12,6 +13,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from core.services.client_service import ClientService
 from core.services.panel_service import PanelService
+from core.services.warm_pool_service import WarmPoolService
 from db.repositories.account_repo import AccountRepository
 from db.models.client_account import AccountStatus, ClientAccount
 from db.models import Panel, Inbound, Plan, User
@@ -19,6 +21,16 @@ from db.models import Panel, Inbound, Plan, User
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class AccountProvisionRequest:
+    """یک درخواست ایجاد اکانت در عملیات دسته‌ای (هدیه گروهی، مهاجرت و...)"""
+    user_id: int
+    plan: Plan
+    inbound: Inbound
+    panel: Panel
+    order_id: Optional[int] = None
+
+
 class AccountService:
     """
     سرویس مدیریت اکانت‌های VPN کاربران در دیتابیس و هماهنگی با پنل‌ها از طریق سرویس‌های دیگر.
@@ -37,6 +49,7 @@ class AccountService:
         self.client_service = client_service
         self.panel_service = panel_service
         self.account_repo = AccountRepository(session)
+        self.warm_pool_service = WarmPoolService(session, panel_service)
     
     def _generate_transfer_id(self, user_id: int) -> str:
         """
@@ -66,6 +79,78 @@ class AccountService:
         parts = [part for part in [panel_flag_emoji, panel_default_label, f"{user_id:03d}"] if part]
         return "-".join(parts)
     
+    def _build_client_spec(
+        self, user_id: int, plan: Plan, panel: Panel, client_uuid: str, transfer_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        تولید مشخصات کلاینت جدید برای یک پلن (داده API پنل و مقادیر لازم برای رکورد اکانت).
+
+        Args:
+            user_id: شناسه کاربر.
+            plan: پلن انتخابی.
+            panel: پنل مقصد.
+            client_uuid: UUID کلاینت.
+            transfer_id: شناسه اشتراک (sub_id)؛ در صورت None از `_generate_transfer_id` ساخته می‌شود.
+
+        Returns:
+            دیکشنری شامل client_data، label، email، expires_at و expiry_time (میلی‌ثانیه).
+        """
+        expires_at = datetime.utcnow() + timedelta(days=plan.duration_days)
+        expire_timestamp_ms = int(datetime.timestamp(expires_at)) * 1000
+        label = self._create_label(panel.flag_emoji, panel.default_label, user_id)
+        email = f"{label}@{panel.name}" # Example email format
+        client_data = {
+            "id": client_uuid,
+            "email": email, # Use generated email
+            "remark": label, # Use label as remark
+            "enable": True,
+            "total_gb": plan.traffic_gb, # GB؛ XuiClient آن را به بایت تبدیل می‌کند
+            "expiry_time": expire_timestamp_ms,
+            "flow": plan.flow or "",
+            "limit_ip": plan.ip_limit or 1,
+            "sub_id": transfer_id or self._generate_transfer_id(user_id),
+        }
+        return {
+            "client_data": client_data,
+            "label": label,
+            "email": email,
+            "expires_at": expires_at,
+            "expiry_time": expire_timestamp_ms,
+        }
+
+    @staticmethod
+    def _build_account_data(
+        user_id: int,
+        plan: Plan,
+        inbound: Inbound,
+        panel: Panel,
+        spec: Dict[str, Any],
+        config_url: Optional[str],
+        order_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """ساخت داده رکورد ClientAccount از مشخصات کلاینت ساخته شده در پنل"""
+        return {
+            "user_id": user_id,
+            "order_id": order_id,
+            "panel_id": panel.id,
+            "inbound_id": inbound.id, # Our DB inbound ID
+            "plan_id": plan.id,
+            "remote_uuid": spec["client_data"]["id"],
+            "client_name": spec["label"],
+            "email_name": spec["email"],
+            "expires_at": spec["expires_at"],
+            "expiry_time": spec["expiry_time"],
+            "traffic_limit": plan.traffic_gb,
+            "data_limit": plan.traffic_gb * (1024**3), # تبدیل GB به بایت
+            "traffic_used": 0,
+            "data_used": 0,
+            "status": AccountStatus.ACTIVE,
+            "enable": True,
+            "config_url": config_url,
+            "ip_limit": plan.ip_limit or 1, # Use the value from plan
+            "created_at": datetime.utcnow() # Ensure UTC time
+        }
+
     async def provision_account(
         self,
         user_id: int,
@@ -100,52 +185,46 @@ class AccountService:
         logger.info(f"{log_prefix} Starting account provisioning. | شروع فرآیند ایجاد اکانت.")
 
         created_client_uuid_on_panel: Optional[str] = None # برای rollback احتمالی پنل
+        claimed_pool_client = None # کلاینت برداشته شده از استخر گرم (در صورت فعال بودن)
+        pool_release_args: Optional[Tuple] = None # مقادیر لازم برای بازگرداندن کلاینت استخر پس از rollback
 
         try:
-            # 1. محاسبه تاریخ انقضا و حجم ترافیک
-            expires_at = datetime.utcnow() + timedelta(days=plan.duration_days)
-            traffic_total_bytes = plan.traffic_gb * (1024**3) # تبدیل GB به بایت
-            logger.debug(f"{log_prefix} Calculated expiry: {expires_at}, traffic: {plan.traffic_gb} GB. | محاسبه تاریخ انقضا و ترافیک.")
-
-            # 2. تولید مشخصات کلاینت (UUID, label, email, transfer_id)
-            client_uuid = str(uuid.uuid4())
-            label = self._create_label(panel.flag_emoji, panel.default_label, user_id)
-            email = f"{label}@{panel.name}" # Example email format
-            transfer_id = self._generate_transfer_id(user_id)
-
-            logger.debug(f"{log_prefix} Generated client details: UUID={client_uuid}, Label={label}, Email={email}. | تولید مشخصات کلاینت.")
-
-            # 3. آماده‌سازی داده‌های کلاینت برای پنل
-            expire_timestamp_ms = int(datetime.timestamp(expires_at)) * 1000
-            client_data_for_panel = {
-                "id": client_uuid,
-                "email": email, # Use generated email
-                "remark": label, # Use label as remark
-                "enable": True,
-                "total_gb": plan.traffic_gb, # XUI client likely expects GB directly here, confirm ClientService logic
-                "expiry_time": expire_timestamp_ms,
-                "flow": plan.flow or "",
-                "limit_ip": plan.ip_limit or 1,
-                "sub_id": transfer_id
-            }
+            # 1. تولید مشخصات کلاینت (UUID, label, email, transfer_id، انقضا و حجم)
+            # در صورت فعال بودن استخر گرم، یک کلاینت از پیش ساخته شده به صورت اتمی برداشته می‌شود
+            claimed_pool_client = await self.warm_pool_service.claim(inbound.id, user_id)
+            if claimed_pool_client:
+                pool_release_args = (panel.id, inbound.remote_id, claimed_pool_client.remote_uuid, claimed_pool_client.email_name, claimed_pool_client.sub_id)
+            client_uuid = claimed_pool_client.remote_uuid if claimed_pool_client else str(uuid.uuid4())
+            spec = self._build_client_spec(
+                user_id, plan, panel, client_uuid, claimed_pool_client.sub_id if claimed_pool_client else None
+            )
+            email = spec["email"]
+            client_data_for_panel = spec["client_data"]
+
+            logger.debug(f"{log_prefix} Generated client details: UUID={client_uuid}, Label={spec['label']}, Email={email}, Expiry={spec['expires_at']}. | تولید مشخصات کلاینت.")
             logger.debug(f"{log_prefix} Prepared client data for panel API: {client_data_for_panel}. | آماده‌سازی داده برای API پنل.")
 
-            # 4. دریافت کلاینت XUI از PanelService
+            # 2. دریافت کلاینت XUI از PanelService
             # این کار حالا داخل ClientService انجام می‌شود.
             # panel_xui_client = await self.panel_service._get_xui_client(panel) # Private method call not ideal
 
-            # 5. ایجاد کلاینت در پنل از طریق ClientService
-            logger.info(f"{log_prefix} Calling ClientService to create client on panel {panel.id}. | فراخوانی ClientService برای ایجاد کلاینت در پنل.")
-            
-            panel_response = await self.client_service._create_client_on_panel(
-                panel=panel,
-                inbound_id=inbound.remote_id,
-                client_data=client_data_for_panel
-            )
-            created_client_uuid_on_panel = client_uuid # Set for potential rollback
-            logger.info(f"{log_prefix} Client successfully created on panel via ClientService. Response: {panel_response}. | کلاینت با موفقیت در پنل ایجاد شد.")
-
-            # 6. دریافت URL کانفیگ از طریق ClientService
+            # 3. ایجاد کلاینت در پنل از طریق ClientService
+            if claimed_pool_client:
+                # کلاینت از قبل در پنل وجود دارد: فقط اعمال مشخصات پلن و فعال‌سازی
+                logger.info(f"{log_prefix} Activating pooled client {client_uuid} on panel {panel.id}. | فعال‌سازی کلاینت استخر گرم در پنل.")
+                await self.warm_pool_service.activate_on_panel(panel, inbound.remote_id, claimed_pool_client, client_data_for_panel)
+            else:
+                logger.info(f"{log_prefix} Calling ClientService to create client on panel {panel.id}. | فراخوانی ClientService برای ایجاد کلاینت در پنل.")
+                
+                panel_response = await self.client_service._create_client_on_panel(
+                    panel=panel,
+                    inbound_id=inbound.remote_id,
+                    client_data=client_data_for_panel
+                )
+                created_client_uuid_on_panel = client_uuid # Set for potential rollback
+                logger.info(f"{log_prefix} Client successfully created on panel via ClientService. Response: {panel_response}. | کلاینت با موفقیت در پنل ایجاد شد.")
+
+            # 4. دریافت URL کانفیگ از طریق ClientService
             logger.info(f"{log_prefix} Calling ClientService to get config URL for UUID {client_uuid}. | فراخوانی ClientService برای دریافت URL کانفیگ.")
             
             config_url = await self.client_service._generate_config_url(
@@ -156,28 +235,8 @@ class AccountService:
             )
             logger.info(f"{log_prefix} Config URL received: {config_url}. | URL کانفیگ دریافت شد.")
 
-            # 7. ایجاد رکورد ClientAccount در دیتابیس
-            account_data = {
-                "user_id": user_id,
-                "order_id": order_id,
-                "panel_id": panel.id,
-                "inbound_id": inbound.id, # Our DB inbound ID
-                "plan_id": plan.id,
-                "remote_uuid": client_uuid,
-                "client_name": label,
-                "email_name": email,
-                "expires_at": expires_at,
-                "expiry_time": expire_timestamp_ms,
-                "traffic_limit": plan.traffic_gb,
-                "data_limit": traffic_total_bytes,
-                "traffic_used": 0,
-                "data_used": 0,
-                "status": AccountStatus.ACTIVE,
-                "enable": True,
-                "config_url": config_url,
-                "ip_limit": plan.ip_limit or 1, # Use the value from plan
-                "created_at": datetime.utcnow() # Ensure UTC time
-            }
+            # 5. ایجاد رکورد ClientAccount در دیتابیس
+            account_data = self._build_account_data(user_id, plan, inbound, panel, spec, config_url, order_id)
             logger.debug(f"{log_prefix} Prepared ClientAccount data for DB: {account_data}. | آماده‌سازی داده ClientAccount برای دیتابیس.")
 
             client_account = await self.account_repo.create(account_data)
@@ -185,7 +244,7 @@ class AccountService:
                  logger.error(f"{log_prefix} Failed to create ClientAccount in DB after panel creation. Rolling back panel. | عدم موفقیت در ایجاد رکورد دیتابیس پس از ایجاد در پنل.")
                  raise ValueError("ایجاد رکورد اکانت در دیتابیس ناموفق بود.") # Generic error
 
-            # 8. Flush کردن تغییرات دیتابیس (بدون commit)
+            # 6. Flush کردن تغییرات دیتابیس (بدون commit)
             await self.session.flush([client_account]) # Flush only this object
             logger.info(f"{log_prefix} ClientAccount flushed to DB. Account ID: {client_account.id}. | رکورد ClientAccount در دیتابیس Flush شد.")
 
@@ -203,6 +262,9 @@ class AccountService:
             if created_client_uuid_on_panel:
                 logger.warning(f"{log_prefix} Attempting to roll back panel client creation for UUID {created_client_uuid_on_panel}. | تلاش برای بازگردانی ایجاد کلاینت در پنل.")
                 await self.client_service._rollback_panel_creation(panel, created_client_uuid_on_panel, log_prefix)
+            # کلاینت استخر گرم به حالت غیرفعال برمی‌گردد (رکورد استخر با rollback دوباره آزاد شده است)
+            if pool_release_args:
+                await self.warm_pool_service.release_on_panel(*pool_release_args)
             raise # Re-raise the caught exception
 
         except Exception as e: # Catch potential errors from ClientService calls or others
@@ -213,9 +275,87 @@ class AccountService:
             if created_client_uuid_on_panel:
                 logger.warning(f"{log_prefix} Attempting to roll back panel client creation for UUID {created_client_uuid_on_panel}. | تلاش برای بازگردانی ایجاد کلاینت در پنل.")
                 await self.client_service._rollback_panel_creation(panel, created_client_uuid_on_panel, log_prefix)
+            # کلاینت استخر گرم به حالت غیرفعال برمی‌گردد (رکورد استخر با rollback دوباره آزاد شده است)
+            if pool_release_args:
+                await self.warm_pool_service.release_on_panel(*pool_release_args)
             # Wrap unexpected errors for clarity
             raise ValueError(f"خطای پیش‌بینی نشده در ایجاد اکانت: {e}") from e
 
+    async def provision_accounts_batch(self, requests: List[AccountProvisionRequest]) -> List[Optional[ClientAccount]]:
+        """
+        ایجاد دسته‌ای اکانت‌ها: درخواست‌ها بر اساس (پنل، inbound) گروه‌بندی و کلاینت‌های هر گروه
+        با درخواست‌های addClient دسته‌ای ساخته می‌شوند؛ بنابراین تعداد درخواست‌های پنل به تعداد
+        گروه‌ها بستگی دارد نه تعداد اکانت‌ها. رکوردهای دیتابیس با یک flush ایجاد می‌شوند (بدون commit).
+
+        کلاینت‌هایی که پنل رد کند فقط همان ورودی را ناموفق می‌کنند. اگر ثبت در دیتابیس شکست
+        بخورد، نشست rollback و تمام کلاینت‌های ساخته شده در پنل حذف می‌شوند.
+
+        Args:
+            requests: لیست درخواست‌های ایجاد اکانت.
+
+        Returns:
+            لیست هم‌ترتیب با ورودی: ClientAccount ایجاد شده یا None برای درخواست‌های ناموفق.
+
+        Raises:
+            SQLAlchemyError: در صورت بروز خطای پایگاه داده.
+        """
+        specs = [
+            self._build_client_spec(req.user_id, req.plan, req.panel, str(uuid.uuid4()))
+            for req in requests
+        ]
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for index, req in enumerate(requests):
+            groups.setdefault((req.panel.id, req.inbound.id), []).append(index)
+
+        created: List[int] = []
+        for (panel_id, inbound_id), indexes in groups.items():
+            inbound = requests[indexes[0]].inbound
+            log_prefix = f"[Panel ID: {panel_id}, Inbound ID: {inbound_id}]"
+            try:
+                failed = await self.client_service.create_clients_on_panel(
+                    panel_id, inbound.remote_id, [specs[i]["client_data"] for i in indexes]
+                )
+            except Exception as e:
+                logger.error(f"{log_prefix} Batch client creation failed for {len(indexes)} accounts: {e}. | ایجاد دسته‌ای کلاینت‌ها در پنل ناموفق بود.", exc_info=True)
+                continue
+            for i in indexes:
+                client_uuid = specs[i]["client_data"]["id"]
+                if client_uuid in failed:
+                    logger.warning(f"{log_prefix} Client for user {requests[i].user_id} was rejected by panel: {failed[client_uuid]}. | کلاینت توسط پنل رد شد.")
+                else:
+                    created.append(i)
+
+        rows = []
+        for i in created:
+            req, spec = requests[i], specs[i]
+            try:
+                config_url = await self.client_service._generate_config_url(
+                    panel=req.panel, inbound=req.inbound, client_uuid=spec["client_data"]["id"], client_email=spec["email"]
+                )
+            except Exception as e:
+                logger.warning(f"[User ID: {req.user_id}] Could not get config URL in batch provisioning: {e}. | دریافت لینک کانفیگ ناموفق بود.")
+                config_url = None
+            rows.append(self._build_account_data(req.user_id, req.plan, req.inbound, req.panel, spec, config_url, req.order_id))
+
+        results: List[Optional[ClientAccount]] = [None] * len(requests)
+        if not rows:
+            return results
+        try:
+            accounts = await self.account_repo.create_many(rows)
+        except SQLAlchemyError as db_err:
+            logger.error(f"Database error storing {len(rows)} batch-provisioned accounts: {db_err}. Rolling back panel clients. | خطای دیتابیس در ثبت اکانت‌های دسته‌ای.", exc_info=True)
+            await self.session.rollback()
+            for i in created:
+                try:
+                    await self.client_service._delete_client_on_panel(requests[i].panel.id, specs[i]["client_data"]["id"])
+                except Exception as e:
+                    logger.error(f"Failed to roll back panel client {specs[i]['client_data']['id']}: {e}. | حذف کلاینت از پنل ناموفق بود.")
+            raise
+        for i, account in zip(created, accounts):
+            results[i] = account
+        logger.info(f"Batch provisioning finished: {len(accounts)} of {len(requests)} accounts created in {len(groups)} panel/inbound groups. | ایجاد دسته‌ای اکانت‌ها پایان یافت.")
+        return results
+
     async def get_account_by_id(self, account_id: int) -> Optional[ClientAccount]:
         """
         دریافت اطلاعات یک اکانت خاص با شناسه آن.
@@ -260,19 +400,20 @@ class AccountService:
             logger.error(f"Database error fetching account UUID {client_uuid}: {e}. | خطای دیتابیس در دریافت اکانت.", exc_info=True)
             return None # Or re-raise
 
-    async def get_active_accounts_by_user(self, user_id: int) -> List[ClientAccount]:
+    async def get_active_accounts_by_user(self, user_id: int, profile: Optional[str] = None) -> List[ClientAccount]:
         """
         دریافت لیست تمام اکانت‌های فعال یک کاربر.
 
         Args:
             user_id: شناسه کاربر.
+            profile: پروفایل بارگذاری رابطه‌ها (مثلاً "account_list" برای نمایش لوکیشن).
 
         Returns:
             لیستی از اشیاء ClientAccount فعال.
         """
         logger.info(f"Fetching active accounts for user ID: {user_id}. | دریافت اکانت‌های فعال کاربر.")
         try:
-            accounts = await self.account_repo.get_active_by_user_id(user_id)
+            accounts = await self.account_repo.get_active_by_user_id(user_id, profile)
             logger.debug(f"Found {len(accounts)} active accounts for user {user_id}. | {len(accounts)} اکانت فعال یافت شد.")
             return accounts
         except SQLAlchemyError as e:
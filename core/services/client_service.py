@@ -7,7 +7,6 @@ from datetime import datetime, timedelta
 import uuid
 from core.log_config import logger
 import os
-import qrcode
 import base64
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -36,7 +35,9 @@ if TYPE_CHECKING:
     from core.services.panel_service import PanelService
 
 # Integrations & Exceptions
-from core.integrations.xui_client import XuiClient, XuiConnectionError, XuiAuthenticationError, XuiNotFoundError
+from core.utils.qr_renderer import qr_renderer
+from core.integrations.circuit_breaker import panel_circuit_breaker
+from core.integrations.xui_client import XuiClient, batch_transport_failed, XuiConnectionError, XuiAuthenticationError, XuiNotFoundError
 
 # Custom Exceptions (Keep relevant ones or define centrally)
 class OrderNotFoundError(Exception):
@@ -213,9 +214,8 @@ class ClientService:
             else:
                  logger.warning(f"{log_prefix} Could not retrieve config URL, proceeding without it. | دریافت لینک کانفیگ ناموفق بود، ادامه بدون لینک.")
 
-            # --- Generate and Save QR Code ---
-            qr_code_path = await self._generate_and_save_qr(user_id, created_client_uuid_on_panel, config_url) if config_url else None
-            qr_base64 = await self._get_qr_base64(qr_code_path) if qr_code_path else None
+            # --- Save QR Code to disk only if QR_CODE_DIR is set (delivery renders on demand via send_qr_code) ---
+            qr_code_path = await qr_renderer.save(config_url) if config_url else None
 
             # --- 5. Create ClientAccount in Database ---
             logger.info(f"{log_prefix} Preparing to save ClientAccount to database. | آماده‌سازی برای ذخیره اکانت کلاینت در دیتابیس.")
@@ -240,8 +240,6 @@ class ClientService:
             )
             self.session.add(client_account)
             logger.info(f"{log_prefix} ClientAccount object created and added to session. | آبجکت ClientAccount ایجاد و به نشست اضافه شد.")
-            # افزودن base64 به خروجی برای ارسال نوتیفیکیشن
-            client_account.qr_base64 = qr_base64
 
             # --- 6. Flush Session ---
             logger.info(f"{log_prefix} Flushing session to save ClientAccount. | Flush کردن نشست برای ذخیره ClientAccount.")
@@ -391,6 +389,51 @@ class ClientService:
             await self.session.rollback()
             return False
 
+    async def _create_client_on_panel(self, panel: Panel, inbound_id: int, client_data: Dict[str, Any]) -> Dict[str, Any]:
+        """ایجاد یک کلاینت در پنل (مسیر دسته‌ای با یک کلاینت)."""
+        failed = await self.create_clients_on_panel(panel.id, inbound_id, [client_data])
+        if failed:
+            raise PanelOperationFailedError(f"ایجاد کلاینت در پنل {panel.id} ناموفق بود: {failed[str(client_data['id'])]}")
+        return {"success": True, "obj": str(client_data["id"])}
+
+    async def create_clients_on_panel(
+        self, panel_id: int, inbound_id: int, clients_data: List[Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        ایجاد دسته‌ای کلاینت‌ها در یک inbound پنل با یک درخواست addClient برای هر دسته.
+
+        Args:
+            panel_id: شناسه پنل.
+            inbound_id: شناسه inbound در پنل (remote_id).
+            clients_data: داده کلاینت‌ها (هر کدام با `id`).
+
+        Returns:
+            Dict[str, str]: فقط کلاینت‌های ناموفق (UUID -> پیام خطا)؛ خالی یعنی همه ساخته شدند.
+
+        Raises:
+            PanelUnavailableError, XuiConnectionError, XuiAuthenticationError: اگر پنل در دسترس نباشد.
+        """
+        log_prefix = f"[Panel ID: {panel_id}, Inbound: {inbound_id}]"
+        panel_xui_client = await self._get_xui_client(panel_id)
+        results = await panel_circuit_breaker.call(
+            panel_id, lambda: panel_xui_client.create_clients(inbound_id, clients_data), failed=batch_transport_failed
+        )
+        failed = {client_uuid: str(error) for client_uuid, error in results.items() if error is not None}
+        logger.info(f"{log_prefix} Batch client creation: {len(results) - len(failed)} created, {len(failed)} failed. | ایجاد دسته‌ای کلاینت‌ها در پنل.")
+        return failed
+
+    async def _generate_config_url(self, panel: Panel, inbound: Inbound, client_uuid: str, client_email: str) -> Optional[str]:
+        """دریافت لینک کانفیگ کلاینت از snapshot پنل (بدون درخواست جداگانه برای هر کلاینت)."""
+        panel_xui_client = await self.panel_service._get_xui_client(panel)
+        try:
+            # خواندن snapshot از طریق circuit breaker تا خطای پنل در مسیر خرید در سلامت پنل ثبت شود؛
+            # get_config سپس از همین snapshot کش شده می‌خواند
+            await panel_circuit_breaker.call(panel.id, panel_xui_client.get_snapshot)
+        except Exception as e:
+            logger.error(f"[Panel ID: {panel.id}] Failed to read panel snapshot for config URL: {e}. | دریافت snapshot پنل برای لینک کانفیگ ناموفق بود.")
+            return None
+        return await panel_xui_client.get_config(client_uuid) or None
+
     async def _delete_client_on_panel(self, panel_id: int, client_uuid: str) -> bool:
         """دریافت یک نمونه XuiClient پیکربندی و لاگین شده برای پنل از طریق PanelService."""
         logger.info(f"[Panel ID: {panel_id}] Attempting to delete client from panel. | تلاش برای حذف کلاینت از پنل.")
@@ -398,7 +441,7 @@ class ClientService:
         try:
             panel_xui_client = await self._get_xui_client(panel_id)
             logger.debug(f"[Panel ID: {panel_id}] Executing delete_client on XuiClient. | اجرای متد delete_client روی XuiClient.")
-            success = await panel_xui_client.delete_client(client_uuid)
+            success = await panel_circuit_breaker.call(panel_id, lambda: panel_xui_client.delete_client(client_uuid))
 
             if success:
                 logger.info(f"[Panel ID: {panel_id}] Client successfully deleted from panel. | کلاینت با موفقیت از پنل حذف شد.")
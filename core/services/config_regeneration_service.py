@@ -0,0 +1,65 @@
+"""
+بازسازی گروهی لینک‌های کانفیگ اکانت‌ها پس از تغییر تنظیمات انتقال یک inbound
+
+وقتی پورت، SNI، کلیدهای REALITY یا تنظیمات شبکه یک inbound در پنل تغییر می‌کند،
+`config_url` تمام اکانت‌های آن inbound نامعتبر می‌شود. این سرویس اکانت‌ها را به صورت
+تکه‌ای (keyset روی ایندکس inbound_id) می‌خواند، لینک‌ها را از یک قالب کامپایل شده
+می‌سازد و با UPDATE های دسته‌ای می‌نویسد؛ بنابراین حافظه مصرفی مستقل از تعداد اکانت‌هاست.
+"""
+
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.services.notification_dispatcher import InboundBroadcast, notification_dispatcher
+from core.services.subscription_service import subscription_cache
+from core.settings import CONFIG_REGEN_CHUNK_SIZE, CONFIG_REGEN_NOTIFY_USERS
+from core.utils.config_generator import ConfigTemplate
+from db.repositories.client_repo import ClientRepository
+
+logger = logging.getLogger(__name__)
+
+LINK_CHANGED_MESSAGE = (
+    "🔄 تنظیمات سرور یکی از اکانت‌های شما تغییر کرد و لینک کانفیگ جدید ساخته شد.\n"
+    "لطفاً لینک جدید را از بخش «اکانت‌های من» دریافت و در برنامه خود جایگزین کنید."
+)
+
+
+class ConfigRegenerationService:
+    """بازسازی و ذخیره لینک کانفیگ تمام اکانت‌های یک inbound"""
+
+    def __init__(self, session: AsyncSession, chunk_size: int = CONFIG_REGEN_CHUNK_SIZE):
+        self.session = session
+        self.client_repo = ClientRepository(session)
+        self.chunk_size = chunk_size
+
+    async def regenerate_inbound_links(self, inbound_id: int, template: ConfigTemplate, notify: bool = CONFIG_REGEN_NOTIFY_USERS) -> int:
+        """
+        بازسازی `config_url` تمام اکانت‌های یک inbound از قالب جدید آن.
+
+        Args:
+            inbound_id: شناسه دیتابیسی inbound.
+            template: قالب کامپایل شده لینک با تنظیمات جدید inbound.
+            notify: ارسال پیام به کاربران دارای اکانت فعال پس از commit.
+
+        Returns:
+            تعداد اکانت‌هایی که لینک آنها بازنویسی شد.
+
+        Raises:
+            SQLAlchemyError: در صورت بروز خطای دیتابیس (commit/rollback در لایه بالاتر).
+        """
+        total = 0
+        async for rows in self.client_repo.iter_link_targets(inbound_id, self.chunk_size):
+            links = {
+                row.id: template.render(row.remote_uuid, row.email_name or row.remote_uuid)
+                for row in rows
+            }
+            total += await self.client_repo.bulk_update_config_urls(links, self.chunk_size)
+
+        # بدنه‌های اشتراک کش شده لینک‌های قدیمی را دارند
+        if total:
+            subscription_cache.clear()
+        logger.info(f"لینک کانفیگ {total} اکانت inbound {inbound_id} بازسازی شد. (Regenerated config links of {total} accounts on inbound {inbound_id}.)")
+        if total and notify:
+            notification_dispatcher.enqueue_after_commit(self.session, InboundBroadcast(inbound_id, LINK_CHANGED_MESSAGE))
+        return total
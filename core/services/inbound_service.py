@@ -6,8 +6,9 @@ import logging
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.models.inbound import Inbound
+from db.models.inbound import Inbound, InboundStatus
 from db.repositories.inbound_repo import InboundRepository
+from core.services.panel_placement import panel_load_cache
 
 logger = logging.getLogger(__name__)
 
@@ -74,12 +75,22 @@ class InboundService:
             شیء Inbound مناسب یا None در صورت عدم وجود.
         """
         logger.debug(f"جستجوی اینباند مناسب برای پنل: {panel_id}")
-        inbounds = await self.repository.get_active_inbounds_by_panel_id(panel_id)
+        await panel_load_cache.ensure_fresh(self.session)
+        selected = panel_load_cache.select_inbound(panel_id)
         
+        if selected:
+            inbound = await self.repository.get_by_id(selected.inbound_id)
+            if inbound and inbound.status == InboundStatus.ACTIVE:
+                # ثبت محلی اکانت جدید تا انتخاب‌های بعدی قبل از refresh کش پخش شوند
+                panel_load_cache.record_placement(panel_id, inbound.id)
+                return inbound
+        elif panel_load_cache.knows_panel(panel_id):
+            logger.warning(f"تمام اینباندهای پنل {panel_id} به ظرفیت کامل رسیده‌اند.")
+            return None
+        
+        # کش اطلاعاتی از این پنل ندارد (مثلاً پنل تازه همگام شده): اولین اینباند فعال
+        inbounds = await self.repository.get_by_panel_id(panel_id, status=InboundStatus.ACTIVE)
         if not inbounds:
             logger.warning(f"هیچ اینباند فعالی برای پنل {panel_id} یافت نشد.")
             return None
-            
-        # فعلاً اولین اینباند فعال را انتخاب می‌کنیم
-        # در آینده می‌توان الگوریتم‌های پیچیده‌تری برای انتخاب اینباند اضافه کرد
-        return inbounds[0] 
\ No newline at end of file
+        return inbounds[0]
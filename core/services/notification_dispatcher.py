@@ -0,0 +1,145 @@
+"""
+ارسال صف‌بندی شده و با نرخ محدود پیام‌های گروهی به کاربران
+
+برای اطلاع‌رسانی‌هایی که ممکن است ده‌ها هزار کاربر را شامل شوند (مثلاً تغییر لینک کانفیگ
+همه اکانت‌های یک inbound). هر کار فقط شناسه inbound و متن پیام را نگه می‌دارد؛ گیرنده‌ها
+هنگام ارسال به صورت تکه‌ای (keyset) از دیتابیس خوانده می‌شوند و پیام‌ها با سقف
+`NOTIFICATION_RATE_PER_SECOND` ارسال می‌شوند تا از محدودیت تلگرام عبور نکنیم.
+
+کارها فقط پس از commit تراکنشی که آنها را ثبت کرده وارد صف می‌شوند (`enqueue_after_commit`)،
+بنابراین کاربر هرگز پیش از ذخیره شدن لینک جدید پیام دریافت نمی‌کند.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.settings import CONFIG_REGEN_CHUNK_SIZE, NOTIFICATION_QUEUE_SIZE, NOTIFICATION_RATE_PER_SECOND
+from db import async_session_maker
+from db.repositories.client_repo import ClientRepository
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_inbound_notifications"
+
+
+@dataclass(frozen=True)
+class InboundBroadcast:
+    """پیام برای تمام کاربران دارای اکانت فعال روی یک inbound"""
+    inbound_id: int
+    message: str
+
+
+class NotificationDispatcher:
+    """صف پیام‌های گروهی با یک worker پس‌زمینه و ارسال با نرخ محدود"""
+
+    def __init__(self, rate_per_second: float = NOTIFICATION_RATE_PER_SECOND, max_queue: int = NOTIFICATION_QUEUE_SIZE):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self.max_queue = max_queue
+        self.bot: Optional[Bot] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self, bot: Bot) -> None:
+        """شروع worker ارسال (یک بار پس از ساخت ربات)"""
+        self.bot = bot
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.create_task(self._run(), name="notification_dispatcher")
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def enqueue(self, job: InboundBroadcast) -> bool:
+        """افزودن کار به صف؛ اگر dispatcher شروع نشده یا صف پر باشد False برمی‌گرداند"""
+        if self._queue is None or self.bot is None:
+            logger.warning(f"Dispatcher پیام شروع نشده است؛ اطلاع‌رسانی inbound {job.inbound_id} رد شد. (Notification dispatcher not started; dropped broadcast for inbound {job.inbound_id}.)")
+            return False
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"صف اطلاع‌رسانی پر است؛ اطلاع‌رسانی inbound {job.inbound_id} رد شد. (Notification queue full; dropped broadcast for inbound {job.inbound_id}.)")
+            return False
+
+    def enqueue_after_commit(self, session: AsyncSession, job: InboundBroadcast) -> None:
+        """ثبت کار تا پس از commit موفق `session` وارد صف شود (با rollback دور ریخته می‌شود)"""
+        sync_session = session.sync_session
+        pending: List[InboundBroadcast] = sync_session.info.setdefault(_PENDING_KEY, [])
+        pending.append(job)
+        if not event.contains(sync_session, "after_commit", self._flush_pending):
+            event.listen(sync_session, "after_commit", self._flush_pending)
+            event.listen(sync_session, "after_rollback", self._discard_pending)
+
+    def _flush_pending(self, sync_session) -> None:
+        for job in sync_session.info.pop(_PENDING_KEY, []):
+            self.enqueue(job)
+
+    def _discard_pending(self, sync_session) -> None:
+        sync_session.info.pop(_PENDING_KEY, None)
+
+    async def _run(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._broadcast(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"خطا در ارسال اطلاع‌رسانی inbound {job.inbound_id}: {e} (Error broadcasting to inbound {job.inbound_id}: {e})", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _broadcast(self, job: InboundBroadcast) -> None:
+        sent = failed = 0
+        after_user_id = 0
+        while True:
+            # نشست کوتاه برای هر تکه گیرنده تا اتصال دیتابیس در طول ارسال نگه داشته نشود
+            async with async_session_maker() as session:
+                recipients = await ClientRepository(session).get_active_recipients_by_inbound(
+                    job.inbound_id, after_user_id=after_user_id, limit=CONFIG_REGEN_CHUNK_SIZE
+                )
+            if not recipients:
+                break
+            for row in recipients:
+                if await self._send(row.telegram_id, job.message):
+                    sent += 1
+                else:
+                    failed += 1
+            if len(recipients) < CONFIG_REGEN_CHUNK_SIZE:
+                break
+            after_user_id = recipients[-1].id
+        logger.info(f"اطلاع‌رسانی inbound {job.inbound_id} تمام شد: {sent} ارسال، {failed} ناموفق. (Broadcast for inbound {job.inbound_id} done: {sent} sent, {failed} failed.)")
+
+    async def _send(self, telegram_id: int, message: str) -> bool:
+        for _ in range(3):
+            try:
+                await self.bot.send_message(telegram_id, message)
+                await asyncio.sleep(self.interval)
+                return True
+            except TelegramRetryAfter as e:
+                # محدودیت نرخ تلگرام: صبر به اندازه درخواستی و تلاش مجدد
+                await asyncio.sleep(e.retry_after)
+            except TelegramForbiddenError:
+                # کاربر ربات را مسدود کرده است
+                return False
+            except TelegramAPIError as e:
+                logger.debug(f"Failed to notify {telegram_id}: {e}")
+                return False
+        return False
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+notification_dispatcher = NotificationDispatcher()
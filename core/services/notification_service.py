@@ -8,10 +8,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from datetime import datetime
 from aiogram import Bot
+from aiogram.types import InputFile
 
 from core import settings
+from core.integrations.telegram_file_cache import telegram_file_cache
+from core.utils.qr_renderer import qr_renderer
 from db.repositories.user_repo import UserRepository
 from db.models.notification_log import NotificationLog
+from db.routing import read_only
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +80,59 @@ class NotificationService:
             logger.error(f"Error sending telegram message: {e}")
             return False
     
+    async def send_photo(self, user_id: int, photo: Union[str, InputFile], caption: Optional[str] = None) -> bool:
+        """
+        ارسال تصویر به یک کاربر (مثلاً QR Code ساخته شده در حافظه)
+        
+        Args:
+            user_id (int): شناسه تلگرام کاربر
+            photo: file_id، آدرس یا فایل درون حافظه (BufferedInputFile)
+            caption (str): متن زیر تصویر
+            
+        Returns:
+            bool: موفقیت یا عدم موفقیت ارسال
+        """
+        if not self.bot:
+            return False
+        
+        try:
+            await self.bot.send_photo(user_id, photo, caption=caption)
+            logger.info(f"Photo sent to user {user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error sending telegram photo: {e}")
+            return False
+    
+    async def send_qr_code(self, user_id: int, data: str, caption: Optional[str] = None) -> bool:
+        """
+        ارسال QR Code یک لینک؛ پس از اولین آپلود فقط file_id کش شده ارسال می‌شود
+        
+        Args:
+            user_id (int): شناسه تلگرام کاربر
+            data (str): لینک کانفیگ یا اشتراک
+            caption (str): متن زیر تصویر
+            
+        Returns:
+            bool: موفقیت یا عدم موفقیت ارسال
+        """
+        if not self.bot:
+            return False
+        
+        try:
+            await telegram_file_cache.send_photo(
+                self.bot,
+                user_id,
+                f"qr:{qr_renderer.content_key(data)}",
+                lambda: qr_renderer.render(data),
+                filename="qr.png",
+                caption=caption,
+            )
+            logger.info(f"QR code sent to user {user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error sending QR code: {e}")
+            return False
+    
     async def notify_admin(self, message: str) -> bool:
         """
         ارسال پیام به همه ادمین‌ها
@@ -149,6 +206,7 @@ class NotificationService:
         
         return results
     
+    @read_only
     async def get_notification_logs(self, user_id: int, limit: int = 10) -> List[NotificationLog]:
         """Get notification logs for a user"""
         stmt = (
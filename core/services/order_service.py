@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from db.models.order import Order
 from db.models.enums import OrderStatus
 from db.repositories.order_repo import OrderRepository
+from db.repositories.pagination import Page
 from db.schemas.order import OrderCreate, OrderUpdate
 from core.services.notification_service import NotificationService
 # Fix the circular import
@@ -19,6 +20,7 @@ from core.services.account_service import AccountService
 from core.services.panel_service import PanelService
 from core.services.client_service import ClientService
 from core.services.inbound_service import InboundService
+from core.services.subscription_service import account_link
 from db.repositories.user_repo import UserRepository
 from db.repositories.plan_repo import PlanRepository
 from db.models.transaction import Transaction
@@ -153,13 +155,17 @@ class OrderService:
             logger.error(f"Transaction error while creating order for user {user_id}, plan {plan_id}: {e}", exc_info=True)
             raise OrderCreationError(f"Transaction error: {str(e)}")
     
-    async def get_order_by_id(self, order_id: int) -> Optional[Order]:
-        """Get order details by ID using the repository."""
-        return await self.order_repo.get_by_id(order_id)
+    async def get_order_by_id(self, order_id: int, profile: Optional[str] = None) -> Optional[Order]:
+        """Get order details by ID; `profile` eager-loads the relations a view needs (e.g. "order_detail")."""
+        return await self.order_repo.get_by_id(order_id, profile)
     
-    async def get_user_orders(self, user_id: int, limit: int = 10, offset: int = 0) -> List[Order]:
-        """Get a list of orders for a user using the repository."""
-        return await self.order_repo.get_by_user_id(user_id, limit, offset)
+    async def get_user_orders(self, user_id: int, limit: int = 10, cursor: Optional[str] = None) -> Page[Order]:
+        """Get one page of a user's orders (keyset cursor from the previous page)."""
+        return await self.order_repo.get_by_user_id(user_id, limit, cursor)
+
+    async def get_orders_page(self, status: Optional[OrderStatus] = None, limit: int = 10, cursor: Optional[str] = None) -> Page[Order]:
+        """Get one page of all orders for the admin listing."""
+        return await self.order_repo.get_page(status, limit, cursor)
     
     async def update_order_status(self, order_id: int, new_status: OrderStatus) -> Optional[Order]:
         """
@@ -422,17 +428,16 @@ class OrderService:
         """
         logger.info(f"Attempting wallet payment for order {order_id} (legacy method)")
         
-        # Get order details
-        order = await self.get_order_by_id(order_id)
+        # Get order details with its user and plan in one query
+        order = await self.get_order_by_id(order_id, profile="order_detail")
         if not order:
             return False, "سفارش یافت نشد."
 
         if order.status != OrderStatus.PENDING:
             return False, "وضعیت سفارش معتبر نیست (باید در انتظار پرداخت باشد)."
             
-        # Get user and plan details for the order
-        user = await self.user_repo.get_by_id(order.user_id)
-        plan = await self.plan_repo.get_by_id(order.plan_id)
+        user = order.user
+        plan = order.plan
         
         if not user or not plan:
             return False, "اطلاعات کاربر یا پلن یافت نشد."
@@ -468,8 +473,8 @@ class OrderService:
         """
         logger.info(f"Processing receipt approval for order {order_id} by admin {approved_by_user_id}")
         
-        # Get order details
-        order = await self.get_order_by_id(order_id)
+        # Get order details with its user and plan in one query
+        order = await self.get_order_by_id(order_id, profile="order_detail")
         if not order:
             logger.error(f"Order {order_id} not found for receipt approval")
             return False, "سفارش یافت نشد.", None
@@ -485,9 +490,9 @@ class OrderService:
                 await self.update_order_status(order.id, OrderStatus.PAID)
                 logger.info(f"Order {order.id} status updated to PAID after receipt approval")
                 
-                # 2. Get required data
-                user = await self.user_repo.get_by_id(order.user_id)
-                plan = await self.plan_repo.get_by_id(order.plan_id)
+                # 2. Required data (eager-loaded with the order)
+                user = order.user
+                plan = order.plan
                 
                 if not user or not plan:
                     logger.error(f"User {order.user_id} or plan {order.plan_id} not found")
@@ -586,7 +591,7 @@ class OrderService:
                 logger.warning(f"Can't get plan details for notification to user {user_id}, plan {order.plan_id}")
                 plan_info = "پلن خریداری شده"
             else:
-                plan_info = f"{plan.name} ({plan.data_limit}GB / {plan.duration_days} روز)"
+                plan_info = f"{plan.name} ({plan.traffic_gb}GB / {plan.duration_days} روز)"
 
             # Format the purchase notification
             message_parts = [
@@ -607,10 +612,10 @@ class OrderService:
             if transaction:
                 message_parts.append(f"🔹 شناسه تراکنش: #{transaction.id}")
 
+            link = account_link(account)
+            if link:
+                message_parts.extend([f"", f"🔗 لینک اشتراک:", f"<code>{link}</code>"])
             message_parts.extend([
-                f"",
-                f"🔗 لینک اشتراک:",
-                f"<code>{account.subscription_url}</code>",
                 f"",
                 f"🔄 برای تمدید اشتراک می‌توانید از منوی «خرید و تمدید» اقدام نمایید."
             ])
@@ -623,19 +628,11 @@ class OrderService:
                 parse_mode="HTML"
             )
 
-            # Optionally, also send QR code if available
-            qr_base64 = getattr(account, 'qr_base64', None)
-            if not qr_base64 and getattr(account, 'qr_code_path', None):
-                # تلاش برای تولید base64 از فایل در صورت نبود مقدار
-                import os, base64
-                qr_path = account.qr_code_path
-                if os.path.exists(qr_path):
-                    with open(qr_path, "rb") as f:
-                        qr_base64 = base64.b64encode(f.read()).decode("utf-8")
-            if qr_base64:
-                await self.notification_service.send_photo_base64(
+            # Also send the QR code of the same link (uploaded once, then resent by cached file_id)
+            if link:
+                await self.notification_service.send_qr_code(
                     user_id=user.telegram_id,
-                    base64_data=qr_base64,
+                    data=link,
                     caption="QR Code اشتراک شما"
                 )
 
@@ -674,9 +671,10 @@ class OrderService:
                 logger.warning(f"Can't get plan details for notification to user {user_id}, plan {order.plan_id}")
                 plan_info = "پلن خریداری شده"
             else:
-                plan_info = f"{plan.name} ({plan.data_limit}GB / {plan.duration_days} روز)"
+                plan_info = f"{plan.name} ({plan.traffic_gb}GB / {plan.duration_days} روز)"
 
             # Format the approved receipt notification
+            link = account_link(account)
             message_parts = [
                 f"✅ رسید پرداخت شما تأیید شد!",
                 f"",
@@ -684,12 +682,13 @@ class OrderService:
                 f"🔹 پلن: {plan_info}",
                 f"🔹 لوکیشن: {order.location_name}",
                 f"🔹 مبلغ: {order.amount:,.0f} تومان",
-                f"",
-                f"🔗 لینک اشتراک:",
-                f"<code>{account.subscription_url}</code>",
+            ]
+            if link:
+                message_parts.extend([f"", f"🔗 لینک اشتراک:", f"<code>{link}</code>"])
+            message_parts.extend([
                 f"",
                 f"🔄 برای تمدید اشتراک می‌توانید از منوی «خرید و تمدید» اقدام نمایید."
-            ]
+            ])
 
             # Send the notification
             message = "\n".join(message_parts)
@@ -699,19 +698,11 @@ class OrderService:
                 parse_mode="HTML"
             )
 
-            # Optionally, also send QR code if available
-            qr_base64 = getattr(account, 'qr_base64', None)
-            if not qr_base64 and getattr(account, 'qr_code_path', None):
-                # تلاش برای تولید base64 از فایل در صورت نبود مقدار
-                import os, base64
-                qr_path = account.qr_code_path
-                if os.path.exists(qr_path):
-                    with open(qr_path, "rb") as f:
-                        qr_base64 = base64.b64encode(f.read()).decode("utf-8")
-            if qr_base64:
-                await self.notification_service.send_photo_base64(
+            # Also send the QR code of the same link (uploaded once, then resent by cached file_id)
+            if link:
+                await self.notification_service.send_qr_code(
                     user_id=user.telegram_id,
-                    base64_data=qr_base64,
+                    data=link,
                     caption="QR Code اشتراک شما"
                 )
 
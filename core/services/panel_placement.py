@@ -0,0 +1,308 @@
+"""
+انتخاب پنل و inbound مناسب برای اکانت‌های جدید بر اساس بار (load-aware placement)
+
+بار هر پنل و inbound (تعداد اکانت‌های فعال، ظرفیت `Inbound.max_clients` و آخرین
+CPU/RAM گزارش شده توسط `get_server_status`) در حافظه پروسه کش می‌شود تا تصمیم
+انتخاب بدون کوئری زنده انجام شود. استراتژی انتخاب قابل تعویض است.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.integrations.circuit_breaker import panel_circuit_breaker
+from core.settings import (
+    PANEL_LOAD_CACHE_TTL_SECONDS,
+    PANEL_MAX_CPU_PERCENT,
+    PANEL_MAX_MEMORY_PERCENT,
+    PANEL_PLACEMENT_STRATEGY,
+)
+from db.models.client_account import ClientAccount, AccountStatus
+from db.models.enums import InboundStatus, PanelStatus
+from db.models.inbound import Inbound
+from db.models.panel import Panel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InboundLoad:
+    """بار کش شده یک inbound"""
+    inbound_id: int
+    panel_id: int
+    active_accounts: int = 0
+    max_clients: int = 0  # 0 = بدون محدودیت
+
+    @property
+    def is_full(self) -> bool:
+        return bool(self.max_clients) and self.active_accounts >= self.max_clients
+
+    @property
+    def utilization(self) -> float:
+        """نسبت پر بودن (برای inbound بدون محدودیت، تعداد اکانت‌ها مبنای مقایسه است)"""
+        if self.max_clients:
+            return self.active_accounts / self.max_clients
+        return float(self.active_accounts)
+
+
+@dataclass
+class PanelLoad:
+    """بار کش شده یک پنل"""
+    panel_id: int
+    location_name: str
+    inbounds: Dict[int, InboundLoad] = field(default_factory=dict)
+    cpu_percent: Optional[float] = None
+    memory_percent: Optional[float] = None
+    healthy: bool = True
+    health_score: float = 1.0  # امتیاز سلامت circuit breaker (تأخیر و نرخ خطا)
+
+    @property
+    def active_accounts(self) -> int:
+        return sum(inbound.active_accounts for inbound in self.inbounds.values())
+
+    @property
+    def capacity(self) -> int:
+        """ظرفیت کل؛ 0 اگر حداقل یک inbound بدون محدودیت باشد"""
+        if any(not inbound.max_clients for inbound in self.inbounds.values()):
+            return 0
+        return sum(inbound.max_clients for inbound in self.inbounds.values())
+
+    @property
+    def is_full(self) -> bool:
+        return not self.inbounds or all(inbound.is_full for inbound in self.inbounds.values())
+
+    @property
+    def is_overloaded(self) -> bool:
+        """True اگر CPU یا RAM پنل از سقف تنظیم شده بالاتر باشد"""
+        if self.cpu_percent is not None and self.cpu_percent >= PANEL_MAX_CPU_PERCENT:
+            return True
+        if self.memory_percent is not None and self.memory_percent >= PANEL_MAX_MEMORY_PERCENT:
+            return True
+        return False
+
+    @property
+    def is_available(self) -> bool:
+        return self.healthy and not self.is_full and not self.is_overloaded
+
+    @property
+    def utilization(self) -> float:
+        if self.capacity:
+            return self.active_accounts / self.capacity
+        return float(self.active_accounts)
+
+    def least_loaded_inbound(self) -> Optional[InboundLoad]:
+        candidates = [inbound for inbound in self.inbounds.values() if not inbound.is_full]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda inbound: (inbound.utilization, inbound.inbound_id))
+
+
+class PlacementStrategy:
+    """استراتژی پایه انتخاب پنل از بین پنل‌های در دسترس یک لوکیشن"""
+
+    name = "base"
+
+    def select_panel(self, candidates: List[PanelLoad]) -> Optional[PanelLoad]:
+        raise NotImplementedError
+
+
+class LeastLoadedStrategy(PlacementStrategy):
+    """انتخاب پنلی که کمترین نسبت پر بودن (و سپس کمترین CPU) را دارد"""
+
+    name = "least_loaded"
+
+    def select_panel(self, candidates: List[PanelLoad]) -> Optional[PanelLoad]:
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda load: (load.utilization, -load.health_score, load.cpu_percent or 0.0, load.panel_id),
+        )
+
+
+class WeightedStrategy(PlacementStrategy):
+    """
+    انتخاب تصادفی وزن‌دار بر اساس ظرفیت آزاد و منابع آزاد سرور؛
+    پنل‌های خلوت‌تر شانس بیشتری دارند اما بار روی یک پنل متمرکز نمی‌شود.
+    """
+
+    name = "weighted"
+
+    def select_panel(self, candidates: List[PanelLoad]) -> Optional[PanelLoad]:
+        if not candidates:
+            return None
+        weights = [self._weight(load) for load in candidates]
+        if not any(weights):
+            return candidates[0]
+        return random.choices(candidates, weights=weights, k=1)[0]
+
+    @staticmethod
+    def _weight(load: PanelLoad) -> float:
+        if load.capacity:
+            free_ratio = max(0.0, 1.0 - load.utilization)
+        else:
+            free_ratio = 1.0 / (1.0 + load.active_accounts)
+        headroom = 1.0 - (max(load.cpu_percent or 0.0, load.memory_percent or 0.0) / 100.0)
+        return max(0.0, free_ratio) * max(0.05, headroom) * max(0.05, load.health_score)
+
+
+PLACEMENT_STRATEGIES: Dict[str, PlacementStrategy] = {
+    LeastLoadedStrategy.name: LeastLoadedStrategy(),
+    WeightedStrategy.name: WeightedStrategy(),
+}
+
+
+def get_placement_strategy(name: Optional[str] = None) -> PlacementStrategy:
+    """دریافت استراتژی انتخاب با نام (پیش‌فرض: `PANEL_PLACEMENT_STRATEGY`)"""
+    strategy_name = (name or PANEL_PLACEMENT_STRATEGY).lower()
+    strategy = PLACEMENT_STRATEGIES.get(strategy_name)
+    if strategy is None:
+        logger.warning(f"استراتژی انتخاب پنل '{strategy_name}' ناشناخته است، از least_loaded استفاده می‌شود. (Unknown placement strategy '{strategy_name}', falling back to least_loaded.)")
+        return PLACEMENT_STRATEGIES[LeastLoadedStrategy.name]
+    return strategy
+
+
+def _memory_percent(status: Dict[str, Any]) -> Optional[float]:
+    """استخراج درصد RAM از پاسخ get_server_status"""
+    mem = status.get("mem")
+    if mem is None:
+        return None
+    current = mem.get("current") if isinstance(mem, dict) else getattr(mem, "current", None)
+    total = mem.get("total") if isinstance(mem, dict) else getattr(mem, "total", None)
+    if not current or not total:
+        return None
+    return current / total * 100.0
+
+
+class PanelLoadCache:
+    """
+    کش سراسری بار پنل‌ها و inboundها.
+
+    شمارش اکانت‌ها با یک کوئری تجمعی در هر بار refresh (حداکثر هر
+    `PANEL_LOAD_CACHE_TTL_SECONDS` ثانیه) ساخته می‌شود و هر انتخاب به صورت محلی
+    ثبت می‌شود تا انتخاب‌های پشت سر هم قبل از refresh بعدی روی یک پنل جمع نشوند.
+    """
+
+    def __init__(self, ttl: float = PANEL_LOAD_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._panels: Dict[int, PanelLoad] = {}
+        self._by_location: Dict[str, List[int]] = {}
+        self._server_status: Dict[int, Dict[str, Optional[float]]] = {}
+        self._refreshed_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return not self._refreshed_at or time.monotonic() - self._refreshed_at > self.ttl
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        """refresh کش در صورت منقضی بودن (فقط یک refresh هم‌زمان)"""
+        if not self.is_stale:
+            return
+        async with self._lock:
+            if self.is_stale:
+                await self.refresh(session)
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """بازسازی کش از دیتابیس با دو کوئری (inboundهای فعال و شمارش اکانت‌ها)"""
+        inbound_rows = (await session.execute(
+            select(Inbound.id, Inbound.panel_id, Inbound.max_clients, Panel.location_name)
+            .join(Panel, Panel.id == Inbound.panel_id)
+            .where(Panel._status == PanelStatus.ACTIVE, Inbound.status == InboundStatus.ACTIVE)
+        )).all()
+        count_rows = (await session.execute(
+            select(ClientAccount.inbound_id, func.count(ClientAccount.id))
+            .where(ClientAccount.status == AccountStatus.ACTIVE)
+            .group_by(ClientAccount.inbound_id)
+        )).all()
+        counts = {inbound_id: count for inbound_id, count in count_rows}
+
+        panels: Dict[int, PanelLoad] = {}
+        by_location: Dict[str, List[int]] = {}
+        for inbound_id, panel_id, max_clients, location_name in inbound_rows:
+            load = panels.get(panel_id)
+            if load is None:
+                status = self._server_status.get(panel_id, {})
+                previous = self._panels.get(panel_id)
+                load = PanelLoad(
+                    panel_id=panel_id,
+                    location_name=location_name,
+                    cpu_percent=status.get("cpu"),
+                    memory_percent=status.get("mem"),
+                    healthy=previous.healthy if previous else True,
+                )
+                panels[panel_id] = load
+                by_location.setdefault(location_name, []).append(panel_id)
+            load.inbounds[inbound_id] = InboundLoad(
+                inbound_id=inbound_id,
+                panel_id=panel_id,
+                active_accounts=counts.get(inbound_id, 0),
+                max_clients=max_clients or 0,
+            )
+
+        self._panels = panels
+        self._by_location = by_location
+        self._refreshed_at = time.monotonic()
+        logger.debug(f"کش بار پنل‌ها به‌روز شد: {len(panels)} پنل. (Panel load cache refreshed: {len(panels)} panels.)")
+
+    def record_server_status(self, panel_id: int, status: Optional[Dict[str, Any]]) -> None:
+        """ثبت آخرین وضعیت سرور (CPU/RAM) یک پنل؛ None یعنی پنل پاسخ نداده و ناسالم است"""
+        load = self._panels.get(panel_id)
+        if status is None:
+            if load is not None:
+                load.healthy = False
+            return
+        cpu = status.get("cpu")
+        snapshot = {"cpu": float(cpu) if cpu is not None else None, "mem": _memory_percent(status)}
+        self._server_status[panel_id] = snapshot
+        if load is not None:
+            load.cpu_percent = snapshot["cpu"]
+            load.memory_percent = snapshot["mem"]
+            load.healthy = True
+
+    def set_healthy(self, panel_id: int, healthy: bool) -> None:
+        """علامت‌گذاری سلامت یک پنل (پنل ناسالم در انتخاب نادیده گرفته می‌شود)"""
+        load = self._panels.get(panel_id)
+        if load is not None:
+            load.healthy = healthy
+
+    def select_panel(self, location_name: str, strategy: Optional[PlacementStrategy] = None) -> Optional[PanelLoad]:
+        """انتخاب پنل برای یک لوکیشن از روی کش (بدون کوئری)؛ پنل‌های با مدار باز نادیده گرفته می‌شوند"""
+        candidates = []
+        for panel_id in self._by_location.get(location_name, []):
+            load = self._panels[panel_id]
+            if panel_circuit_breaker.is_open(panel_id):
+                continue
+            load.health_score = panel_circuit_breaker.health(panel_id).score
+            if load.is_available:
+                candidates.append(load)
+        return (strategy or get_placement_strategy()).select_panel(candidates)
+
+    def knows_panel(self, panel_id: int) -> bool:
+        """آیا بار این پنل در کش موجود است؟"""
+        return panel_id in self._panels
+
+    def select_inbound(self, panel_id: int) -> Optional[InboundLoad]:
+        """انتخاب کم‌بارترین inbound غیر پر یک پنل از روی کش"""
+        load = self._panels.get(panel_id)
+        return load.least_loaded_inbound() if load else None
+
+    def record_placement(self, panel_id: int, inbound_id: int) -> None:
+        """ثبت محلی یک اکانت جدید تا refresh بعدی"""
+        load = self._panels.get(panel_id)
+        if load is not None and inbound_id in load.inbounds:
+            load.inbounds[inbound_id].active_accounts += 1
+
+    def invalidate(self) -> None:
+        """منقضی کردن کش تا در استفاده بعدی از دیتابیس بازسازی شود"""
+        self._refreshed_at = 0.0
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+panel_load_cache = PanelLoadCache()
@@ -2,8 +2,10 @@
 سرویس مدیریت پنل‌ها و تنظیمات inbound
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional, Dict, Any
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import json
 from urllib.parse import urlparse # Added for default name generation
@@ -16,9 +18,18 @@ from sqlalchemy.exc import SQLAlchemyError
 from db.models.panel import Panel, PanelStatus, PanelType
 from db.models.inbound import Inbound, InboundStatus
 from core.integrations.xui_client import XuiClient, XuiAuthenticationError, XuiConnectionError
+from core.integrations.xui_registry import xui_client_registry
+from core.integrations.circuit_breaker import panel_circuit_breaker
+from core.services.panel_placement import panel_load_cache
 from core.services.notification_service import NotificationService
+from core.services.config_regeneration_service import ConfigRegenerationService
+from core.utils.config_generator import ConfigTemplate, get_config_template
 from db.repositories.panel_repo import PanelRepository
-from db import get_async_db
+from db import get_async_db, async_session_maker
+from core.settings import PANEL_SYNC_CONCURRENCY, PANEL_SYNC_TIMEOUT_SECONDS
+
+if TYPE_CHECKING:
+    from db.repositories.inbound_repo import InboundRepository
 
 logger = logging.getLogger(__name__)
 
@@ -31,12 +42,32 @@ class PanelSyncError(Exception):
     """Raised when syncing inbounds fails."""
     pass
 
+# اولین پیام نتیجه همگام‌سازی موفق هر پنل در خروجی sync_all_panels_inbounds
+SYNC_SUCCESS_MESSAGE = "✅ همگام‌سازی موفق بود. (Sync successful.)"
+
+def get_failed_sync_panels(results: Dict[int, List[str]]) -> Dict[int, List[str]]:
+    """
+    جدا کردن پنل‌های ناموفق از نتایج sync_all_panels_inbounds
+    (این متد خطا پرتاب نمی‌کند و شکست هر پنل فقط در پیام‌های نتیجه ثبت می‌شود).
+    """
+    return {
+        panel_id: messages
+        for panel_id, messages in results.items()
+        if not messages or messages[0] != SYNC_SUCCESS_MESSAGE
+    }
+
 # Helper function to convert potential py3xui objects to dict
 def _to_dict_safe(obj: Any) -> Dict | Any:
     if obj is None:
         return {} # Return empty dict for None to store as JSON '{}'
     if isinstance(obj, dict):
         return obj # Already a dict
+    # pydantic v2 models (py3xui) produce JSON-safe dicts directly, no serialization probe needed
+    if hasattr(obj, 'model_dump') and callable(getattr(obj, 'model_dump')):
+        try:
+            return obj.model_dump(mode="json", by_alias=True)
+        except Exception as e:
+            logger.warning(f"Failed to call .model_dump() on object {type(obj)}: {e}. Falling back to .dict(). (فراخوانی model_dump ناموفق بود)")
     if hasattr(obj, 'dict') and callable(getattr(obj, 'dict')):
         try:
             return obj.dict() # Try calling .dict() method
@@ -44,24 +75,47 @@ def _to_dict_safe(obj: Any) -> Dict | Any:
             logger.warning(f"Failed to call .dict() on object {type(obj)}: {e}. Falling back to vars(). (فراخوانی dict. ناموفق بود)")
             # Fallback or handle error appropriately
     if hasattr(obj, '__dict__'):
-        try:
-            # Fallback using vars() if .dict() fails or doesn't exist
-            # Be cautious as vars() might expose private attributes
-            d = vars(obj)
-            # Attempt to serialize the dict to catch issues early
-            json.dumps(d)
-            return d
-        except TypeError:
-             logger.error(f"Object of type {type(obj)} could not be serialized to JSON even with vars(). Returning empty dict. (امکان سریال‌سازی با vars وجود ندارد)", exc_info=True)
-             return {} # Cannot serialize
-        except Exception as e:
-            logger.error(f"Error converting object {type(obj)} using vars(): {e}. Returning empty dict. (خطا در تبدیل با vars)", exc_info=True)
-            return {}
+        # Fallback using vars() if .dict() fails or doesn't exist
+        # Be cautious as vars() might expose private attributes
+        return {k: v for k, v in vars(obj).items() if not k.startswith('_')}
 
-    # If it's not None, not dict, has no .dict() or vars(), or vars() fails serialization
+    # If it's not None, not dict, has no .dict() or vars()
     logger.warning(f"Object of type {type(obj)} is not directly JSON serializable and couldn't be converted to dict. Storing as empty JSON. (امکان تبدیل به دیکشنری وجود ندارد)")
     return {} # Default to empty dict if conversion fails
 
+# Remote inbound fields that are mirrored into the DB; traffic counters (up/down) are deliberately excluded
+_FINGERPRINT_FIELDS = ('id', 'tag', 'protocol', 'port', 'listen', 'settings', 'streamSettings', 'sniffing', 'remark', 'enable')
+
+def _inbound_fingerprint(xui_ib_data: Dict[str, Any]) -> str:
+    """
+    محاسبه اثر انگشت پایدار (SHA-256) از فیلدهای یک inbound که در دیتابیس ذخیره می‌شوند.
+    اگر اثر انگشت تغییر نکرده باشد نیازی به نوشتن مجدد inbound در دیتابیس نیست.
+    """
+    payload = {key: xui_ib_data.get(key) for key in _FINGERPRINT_FIELDS}
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _compact_inbound_settings(settings_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    حذف آرایه `clients` از تنظیمات inbound قبل از ذخیره در `Inbound.settings_json`.
+
+    در 3x-ui کل لیست کلاینت‌ها داخل settings قرار دارد و با هزاران کلاینت سطر inbound
+    چند مگابایت می‌شود؛ منبع اصلی عضویت کلاینت‌ها جدول client_accounts است. فقط
+    تعداد کلاینت‌ها و مقادیر پیش‌فرض مورد نیاز ساخت کانفیگ (flow و alterId اولین کلاینت)
+    نگه داشته می‌شوند.
+    """
+    clients = settings_dict.get("clients")
+    if not isinstance(clients, list):
+        return settings_dict
+
+    compact = {key: value for key, value in settings_dict.items() if key != "clients"}
+    compact["client_count"] = len(clients)
+    first_client = clients[0] if clients and isinstance(clients[0], dict) else {}
+    client_defaults = {key: first_client[key] for key in ("flow", "alterId") if first_client.get(key) not in (None, "")}
+    if client_defaults:
+        compact["client_defaults"] = client_defaults
+    return compact
+
 class PanelService:
     """سرویس جامع برای مدیریت پنل‌های XUI شامل عملیات CRUD،
     تست اتصال، همگام‌سازی inboundها و مدیریت وضعیت.
@@ -77,7 +131,6 @@ class PanelService:
         self.session = session
         self.panel_repo = PanelRepository(session)
         self.notification_service = NotificationService(session)
-        self._xui_clients: Dict[int, XuiClient] = {}  # Cache for XuiClient instances
 
     async def _test_panel_connection_details(self, url: str, username: str, password: str) -> bool:
         """
@@ -98,8 +151,8 @@ class PanelService:
         logger.debug(f"شروع تست اتصال داخلی برای: {url} (Starting internal connection test for: {url})")
         temp_client = XuiClient(host=url, username=username, password=password)
         try:
-            # Login first
-            await temp_client.login()
+            # Login first (always against the panel, not a stored session)
+            await temp_client.login(force=True)
             logger.debug(f"Login successful for {url} during internal test.")
             # verify_connection handles login internally if needed, but logging in explicitly ensures it happens
             verified = await temp_client.verify_connection()
@@ -141,12 +194,10 @@ class PanelService:
             logger.warning(f"تست اتصال ناموفق برای پنل {panel_id}: اطلاعات اتصال ناقص است. (Connection test failed for panel {panel_id}: Incomplete connection details.)")
             return False, "اطلاعات اتصال (URL, نام کاربری، رمز عبور) پنل کامل نیست."
 
-        # Use the cached client if available, otherwise create a temporary one
-        client = await self._get_xui_client(panel) # Use helper to get/create client
-
         try:
-            # Explicitly login first
-            await client.login()
+            # Force a real login through the process-wide registry for this explicit test
+            xui_client_registry.mark_stale(panel_id)
+            client = await self._get_xui_client(panel)
             logger.debug(f"Login successful for panel {panel_id} during connection test.")
             # verify_connection might handle login internally, but explicit login ensures it.
             verified = await client.verify_connection()
@@ -341,7 +392,11 @@ class PanelService:
 
     async def get_suitable_panel_for_location(self, location_name: str) -> Optional[Panel]:
         """
-        یافتن پنل مناسب برای یک لوکیشن خاص.
+        یافتن پنل مناسب برای یک لوکیشن خاص بر اساس بار.
+
+        انتخاب از روی کش بار پنل‌ها (`panel_load_cache`) و با استراتژی
+        `PANEL_PLACEMENT_STRATEGY` انجام می‌شود؛ پنل‌های پر، ناسالم یا با CPU/RAM
+        بیش از حد نادیده گرفته می‌شوند.
         
         Args:
             location_name: نام لوکیشن.
@@ -350,15 +405,53 @@ class PanelService:
             شیء Panel مناسب یا None در صورت عدم وجود.
         """
         logger.debug(f"جستجوی پنل مناسب برای لوکیشن: {location_name}")
-        panels = await self.panel_repo.filter_by(location_name=location_name, status=PanelStatus.ACTIVE)
+        await panel_load_cache.ensure_fresh(self.session)
+        selected = panel_load_cache.select_panel(location_name)
         
-        if not panels:
-            logger.warning(f"هیچ پنل فعالی برای لوکیشن {location_name} یافت نشد.")
+        if not selected:
+            logger.warning(f"هیچ پنل فعال و دارای ظرفیتی برای لوکیشن {location_name} یافت نشد.")
             return None
             
-        # فعلاً اولین پنل فعال را انتخاب می‌کنیم
-        # در آینده می‌توان الگوریتم‌های پیچیده‌تری برای توزیع بار اضافه کرد
-        return panels[0]
+        logger.debug(f"پنل {selected.panel_id} برای لوکیشن {location_name} انتخاب شد (بار: {selected.utilization:.2f}).")
+        return await self.panel_repo.get_panel_by_id(selected.panel_id)
+
+    def get_panel_health(self, panel_id: int) -> Dict[str, Any]:
+        """
+        دریافت وضعیت مدار و امتیاز سلامت پنل (تأخیر و نرخ خطا) از حافظه، بدون I/O شبکه.
+
+        Args:
+            panel_id: شناسه پنل.
+
+        Returns:
+            دیکشنری شامل state، consecutive_failures، error_rate، avg_latency و score.
+        """
+        return panel_circuit_breaker.health(panel_id).snapshot()
+
+    async def refresh_panel_load(self) -> None:
+        """
+        به‌روزرسانی کش بار پنل‌ها: شمارش اکانت‌ها از دیتابیس و CPU/RAM از `get_server_status`
+        تمام پنل‌های فعال (به صورت هم‌زمان). برای اجرای دوره‌ای در پس‌زمینه طراحی شده
+        تا انتخاب پنل در مسیر خرید به درخواست زنده نیاز نداشته باشد.
+        """
+        await panel_load_cache.refresh(self.session)
+        # پنل‌های با مدار باز هم فعال می‌مانند؛ probe آن‌ها پس از reset_timeout مدار را نیمه‌باز و در صورت موفقیت بسته می‌کند
+        active_panels = await self.get_active_panels()
+        semaphore = asyncio.Semaphore(max(1, PANEL_SYNC_CONCURRENCY))
+
+        async def _probe(panel: Panel) -> None:
+            async with semaphore:
+                try:
+                    client = await self._get_xui_client(panel)
+                    status = await panel_circuit_breaker.call(
+                        panel.id,
+                        lambda: asyncio.wait_for(client.get_server_status(), timeout=PANEL_SYNC_TIMEOUT_SECONDS),
+                    )
+                except Exception as e:
+                    logger.warning(f"دریافت وضعیت سرور پنل {panel.id} ناموفق بود: {e} (Failed to get server status for panel {panel.id}: {e})")
+                    status = None
+                panel_load_cache.record_server_status(panel.id, status)
+
+        await asyncio.gather(*(_probe(panel) for panel in active_panels))
 
     async def get_inbounds_by_panel_id(self, panel_id: int, status: Optional[InboundStatus] = None) -> List[Inbound]:
         """
@@ -378,9 +471,9 @@ class PanelService:
 
     async def _get_xui_client(self, panel: Panel) -> XuiClient:
         """
-        [Helper خصوصی] دریافت یا ایجاد نمونه XuiClient برای یک پنل.
-        از کش داخلی برای جلوگیری از ایجاد مکرر کلاینت استفاده می‌کند.
-        همچنین وضعیت لاگین کلاینت کش شده را بررسی و در صورت نیاز لاگین مجدد انجام می‌دهد.
+        [Helper خصوصی] دریافت نمونه XuiClient لاگین شده برای یک پنل.
+        کلاینت‌ها در رجیستری سراسری پروسه (`xui_client_registry`) نگهداری می‌شوند،
+        بنابراین ساخت PanelService جدید در هر هندلر باعث لاگین مجدد به پنل نمی‌شود.
 
         Args:
             panel: شیء Panel که اطلاعات اتصال را دارد.
@@ -390,63 +483,308 @@ class PanelService:
 
         Raises:
             ValueError: اگر اطلاعات اتصال پنل (url, username, password) ناقص باشد.
-            PanelConnectionError: اگر لاگین مجدد ناموفق باشد.
+            PanelConnectionError: اگر لاگین ناموفق باشد.
         """
         if not panel.url or not panel.username or not panel.password:
             logger.error(f"امکان دریافت XUI client برای پنل ID {panel.id} وجود ندارد: اطلاعات اتصال ناقص است. (Cannot get XUI client for panel ID {panel.id}: Incomplete connection details.)")
             raise ValueError(f"اطلاعات اتصال پنل (ID: {panel.id}) ناقص است.")
 
         panel_id = panel.id
-        client: Optional[XuiClient] = self._xui_clients.get(panel_id)
+        try:
+            return await xui_client_registry.get_client(panel_id, panel.url, panel.username, panel.password)
+        except (XuiAuthenticationError, XuiConnectionError) as e:
+            logger.error(f"🔥 لاگین به پنل {panel_id} از طریق رجیستری ناموفق بود: {e}. (Registry login failed for panel {panel_id}: {e}.)")
+            raise PanelConnectionError(f"ایجاد کلاینت برای پنل {panel_id} ناموفق بود (خطای لاگین): {e}") from e
+        except Exception as e:
+            logger.error(f"خطای پیش‌بینی نشده هنگام دریافت کلاینت پنل {panel_id} از رجیستری: {e}. (Unexpected error getting registry client for panel {panel_id}: {e}).", exc_info=True)
+            raise PanelConnectionError(f"ایجاد کلاینت برای پنل {panel_id} ناموفق بود (خطای پیش‌بینی نشده در لاگین): {e}") from e
 
-        if client:
-            logger.debug(f"استفاده از XUI client موجود در کش برای پنل ID: {panel_id}. (Using cached XUI client for panel ID: {panel_id}.)")
-            # بررسی وضعیت لاگین کلاینت کش شده
-            if not client.is_logged_in():
-                logger.info(f"کلاینت XUI کش شده برای پنل {panel_id} لاگین نیست یا سشن معتبر نیست، تلاش برای لاگین مجدد... (Cached XUI client for panel {panel_id} is not logged in or session invalid, attempting re-login...)")
-                try:
-                    await client.login()
-                    logger.info(f"✅ لاگین مجدد برای کلاینت XUI کش شده پنل {panel_id} موفق بود. (Re-login successful for cached XUI client of panel {panel_id}.)")
-                except (XuiAuthenticationError, XuiConnectionError) as e:
-                    logger.warning(f"🔥 لاگین مجدد برای کلاینت XUI کش شده پنل {panel_id} ناموفق بود: {e}. (Re-login failed for cached XUI client of panel {panel_id}: {e}.)")
-                    # حذف از کش برای ایجاد مجدد بعدی
-                    if panel_id in self._xui_clients:
-                        del self._xui_clients[panel_id] # حذف کلاینت مشکل‌دار از کش
-                    raise PanelConnectionError(f"لاگین مجدد کلاینت کش شده برای پنل {panel_id} ناموفق بود: {e}") from e
-                except Exception as e:
-                    logger.error(f"خطای پیش‌بینی نشده هنگام لاگین مجدد کلاینت کش شده پنل {panel_id}: {e}. (Unexpected error during re-login for cached client of panel {panel_id}: {e}).", exc_info=True)
-                    if panel_id in self._xui_clients:
-                        del self._xui_clients[panel_id] # حذف کلاینت احتمالاً خراب
-                    raise PanelConnectionError(f"خطای پیش‌بینی نشده در لاگین مجدد کلاینت پنل {panel_id}: {e}") from e
+    async def get_xui_client_by_id(self, panel_id: int) -> Optional[XuiClient]:
+        """
+        دریافت کلاینت XUI لاگین شده بر اساس شناسه پنل.
+
+        Args:
+            panel_id: شناسه پنل.
+
+        Returns:
+            نمونه XuiClient یا None اگر پنل یافت نشود.
+
+        Raises:
+            PanelConnectionError: اگر لاگین ناموفق باشد.
+        """
+        panel = await self.panel_repo.get_panel_by_id(panel_id)
+        if not panel:
+            logger.warning(f"پنل با ID {panel_id} برای دریافت کلاینت XUI یافت نشد. (Panel {panel_id} not found when requesting XUI client.)")
+            return None
+        return await self._get_xui_client(panel)
+
+    async def get_clients_by_inbound(self, panel_id: int, remote_inbound_id: int) -> List[Dict[str, Any]]:
+        """
+        لیست کلاینت‌های یک inbound پنل (همراه با up/down) از snapshot پنل، بدون درخواست جداگانه.
+
+        Args:
+            panel_id: شناسه پنل.
+            remote_inbound_id: شناسه inbound در پنل.
+
+        Returns:
+            لیست دیکشنری کلاینت‌ها (خالی اگر پنل یافت نشود).
+
+        Raises:
+            PanelConnectionError: اگر اتصال به پنل ناموفق باشد.
+        """
+        client = await self.get_xui_client_by_id(panel_id)
+        if not client:
+            return []
+        try:
+            return await client.find_clients_by_inbound(remote_inbound_id)
+        except XuiConnectionError as e:
+            raise PanelConnectionError(f"خطا در دریافت کلاینت‌های inbound {remote_inbound_id} پنل {panel_id}: {e}") from e
+
+    async def update_panel_credentials(
+        self,
+        panel_id: int,
+        url: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+    ) -> Optional[Panel]:
+        """
+        به‌روزرسانی اطلاعات اتصال پنل و باطل کردن کلاینت کش شده آن در رجیستری.
+
+        Args:
+            panel_id: شناسه پنل.
+            url: آدرس جدید پنل (اختیاری).
+            username: نام کاربری جدید (اختیاری).
+            password: رمز عبور جدید (اختیاری).
+
+        Returns:
+            شیء Panel به‌روز شده یا None اگر پنل یافت نشد.
+
+        Raises:
+            SQLAlchemyError: در صورت بروز خطای دیتابیس.
+        """
+        update_data = {k: v for k, v in {"url": url, "username": username, "password": password}.items() if v is not None}
+        if not update_data:
+            return await self.panel_repo.get_panel_by_id(panel_id)
+
+        try:
+            updated_panel = await self.panel_repo.update_panel(panel_id, update_data)
+        except SQLAlchemyError as e:
+            logger.error(f"خطای دیتابیس حین به‌روزرسانی اطلاعات اتصال پنل {panel_id}: {e} (Database error updating credentials of panel {panel_id}: {e})", exc_info=True)
+            await self.session.rollback()
+            raise
+        await xui_client_registry.invalidate(panel_id)
+        return updated_panel
+
+    async def _fetch_remote_inbounds(self, panel: Panel) -> List[Any]:
+        """
+        [Helper خصوصی] دریافت لیست خام inboundها از پنل XUI (فقط عملیات شبکه، بدون دیتابیس).
+
+        Args:
+            panel: شیء Panel.
+
+        Returns:
+            لیست inboundهای دریافتی از پنل.
+
+        Raises:
+            PanelConnectionError: اگر لاگین ناموفق باشد.
+            PanelSyncError: اگر پنل نتیجه‌ای برنگرداند.
+        """
+        client = await self._get_xui_client(panel)
+        logger.debug(f"در حال دریافت inboundها از پنل {panel.id}...")
+        xui_inbounds_raw = await panel_circuit_breaker.call(panel.id, client.get_inbounds)
+        if xui_inbounds_raw is None:
+            logger.warning(f"دریافت inboundها از XUI برای پنل {panel.id} نتیجه‌ای نداشت (None). همگام‌سازی متوقف شد. (Received None when fetching inbounds from XUI for panel {panel.id}. Stopping sync.)")
+            raise PanelSyncError("دریافت لیست inboundها از پنل XUI ناموفق بود (نتیجه None). (Failed to get inbound list from XUI panel (result was None).)")
+        return xui_inbounds_raw
+
+    async def _apply_inbound_sync(self, panel_id: int, xui_inbounds_raw: List[Any]) -> Dict[str, int]:
+        """
+        [Helper خصوصی] اعمال لیست inboundهای دریافتی از پنل روی دیتابیس با نشست همین سرویس.
+
+        همگام‌سازی افزایشی است: اثر انگشت هر inbound دریافتی با مقدار ذخیره شده
+        (`Inbound.content_hash`) مقایسه می‌شود و فقط inboundهای جدید، تغییر کرده یا
+        حذف شده در دیتابیس نوشته می‌شوند. در حالت بدون تغییر فقط یک SELECT سبک اجرا می‌شود.
+        نوشتن‌ها مستقل از تعداد inboundها حداکثر دو دستور هستند: یک upsert
+        (`INSERT ... ON DUPLICATE KEY UPDATE`) و یک UPDATE برای غیرفعال‌سازی.
+
+        Args:
+            panel_id: شناسه پنل.
+            xui_inbounds_raw: لیست خام inboundهای دریافتی از پنل.
+
+        Returns:
+            Dict[str, int]: تعداد inboundهای added, updated, unchanged و deactivated
+                            و تعداد اکانت‌هایی که لینک کانفیگشان بازسازی شد (relinked).
+
+        Raises:
+            SQLAlchemyError: در صورت بروز خطای دیتابیس (rollback در لایه بالاتر).
+        """
+        from db.repositories.inbound_repo import InboundRepository
+        inbound_repo = InboundRepository(self.session)
+
+        # تبدیل inboundهای دریافتی به دیکشنری
+        xui_inbounds_list = [_to_dict_safe(ib) for ib in xui_inbounds_raw if ib is not None]
+        logger.info(f"تعداد {len(xui_inbounds_list)} اینباند از پنل XUI {panel_id} دریافت شد. (Fetched {len(xui_inbounds_list)} inbounds from XUI panel {panel_id}.)")
+
+        # دریافت وضعیت همگام‌سازی inboundهای موجود (فقط ستون‌های سبک، بدون JSONهای حجیم)
+        db_sync_state = await inbound_repo.get_sync_state_by_panel_id(panel_id)
+        db_inbounds_map = {row.remote_id: row for row in db_sync_state}
+
+        # آماده‌سازی داده‌ها برای عملیات ریپازیتوری
+        inbounds_to_add = []
+        inbounds_to_update = []
+        active_xui_inbound_ids = set()
+        unchanged_count = 0
+
+        for xui_ib_data in xui_inbounds_list:
+            inbound_id = xui_ib_data.get('id')
+            if not inbound_id:
+                logger.warning(f"رد شدن از inbound دریافتی از XUI برای پنل {panel_id} به دلیل نداشتن ID: {xui_ib_data} (Skipping inbound from XUI for panel {panel_id} due to missing ID: {xui_ib_data})")
+                continue
+
+            active_xui_inbound_ids.add(inbound_id)
+            fingerprint = _inbound_fingerprint(xui_ib_data)
+            existing_db_inbound = db_inbounds_map.get(inbound_id)
+
+            # inbound بدون تغییر: نه parse و نه UPDATE (مگر اینکه قبلاً به دلیل حذف غیرفعال شده باشد)
+            if (
+                existing_db_inbound is not None
+                and existing_db_inbound.content_hash == fingerprint
+                and existing_db_inbound.status != InboundStatus.INACTIVE
+            ):
+                unchanged_count += 1
+                continue
+
+            ib_data_for_db = self._build_inbound_db_payload(panel_id, xui_ib_data)
+            ib_data_for_db['content_hash'] = fingerprint
+
+            if existing_db_inbound is not None:
+                inbounds_to_update.append(ib_data_for_db)
             else:
-                logger.debug(f"کلاینت XUI کش شده برای پنل {panel_id} لاگین است و سشن معتبر فرض می‌شود. (Cached XUI client for panel {panel_id} is logged in and session assumed valid.)")
-            return client
-        else:
-            logger.debug(f"ایجاد XUI client جدید برای پنل ID: {panel_id} در {panel.url}. (Creating new XUI client for panel ID: {panel_id} at {panel.url}.)")
-            client = XuiClient(host=panel.url, username=panel.username, password=panel.password)
-            # تلاش برای لاگین اولیه هنگام ایجاد قبل از ذخیره در کش
+                inbounds_to_add.append(ib_data_for_db)
+
+        # آیا inboundی در دیتابیس هست که دیگر در لیست XUI وجود ندارد؟
+        has_missing_inbounds = any(
+            remote_id not in active_xui_inbound_ids and row.status != InboundStatus.INACTIVE
+            for remote_id, row in db_inbounds_map.items()
+        )
+
+        counts = {"added": len(inbounds_to_add), "updated": len(inbounds_to_update), "unchanged": unchanged_count, "deactivated": 0, "relinked": 0}
+
+        # تشخیص inboundهایی که تغییرشان لینک کانفیگ اکانت‌ها را عوض می‌کند (قبل از بازنویسی تنظیمات قدیمی)
+        relink_templates = await self._detect_link_changes(panel_id, inbounds_to_update, inbound_repo) if inbounds_to_update else {}
+
+        # افزودن inboundهای جدید و به‌روزرسانی inboundهای تغییر کرده در یک دستور
+        if inbounds_to_add or inbounds_to_update:
+            await inbound_repo.upsert_inbounds(inbounds_to_add + inbounds_to_update)
+            logger.info(f"{counts['added']} اینباند جدید اضافه و {counts['updated']} اینباند برای پنل {panel_id} به‌روز شد. (Added {counts['added']} and updated {counts['updated']} inbounds for panel {panel_id}.)")
+
+        # بازسازی لینک کانفیگ اکانت‌های inboundهایی که پورت/SNI/کلیدهای آنها تغییر کرده است (در همین تراکنش)
+        if relink_templates:
+            regeneration_service = ConfigRegenerationService(self.session)
+            for db_inbound_id, template in relink_templates.items():
+                counts["relinked"] += await regeneration_service.regenerate_inbound_links(db_inbound_id, template)
+
+        # غیرفعال کردن inboundهایی که در XUI یافت نشدند (یک UPDATE مجموعه‌ای)
+        if has_missing_inbounds:
+            counts["deactivated"] = await inbound_repo.deactivate_missing_inbounds(panel_id, list(active_xui_inbound_ids))
+            logger.info(f"{counts['deactivated']} اینباند که در XUI یافت نشدند، برای پنل {panel_id} غیرفعال شدند. (Deactivated {counts['deactivated']} inbounds not found in XUI for panel {panel_id}.)")
+
+        if inbounds_to_add or inbounds_to_update or has_missing_inbounds:
+            # نیاز به commit نیست، commit در لایه بالاتر انجام می‌شود
+            await self.session.flush()
+        logger.info(f"✅ همگام‌سازی inboundها برای پنل {panel_id} تکمیل شد: {counts} (Inbound sync completed for panel {panel_id}: {counts})")
+        return counts
+
+    async def _detect_link_changes(
+        self, panel_id: int, inbounds_to_update: List[Dict[str, Any]], inbound_repo: "InboundRepository"
+    ) -> Dict[int, ConfigTemplate]:
+        """
+        [Helper خصوصی] مقایسه قالب لینک کانفیگ قدیمی و جدید inboundهای تغییر کرده.
+        تغییراتی که روی لینک اثری ندارند (مثلاً remark یا تنظیمات sniffing) نادیده گرفته می‌شوند.
+
+        Args:
+            panel_id: شناسه پنل.
+            inbounds_to_update: داده جدید inboundهای تغییر کرده (خروجی `_build_inbound_db_payload`).
+            inbound_repo: ریپازیتوری inbound با نشست همین سرویس.
+
+        Returns:
+            Dict[int, ConfigTemplate]: قالب جدید به ازای شناسه دیتابیسی inboundهایی که لینکشان تغییر کرده است.
+        """
+        panel = await self.panel_repo.get_panel_by_id(panel_id)
+        if not panel:
+            return {}
+        address = urlparse(panel.url).hostname or panel.url
+        new_by_remote_id = {data['remote_id']: data for data in inbounds_to_update}
+        old_rows = await inbound_repo.get_link_state_by_remote_ids(panel_id, list(new_by_remote_id))
+
+        changed: Dict[int, ConfigTemplate] = {}
+        for old in old_rows:
+            new = new_by_remote_id[old.remote_id]
             try:
-                logger.info(f"تلاش برای لاگین اولیه هنگام ایجاد کلاینت برای پنل {panel_id}... (Attempting initial login upon client creation for panel {panel_id}...) ")
-                await client.login()
-                logger.info(f"✅ لاگین اولیه برای کلاینت جدید پنل {panel_id} موفق بود. (Initial login successful for new client of panel {panel_id}.)")
-                self._xui_clients[panel_id] = client # ذخیره در کش فقط پس از لاگین موفق
-                return client
-            except (XuiAuthenticationError, XuiConnectionError) as e:
-                logger.error(f"🔥 لاگین اولیه هنگام ایجاد کلاینت برای پنل {panel_id} ناموفق بود: {e}. کلاینت کش نخواهد شد. (Initial login failed upon client creation for panel {panel_id}: {e}. Client will not be cached.)")
-                # اگر لاگین اولیه ناموفق باشد کلاینت را کش نمی‌کنیم
-                raise PanelConnectionError(f"ایجاد کلاینت برای پنل {panel_id} ناموفق بود (خطای لاگین اولیه): {e}") from e
+                old_template = get_config_template(address, old.protocol, old.port, old.stream_settings, old.sniffing, old.settings_json)
+                new_template = get_config_template(address, new['protocol'], new['port'], new['stream_settings'], new['sniffing'], new['settings_json'])
             except Exception as e:
-                logger.error(f"خطای پیش‌بینی نشده هنگام لاگین اولیه کلاینت جدید پنل {panel_id}: {e}. (Unexpected error during initial login for new client of panel {panel_id}: {e}).", exc_info=True)
-                raise PanelConnectionError(f"ایجاد کلاینت برای پنل {panel_id} ناموفق بود (خطای پیش‌بینی نشده در لاگین): {e}") from e
+                logger.warning(f"ساخت قالب لینک inbound {old.remote_id} پنل {panel_id} ناموفق بود: {e} (Failed to compile link template of inbound {old.remote_id} on panel {panel_id}: {e})")
+                continue
+            if new_template is not None and new_template != old_template:
+                changed[old.id] = new_template
+        if changed:
+            logger.info(f"لینک کانفیگ {len(changed)} inbound پنل {panel_id} تغییر کرده است. (Config links changed for {len(changed)} inbounds on panel {panel_id}.)")
+        return changed
+
+    def _build_inbound_db_payload(self, panel_id: int, xui_ib_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        [Helper خصوصی] تبدیل داده inbound دریافتی از پنل به دیکشنری متناسب با مدل دیتابیس.
 
-    async def sync_panel_inbounds(self, panel_id: int) -> None:
+        Args:
+            panel_id: شناسه پنل.
+            xui_ib_data: داده inbound دریافتی از پنل (دیکشنری).
+
+        Returns:
+            دیکشنری داده برای ذخیره در جدول inbound.
+        """
+        inbound_id = xui_ib_data.get('id')
+        remark = xui_ib_data.get('remark', f'Inbound {inbound_id}')
+
+        # استخراج تنظیمات به صورت ایمن - مدیریت None یا JSON رشته‌ای
+        settings_str = xui_ib_data.get('settings')
+        settings_dict = {}
+        if isinstance(settings_str, str):
+            try:
+                settings_dict = json.loads(settings_str)
+            except json.JSONDecodeError:
+                logger.warning(f"Parsing settings JSON failed for inbound {inbound_id} (Panel {panel_id}): {settings_str}. Storing raw string.", exc_info=True)
+                settings_dict = {"raw_settings": settings_str}
+        elif isinstance(settings_str, dict):
+             settings_dict = settings_str
+
+        return {
+            'remote_id': inbound_id,
+            'panel_id': panel_id,
+            'tag': xui_ib_data.get('tag'),
+            'protocol': xui_ib_data.get('protocol'),
+            'port': xui_ib_data.get('port'),
+            'listen': xui_ib_data.get('listen'),
+            'settings_json': _compact_inbound_settings(settings_dict),
+            'stream_settings': json.loads(xui_ib_data['streamSettings']) if isinstance(xui_ib_data.get('streamSettings'), str) else xui_ib_data.get('streamSettings', {}),
+            'sniffing': json.loads(xui_ib_data['sniffing']) if isinstance(xui_ib_data.get('sniffing'), str) else xui_ib_data.get('sniffing', {}),
+            'remark': remark,
+            'status': InboundStatus.ACTIVE if xui_ib_data.get('enable', False) else InboundStatus.DISABLED,
+            'last_synced': datetime.utcnow()
+        }
+
+    async def sync_panel_inbounds(self, panel_id: int) -> Dict[str, int]:
         """
         همگام‌سازی inboundهای یک پنل خاص بین XUI و دیتابیس.
-        Inboundهای جدید را اضافه، موجود را به‌روزرسانی و آنهایی که در XUI نیستند را غیرفعال می‌کند.
+        Inboundهای جدید را اضافه، تغییر کرده را به‌روزرسانی و آنهایی که در XUI نیستند را غیرفعال می‌کند.
 
         Args:
             panel_id: شناسه پنل برای همگام‌سازی.
 
+        Returns:
+            Dict[str, int]: تعداد inboundهای added, updated, unchanged و deactivated و اکانت‌های relinked
+                            (برای پنل غیرفعال دیکشنری خالی).
+
         Raises:
             PanelSyncError: در صورت بروز خطا حین دریافت اطلاعات از XUI یا ذخیره در دیتابیس.
             ValueError: اگر پنل یافت نشود.
@@ -461,115 +799,11 @@ class PanelService:
 
         if panel.status != PanelStatus.ACTIVE:
              logger.warning(f"همگام‌سازی برای پنل {panel_id} انجام نشد زیرا وضعیت آن {panel.status.value} است. (Skipping sync for panel {panel_id} because its status is {panel.status.value}.)")
-             return # پنل‌های غیرفعال یا دارای خطا همگام‌سازی نمی‌شوند
+             return {} # پنل‌های غیرفعال یا دارای خطا همگام‌سازی نمی‌شوند
 
         try:
-            # دریافت کلاینت XUI و اطمینان از لاگین بودن
-            client = await self._get_xui_client(panel)
-            
-            # دریافت inboundها از پنل XUI
-            logger.debug(f"در حال دریافت inboundها از پنل {panel_id}...")
-            xui_inbounds_raw = await client.get_inbounds()
-            
-            if xui_inbounds_raw is None:
-                 logger.warning(f"دریافت inboundها از XUI برای پنل {panel_id} نتیجه‌ای نداشت (None). همگام‌سازی متوقف شد. (Received None when fetching inbounds from XUI for panel {panel_id}. Stopping sync.)")
-                 raise PanelSyncError("دریافت لیست inboundها از پنل XUI ناموفق بود (نتیجه None). (Failed to get inbound list from XUI panel (result was None).)")
-
-            # تبدیل inboundهای دریافتی به دیکشنری
-            xui_inbounds_list = [_to_dict_safe(ib) for ib in xui_inbounds_raw if ib is not None]
-            logger.info(f"تعداد {len(xui_inbounds_list)} اینباند از پنل XUI {panel_id} دریافت شد. (Fetched {len(xui_inbounds_list)} inbounds from XUI panel {panel_id}.)")
-
-            # دریافت inboundهای موجود در دیتابیس برای این پنل
-            db_inbounds = await self.panel_repo.get_inbounds_by_panel_id(panel_id)
-            db_inbounds_map = {ib.remote_id: ib for ib in db_inbounds}
-
-            # آماده‌سازی داده‌ها برای عملیات ریپازیتوری
-            inbounds_to_add = []
-            inbounds_to_update = []
-            active_xui_inbound_ids = set()
-
-            for xui_ib_data in xui_inbounds_list:
-                inbound_id = xui_ib_data.get('id')
-                if not inbound_id:
-                    logger.warning(f"رد شدن از inbound دریافتی از XUI برای پنل {panel_id} به دلیل نداشتن ID: {xui_ib_data} (Skipping inbound from XUI for panel {panel_id} due to missing ID: {xui_ib_data})")
-                    continue
-
-                active_xui_inbound_ids.add(inbound_id)
-                remark = xui_ib_data.get('remark', f'Inbound {inbound_id}')
-                
-                # استخراج تنظیمات به صورت ایمن - مدیریت None یا JSON رشته‌ای
-                settings_str = xui_ib_data.get('settings')
-                settings_dict = {}
-                if isinstance(settings_str, str):
-                    try:
-                        settings_dict = json.loads(settings_str)
-                    except json.JSONDecodeError:
-                        logger.warning(f"Parsing settings JSON failed for inbound {inbound_id} (Panel {panel_id}): {settings_str}. Storing raw string.", exc_info=True)
-                        settings_dict = {"raw_settings": settings_str}
-                elif isinstance(settings_str, dict):
-                     settings_dict = settings_str
-
-                # آماده‌سازی دیکشنری داده متناسب با مدل دیتابیس
-                ib_data_for_db = {
-                    'remote_id': inbound_id,
-                    'panel_id': panel_id,
-                    'tag': xui_ib_data.get('tag'),
-                    'protocol': xui_ib_data.get('protocol'),
-                    'port': xui_ib_data.get('port'),
-                    'listen': xui_ib_data.get('listen'),
-                    'settings_json': settings_dict,
-                    'stream_settings': json.loads(xui_ib_data['streamSettings']) if isinstance(xui_ib_data.get('streamSettings'), str) else xui_ib_data.get('streamSettings', {}),
-                    'sniffing': json.loads(xui_ib_data['sniffing']) if isinstance(xui_ib_data.get('sniffing'), str) else xui_ib_data.get('sniffing', {}),
-                    'remark': remark,
-                    'status': InboundStatus.ACTIVE if xui_ib_data.get('enable', False) else InboundStatus.DISABLED,
-                    'last_synced': datetime.utcnow()
-                }
-
-                existing_db_inbound = db_inbounds_map.get(inbound_id)
-
-                if existing_db_inbound:
-                    # آماده‌سازی payload داده از XUI
-                    update_payload = ib_data_for_db
-                    # افزودن کلید اصلی دیتابیس مورد نیاز bulk_update_inbounds
-                    update_payload['id'] = existing_db_inbound.id
-                    inbounds_to_update.append(update_payload)
-                else:
-                    # نیازی به تکرار remote_id نیست چون قبلاً به دیکشنری اضافه شده
-                    inbounds_to_add.append(ib_data_for_db)
-
-            # شناسایی inboundهایی که باید غیرفعال شوند (در دیتابیس هستند اما در لیست XUI فعال نیستند)
-            inbounds_to_deactivate_ids = []
-            for db_inbound_id, db_inbound in db_inbounds_map.items():
-                if db_inbound_id not in active_xui_inbound_ids and db_inbound.status != InboundStatus.INACTIVE:
-                    inbounds_to_deactivate_ids.append(db_inbound_id)
-
-            # انجام عملیات‌های دیتابیس از طریق ریپازیتوری
-            from db.repositories.inbound_repo import InboundRepository
-            inbound_repo = InboundRepository(self.session)
-            
-            # افزودن inboundهای جدید
-            if inbounds_to_add:
-                added_count = await inbound_repo.bulk_add_inbounds(inbounds_to_add)
-                logger.info(f"{added_count} اینباند جدید برای پنل {panel_id} اضافه شد. (Added {added_count} new inbounds for panel {panel_id}.)")
-
-            # به‌روزرسانی inboundهای موجود
-            if inbounds_to_update:
-                updated_count = await inbound_repo.bulk_update_inbounds(inbounds_to_update)
-                logger.info(f"{updated_count} اینباند برای پنل {panel_id} به‌روز شد. (Updated {updated_count} inbounds for panel {panel_id}.)")
-
-            # غیرفعال کردن inboundهایی که در XUI یافت نشدند
-            if inbounds_to_deactivate_ids:
-                deactivated_count = 0
-                for remote_id_to_deactivate in inbounds_to_deactivate_ids:
-                     success = await inbound_repo.update_inbound_status(remote_id_to_deactivate, panel_id, InboundStatus.INACTIVE)
-                     if success:
-                         deactivated_count += 1
-
-                logger.info(f"{deactivated_count} اینباند که در XUI یافت نشدند، برای پنل {panel_id} غیرفعال شدند. (Deactivated {deactivated_count} inbounds not found in XUI for panel {panel_id}.)")
-
-            # نیاز به commit نیست، commit در لایه بالاتر انجام می‌شود
-            await self.session.flush()  # فقط برای اطمینان از اعمال تغییرات در session
-            logger.info(f"✅ همگام‌سازی inboundها برای پنل {panel_id} با موفقیت تکمیل شد. (Inbound sync completed successfully for panel {panel_id}.)")
+            xui_inbounds_raw = await self._fetch_remote_inbounds(panel)
+            return await self._apply_inbound_sync(panel_id, xui_inbounds_raw)
 
         except (XuiAuthenticationError, XuiConnectionError) as conn_err:
             logger.error(f"خطای اتصال یا احراز هویت حین همگام‌سازی پنل {panel_id}: {conn_err} (Connection or Authentication error during sync for panel {panel_id}: {conn_err})", exc_info=True)
@@ -587,6 +821,11 @@ class PanelService:
         """
         همگام‌سازی inboundها برای تمام پنل‌های فعال (ACTIVE) در سیستم.
 
+        دریافت inboundها از پنل‌ها به صورت هم‌زمان و با سقف `PANEL_SYNC_CONCURRENCY`
+        انجام می‌شود و هر پنل حداکثر `PANEL_SYNC_TIMEOUT_SECONDS` ثانیه فرصت پاسخ دارد.
+        نوشتن در دیتابیس برای هر پنل در نشست جداگانه خودش انجام و commit می‌شود،
+        بنابراین یک پنل کند یا از کار افتاده بقیه را معطل نمی‌کند.
+
         Returns:
             Dict[int, List[str]]: دیکشنری شامل نتایج همگام‌سازی برای هر پنل.
                                   کلید: ID پنل.
@@ -601,42 +840,97 @@ class PanelService:
             logger.info("هیچ پنل فعالی برای همگام‌سازی یافت نشد. (No active panels found to sync.)")
             return results
 
-        for panel in active_panels:
-            panel_id = panel.id
-            panel_name = panel.name
+        semaphore = asyncio.Semaphore(max(1, PANEL_SYNC_CONCURRENCY))
+        outcomes = await asyncio.gather(
+            *(self._sync_panel_isolated(panel, semaphore) for panel in active_panels)
+        )
+        for panel_id, messages in outcomes:
+            results[panel_id] = messages
+
+        logger.info("همگام‌سازی تمام پنل‌های فعال به پایان رسید. (Finished syncing all active panels.)")
+        return results
+
+    async def _sync_panel_isolated(self, panel: Panel, semaphore: asyncio.Semaphore) -> Tuple[int, List[str]]:
+        """
+        [Helper خصوصی] همگام‌سازی یک پنل با timeout مستقل و نشست دیتابیس اختصاصی.
+        این متد هرگز خطا پرتاب نمی‌کند و نتیجه را به صورت پیام برمی‌گرداند.
+
+        Args:
+            panel: شیء Panel (فقط ستون‌های ساده آن خوانده می‌شود).
+            semaphore: سمافور محدودکننده تعداد پنل‌های هم‌زمان.
+
+        Returns:
+            Tuple[int, List[str]]: شناسه پنل و پیام‌های نتیجه.
+        """
+        panel_id = panel.id
+        panel_name = panel.name
+        async with semaphore:
             logger.info(f"شروع همگام‌سازی برای پنل: {panel_name} (ID: {panel_id})... (Starting sync for panel: {panel_name} (ID: {panel_id})...)")
             try:
-                # اطمینان از دریافت کلاینت XUI و لاگین بودن آن
-                try:
-                    client = await self._get_xui_client(panel)
-                    # بررسی وضعیت لاگین
-                    if not client.is_logged_in():
-                        logger.info(f"لاگین به پنل {panel_name} (ID: {panel_id}) قبل از همگام‌سازی...")
-                        await client.login()
-                        logger.info(f"لاگین به پنل {panel_name} (ID: {panel_id}) موفق بود.")
-                    else:
-                        logger.debug(f"کلاینت برای پنل {panel_name} (ID: {panel_id}) قبلاً لاگین است.")
-                except (XuiAuthenticationError, XuiConnectionError) as login_err:
-                    logger.error(f"خطای لاگین به پنل {panel_name} (ID: {panel_id}) قبل از همگام‌سازی: {login_err}")
-                    results[panel_id] = [f"🔥 همگام‌سازی ناموفق: خطای لاگین: {login_err} (Sync failed: Login error: {login_err})"]
-                    continue
-
-                # انجام همگام‌سازی
-                await self.sync_panel_inbounds(panel_id)
-                results[panel_id] = ["✅ همگام‌سازی موفق بود. (Sync successful.)"]
-                logger.info(f"✅ همگام‌سازی برای پنل {panel_name} (ID: {panel_id}) موفق بود. (Sync successful for panel {panel_name} (ID: {panel_id}).)")
-            except (PanelSyncError, ValueError) as e:
-                # لاگ قبلاً در sync_panel_inbounds یا get_panel_by_id ثبت شده است
+                xui_inbounds_raw = await asyncio.wait_for(
+                    self._fetch_remote_inbounds(panel), timeout=PANEL_SYNC_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"🔥 پنل {panel_name} (ID: {panel_id}) در {PANEL_SYNC_TIMEOUT_SECONDS} ثانیه پاسخ نداد. (Panel {panel_name} (ID: {panel_id}) timed out after {PANEL_SYNC_TIMEOUT_SECONDS}s.)")
+                return panel_id, [f"🔥 همگام‌سازی ناموفق: پنل در {PANEL_SYNC_TIMEOUT_SECONDS} ثانیه پاسخ نداد. (Sync failed: Timed out after {PANEL_SYNC_TIMEOUT_SECONDS}s)"]
+            except PanelConnectionError as login_err:
+                logger.error(f"خطای لاگین به پنل {panel_name} (ID: {panel_id}) قبل از همگام‌سازی: {login_err}")
+                return panel_id, [f"🔥 همگام‌سازی ناموفق: خطای لاگین: {login_err} (Sync failed: Login error: {login_err})"]
+            except PanelSyncError as e:
                 logger.error(f"🔥 همگام‌سازی برای پنل {panel_name} (ID: {panel_id}) ناموفق بود: {e} (Sync failed for panel {panel_name} (ID: {panel_id}): {e})")
-                results[panel_id] = [f"🔥 همگام‌سازی ناموفق: {e} (Sync failed: {e})"]
+                return panel_id, [f"🔥 همگام‌سازی ناموفق: {e} (Sync failed: {e})"]
             except Exception as e:
-                 logger.error(f"🔥 خطای پیش‌بینی نشده حین همگام‌سازی پنل {panel_name} (ID: {panel_id}): {e} (Unexpected error syncing panel {panel_name} (ID: {panel_id}): {e})", exc_info=True)
-                 results[panel_id] = [f"🔥 خطای پیش‌بینی نشده: {e} (Unexpected error: {e})"]
+                logger.error(f"🔥 خطای پیش‌بینی نشده حین دریافت inboundهای پنل {panel_name} (ID: {panel_id}): {e} (Unexpected error fetching inbounds of panel {panel_name} (ID: {panel_id}): {e})", exc_info=True)
+                return panel_id, [f"🔥 خطای پیش‌بینی نشده: {e} (Unexpected error: {e})"]
 
-        # نیازی به commit نیست زیرا در سطح بالاتر انجام می‌شود
-        await self.session.flush()
-        logger.info("همگام‌سازی تمام پنل‌های فعال به پایان رسید. (Finished syncing all active panels.)")
-        return results
+        # نوشتن در دیتابیس با نشست اختصاصی همین پنل (خارج از سمافور شبکه)
+        async with async_session_maker() as panel_session:
+            try:
+                counts = await PanelService(panel_session)._apply_inbound_sync(panel_id, xui_inbounds_raw)
+                await panel_session.commit()
+            except SQLAlchemyError as db_err:
+                await panel_session.rollback()
+                logger.error(f"خطای دیتابیس حین همگام‌سازی پنل {panel_id}: {db_err} (Database error during sync for panel {panel_id}: {db_err})", exc_info=True)
+                return panel_id, [f"🔥 همگام‌سازی ناموفق: خطای دیتابیس: {db_err} (Sync failed: Database error: {db_err})"]
+            except Exception as e:
+                await panel_session.rollback()
+                logger.error(f"🔥 خطای پیش‌بینی نشده حین همگام‌سازی پنل {panel_name} (ID: {panel_id}): {e} (Unexpected error syncing panel {panel_name} (ID: {panel_id}): {e})", exc_info=True)
+                return panel_id, [f"🔥 خطای پیش‌بینی نشده: {e} (Unexpected error: {e})"]
+
+        logger.info(f"✅ همگام‌سازی برای پنل {panel_name} (ID: {panel_id}) موفق بود. (Sync successful for panel {panel_name} (ID: {panel_id}).)")
+        return panel_id, [
+            SYNC_SUCCESS_MESSAGE,
+            f"جدید: {counts['added']}، تغییر: {counts['updated']}، بدون تغییر: {counts['unchanged']}، غیرفعال: {counts['deactivated']}، لینک بازسازی شده: {counts['relinked']} "
+            f"(added: {counts['added']}, updated: {counts['updated']}, unchanged: {counts['unchanged']}, deactivated: {counts['deactivated']}, relinked: {counts['relinked']})",
+        ]
+
+    async def set_panel_circuit_open(self, panel_id: int, is_open: bool) -> bool:
+        """
+        ثبت وضعیت مدار circuit breaker پنل در دیتابیس (status ادمین تغییر نمی‌کند).
+
+        Args:
+            panel_id: شناسه پنل.
+            is_open: باز بودن مدار.
+
+        Returns:
+            True اگر پنل یافت شد.
+        """
+        return await self.panel_repo.set_circuit_open(panel_id, is_open)
+
+    async def restore_circuit_state(self) -> List[int]:
+        """
+        بازگرداندن مدارهای باز ثبت شده در دیتابیس به circuit breaker پس از ری‌استارت؛
+        این پنل‌ها تا probe موفق بعدی (اولین به‌روزرسانی بار پنل‌ها) در انتخاب پنل استفاده نمی‌شوند.
+
+        Returns:
+            شناسه پنل‌های بازگردانده شده.
+        """
+        panel_ids = await self.panel_repo.get_circuit_open_panel_ids()
+        for panel_id in panel_ids:
+            panel_circuit_breaker.restore_open(panel_id)
+        if panel_ids:
+            logger.info(f"مدار {len(panel_ids)} پنل از دیتابیس بازگردانده شد: {panel_ids} (Restored open circuits for panels {panel_ids})")
+        return panel_ids
 
     async def update_panel_status(self, panel_id: int, status: PanelStatus) -> bool:
         """
@@ -657,10 +951,8 @@ class PanelService:
             updated_panel = await self.panel_repo.update_panel(panel_id, {"status": status})
             if updated_panel:
                 logger.info(f"✅ وضعیت پنل {panel_id} با موفقیت به {status.value} تغییر یافت. (Panel {panel_id} status updated successfully to {status.value}.)")
-                # Invalidate cache if panel becomes inactive
-                if status == PanelStatus.INACTIVE and panel_id in self._xui_clients:
-                     del self._xui_clients[panel_id]
-                     logger.info(f"کلاینت XUI کش شده برای پنل غیرفعال {panel_id} حذف شد. (Removed cached XUI client for inactive panel {panel_id}.)")
+                # Any status change drops the registry client so the next use re-validates the panel
+                await xui_client_registry.invalidate(panel_id)
                 return True
             else:
                 logger.warning(f"به‌روزرسانی وضعیت ناموفق: پنل با ID {panel_id} یافت نشد. (Status update failed: Panel with ID {panel_id} not found.)")
@@ -424,38 +424,28 @@ class PaymentService:
             bool: موفقیت عملیات
         """
         try:
-            # Get receipt details
-            receipt = await self.receipt_repo.get_by_id(receipt_id)
+            # Get receipt with user, bank card and order plan in a single query
+            receipt = await self.receipt_repo.get_by_id(receipt_id, profile="receipt_review")
             if not receipt:
                 logger.error(f"Receipt {receipt_id} not found")
                 return False
                 
-            # Get user details
-            user = await self.user_repo.get_by_id(receipt.user_id)
+            user = receipt.user
             if not user:
                 logger.error(f"User {receipt.user_id} not found")
                 return False
                 
-            # Get bank card details
-            bank_card = await self.bank_card_repo.get_by_id(receipt.card_id)
+            bank_card = receipt.bank_card
             if not bank_card:
                 logger.error(f"Bank card {receipt.card_id} not found")
                 return False
                 
-            # Get order details if available
+            # Order details if available
             order_text = ""
-            if receipt.order_id:
-                query = text("""
-                    SELECT o.id, p.name, o.final_amount
-                    FROM orders o
-                    JOIN plans p ON o.plan_id = p.id
-                    WHERE o.id = :order_id
-                """)
-                result = await self.session.execute(query, {"order_id": receipt.order_id})
-                order_data = result.fetchone()
-                if order_data:
-                    order_id, plan_name, final_amount = order_data
-                    order_text = f"📦 سفارش: {plan_name} (#{order_id})\n💰 مبلغ سفارش: {format_currency(float(final_amount))}\n\n"
+            order = receipt.order
+            if order and order.plan:
+                order_amount = order.final_amount if order.final_amount is not None else order.amount
+                order_text = f"📦 سفارش: {order.plan.name} (#{order.id})\n💰 مبلغ سفارش: {format_currency(float(order_amount))}\n\n"
             
             # Format the message for admin
             message = (
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models.receipt_log import ReceiptLog, ReceiptStatus
 from db.repositories.receipt_log_repository import ReceiptLogRepository
+from db.repositories.pagination import Page
 from db.repositories.transaction_repo import TransactionRepository
 from db.models.transaction import TransactionStatus
 from core.services.wallet_service import WalletService
@@ -43,6 +44,35 @@ class ReceiptService:
         """
         return await self._receipt_repo.get_by_status(ReceiptStatus.PENDING.value, limit)
 
+    async def get_receipt_by_id(self, receipt_id: int) -> Optional[ReceiptLog]:
+        """دریافت رسید برای نمایش به ادمین (کاربر، کارت مقصد و پلن سفارش در همان کوئری)
+
+        Args:
+            receipt_id: شناسه رسید
+
+        Returns:
+            Optional[ReceiptLog]: رسید یا None
+        """
+        return await self._receipt_repo.get_by_id(receipt_id, profile="receipt_review")
+
+    async def get_receipts_page(
+        self,
+        status: Optional[ReceiptStatus] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+    ) -> Page[ReceiptLog]:
+        """دریافت یک صفحه از رسیدها با صفحه‌بندی keyset
+
+        Args:
+            status: وضعیت رسیدها (None برای همه)
+            limit: تعداد رسید هر صفحه
+            cursor: cursor صفحه قبلی (None برای صفحه اول)
+
+        Returns:
+            Page[ReceiptLog]: رسیدهای صفحه و cursor صفحه‌های بعد و قبل
+        """
+        return await self._receipt_repo.get_page_by_status(status, limit, cursor)
+
     async def approve_receipt(self, receipt_id: int, admin_id: int) -> Optional[ReceiptLog]:
         """تایید رسید توسط ادمین
 
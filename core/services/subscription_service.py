@@ -0,0 +1,152 @@
+"""
+ساخت بدنه اشتراک (subscription) اکانت‌ها و کش آن با ETag
+
+بدنه اشتراک لیست لینک‌های کانفیگ یک اکانت است که از قالب‌های کامپایل شده inboundها
+(`config_generator`) ساخته می‌شود، نه از پنل. نتیجه به ازای توکن اشتراک در حافظه کش
+می‌شود تا درخواست‌های تکراری برنامه‌های کاربر با `If-None-Match` بدون دیتابیس پاسخ 304 بگیرند.
+"""
+
+import base64
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.settings import (
+    SUBSCRIPTION_BASE_URL,
+    SUBSCRIPTION_CACHE_SIZE,
+    SUBSCRIPTION_CACHE_TTL_SECONDS,
+    SUBSCRIPTION_UPDATE_INTERVAL_HOURS,
+)
+from core.utils.config_generator import get_inbound_template
+from db.models.client_account import AccountStatus, ClientAccount
+from db.repositories.client_repo import ClientRepository
+from db.repositories.inbound_repo import InboundRepository
+
+logger = logging.getLogger(__name__)
+
+
+def build_subscription_url(sub_token: str) -> Optional[str]:
+    """آدرس عمومی اشتراک یک اکانت (اگر `SUBSCRIPTION_BASE_URL` تنظیم شده باشد)"""
+    if not SUBSCRIPTION_BASE_URL or not sub_token:
+        return None
+    return f"{SUBSCRIPTION_BASE_URL.rstrip('/')}/sub/{sub_token}"
+
+
+def account_link(account: ClientAccount) -> Optional[str]:
+    """لینک تحویلی به کاربر: آدرس اشتراک اکانت (اگر فعال باشد) و در غیر این صورت لینک کانفیگ"""
+    return build_subscription_url(account.sub_token) or account.config_url
+
+
+@dataclass(frozen=True)
+class SubscriptionDocument:
+    """بدنه ساخته شده اشتراک یک اکانت به همراه هدرهای اطلاعات مصرف"""
+    links: str
+    userinfo: str
+    digest: str
+
+    @classmethod
+    def create(cls, links: List[str], userinfo: str) -> "SubscriptionDocument":
+        text = "\n".join(links)
+        digest = hashlib.sha256(f"{text}\x00{userinfo}".encode("utf-8")).hexdigest()[:32]
+        return cls(links=text, userinfo=userinfo, digest=digest)
+
+    def etag(self, fmt: str) -> str:
+        return f'"{self.digest}-{fmt}"'
+
+    def body(self, fmt: str) -> bytes:
+        raw = self.links.encode("utf-8")
+        return raw if fmt == "plain" else base64.b64encode(raw)
+
+    def headers(self, fmt: str) -> Dict[str, str]:
+        return {
+            "ETag": self.etag(fmt),
+            "Cache-Control": "no-cache",
+            "Subscription-Userinfo": self.userinfo,
+            "Profile-Update-Interval": str(SUBSCRIPTION_UPDATE_INTERVAL_HOURS),
+        }
+
+
+class SubscriptionCache:
+    """کش درون حافظه بدنه‌های اشتراک به ازای توکن (None یعنی توکن نامعتبر)"""
+
+    def __init__(self, ttl: int = SUBSCRIPTION_CACHE_TTL_SECONDS, maxsize: int = SUBSCRIPTION_CACHE_SIZE):
+        self._documents: Optional[TTLCache] = TTLCache(maxsize=maxsize, ttl=ttl) if ttl > 0 else None
+
+    def lookup(self, sub_token: str) -> Tuple[bool, Optional[SubscriptionDocument]]:
+        """(found, document)؛ found برای توکن نامعتبر کش شده هم True است"""
+        if self._documents is None or sub_token not in self._documents:
+            return False, None
+        return True, self._documents.get(sub_token)
+
+    def store(self, sub_token: str, document: Optional[SubscriptionDocument]) -> None:
+        if self._documents is not None:
+            self._documents[sub_token] = document
+
+    def invalidate(self, sub_token: str) -> None:
+        if self._documents is not None:
+            self._documents.pop(sub_token, None)
+
+    def clear(self) -> None:
+        if self._documents is not None:
+            self._documents.clear()
+
+
+class SubscriptionService:
+    """ساخت بدنه اشتراک اکانت‌ها از دیتابیس و قالب‌های کامپایل شده"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.client_repo = ClientRepository(session)
+        self.inbound_repo = InboundRepository(session)
+
+    async def build_document(self, sub_token: str, user_agent: Optional[str] = None) -> Optional[SubscriptionDocument]:
+        """
+        ساخت بدنه اشتراک یک توکن و ثبت زمان و User-Agent آخرین دریافت.
+
+        Args:
+            sub_token: توکن اشتراک اکانت.
+            user_agent: User-Agent برنامه کاربر.
+
+        Returns:
+            SubscriptionDocument یا None اگر توکن معتبر نباشد.
+        """
+        account = await self.client_repo.get_by_sub_token(sub_token)
+        if account is None:
+            return None
+
+        links = await self._build_links(account) if account.status == AccountStatus.ACTIVE and account.enable else []
+        await self.client_repo.touch_subscription(account.id, user_agent)
+        return SubscriptionDocument.create(links, self._userinfo(account))
+
+    async def _build_links(self, account: ClientAccount) -> List[str]:
+        inbounds = [account.inbound] if account.inbound is not None else []
+        # inboundهای اضافه همان پنل (inbound_ids) در صورت وجود
+        extra_ids = [i for i in (account.inbound_ids or []) if isinstance(i, int) and i != account.inbound_id]
+        if extra_ids:
+            inbounds += [ib for ib in await self.inbound_repo.get_by_ids(extra_ids) if ib.panel_id == account.panel_id]
+
+        remark = account.email_name or account.remote_uuid
+        links = []
+        for inbound in inbounds:
+            try:
+                template = get_inbound_template(account.panel, inbound)
+            except Exception as e:
+                logger.warning(f"ساخت قالب لینک inbound {inbound.id} برای اشتراک اکانت {account.id} ناموفق بود: {e} (Failed to compile link template of inbound {inbound.id} for account {account.id}: {e})")
+                continue
+            if template is not None:
+                links.append(template.render(account.remote_uuid, remark))
+        return links
+
+    @staticmethod
+    def _userinfo(account: ClientAccount) -> str:
+        # expiry_time زمان انقضای پنل به میلی‌ثانیه است
+        expire = (account.expiry_time or 0) // 1000
+        return f"upload=0; download={account.data_used or 0}; total={account.data_limit or 0}; expire={expire}"
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+subscription_cache = SubscriptionCache()
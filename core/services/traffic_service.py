@@ -0,0 +1,155 @@
+"""
+سرویس دریافت دسته‌ای مصرف ترافیک کلاینت‌ها از پنل‌ها و ثبت آن در ClientAccount
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.services.panel_service import PanelService, PanelConnectionError, PanelSyncError, _to_dict_safe
+from core.settings import PANEL_SYNC_CONCURRENCY, PANEL_SYNC_TIMEOUT_SECONDS
+from db import async_session_maker
+from db.models.panel import Panel
+from db.repositories.client_repo import ClientRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _extract_client_usage(xui_inbounds_raw: List[Any]) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """
+    استخراج مصرف کلاینت‌ها از لیست inboundهای پنل (فیلد clientStats).
+
+    Args:
+        xui_inbounds_raw: لیست خام inboundهای دریافتی از پنل.
+
+    Returns:
+        Tuple شامل:
+            - دیکشنری email -> مجموع ترافیک مصرفی (up + down، بایت)
+            - دیکشنری uuid -> email (از لیست clients در settings، برای اکانت‌های بدون email_name)
+    """
+    usage_by_email: Dict[str, int] = {}
+    email_by_uuid: Dict[str, str] = {}
+
+    for raw_inbound in xui_inbounds_raw:
+        inbound = _to_dict_safe(raw_inbound)
+        if not isinstance(inbound, dict):
+            continue
+
+        client_stats = inbound.get("clientStats") or inbound.get("client_stats") or []
+        for stat in client_stats:
+            stat = _to_dict_safe(stat)
+            email = stat.get("email")
+            if not email:
+                continue
+            usage_by_email[email] = int(stat.get("up") or 0) + int(stat.get("down") or 0)
+
+        settings = inbound.get("settings")
+        if isinstance(settings, str):
+            try:
+                settings = json.loads(settings)
+            except json.JSONDecodeError:
+                settings = {}
+        for client in (settings or {}).get("clients", []) if isinstance(settings, dict) else []:
+            client = _to_dict_safe(client)
+            if client.get("id") and client.get("email"):
+                email_by_uuid[str(client["id"])] = client["email"]
+
+    return usage_by_email, email_by_uuid
+
+
+class TrafficService:
+    """
+    دریافت دسته‌ای مصرف ترافیک تمام کلاینت‌های یک پنل با یک درخواست (لیست inboundها)
+    و ثبت شمارنده‌های تغییر کرده با UPDATE دسته‌ای، به جای یک درخواست HTTP به ازای هر کلاینت.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.client_repo = ClientRepository(session)
+        self.panel_service = PanelService(session)
+
+    async def apply_panel_usage(self, panel_id: int, xui_inbounds_raw: List[Any]) -> Dict[str, int]:
+        """
+        اعمال مصرف دریافتی از پنل روی اکانت‌های همان پنل (بدون commit).
+
+        Args:
+            panel_id: شناسه پنل.
+            xui_inbounds_raw: لیست خام inboundهای پنل (شامل clientStats).
+
+        Returns:
+            Dict[str, int]: تعداد اکانت‌های updated، unchanged و unmatched.
+        """
+        usage_by_email, email_by_uuid = _extract_client_usage(xui_inbounds_raw)
+        accounts = await self.client_repo.get_traffic_state_by_panel_id(panel_id)
+
+        changed: Dict[int, int] = {}
+        unchanged = unmatched = 0
+        for account in accounts:
+            email = account.email_name or email_by_uuid.get(account.remote_uuid)
+            used = usage_by_email.get(email) if email else None
+            if used is None:
+                unmatched += 1
+            elif used != account.data_used:
+                changed[account.id] = used
+            else:
+                unchanged += 1
+
+        updated = await self.client_repo.bulk_update_traffic(changed) if changed else 0
+        counts = {"updated": updated, "unchanged": unchanged, "unmatched": unmatched}
+        logger.info(f"مصرف ترافیک پنل {panel_id} ثبت شد: {counts} (Traffic usage ingested for panel {panel_id}: {counts})")
+        return counts
+
+    async def ingest_all_panels(self) -> Dict[int, Dict[str, int]]:
+        """
+        دریافت مصرف ترافیک از تمام پنل‌های فعال به صورت هم‌زمان (با سقف `PANEL_SYNC_CONCURRENCY`).
+        نوشتن هر پنل در نشست دیتابیس جداگانه انجام و commit می‌شود.
+
+        Returns:
+            Dict[int, Dict[str, int]]: نتیجه هر پنل (برای پنل‌های ناموفق دیکشنری خالی).
+        """
+        active_panels = await self.panel_service.get_active_panels()
+        if not active_panels:
+            return {}
+
+        semaphore = asyncio.Semaphore(max(1, PANEL_SYNC_CONCURRENCY))
+        outcomes = await asyncio.gather(
+            *(self._ingest_panel_isolated(panel, semaphore) for panel in active_panels)
+        )
+        return dict(outcomes)
+
+    async def _ingest_panel_isolated(self, panel: Panel, semaphore: asyncio.Semaphore) -> Tuple[int, Dict[str, int]]:
+        """[Helper خصوصی] دریافت و ثبت مصرف یک پنل؛ هرگز خطا پرتاب نمی‌کند."""
+        panel_id = panel.id
+        async with semaphore:
+            try:
+                xui_inbounds_raw = await asyncio.wait_for(
+                    self.panel_service._fetch_remote_inbounds(panel), timeout=PANEL_SYNC_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"🔥 پنل {panel_id} هنگام دریافت مصرف ترافیک در {PANEL_SYNC_TIMEOUT_SECONDS} ثانیه پاسخ نداد. (Panel {panel_id} timed out during traffic ingestion.)")
+                return panel_id, {}
+            except (PanelConnectionError, PanelSyncError) as e:
+                logger.error(f"🔥 دریافت مصرف ترافیک پنل {panel_id} ناموفق بود: {e} (Traffic ingestion failed for panel {panel_id}: {e})")
+                return panel_id, {}
+            except Exception as e:
+                logger.error(f"🔥 خطای پیش‌بینی نشده در دریافت مصرف ترافیک پنل {panel_id}: {e} (Unexpected error ingesting traffic for panel {panel_id}: {e})", exc_info=True)
+                return panel_id, {}
+
+        async with async_session_maker() as panel_session:
+            try:
+                counts = await TrafficService(panel_session).apply_panel_usage(panel_id, xui_inbounds_raw)
+                await panel_session.commit()
+                return panel_id, counts
+            except SQLAlchemyError as db_err:
+                await panel_session.rollback()
+                logger.error(f"خطای دیتابیس در ثبت مصرف ترافیک پنل {panel_id}: {db_err} (Database error storing traffic for panel {panel_id}: {db_err})", exc_info=True)
+                return panel_id, {}
+            except Exception as e:
+                # خطای غیر دیتابیسی (مثلاً داده نامعتبر پنل) نباید دریافت مصرف سایر پنل‌ها را در gather متوقف کند
+                await panel_session.rollback()
+                logger.error(f"🔥 خطای پیش‌بینی نشده در ثبت مصرف ترافیک پنل {panel_id}: {e} (Unexpected error storing traffic for panel {panel_id}: {e})", exc_info=True)
+                return panel_id, {}
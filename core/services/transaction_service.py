@@ -7,6 +7,7 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.repositories.transaction_repo import TransactionRepository
+from db.repositories.pagination import Page
 from db.models.transaction import Transaction  # Keep for type hinting if needed
 from db.models.enums import TransactionStatus, PaymentMethod # Import enums
 from db.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionSchema
@@ -60,10 +61,14 @@ class TransactionService:
             return TransactionSchema.from_orm(transaction)
         return None
 
-    async def get_user_transactions(self, user_id: int, limit: int = 10, offset: int = 0) -> List[TransactionSchema]:
-        """Get transactions for a specific user."""
-        transactions = await self.transaction_repo.get_by_user_id(user_id, limit=limit, offset=offset)
-        return [TransactionSchema.from_orm(t) for t in transactions]
+    async def get_user_transactions(self, user_id: int, limit: int = 10, cursor: Optional[str] = None) -> Page[TransactionSchema]:
+        """Get one page of transactions for a specific user (keyset cursor from the previous page)."""
+        page = await self.transaction_repo.get_user_transactions_page(user_id, cursor=cursor, limit=limit)
+        return Page(
+            [TransactionSchema.from_orm(t) for t in page.items],
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
+        )
 
     async def update_transaction_status(
         self, 
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from db.repositories.user_repo import UserRepository
+from db.repositories.pagination import Page
 from db.models.user import User, UserRole, UserStatus
 from db.models.enums import UserRole
 
@@ -125,3 +126,11 @@ class UserService:
         await session.commit()
         await session.refresh(new_user)
         return new_user
+
+    async def get_users_page(self, cursor: Optional[str] = None, limit: int = 10) -> Page[User]:
+        """دریافت یک صفحه از لیست کاربران با cursor صفحه قبلی"""
+        return await self.user_repo.get_users_page(cursor, limit)
+
+    async def count_users(self, role: Optional[str] = None) -> int:
+        """شمارش کاربران (اختیاری بر اساس نقش) بدون بارگذاری آنها"""
+        return await self.user_repo.count_users(role)
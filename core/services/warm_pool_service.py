@@ -0,0 +1,171 @@
+"""
+سرویس استخر گرم (warm pool) کلاینت‌های از پیش ساخته شده در پنل‌ها
+
+برای هر inbound فعال تعدادی کلاینت غیرفعال از قبل در پنل ساخته می‌شود تا هنگام
+خرید فقط یک کلاینت از استخر برداشته، انقضا و حجم پلن روی آن اعمال و فعال شود؛
+بنابراین تأخیر ساخت کلاینت در پنل به زمان انتظار کاربر اضافه نمی‌شود.
+"""
+
+import asyncio
+import logging
+import secrets
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.integrations.circuit_breaker import panel_circuit_breaker
+from core.integrations.xui_client import batch_transport_failed
+from core.services.panel_service import PanelService
+from core.settings import PANEL_SYNC_CONCURRENCY, WARM_POOL_SIZE
+from db import async_session_maker
+from db.models.enums import InboundStatus, PanelStatus
+from db.models.inbound import Inbound
+from db.models.panel import Panel
+from db.models.warm_pool_client import WarmPoolClient
+from db.repositories.warm_pool_repo import WarmPoolRepository
+
+logger = logging.getLogger(__name__)
+
+
+class WarmPoolService:
+    """مدیریت برداشت (claim) و پر کردن مجدد استخر گرم کلاینت‌ها"""
+
+    def __init__(self, session: AsyncSession, panel_service: Optional[PanelService] = None):
+        self.session = session
+        self.panel_service = panel_service or PanelService(session)
+        self.pool_repo = WarmPoolRepository(session)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return WARM_POOL_SIZE > 0
+
+    async def claim(self, inbound_id: int, user_id: int) -> Optional[WarmPoolClient]:
+        """
+        برداشت اتمی یک کلاینت آماده از استخر inbound (در تراکنش جاری، بدون commit).
+
+        Returns:
+            WarmPoolClient برداشت شده یا None اگر استخر خالی باشد.
+        """
+        if not self.is_enabled():
+            return None
+        pooled = await self.pool_repo.claim_available(inbound_id, user_id)
+        if pooled:
+            logger.info(f"کلاینت {pooled.remote_uuid} از استخر گرم inbound {inbound_id} برای کاربر {user_id} برداشته شد. (Claimed pooled client {pooled.remote_uuid} of inbound {inbound_id} for user {user_id}.)")
+        else:
+            logger.info(f"استخر گرم inbound {inbound_id} خالی است؛ ساخت مستقیم کلاینت. (Warm pool of inbound {inbound_id} is empty, falling back to direct creation.)")
+        return pooled
+
+    async def activate_on_panel(
+        self, panel: Panel, remote_inbound_id: int, pooled: WarmPoolClient, client_data: Dict[str, Any]
+    ) -> None:
+        """اعمال مشخصات پلن (انقضا، حجم، ایمیل) روی کلاینت برداشته شده و فعال کردن آن در پنل"""
+        client = await self.panel_service._get_xui_client(panel)
+        await panel_circuit_breaker.call(
+            panel.id, lambda: client.update_client(pooled.remote_uuid, remote_inbound_id, {**client_data, "enable": True})
+        )
+
+    async def release_on_panel(
+        self, panel_id: int, remote_inbound_id: int, remote_uuid: str, email_name: str, sub_id: Optional[str]
+    ) -> None:
+        """
+        بازگرداندن کلاینت به حالت استخر (غیرفعال) پس از شکست خرید.
+        رکورد استخر با rollback تراکنش خرید دوباره AVAILABLE می‌شود؛ مقادیر به صورت ساده
+        پاس داده می‌شوند چون آبجکت‌های ORM پس از rollback منقضی شده‌اند.
+        """
+        try:
+            client = await self.panel_service.get_xui_client_by_id(panel_id)
+            if client:
+                await panel_circuit_breaker.call(
+                    panel_id,
+                    lambda: client.update_client(remote_uuid, remote_inbound_id, self._pool_client_data(remote_uuid, email_name, sub_id)),
+                )
+        except Exception as e:
+            logger.error(f"بازگرداندن کلاینت {remote_uuid} به استخر گرم ناموفق بود: {e} (Failed to return pooled client {remote_uuid} to the pool: {e})", exc_info=True)
+
+    @staticmethod
+    def _pool_client_data(client_uuid: str, email: str, sub_id: Optional[str]) -> Dict[str, Any]:
+        """داده کلاینت غیرفعال استخر برای API پنل"""
+        return {
+            "id": client_uuid,
+            "email": email,
+            "enable": False,
+            "total_gb": 0,
+            "expiry_time": 0,
+            "limit_ip": 1,
+            "sub_id": sub_id or "",
+        }
+
+    async def refill_all(self) -> Dict[int, int]:
+        """
+        پر کردن استخر تمام inboundهای فعال تا `WARM_POOL_SIZE` (برای اجرای دوره‌ای).
+        ساخت کلاینت‌ها برای پنل‌های مختلف به صورت هم‌زمان و نوشتن هر inbound در نشست جداگانه انجام می‌شود.
+
+        Returns:
+            Dict[int, int]: تعداد کلاینت‌های ساخته شده برای هر inbound.
+        """
+        if not self.is_enabled():
+            return {}
+
+        rows = (await self.session.execute(
+            select(Inbound.id, Inbound.remote_id, Panel)
+            .join(Panel, Panel.id == Inbound.panel_id)
+            .where(Panel._status == PanelStatus.ACTIVE, Inbound.status == InboundStatus.ACTIVE)
+        )).all()
+        available = await self.pool_repo.count_available_by_inbound()
+
+        semaphore = asyncio.Semaphore(max(1, PANEL_SYNC_CONCURRENCY))
+        tasks = [
+            self._refill_inbound(panel, inbound_id, remote_id, WARM_POOL_SIZE - available.get(inbound_id, 0), semaphore)
+            for inbound_id, remote_id, panel in rows
+            if available.get(inbound_id, 0) < WARM_POOL_SIZE
+        ]
+        created = await asyncio.gather(*tasks)
+        return {inbound_id: count for inbound_id, count in created if count}
+
+    async def _refill_inbound(
+        self, panel: Panel, inbound_id: int, remote_inbound_id: int, missing: int, semaphore: asyncio.Semaphore
+    ) -> tuple:
+        """[Helper خصوصی] ساخت کلاینت‌های کسری یک inbound در پنل و ثبت آن‌ها؛ هرگز خطا پرتاب نمی‌کند."""
+        created: List[dict] = []
+        async with semaphore:
+            try:
+                client = await self.panel_service._get_xui_client(panel)
+                pending = [
+                    self._pool_client_data(str(uuid.uuid4()), f"pool-{secrets.token_hex(6)}", secrets.token_hex(8))
+                    for _ in range(missing)
+                ]
+                # ساخت کل کسری با درخواست‌های addClient دسته‌ای به جای یک درخواست برای هر کلاینت
+                results = await panel_circuit_breaker.call(
+                    panel.id, lambda: client.create_clients(remote_inbound_id, pending), failed=batch_transport_failed
+                )
+                created = [
+                    {
+                        "panel_id": panel.id,
+                        "inbound_id": inbound_id,
+                        "remote_uuid": data["id"],
+                        "email_name": data["email"],
+                        "sub_id": data["sub_id"],
+                    }
+                    for data in pending
+                    if results.get(data["id"]) is None
+                ]
+            except Exception as e:
+                logger.error(f"🔥 پر کردن استخر گرم inbound {inbound_id} (پنل {panel.id}) ناموفق بود: {e} (Warm pool refill failed for inbound {inbound_id} on panel {panel.id}: {e})", exc_info=True)
+
+        if not created:
+            return inbound_id, 0
+
+        async with async_session_maker() as pool_session:
+            try:
+                await WarmPoolRepository(pool_session).add_many(created)
+                await pool_session.commit()
+            except SQLAlchemyError as db_err:
+                await pool_session.rollback()
+                logger.error(f"خطای دیتابیس در ثبت کلاینت‌های استخر گرم inbound {inbound_id}: {db_err} (Database error storing warm pool clients for inbound {inbound_id}: {db_err})", exc_info=True)
+                return inbound_id, 0
+
+        logger.info(f"{len(created)} کلاینت به استخر گرم inbound {inbound_id} اضافه شد. (Added {len(created)} clients to warm pool of inbound {inbound_id}.)")
+        return inbound_id, len(created)
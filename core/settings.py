@@ -57,3 +57,130 @@ REDIS_HOST: str = os.getenv("REDIS_HOST", "redis") # نام سرویس داکر
 REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379")) # پورت پیش‌فرض ردیس
 # REDIS_DB: int = int(os.getenv("REDIS_DB", "0")) # در صورت نیاز به دیتابیس خاص ردیس
 # REDIS_PASSWORD: str | None = os.getenv("REDIS_PASSWORD", None) # در صورت نیاز به پسورد ردیس
+
+# تنظیمات ارتباط با پنل‌های XUI
+# حداکثر عمر سشن لاگین پنل (ثانیه) قبل از لاگین مجدد پیشگیرانه
+XUI_SESSION_TTL_SECONDS: int = int(os.getenv("XUI_SESSION_TTL_SECONDS", "3000"))
+# حداکثر تعداد پنل‌هایی که هم‌زمان همگام‌سازی می‌شوند
+PANEL_SYNC_CONCURRENCY: int = int(os.getenv("PANEL_SYNC_CONCURRENCY", "10"))
+# حداکثر زمان انتظار برای پاسخ هر پنل در همگام‌سازی (ثانیه)
+PANEL_SYNC_TIMEOUT_SECONDS: float = float(os.getenv("PANEL_SYNC_TIMEOUT_SECONDS", "30"))
+
+# حالت اجرای همگام‌سازی پنل‌ها در زمان راه‌اندازی ربات:
+# background = شروع فوری polling و همگام‌سازی در پس‌زمینه، blocking = رفتار قدیمی (انتظار تا پایان همگام‌سازی)
+STARTUP_SYNC_MODE: str = os.getenv("STARTUP_SYNC_MODE", "background").lower()
+
+# فاصله زمانی دریافت دسته‌ای مصرف ترافیک کلاینت‌ها از پنل‌ها (ثانیه، 0 = غیرفعال)
+TRAFFIC_SYNC_INTERVAL_SECONDS: int = int(os.getenv("TRAFFIC_SYNC_INTERVAL_SECONDS", "300"))
+
+# انتخاب پنل برای اکانت‌های جدید: least_loaded یا weighted
+PANEL_PLACEMENT_STRATEGY: str = os.getenv("PANEL_PLACEMENT_STRATEGY", "least_loaded").lower()
+# عمر کش بار پنل‌ها و فاصله بررسی وضعیت سرور پنل‌ها (ثانیه)
+PANEL_LOAD_CACHE_TTL_SECONDS: int = int(os.getenv("PANEL_LOAD_CACHE_TTL_SECONDS", "60"))
+# پنل‌هایی که CPU یا RAM آن‌ها از این درصد بالاتر است برای اکانت جدید انتخاب نمی‌شوند
+PANEL_MAX_CPU_PERCENT: float = float(os.getenv("PANEL_MAX_CPU_PERCENT", "90"))
+PANEL_MAX_MEMORY_PERCENT: float = float(os.getenv("PANEL_MAX_MEMORY_PERCENT", "90"))
+
+# استخر گرم: تعداد کلاینت‌های غیرفعال از پیش ساخته شده برای هر inbound (0 = غیرفعال)
+WARM_POOL_SIZE: int = int(os.getenv("WARM_POOL_SIZE", "0"))
+# فاصله زمانی پر کردن مجدد استخر گرم (ثانیه)
+WARM_POOL_REFILL_INTERVAL_SECONDS: int = int(os.getenv("WARM_POOL_REFILL_INTERVAL_SECONDS", "120"))
+
+# Circuit breaker پنل‌ها: تعداد خطای پشت سر هم برای باز شدن مدار و مدت انتظار قبل از probe مجدد (ثانیه)
+PANEL_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("PANEL_CIRCUIT_FAILURE_THRESHOLD", "3"))
+PANEL_CIRCUIT_RESET_SECONDS: float = float(os.getenv("PANEL_CIRCUIT_RESET_SECONDS", "30"))
+# تعداد آخرین درخواست‌هایی که در امتیاز سلامت پنل (تأخیر و نرخ خطا) حساب می‌شوند
+PANEL_HEALTH_WINDOW: int = int(os.getenv("PANEL_HEALTH_WINDOW", "50"))
+
+# عمر snapshot درون حافظه‌ای کلاینت‌ها و inboundهای هر پنل (ثانیه، هر عملیات نوشتن آن را باطل می‌کند)
+XUI_SNAPSHOT_TTL_SECONDS: float = float(os.getenv("XUI_SNAPSHOT_TTL_SECONDS", "30"))
+# مدت استفاده مجدد از نتیجه خواندن‌های یکسان از یک پنل (ثانیه، 0 = فقط اشتراک درخواست‌های هم‌زمان)
+XUI_READ_CACHE_TTL_SECONDS: float = float(os.getenv("XUI_READ_CACHE_TTL_SECONDS", "2"))
+
+# لایه انتقال HTTP پنل‌ها: timeout اتصال و خواندن (ثانیه)
+XUI_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("XUI_HTTP_CONNECT_TIMEOUT", "5"))
+XUI_HTTP_READ_TIMEOUT: float = float(os.getenv("XUI_HTTP_READ_TIMEOUT", "15"))
+# حداکثر اتصال هم‌زمان و اتصال‌های keep-alive نگه داشته شده برای هر پنل
+XUI_HTTP_MAX_CONNECTIONS: int = int(os.getenv("XUI_HTTP_MAX_CONNECTIONS", "20"))
+XUI_HTTP_KEEPALIVE_CONNECTIONS: int = int(os.getenv("XUI_HTTP_KEEPALIVE_CONNECTIONS", "10"))
+XUI_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("XUI_HTTP_KEEPALIVE_EXPIRY", "30"))
+# استفاده از HTTP/2 (نیازمند پکیج h2)
+XUI_HTTP2: bool = os.getenv("XUI_HTTP2", "false").lower() in ("1", "true", "yes")
+# حداکثر تکرار درخواست‌های خواندنی و نسبت تکرار مجاز به کل درخواست‌های هر پنل (retry budget)
+XUI_HTTP_MAX_RETRIES: int = int(os.getenv("XUI_HTTP_MAX_RETRIES", "2"))
+XUI_RETRY_BUDGET_RATIO: float = float(os.getenv("XUI_RETRY_BUDGET_RATIO", "0.2"))
+# مهلت درخواست‌های پنل داخل هر handler تلگرام (ثانیه، 0 = بدون مهلت)
+PANEL_HANDLER_DEADLINE_SECONDS: float = float(os.getenv("PANEL_HANDLER_DEADLINE_SECONDS", "20"))
+
+# ذخیره کوکی سشن پنل‌ها در Redis برای استفاده مشترک بین ری‌استارت‌ها و replicaها
+XUI_SESSION_STORE_ENABLED: bool = os.getenv("XUI_SESSION_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+# عمر کوکی ذخیره شده (ثانیه)؛ باید از مدت سشن پنل (پیش‌فرض 3x-ui: 60 دقیقه) کمتر باشد
+XUI_SESSION_COOKIE_TTL_SECONDS: int = int(os.getenv("XUI_SESSION_COOKIE_TTL_SECONDS", "3000"))
+
+# حداکثر تعداد کلاینت در هر درخواست addClient دسته‌ای
+XUI_CLIENT_BATCH_SIZE: int = int(os.getenv("XUI_CLIENT_BATCH_SIZE", "50"))
+
+# حداکثر تعداد قالب‌های کامپایل شده لینک کانفیگ (به ازای تنظیمات هر inbound) در حافظه
+CONFIG_TEMPLATE_CACHE_SIZE: int = int(os.getenv("CONFIG_TEMPLATE_CACHE_SIZE", "1024"))
+
+# تعداد اکانت‌ها در هر تکه خواندن/نوشتن هنگام بازسازی لینک‌های کانفیگ یک inbound
+CONFIG_REGEN_CHUNK_SIZE: int = int(os.getenv("CONFIG_REGEN_CHUNK_SIZE", "500"))
+# ارسال پیام به کاربران پس از بازسازی لینک کانفیگ اکانت‌هایشان
+CONFIG_REGEN_NOTIFY_USERS: bool = os.getenv("CONFIG_REGEN_NOTIFY_USERS", "true").lower() in ("1", "true", "yes")
+# حداکثر تعداد پیام گروهی ارسالی در هر ثانیه (محدودیت تلگرام حدود ۳۰ پیام در ثانیه است)
+NOTIFICATION_RATE_PER_SECOND: float = float(os.getenv("NOTIFICATION_RATE_PER_SECOND", "25"))
+# حداکثر تعداد کارهای اطلاع‌رسانی گروهی در صف
+NOTIFICATION_QUEUE_SIZE: int = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "1000"))
+
+# سرور HTTP اشتراک (subscription) داخل پروسه ربات
+SUBSCRIPTION_SERVER_ENABLED: bool = os.getenv("SUBSCRIPTION_SERVER_ENABLED", "false").lower() in ("1", "true", "yes")
+SUBSCRIPTION_HOST: str = os.getenv("SUBSCRIPTION_HOST", "0.0.0.0")
+SUBSCRIPTION_PORT: int = int(os.getenv("SUBSCRIPTION_PORT", "8080"))
+# آدرس عمومی سرور اشتراک برای ساخت لینک کاربران (مثلاً https://sub.example.com)
+SUBSCRIPTION_BASE_URL: str = os.getenv("SUBSCRIPTION_BASE_URL", "")
+# مدت نگهداری بدنه ساخته شده اشتراک در حافظه (ثانیه)؛ درخواست‌های با ETag معتبر در این مدت بدون دیتابیس پاسخ می‌گیرند
+SUBSCRIPTION_CACHE_TTL_SECONDS: int = int(os.getenv("SUBSCRIPTION_CACHE_TTL_SECONDS", "300"))
+# حداکثر تعداد اشتراک‌های کش شده در حافظه
+SUBSCRIPTION_CACHE_SIZE: int = int(os.getenv("SUBSCRIPTION_CACHE_SIZE", "50000"))
+# فاصله پیشنهادی به‌روزرسانی اشتراک در برنامه کاربر (ساعت)
+SUBSCRIPTION_UPDATE_INTERVAL_HOURS: int = int(os.getenv("SUBSCRIPTION_UPDATE_INTERVAL_HOURS", "12"))
+
+# تعداد پروسه‌های ساخت QR Code (0 = اجرا در thread pool پیش‌فرض)
+QR_RENDER_WORKERS: int = int(os.getenv("QR_RENDER_WORKERS", "2"))
+# حداکثر تعداد تصاویر QR کش شده در حافظه (به ازای لینک)
+QR_CACHE_SIZE: int = int(os.getenv("QR_CACHE_SIZE", "512"))
+# پوشه ذخیره فایل QR Code (خالی = بدون ذخیره روی دیسک)
+QR_CODE_DIR: str = os.getenv("QR_CODE_DIR", "")
+
+# عمر file_id های کش شده تلگرام برای رسانه‌های تکراری (ثانیه، 0 = بدون انقضا)
+TELEGRAM_FILE_CACHE_TTL_SECONDS: int = int(os.getenv("TELEGRAM_FILE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# تنظیمات connection pool موتور مشترک دیتابیس
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+# حداکثر انتظار برای گرفتن اتصال از pool (ثانیه)
+DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+# بازسازی اتصال‌ها قبل از wait_timeout سرور MySQL (ثانیه)
+DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+# فاصله ثبت آمار pool در لاگ (ثانیه، 0 = غیرفعال)
+DB_POOL_METRICS_LOG_INTERVAL_SECONDS: int = int(os.getenv("DB_POOL_METRICS_LOG_INTERVAL_SECONDS", "300"))
+
+# شمارش کوئری‌های هر handler برای یافتن N+1
+QUERY_BUDGET_ENABLED: bool = os.getenv("QUERY_BUDGET_ENABLED", "true").lower() in ("1", "true", "yes")
+# بودجه پیش‌فرض کوئری هر handler (قابل تغییر با @query_budget_for)
+QUERY_BUDGET_DEFAULT: int = int(os.getenv("QUERY_BUDGET_DEFAULT", "25"))
+# خطا به جای هشدار هنگام عبور از بودجه (برای تست‌ها)
+QUERY_BUDGET_STRICT: bool = os.getenv("QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+# آدرس replica های فقط‌خواندنی MySQL، جدا شده با کاما (خالی = همه کوئری‌ها روی primary)
+DATABASE_REPLICA_URLS: list[str] = [
+    url.strip().replace("pymysql", "aiomysql")
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+# حداکثر تأخیر replication قابل قبول برای خواندن از replica (ثانیه)
+REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# فاصله بررسی سلامت و تأخیر replica ها (ثانیه)
+REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL_SECONDS", "10"))
@@ -0,0 +1,104 @@
+"""
+سرور HTTP سبک اشتراک (subscription) برای برنامه‌های کاربر
+
+`GET /sub/{token}` لیست لینک‌های کانفیگ اکانت را به صورت base64 (پیش‌فرض) یا متن ساده
+(`?format=plain`) برمی‌گرداند. بدنه‌ها در `subscription_cache` نگه داشته می‌شوند و با ETag
+ارسال می‌شوند؛ درخواست دوره‌ای برنامه‌ها با `If-None-Match` معتبر بدون دیتابیس و پنل
+پاسخ 304 می‌گیرد. ساخت هم‌زمان بدنه یک توکن فقط یک بار انجام می‌شود.
+
+اجرا: داخل پروسه ربات با `SUBSCRIPTION_SERVER_ENABLED=true`، یا مستقل با
+`python -m core.subscription_server`.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from core.integrations.single_flight import SingleFlight
+from core.services.subscription_service import SubscriptionDocument, SubscriptionService, subscription_cache
+from core.settings import SUBSCRIPTION_HOST, SUBSCRIPTION_PORT
+from db import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+_FORMATS = ("b64", "plain")
+
+# ادغام ساخت هم‌زمان بدنه یک توکن (بدون کش نتیجه؛ کش در subscription_cache است)
+_build_coalescer = SingleFlight(ttl=0)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """مقایسه ضعیف ETag با هدر If-None-Match (شامل لیست و *)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def _load_document(sub_token: str, user_agent: Optional[str]) -> Optional[SubscriptionDocument]:
+    async with async_session_maker() as session:
+        document = await SubscriptionService(session).build_document(sub_token, user_agent)
+        await session.commit()
+    subscription_cache.store(sub_token, document)
+    return document
+
+
+async def handle_subscription(request: web.Request) -> web.StreamResponse:
+    sub_token = request.match_info["token"]
+    fmt = request.query.get("format", "b64")
+    if fmt not in _FORMATS:
+        raise web.HTTPBadRequest(text="format must be b64 or plain")
+
+    found, document = subscription_cache.lookup(sub_token)
+    if not found:
+        try:
+            document = await _build_coalescer.do(
+                ("subscription", sub_token),
+                lambda: _load_document(sub_token, request.headers.get("User-Agent")),
+            )
+        except Exception as e:
+            logger.error(f"خطا در ساخت اشتراک: {e} (Error building subscription: {e})", exc_info=True)
+            raise web.HTTPServiceUnavailable()
+    if document is None:
+        raise web.HTTPNotFound()
+
+    headers = document.headers(fmt)
+    if _etag_matches(request.headers.get("If-None-Match"), document.etag(fmt)):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=document.body(fmt), content_type="text/plain", charset="utf-8", headers=headers)
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/sub/{token}", handle_subscription)
+    return app
+
+
+async def start_subscription_server(host: str = SUBSCRIPTION_HOST, port: int = SUBSCRIPTION_PORT) -> web.AppRunner:
+    """راه‌اندازی سرور روی حلقه رویداد جاری؛ runner برگردانده شده را در خاموشی `cleanup` کنید"""
+    runner = web.AppRunner(create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"سرور اشتراک روی {host}:{port} اجرا شد. (Subscription server listening on {host}:{port}.)")
+    return runner
+
+
+async def main() -> None:
+    runner = await start_subscription_server()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("سرور اشتراک متوقف شد. (Subscription server stopped.)")
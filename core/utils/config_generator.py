@@ -3,11 +3,17 @@ Utilities for generating VPN configuration links based on panel and inbound sett
 """
 
 import logging
+import hashlib
 import json
 import base64
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Iterable, Tuple
 from urllib.parse import urlparse, urlencode
 
+from cachetools import LRUCache
+
+from core.settings import CONFIG_TEMPLATE_CACHE_SIZE
+
 # Assuming models are accessible, adjust path if necessary
 from db.models.panel import Panel
 from db.models.inbound import Inbound
@@ -18,6 +24,245 @@ class ConfigGenerationError(Exception):
      """Custom exception for configuration generation errors."""
      pass
 
+def _client_defaults(inbound_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Return per-client defaults (flow, alterId) from compact settings, falling back to a legacy 'clients' list."""
+    defaults = inbound_settings.get("client_defaults")
+    if isinstance(defaults, dict):
+        return defaults
+    clients = inbound_settings.get("clients") or [{}]
+    return clients[0] if isinstance(clients[0], dict) else {}
+
+# Placeholders substituted into precompiled VMess JSON (never produced by real settings)
+_UUID_PLACEHOLDER = "__MOONVPN_CLIENT_UUID__"
+_REMARK_PLACEHOLDER = "__MOONVPN_CLIENT_REMARK__"
+
+
+@dataclass(frozen=True)
+class ConfigTemplate:
+    """
+    Precompiled config link of one inbound: everything except the client UUID and remark.
+    Rendering a link is plain string substitution, without re-walking stream/TLS/REALITY settings.
+    """
+    protocol: str
+    head: str = ""  # VLESS: text before the UUID
+    tail: str = ""  # VLESS: text between the UUID and the remark
+    vmess_json: str = ""  # VMess: sorted JSON with UUID/remark placeholders
+    vmess_fields: Tuple[Tuple[str, Any], ...] = ()  # VMess: cleaned fields for the empty-value fallback
+
+    def render(self, client_uuid: str, remark: str) -> str:
+        if self.protocol == "vless":
+            return f"{self.head}{client_uuid}{self.tail}{remark}".strip()
+        if client_uuid and remark:
+            json_string = (
+                self.vmess_json
+                .replace(_UUID_PLACEHOLDER, json.dumps(client_uuid)[1:-1])
+                .replace(_REMARK_PLACEHOLDER, json.dumps(remark)[1:-1])
+            )
+        else:
+            # Empty values are dropped from VMess JSON, so they cannot be substituted
+            fields = {**dict(self.vmess_fields), "id": client_uuid, "ps": remark}
+            json_string = json.dumps({k: v for k, v in fields.items() if v not in [None, ""]}, separators=(',', ':'), sort_keys=True)
+        encoded_string = base64.urlsafe_b64encode(json_string.encode('utf-8')).decode('utf-8').rstrip('=')
+        return f"vmess://{encoded_string}"
+
+
+def compile_config_template(
+    address: str,
+    protocol: str,
+    port: Any,
+    stream_settings: Optional[Dict[str, Any]],
+    sniffing_settings: Optional[Dict[str, Any]],
+    inbound_settings: Optional[Dict[str, Any]],
+) -> Optional[ConfigTemplate]:
+    """
+    Compiles the VLESS/VMess link template of an inbound.
+
+    Args:
+        address: Hostname clients connect to.
+        protocol: Inbound protocol.
+        port: Inbound port.
+        stream_settings: Inbound streamSettings.
+        sniffing_settings: Inbound sniffing settings.
+        inbound_settings: Protocol settings (compact settings_json or live panel settings).
+
+    Returns:
+        The compiled template, or None if the protocol is unsupported or protocol/port are missing.
+
+    Raises:
+        KeyError: If a required key is missing from the settings.
+    """
+    protocol = (protocol or "").lower() # Ensure lowercase for comparison
+    if not protocol or not port:
+        return None
+
+    stream_settings = stream_settings or {}
+    inbound_settings = inbound_settings or {} # VLESS/VMess/Trojan specific settings
+
+    network = stream_settings.get("network", "tcp")
+    security = stream_settings.get("security", "none")
+
+    # --- VLESS --- 
+    if protocol == "vless":
+        params: Dict[str, Any] = {"type": network, "security": security}
+        
+        # Network specific settings
+        if network == "tcp":
+            tcp_settings = stream_settings.get("tcpSettings", {})
+            header = tcp_settings.get("header", {})
+            if header.get("type") == "http":
+                params["headerType"] = "http"
+                req = header.get("request", {})
+                # Ensure path starts with /
+                path_list = req.get("path", ["/"])
+                path = path_list[0] if path_list and path_list[0].startswith("/") else "/" + path_list[0] if path_list else "/"
+                params["path"] = path
+                host_headers = req.get("headers", {}).get("Host", [])
+                host = host_headers[0] if host_headers else ""
+                if host: params["host"] = host
+        elif network == "ws":
+            ws_settings = stream_settings.get("wsSettings", {})
+            path = ws_settings.get("path", "/")
+            params["path"] = path if path.startswith("/") else "/" + path
+            host = ws_settings.get("headers", {}).get("Host", "")
+            if host: params["host"] = host
+        elif network == "grpc":
+            grpc_settings = stream_settings.get("grpcSettings", {})
+            params["serviceName"] = grpc_settings.get("serviceName", "")
+            # VLESS grpc link uses 'mode' (multi/gun), default seems to be gun
+            params["mode"] = "multi" if grpc_settings.get("multiMode", False) else "gun"
+
+        # Security specific settings
+        if security == "tls":
+            tls_settings = stream_settings.get("tlsSettings", {})
+            params["sni"] = tls_settings.get("serverName") or tls_settings.get("sni") or address # Use serverName or sni if available
+            params["fp"] = tls_settings.get("fingerprint", "")
+            alpn_list = tls_settings.get("alpn", [])
+            params["alpn"] = ",".join(alpn_list) if alpn_list else None # Comma separated
+        elif security == "reality":
+            reality_settings = stream_settings.get("realitySettings", {})
+            # REALITY settings might be nested under 'settings' key in some panel versions
+            inner_reality_settings = reality_settings.get("settings", reality_settings) 
+            params["sni"] = reality_settings.get("serverNames", [address])[0]
+            params["fp"] = inner_reality_settings.get("fingerprint", "chrome") # Default fingerprint
+            params["pbk"] = inner_reality_settings.get("publicKey", "")
+            params["sid"] = inner_reality_settings.get("shortIds", [""])[0]
+            params["spx"] = inner_reality_settings.get("spiderX", "")
+            # flow is usually part of VLESS itself, typically not in URL but can be added if needed
+            vless_flow = inbound_settings.get("flow", "") # Get flow from VLESS settings
+            if vless_flow:
+                 params["flow"] = vless_flow
+             
+        # Flow (check inbound settings first, usually xtls-rprx-vision)
+        vless_settings = _client_defaults(inbound_settings)
+        flow = vless_settings.get("flow", "")
+        if flow and security in ["tls", "reality"] and "flow" not in params: # Add if not already set by REALITY
+            params["flow"] = flow
+            
+        # Encode params
+        query_string = urlencode({k: v for k, v in params.items() if v is not None and v != ""})
+        return ConfigTemplate(protocol="vless", head="vless://", tail=f"@{address}:{port}?{query_string}#")
+
+    # --- VMess --- (Based on standard VMess AEAD format)
+    if protocol == "vmess":
+         # Extract AlterId from the stored client defaults in settings_json
+         client_settings = _client_defaults(inbound_settings)
+         alter_id = client_settings.get("alterId", 0)
+
+         vmess_data: Dict[str, Any] = {
+            "v": "2",
+            "ps": _REMARK_PLACEHOLDER,
+            "add": address,
+            "port": str(port),
+            "id": _UUID_PLACEHOLDER,
+            "aid": str(alter_id), 
+            "scy": "auto", # Security cipher - auto is common
+            "net": network,
+            "type": "none", # Default header type
+            "host": "",
+            "path": "",
+            "tls": "",
+            "sni": "",
+            "alpn": "",
+            "fp": ""
+         }
+         
+         # Network settings
+         if network == "tcp":
+            tcp_settings = stream_settings.get("tcpSettings", {})
+            header = tcp_settings.get("header", {})
+            if header.get("type") == "http":
+                vmess_data["type"] = "http"
+                req = header.get("request", {})
+                paths = req.get("path", ["/"])
+                vmess_data["path"] = ",".join(paths) if paths else "/" # Comma separated for VMess
+                host_headers = req.get("headers", {}).get("Host", [])
+                vmess_data["host"] = host_headers[0] if host_headers else ""
+         elif network == "ws":
+            ws_settings = stream_settings.get("wsSettings", {})
+            path = ws_settings.get("path", "/")
+            vmess_data["path"] = path if path.startswith("/") else "/" + path
+            vmess_data["host"] = ws_settings.get("headers", {}).get("Host", "")
+         elif network == "grpc":
+             grpc_settings = stream_settings.get("grpcSettings", {})
+             vmess_data["path"] = grpc_settings.get("serviceName", "") # ServiceName acts as path for grpc
+             vmess_data["type"] = "multi" if grpc_settings.get("multiMode", False) else "gun"
+             
+         # Security settings
+         if security == "tls":
+            vmess_data["tls"] = "tls"
+            tls_settings = stream_settings.get("tlsSettings", {})
+            vmess_data["sni"] = tls_settings.get("serverName") or tls_settings.get("sni") or address
+            vmess_data["fp"] = tls_settings.get("fingerprint", "")
+            alpn_list = tls_settings.get("alpn", [])
+            vmess_data["alpn"] = ",".join(alpn_list) if alpn_list else "" # Comma separated for VMess
+         # VMess usually doesn't support REALITY directly in standard links
+         
+         # Remove empty fields before dumping
+         vmess_data_cleaned = {k: v for k, v in vmess_data.items() if v not in [None, ""]}
+         vmess_json = json.dumps(vmess_data_cleaned, separators=(',', ':'), sort_keys=True)
+         fields = tuple((k, v) for k, v in vmess_data_cleaned.items() if k not in ("id", "ps"))
+         return ConfigTemplate(protocol="vmess", vmess_json=vmess_json, vmess_fields=fields)
+
+    return None
+
+
+def _template_key(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+# Compiled templates keyed on a hash of everything that shapes the link (not on inbound id,
+# so an SNI/port/settings change naturally compiles a new template)
+_template_cache: LRUCache = LRUCache(maxsize=CONFIG_TEMPLATE_CACHE_SIZE)
+
+
+def get_config_template(
+    address: str,
+    protocol: str,
+    port: Any,
+    stream_settings: Optional[Dict[str, Any]],
+    sniffing_settings: Optional[Dict[str, Any]],
+    inbound_settings: Optional[Dict[str, Any]],
+) -> Optional[ConfigTemplate]:
+    """Returns the cached compiled template for these inbound settings, compiling it on a miss."""
+    key = _template_key(address, protocol, port, stream_settings, sniffing_settings, inbound_settings)
+    try:
+        return _template_cache[key]
+    except KeyError:
+        pass
+    template = compile_config_template(address, protocol, port, stream_settings, sniffing_settings, inbound_settings)
+    _template_cache[key] = template
+    return template
+
+
+def get_inbound_template(panel: Panel, inbound: Inbound) -> Optional[ConfigTemplate]:
+    """Returns the compiled template of a DB inbound."""
+    address = urlparse(panel.url).hostname or panel.url # Use hostname, fallback to full URL
+    return get_config_template(
+        address, inbound.protocol, inbound.port, inbound.stream_settings, inbound.sniffing, inbound.settings_json
+    )
+
+
 def generate_config_link(panel: Panel, inbound: Inbound, client_uuid: str, client_email: str) -> Optional[str]:
     """
     Generates the VLESS/VMess config URL based on panel and inbound details.
@@ -34,173 +279,42 @@ def generate_config_link(panel: Panel, inbound: Inbound, client_uuid: str, clien
     Raises:
         ConfigGenerationError: If a critical error occurs during generation.
     """
-    log_prefix = f"[ConfigGen Panel: {panel.id}, Inbound: {inbound.remote_id}, Client: {client_uuid}]"
-    logger.info(f"{log_prefix} Generating config URL.")
-    
+    links = generate_config_links(panel, inbound, [(client_uuid, client_email)])
+    return links.get(client_uuid)
+
+
+def generate_config_links(panel: Panel, inbound: Inbound, clients: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    Renders config links for many clients of one inbound from a single compiled template,
+    e.g. to regenerate every account after an SNI or port change.
+
+    Args:
+        panel: The Panel object containing connection details (URL).
+        inbound: The Inbound object containing protocol, port, and settings.
+        clients: (client_uuid, remark) pairs.
+
+    Returns:
+        Mapping of client UUID to link; empty if the protocol is unsupported.
+
+    Raises:
+        ConfigGenerationError: If the inbound settings cannot be compiled.
+    """
+    log_prefix = f"[ConfigGen Panel: {panel.id}, Inbound: {inbound.remote_id}]"
     try:
-        # Required basic info
-        protocol = inbound.protocol.lower() # Ensure lowercase for comparison
-        if not protocol:
-             logger.error(f"{log_prefix} Inbound protocol is missing.")
-             return None
-             
-        address = urlparse(panel.url).hostname or panel.url # Use hostname, fallback to full URL
-        port = inbound.port
-        if not port:
-             logger.error(f"{log_prefix} Inbound port is missing.")
-             return None
-             
-        remark = client_email # Use email as remark
-        
-        # Settings from the DbInbound model (which should mirror SDK structure)
-        stream_settings = inbound.stream_settings or {}
-        sniffing_settings = inbound.sniffing or {}
-        inbound_settings = inbound.settings_json or {} # VLESS/VMess/Trojan specific settings
-
-        network = stream_settings.get("network", "tcp")
-        security = stream_settings.get("security", "none")
-        config_link = ""
-
-        # --- VLESS --- 
-        if protocol == "vless":
-            base_link = f"vless://{client_uuid}@{address}:{port}"
-            params: Dict[str, Any] = {"type": network, "security": security}
-            
-            # Network specific settings
-            if network == "tcp":
-                tcp_settings = stream_settings.get("tcpSettings", {})
-                header = tcp_settings.get("header", {})
-                if header.get("type") == "http":
-                    params["headerType"] = "http"
-                    req = header.get("request", {})
-                    # Ensure path starts with /
-                    path_list = req.get("path", ["/"])
-                    path = path_list[0] if path_list and path_list[0].startswith("/") else "/" + path_list[0] if path_list else "/"
-                    params["path"] = path
-                    host_headers = req.get("headers", {}).get("Host", [])
-                    host = host_headers[0] if host_headers else ""
-                    if host: params["host"] = host
-            elif network == "ws":
-                ws_settings = stream_settings.get("wsSettings", {})
-                path = ws_settings.get("path", "/")
-                params["path"] = path if path.startswith("/") else "/" + path
-                host = ws_settings.get("headers", {}).get("Host", "")
-                if host: params["host"] = host
-            elif network == "grpc":
-                grpc_settings = stream_settings.get("grpcSettings", {})
-                params["serviceName"] = grpc_settings.get("serviceName", "")
-                # VLESS grpc link uses 'mode' (multi/gun), default seems to be gun
-                params["mode"] = "multi" if grpc_settings.get("multiMode", False) else "gun"
-
-            # Security specific settings
-            if security == "tls":
-                tls_settings = stream_settings.get("tlsSettings", {})
-                params["sni"] = tls_settings.get("serverName") or tls_settings.get("sni") or address # Use serverName or sni if available
-                params["fp"] = tls_settings.get("fingerprint", "")
-                alpn_list = tls_settings.get("alpn", [])
-                params["alpn"] = ",".join(alpn_list) if alpn_list else None # Comma separated
-            elif security == "reality":
-                reality_settings = stream_settings.get("realitySettings", {})
-                # REALITY settings might be nested under 'settings' key in some panel versions
-                inner_reality_settings = reality_settings.get("settings", reality_settings) 
-                params["sni"] = reality_settings.get("serverNames", [address])[0]
-                params["fp"] = inner_reality_settings.get("fingerprint", "chrome") # Default fingerprint
-                params["pbk"] = inner_reality_settings.get("publicKey", "")
-                params["sid"] = inner_reality_settings.get("shortIds", [""])[0]
-                params["spx"] = inner_reality_settings.get("spiderX", "")
-                # flow is usually part of VLESS itself, typically not in URL but can be added if needed
-                vless_flow = inbound_settings.get("flow", "") # Get flow from VLESS settings
-                if vless_flow:
-                     params["flow"] = vless_flow
-                 
-            # Flow (check inbound settings first, usually xtls-rprx-vision)
-            vless_settings = inbound_settings.get("clients", [{}])[0] # VLESS client settings are often in a list
-            flow = vless_settings.get("flow", "")
-            if flow and security in ["tls", "reality"] and "flow" not in params: # Add if not already set by REALITY
-                params["flow"] = flow
-                
-            # Encode params
-            query_string = urlencode({k: v for k, v in params.items() if v is not None and v != ""})
-            config_link = f"{base_link}?{query_string}#{remark}"
-
-        # --- VMess --- (Based on standard VMess AEAD format)
-        elif protocol == "vmess":
-             # Extract AlterId from the 'clients' list in settings_json
-             vmess_clients = inbound_settings.get("clients", [])
-             client_settings = vmess_clients[0] if vmess_clients else {}
-             alter_id = client_settings.get("alterId", 0)
-
-             vmess_data: Dict[str, Any] = {
-                "v": "2",
-                "ps": remark,
-                "add": address,
-                "port": str(port),
-                "id": client_uuid,
-                "aid": str(alter_id), 
-                "scy": "auto", # Security cipher - auto is common
-                "net": network,
-                "type": "none", # Default header type
-                "host": "",
-                "path": "",
-                "tls": "",
-                "sni": "",
-                "alpn": "",
-                "fp": ""
-             }
-             
-             # Network settings
-             if network == "tcp":
-                tcp_settings = stream_settings.get("tcpSettings", {})
-                header = tcp_settings.get("header", {})
-                if header.get("type") == "http":
-                    vmess_data["type"] = "http"
-                    req = header.get("request", {})
-                    paths = req.get("path", ["/"])
-                    vmess_data["path"] = ",".join(paths) if paths else "/" # Comma separated for VMess
-                    host_headers = req.get("headers", {}).get("Host", [])
-                    vmess_data["host"] = host_headers[0] if host_headers else ""
-             elif network == "ws":
-                ws_settings = stream_settings.get("wsSettings", {})
-                path = ws_settings.get("path", "/")
-                vmess_data["path"] = path if path.startswith("/") else "/" + path
-                vmess_data["host"] = ws_settings.get("headers", {}).get("Host", "")
-             elif network == "grpc":
-                 grpc_settings = stream_settings.get("grpcSettings", {})
-                 vmess_data["path"] = grpc_settings.get("serviceName", "") # ServiceName acts as path for grpc
-                 vmess_data["type"] = "multi" if grpc_settings.get("multiMode", False) else "gun"
-                 
-             # Security settings
-             if security == "tls":
-                vmess_data["tls"] = "tls"
-                tls_settings = stream_settings.get("tlsSettings", {})
-                vmess_data["sni"] = tls_settings.get("serverName") or tls_settings.get("sni") or address
-                vmess_data["fp"] = tls_settings.get("fingerprint", "")
-                alpn_list = tls_settings.get("alpn", [])
-                vmess_data["alpn"] = ",".join(alpn_list) if alpn_list else "" # Comma separated for VMess
-             # VMess usually doesn't support REALITY directly in standard links
-             
-             # Remove empty fields before dumping
-             vmess_data_cleaned = {k: v for k, v in vmess_data.items() if v not in [None, ""]}
-             
-             json_string = json.dumps(vmess_data_cleaned, separators=(',', ':'), sort_keys=True)
-             encoded_bytes = base64.urlsafe_b64encode(json_string.encode('utf-8'))
-             encoded_string = encoded_bytes.decode('utf-8').rstrip('=')
-             config_link = f"vmess://{encoded_string}"
-             
-        else:
-            logger.warning(f"{log_prefix} Unsupported protocol '{protocol}' for config generation.")
-            return None
-            
-        logger.info(f"{log_prefix} Successfully generated config link for protocol {protocol}.")
-        return config_link.strip() # Ensure no leading/trailing whitespace
-        
+        template = get_inbound_template(panel, inbound)
     except KeyError as ke:
          logger.error(f"{log_prefix} Missing expected key in inbound settings: {ke}", exc_info=True)
-         raise ConfigGenerationError(f"Missing key '{ke}' in settings for {protocol}/{network}/{security}") from ke
+         raise ConfigGenerationError(f"Missing key '{ke}' in settings for {inbound.protocol}") from ke
     except Exception as e:
-         logger.error(f"{log_prefix} Error generating config URL: {e}", exc_info=True)
-         # Raise specific error?
+         logger.error(f"{log_prefix} Error compiling config template: {e}", exc_info=True)
          raise ConfigGenerationError(f"Failed to generate config: {e}") from e
-         # return None # Return None on error
+
+    if template is None:
+        logger.warning(f"{log_prefix} Unsupported protocol '{inbound.protocol}' or missing port for config generation.")
+        return {}
+
+    links = {client_uuid: template.render(client_uuid, remark) for client_uuid, remark in clients}
+    logger.debug(f"{log_prefix} Rendered {len(links)} config links for protocol {template.protocol}.")
+    return links
 
 # Ensure file ends cleanly 
\ No newline at end of file
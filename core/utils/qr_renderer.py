@@ -0,0 +1,119 @@
+"""
+ساخت QR Code لینک‌های کانفیگ خارج از حلقه رویداد، با کش درون حافظه
+
+انکودر `qrcode` تماماً پایتونی و CPU-bound است؛ اجرای آن روی حلقه رویداد تمام
+آپدیت‌های دیگر ربات را متوقف می‌کند. تصاویر در یک process pool ساخته می‌شوند، بر اساس
+هش لینک کانفیگ در یک LRU نگهداری می‌شوند و به صورت bytes/BufferedInputFile مستقیماً به
+aiogram داده می‌شوند. ذخیره فایل روی دیسک فقط در صورت تنظیم `QR_CODE_DIR` انجام می‌شود.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from cachetools import LRUCache
+
+from core.integrations.single_flight import SingleFlight
+from core.settings import QR_CACHE_SIZE, QR_CODE_DIR, QR_RENDER_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def render_qr_png(data: str) -> bytes:
+    """ساخت تصویر PNG یک QR Code (در worker اجرا می‌شود)"""
+    import qrcode
+    from qrcode.image.pure import PyPNGImage
+
+    # backend خالص pypng (وابستگی qrcode)؛ Pillow جزو وابستگی‌های پروژه نیست
+    image = qrcode.make(data, image_factory=PyPNGImage)
+    buffer = io.BytesIO()
+    image.save(buffer)
+    return buffer.getvalue()
+
+
+def _write_file(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class QrRenderer:
+    """ساخت QR Code با worker pool، کش LRU و ادغام درخواست‌های هم‌زمان یکسان"""
+
+    def __init__(self, workers: int = QR_RENDER_WORKERS, cache_size: int = QR_CACHE_SIZE, storage_dir: str = QR_CODE_DIR):
+        self.workers = workers
+        self.storage_dir = storage_dir
+        self._cache: LRUCache = LRUCache(maxsize=max(1, cache_size))
+        self._in_flight = SingleFlight(ttl=0)
+        self._executor: Optional[Executor] = None
+
+    @staticmethod
+    def content_key(data: str) -> str:
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _get_executor(self) -> Optional[Executor]:
+        # workers=0: اجرا در thread pool پیش‌فرض حلقه (بدون پروسه جداگانه)
+        if self._executor is None and self.workers > 0:
+            # spawn: fork کردن پروسه‌ای که thread دارد امن نیست
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def render(self, data: str) -> bytes:
+        """
+        دریافت PNG QR Code برای یک لینک (از کش یا با ساخت در worker).
+
+        Args:
+            data: لینک کانفیگ یا اشتراک.
+
+        Returns:
+            محتوای تصویر PNG.
+        """
+        key = self.content_key(data)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def _render() -> bytes:
+            png = await asyncio.get_running_loop().run_in_executor(self._get_executor(), render_qr_png, data)
+            self._cache[key] = png
+            return png
+
+        return await self._in_flight.do(("qr", key), _render)
+
+    async def get_input_file(self, data: str, filename: str = "qr.png"):
+        """QR Code به صورت `BufferedInputFile` قابل ارسال مستقیم با aiogram"""
+        from aiogram.types import BufferedInputFile
+
+        return BufferedInputFile(await self.render(data), filename=filename)
+
+    async def save(self, data: str) -> Optional[str]:
+        """
+        ذخیره QR Code روی دیسک (فقط اگر `QR_CODE_DIR` تنظیم شده باشد).
+        نام فایل هش لینک است، بنابراین لینک تکراری دوباره نوشته نمی‌شود.
+
+        Returns:
+            مسیر فایل یا None.
+        """
+        if not self.storage_dir:
+            return None
+        path = os.path.join(self.storage_dir, f"{self.content_key(data)}.png")
+        if not os.path.exists(path):
+            png = await self.render(data)
+            await asyncio.to_thread(_write_file, path, png)
+        return path
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# نمونه سراسری مورد استفاده در کل پروسه
+qr_renderer = QrRenderer()
@@ -3,24 +3,26 @@
 """
 
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from core.settings import DATABASE_URL
+from core.settings import DATABASE_REPLICA_URLS
+from db.engine import PoolMetrics, create_engine_from_settings
 from db.models import Base
+from db.routing import ReplicaSet, RoutingSession
 
-# ایجاد موتور SQL آسنکرون
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,  # در محیط توسعه True باشد
-    future=True,
-    poolclass=NullPool,
-)
+# موتور مشترک SQL آسنکرون (با connection pool) برای ربات، اسکریپت‌ها و سرویس‌ها
+db_pool_metrics = PoolMetrics()
+engine = create_engine_from_settings(metrics=db_pool_metrics)
+
+# replica های فقط‌خواندنی (هر کدام با pool و آمار جداگانه)
+replica_set = ReplicaSet([create_engine_from_settings(url) for url in DATABASE_REPLICA_URLS])
 
-# ایجاد کننده جلسه برای دسترسی به دیتابیس
+# ایجاد کننده جلسه برای دسترسی به دیتابیس (خواندن‌های @read_only روی replica سالم)
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=replica_set,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False
@@ -4,27 +4,12 @@
 
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.settings import DATABASE_URL
+# همان موتور و session maker مشترک db (بدون ساخت موتور جداگانه)
+from db import engine, async_session_maker
 from db.models import Base
 
-# ایجاد موتور AsyncSQL
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,  # در محیط توسعه True باشد
-    future=True,
-    poolclass=NullPool,
-)
-
-# ایجاد کننده جلسه برای دسترسی به دیتابیس
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
-
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -0,0 +1,129 @@
+"""
+کارخانه موتور دیتابیس مشترک با connection pool و آمار pool
+
+ربات، اسکریپت‌ها و سرویس‌ها همگی از یک موتور (`db.engine` / `db.async_session_maker`)
+استفاده می‌کنند تا هر نشست به جای handshake کامل TCP و احراز هویت MySQL، یک اتصال
+آماده از pool بگیرد. زمان انتظار گرفتن اتصال و تعداد اتصال‌های در حال استفاده و
+overflow از طریق `PoolMetrics.snapshot()` در دسترس است.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from core.settings import (
+    DATABASE_URL,
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """آمار گرفتن اتصال از pool (زمان انتظار، timeout، اتصال‌های جدید)"""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.max_wait = 0.0
+        self.sync_engine: Optional[Engine] = None
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._waits.append(seconds)
+            self.max_wait = max(self.max_wait, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """وضعیت فعلی pool و آمار زمان انتظار (میلی‌ثانیه) روی پنجره آخرین گرفتن‌ها"""
+        with self._lock:
+            waits = sorted(self._waits)
+            stats: Dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0,
+                "wait_max_ms": round(self.max_wait * 1000, 2),
+            }
+        # pool فعلی موتور (پس از dispose نمونه جدیدی ساخته می‌شود)
+        pool = self.sync_engine.pool if self.sync_engine is not None else None
+        if pool is not None:
+            stats.update(
+                size=pool.size(),
+                in_use=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(0, pool.overflow()),
+            )
+        return stats
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """QueuePool که زمان انتظار هر گرفتن اتصال را در `PoolMetrics` ثبت می‌کند"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def create_engine_from_settings(url: str = DATABASE_URL, metrics: Optional[PoolMetrics] = None, **overrides: Any) -> AsyncEngine:
+    """
+    ساخت موتور async با QueuePool قابل تنظیم از تنظیمات `DB_POOL_*`.
+
+    Args:
+        url: آدرس اتصال دیتابیس.
+        metrics: شیء آمار pool که به موتور متصل می‌شود (در صورت None یک نمونه جدید).
+        **overrides: پارامترهای اضافه یا جایگزین `create_async_engine`.
+
+    Returns:
+        AsyncEngine با pool ابزاردار.
+    """
+    metrics = metrics or PoolMetrics()
+    # زیرکلاس اختصاصی تا آمار پس از بازسازی pool (dispose) هم حفظ شود
+    pool_class = type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"metrics": metrics})
+    options: Dict[str, Any] = dict(
+        echo=DB_ECHO,
+        poolclass=pool_class,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    options.update(overrides)
+    engine = create_async_engine(url, **options)
+
+    metrics.sync_engine = engine.sync_engine
+    event.listen(engine.sync_engine, "connect", lambda *_: metrics.record_connect())
+    return engine
@@ -0,0 +1,65 @@
+"""strip embedded clients from inbound settings_json
+
+Revision ID: 20250503_100000
+Revises: 20250503_093000
+Create Date: 2025-05-03 10:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20250503_100000'
+down_revision: Union[str, None] = '20250503_093000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 100
+
+
+def _compact(settings: dict) -> dict:
+    """حذف آرایه clients و نگه داشتن تعداد و مقادیر پیش‌فرض (هم‌ارز _compact_inbound_settings در PanelService)"""
+    clients = settings.get("clients")
+    if not isinstance(clients, list):
+        return settings
+    compact = {key: value for key, value in settings.items() if key != "clients"}
+    compact["client_count"] = len(clients)
+    first_client = clients[0] if clients and isinstance(clients[0], dict) else {}
+    client_defaults = {key: first_client[key] for key in ("flow", "alterId") if first_client.get(key) not in (None, "")}
+    if client_defaults:
+        compact["client_defaults"] = client_defaults
+    return compact
+
+
+def upgrade() -> None:
+    # کوچک کردن سطرهای موجود به صورت دسته‌ای تا کل جدول یک جا در حافظه بارگذاری نشود
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, settings_json FROM inbound "
+                "WHERE id > :last_id AND settings_json IS NOT NULL ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        for row_id, raw_settings in rows:
+            last_id = row_id
+            settings = json.loads(raw_settings) if isinstance(raw_settings, (str, bytes)) else raw_settings
+            if not isinstance(settings, dict) or "clients" not in settings:
+                continue
+            bind.execute(
+                sa.text("UPDATE inbound SET settings_json = :settings WHERE id = :id"),
+                {"settings": json.dumps(_compact(settings)), "id": row_id},
+            )
+
+
+def downgrade() -> None:
+    # لیست کلاینت‌ها قابل بازیابی نیست؛ همگام‌سازی بعدی پنل داده را مجدداً می‌سازد
+    pass
@@ -0,0 +1,31 @@
+"""add sub_token to client_accounts
+
+Revision ID: 20250505_090000
+Revises: 20250504_090000
+Create Date: 2025-05-05 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20250505_090000'
+down_revision: Union[str, None] = '20250504_090000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('client_accounts', sa.Column('sub_token', sa.String(length=32), nullable=True))
+    # توکن تصادفی برای اکانت‌های موجود (۳۲ کاراکتر hex، هم‌قالب secrets.token_hex(16) در مدل).
+    # RANDOM_BYTES از مولد تصادفی امن (SSL) خوانده می‌شود؛ UUID() نسخه ۱ (زمان + MAC) و قابل حدس است
+    op.execute("UPDATE client_accounts SET sub_token = LOWER(HEX(RANDOM_BYTES(16))) WHERE sub_token IS NULL")
+    op.create_unique_constraint('uq_client_accounts_sub_token', 'client_accounts', ['sub_token'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_client_accounts_sub_token', 'client_accounts', type_='unique')
+    op.drop_column('client_accounts', 'sub_token')
@@ -0,0 +1,61 @@
+"""add composite indexes for hot query paths
+
+Revision ID: 20250506_090000
+Revises: 20250505_090000
+Create Date: 2025-05-06 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20250506_090000'
+down_revision: Union[str, None] = '20250505_090000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # UUIDهای تکراری باید قبل از اجرای migration به صورت دستی بررسی شوند (حذف خودکار اکانت امن نیست)
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT remote_uuid FROM client_accounts GROUP BY remote_uuid HAVING COUNT(*) > 1 LIMIT 5"
+    )).fetchall()
+    if duplicates:
+        raise RuntimeError(
+            f"Duplicate client_accounts.remote_uuid values must be resolved before adding the unique index: "
+            f"{[row[0] for row in duplicates]}"
+        )
+
+    # client_accounts: اکانت‌های کاربر بر اساس وضعیت، انقضا، جستجو با UUID و اکانت‌های هر inbound
+    op.create_index('ix_client_accounts_user_status', 'client_accounts', ['user_id', 'status'], unique=False)
+    op.create_index('ix_client_accounts_status_expires', 'client_accounts', ['status', 'expires_at'], unique=False)
+    op.create_unique_constraint('uq_client_accounts_remote_uuid', 'client_accounts', ['remote_uuid'])
+    op.create_index('ix_client_accounts_inbound_status_user', 'client_accounts', ['inbound_id', 'status', 'user_id'], unique=False)
+
+    # orders: سفارش‌های کاربر به ترتیب زمان و سفارش‌های هر وضعیت
+    op.create_index('ix_orders_user_created', 'orders', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_status', 'orders', ['status'], unique=False)
+
+    # receipt_log: صف رسیدها بر اساس وضعیت و زمان ارسال
+    op.create_index('ix_receipt_log_status_submitted', 'receipt_log', ['status', 'submitted_at'], unique=False)
+
+    # panels: انتخاب پنل بر اساس لوکیشن و وضعیت
+    op.create_index('ix_panels_location_status', 'panels', ['location_name', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_panels_location_status', table_name='panels')
+    op.drop_index('ix_receipt_log_status_submitted', table_name='receipt_log')
+    op.drop_index('ix_orders_status', table_name='orders')
+    # ایندکس کلید خارجی user_id تا حذف ایندکس ترکیبی لازم است
+    op.create_index('ix_orders_user_id', 'orders', ['user_id'], unique=False)
+    op.drop_index('ix_orders_user_created', table_name='orders')
+    op.create_index('ix_client_accounts_inbound_id', 'client_accounts', ['inbound_id'], unique=False)
+    op.drop_index('ix_client_accounts_inbound_status_user', table_name='client_accounts')
+    op.drop_constraint('uq_client_accounts_remote_uuid', 'client_accounts', type_='unique')
+    op.drop_index('ix_client_accounts_status_expires', table_name='client_accounts')
+    op.create_index('ix_client_accounts_user_id', 'client_accounts', ['user_id'], unique=False)
+    op.drop_index('ix_client_accounts_user_status', table_name='client_accounts')
@@ -0,0 +1,27 @@
+"""add circuit_open flag to panels
+
+Revision ID: 20250507_090000
+Revises: 20250506_090000
+Create Date: 2025-05-07 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20250507_090000'
+down_revision: Union[str, None] = '20250506_090000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # وضعیت circuit breaker جدا از status پنل (که فقط توسط ادمین تغییر می‌کند) نگهداری می‌شود
+    op.add_column('panels', sa.Column('circuit_open', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('panels', 'circuit_open')
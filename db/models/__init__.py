@@ -43,6 +43,7 @@ from .receipt_log import ReceiptLog
 from .notification_log import NotificationLog
 from .client_renewal_log import ClientRenewalLog
 from .wallet import Wallet
+from .warm_pool_client import WarmPoolClient
 from .enums import (
     UserRole,
     PanelStatus,
@@ -51,6 +52,7 @@ from .enums import (
     TransactionStatus,
     # PaymentMethod,
     AccountStatus,
+    WarmPoolStatus,
     # UserStatus
 )
 from .admin_permission import AdminPermission
@@ -76,6 +78,7 @@ __all__ = [
     "ClientRenewalLog",
     "AdminPermission",
     "Wallet",
+    "WarmPoolClient",
     # Enums are also often included if needed directly from db.models
     "UserRole",
     "PanelStatus",
@@ -83,5 +86,6 @@ __all__ = [
     "OrderStatus",
     "TransactionStatus",
     "AccountStatus",
+    "WarmPoolStatus",
     # "UserStatus"
 ] 
\ No newline at end of file
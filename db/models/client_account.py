@@ -5,9 +5,10 @@
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, TYPE_CHECKING
+import secrets
 import uuid
 
-from sqlalchemy import BigInteger, Boolean, DateTime, String, Text, Column, ForeignKey, Integer, Enum as SQLEnum, JSON
+from sqlalchemy import BigInteger, Boolean, DateTime, String, Text, Column, ForeignKey, Integer, Enum as SQLEnum, JSON, Index
 from sqlalchemy.orm import relationship, Mapped
 
 from . import Base
@@ -41,7 +42,7 @@ class ClientAccount(Base):
     user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
     panel_id = Column(Integer, ForeignKey("panels.id"), nullable=False)
     inbound_id = Column(Integer, ForeignKey("inbound.id", ondelete="CASCADE"), nullable=False)
-    remote_uuid = Column(String(36), default=lambda: str(uuid.uuid4()), nullable=False) # شناسه UUID منحصر به فرد در پنل
+    remote_uuid = Column(String(36), default=lambda: str(uuid.uuid4()), unique=True, nullable=False) # شناسه UUID منحصر به فرد در پنل
     client_name = Column(String(255), nullable=False) # نام کلاینت یا برچسب (label/remark) برای نمایش
     email_name = Column(String(255), nullable=True) # آدرس ایمیل مورد استفاده در پنل
     plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)
@@ -59,6 +60,7 @@ class ClientAccount(Base):
     ip_limit = Column(Integer, nullable=True) # محدودیت تعداد IP مجاز
     sub_updated_at = Column(DateTime, nullable=True) # زمان آخرین به‌روزرسانی لینک اشتراک
     sub_last_user_agent = Column(String(255), nullable=True) # آخرین User Agent برای آپدیت اشتراک
+    sub_token = Column(String(32), default=lambda: secrets.token_hex(16), unique=True, nullable=True) # توکن محرمانه آدرس اشتراک (subscription)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # ارتباط با سایر مدل‌ها
@@ -90,5 +92,11 @@ class ClientAccount(Base):
         back_populates="client"
     )
     
+    __table_args__ = (
+        Index("ix_client_accounts_user_status", "user_id", "status"),
+        Index("ix_client_accounts_status_expires", "status", "expires_at"),
+        Index("ix_client_accounts_inbound_status_user", "inbound_id", "status", "user_id"),
+    )
+    
     def __repr__(self) -> str:
         return f"<ClientAccount(id={self.id}, user_id={self.user_id}, expires_at={self.expires_at})>"
@@ -46,4 +46,8 @@ class AccountStatus(str, enum.Enum):
     ACTIVE = "active"
     EXPIRED = "expired"
     DISABLED = "disabled"
-    SWITCHED = "switched" 
\ No newline at end of file
+    SWITCHED = "switched"
+
+class WarmPoolStatus(str, enum.Enum):
+    AVAILABLE = "available"  # ساخته شده در پنل (غیرفعال) و آماده واگذاری
+    CLAIMED = "claimed"  # به یک خرید واگذار شده
@@ -4,7 +4,7 @@
 
 from datetime import datetime
 from typing import List
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Boolean, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship, backref, Mapped
 
 from . import Base
@@ -17,6 +17,8 @@ class Inbound(Base):
     """مدل Inbound برای ذخیره اطلاعات inbound‌های پنل‌ها"""
     
     __tablename__ = "inbound"
+    # هر inbound پنل فقط یک بار ذخیره می‌شود (کلید upsert در همگام‌سازی)
+    __table_args__ = (UniqueConstraint("panel_id", "remote_id", name="uq_inbound_panel_remote"),)
     
     id = Column(Integer, primary_key=True)
     panel_id = Column(Integer, ForeignKey("panels.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -36,6 +38,7 @@ class Inbound(Base):
     allow_transparent = Column(Boolean, default=False)  # اجازه تراسپرنت
     security_settings = Column(JSON, nullable=True)  # تنظیمات امنیتی
     remark = Column(String(255), nullable=True)  # توضیحات
+    content_hash = Column(String(64), nullable=True)  # اثر انگشت SHA-256 داده inbound در پنل برای همگام‌سازی افزایشی
     
     # روابط
     panel = relationship("Panel", back_populates="inbounds")
@@ -6,7 +6,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlalchemy import BigInteger, DateTime, Integer, String, Column, ForeignKey, DECIMAL, Enum as SQLEnum, Boolean
+from sqlalchemy import BigInteger, DateTime, Integer, String, Column, ForeignKey, DECIMAL, Enum as SQLEnum, Boolean, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from . import Base
@@ -64,5 +64,10 @@ class Order(Base):
         foreign_keys=[client_account_id]
     )
     
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at"),
+        Index("ix_orders_status", "status"),
+    )
+    
     def __repr__(self) -> str:
         return f"<Order(id={self.id}, user_id={self.user_id}, amount={self.amount}, status={self.status})>"
@@ -5,7 +5,7 @@
 from typing import List, Optional
 from enum import Enum as PythonEnum # Alias standard Enum to avoid conflict
 
-from sqlalchemy import Integer, String, Text, Column, Enum as SQLEnum
+from sqlalchemy import Boolean, Integer, String, Text, Column, Enum as SQLEnum, Index, false
 from sqlalchemy.orm import relationship, Mapped, column_property
 from sqlalchemy.ext.hybrid import hybrid_property
 
@@ -46,6 +46,8 @@ class Panel(Base):
                     default=PanelStatus.ACTIVE, 
                     nullable=False)
     notes = Column(Text, nullable=True)
+    # مدار circuit breaker پنل باز است (مستقل از status که فقط توسط ادمین تغییر می‌کند)
+    circuit_open = Column(Boolean, default=False, server_default=false(), nullable=False)
     
     # ارتباط با سایر مدل‌ها
     inbounds: Mapped[List["Inbound"]] = relationship("Inbound", back_populates="panel", cascade="all, delete-orphan")
@@ -76,3 +78,7 @@ class Panel(Base):
     
     def __repr__(self) -> str:
         return f"<Panel(id={self.id}, name={self.name}, location={self.location_name})>"
+
+
+# انتخاب پنل بر اساس لوکیشن و وضعیت (ستون status با نام ویژگی _status نگاشت شده است)
+Index("ix_panels_location_status", Panel.location_name, Panel._status)
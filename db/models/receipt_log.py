@@ -6,7 +6,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional, TYPE_CHECKING
 
-from sqlalchemy import BigInteger, Boolean, DateTime, String, Column, Enum as SQLEnum, ForeignKey, Text, DECIMAL
+from sqlalchemy import BigInteger, Boolean, DateTime, String, Column, Enum as SQLEnum, ForeignKey, Text, DECIMAL, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from . import Base
@@ -64,5 +64,9 @@ class ReceiptLog(Base):
     admin_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
     admin: Mapped[Optional["User"]] = relationship("User", foreign_keys=[admin_id], back_populates="reviewed_receipts")
     
+    __table_args__ = (
+        Index("ix_receipt_log_status_submitted", "status", "submitted_at"),
+    )
+    
     def __repr__(self) -> str:
         return f"<ReceiptLog(id={self.id}, amount={self.amount}, status={self.status})>" 
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+مدل WarmPoolClient برای نگهداری کلاینت‌های از پیش ساخته شده (غیرفعال) در پنل‌ها
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Enum as SQLEnum
+
+from . import Base
+from .enums import WarmPoolStatus
+
+
+class WarmPoolClient(Base):
+    """کلاینت غیرفعالی که از قبل در یک inbound پنل ساخته شده و هنگام خرید واگذار می‌شود"""
+    
+    __tablename__ = "warm_pool_clients"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    panel_id = Column(Integer, ForeignKey("panels.id", ondelete="CASCADE"), nullable=False)
+    inbound_id = Column(Integer, ForeignKey("inbound.id", ondelete="CASCADE"), nullable=False)
+    remote_uuid = Column(String(36), nullable=False, unique=True) # UUID کلاینت در پنل
+    email_name = Column(String(255), nullable=False) # ایمیل موقت کلاینت در پنل
+    sub_id = Column(String(64), nullable=True)
+    status = Column(SQLEnum(WarmPoolStatus), default=WarmPoolStatus.AVAILABLE, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = Column(DateTime, nullable=True)
+    claimed_by_user_id = Column(BigInteger, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_warm_pool_clients_inbound_status", "inbound_id", "status"),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<WarmPoolClient(id={self.id}, inbound_id={self.inbound_id}, status={self.status})>"
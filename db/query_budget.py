@@ -0,0 +1,116 @@
+"""
+شمارش کوئری‌های هر handler و محافظ N+1
+
+`QueryCounter` با رویداد `do_orm_execute` روی یک نشست مشخص، تمام کوئری‌هایی که از طریق
+`Session.execute` اجرا می‌شوند (شامل lazy load و کوئری‌های selectinload) را می‌شمارد. اگر
+تعداد از بودجه بیشتر شود، هشدار با نمونه کوئری‌ها ثبت می‌شود یا در حالت strict (برای تست‌ها)
+`QueryBudgetExceeded` رخ می‌دهد. نوشتن‌های flush شمرده نمی‌شوند.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, TypeVar, Union
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from core.settings import QUERY_BUDGET_STRICT
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# ویژگی روی تابع handler که بودجه اختصاصی آن را نگه می‌دارد
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """تعداد کوئری‌های یک واحد کار از بودجه تعیین شده بیشتر شد"""
+
+
+def query_budget_for(budget: int) -> Callable[[F], F]:
+    """دکوریتور تعیین بودجه کوئری اختصاصی یک handler (پیش‌فرض از `QUERY_BUDGET_DEFAULT`)"""
+    def decorator(func: F) -> F:
+        setattr(func, BUDGET_ATTRIBUTE, budget)
+        return func
+    return decorator
+
+
+class QueryCounter:
+    """شمارنده کوئری‌های یک نشست در طول یک واحد کار"""
+
+    def __init__(self, budget: int, label: str = "", strict: bool = QUERY_BUDGET_STRICT, sample_size: int = 5):
+        self.budget = budget
+        self.label = label
+        self.strict = strict
+        self.sample_size = sample_size
+        self.count = 0
+        self.relationship_loads = 0
+        self.samples: List[str] = []
+        self._session: Optional[Session] = None
+
+    def _on_execute(self, state: ORMExecuteState) -> None:
+        self.count += 1
+        if state.is_relationship_load:
+            self.relationship_loads += 1
+        if len(self.samples) < self.sample_size:
+            self.samples.append(" ".join(str(state.statement).split())[:200])
+
+    def attach(self, session: Union[AsyncSession, Session]) -> "QueryCounter":
+        self._session = session.sync_session if isinstance(session, AsyncSession) else session
+        event.listen(self._session, "do_orm_execute", self._on_execute)
+        return self
+
+    def detach(self) -> None:
+        if self._session is not None:
+            event.remove(self._session, "do_orm_execute", self._on_execute)
+            self._session = None
+
+    @property
+    def exceeded(self) -> bool:
+        return self.count > self.budget
+
+    def check(self) -> None:
+        """
+        گزارش عبور از بودجه.
+
+        Raises:
+            QueryBudgetExceeded: در حالت strict و در صورت عبور از بودجه.
+        """
+        if not self.exceeded:
+            return
+        message = (
+            f"{self.label or 'unit of work'}: {self.count} queries "
+            f"({self.relationship_loads} relationship loads), budget {self.budget}"
+        )
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+        samples = "\n".join(f"  - {sample}" for sample in self.samples)
+        logger.warning(
+            f"بودجه کوئری رد شد؛ احتمال N+1: {message} (Query budget exceeded, possible N+1: {message})\n{samples}"
+        )
+
+
+@contextmanager
+def query_budget(
+    session: Union[AsyncSession, Session],
+    budget: int,
+    label: str = "",
+    strict: bool = QUERY_BUDGET_STRICT,
+) -> Iterator[QueryCounter]:
+    """
+    شمارش کوئری‌های نشست داخل بلوک و بررسی بودجه در پایان بلوک (فقط در خروج بدون خطا).
+
+    Args:
+        session: نشست دیتابیس مورد بررسی.
+        budget: حداکثر تعداد کوئری مجاز.
+        label: نام واحد کار برای لاگ (مثلاً نام handler).
+        strict: رخ دادن `QueryBudgetExceeded` به جای ثبت هشدار.
+    """
+    counter = QueryCounter(budget, label, strict).attach(session)
+    try:
+        yield counter
+    finally:
+        counter.detach()
+    counter.check()
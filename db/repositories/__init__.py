@@ -3,6 +3,7 @@ Repository exports
 """
 
 from .base_repository import BaseRepository
+from .pagination import Page
 from .user_repo import UserRepository
 from .panel_repo import PanelRepository
 from .inbound_repo import InboundRepository
@@ -14,9 +15,11 @@ from .transaction_repo import TransactionRepository
 from .order_repo import OrderRepository
 from .bank_card_repository import BankCardRepository
 from .discount_code_repo import DiscountCodeRepository
+from .warm_pool_repo import WarmPoolRepository
 
 __all__ = [
     "BaseRepository",
+    "Page",
     "UserRepository",
     "PanelRepository",
     "InboundRepository",
@@ -27,5 +30,6 @@ __all__ = [
     "TransactionRepository",
     "OrderRepository",
     "BankCardRepository",
-    "DiscountCodeRepository"
+    "DiscountCodeRepository",
+    "WarmPoolRepository"
 ] 
\ No newline at end of file
@@ -2,16 +2,20 @@
 ریپوزیتوری عملیات دیتابیسی مرتبط با اکانت‌ها
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from db.models.client_account import ClientAccount, AccountStatus
+from db.routing import read_only
 from .base_repository import BaseRepository
+from .client_repo import CLIENT_ACCOUNT_LOADER_PROFILES
 
 class AccountRepository(BaseRepository[ClientAccount]):
     """ریپوزیتوری برای عملیات CRUD روی مدل ClientAccount"""
 
+    loader_profiles = CLIENT_ACCOUNT_LOADER_PROFILES
+
     def __init__(self, session: AsyncSession):
         """مقداردهی اولیه با کلاس مدل ClientAccount"""
         super().__init__(session, ClientAccount)
@@ -20,10 +24,18 @@ class AccountRepository(BaseRepository[ClientAccount]):
         """دریافت تمام اکانت‌های فعال"""
         return await self.filter_by(is_active=True)
 
-    async def get_active_by_user_id(self, user_id: int) -> List[ClientAccount]:
-        """دریافت اکانت‌های فعال یک کاربر"""
-        return await self.filter_by(user_id=user_id, status=AccountStatus.ACTIVE)
+    @read_only
+    async def get_active_by_user_id(self, user_id: int, profile: Optional[str] = None) -> List[ClientAccount]:
+        """دریافت اکانت‌های فعال یک کاربر (با رابطه‌های پروفایل داده شده در همان کوئری)"""
+        query = (
+            select(self.model)
+            .where(self.model.user_id == user_id, self.model.status == AccountStatus.ACTIVE)
+            .options(*self.loader_options(profile))
+        )
+        result = await self.session.execute(query)
+        return list(result.unique().scalars().all())
 
+    @read_only
     async def get_user_accounts(self, user_id: int) -> List[ClientAccount]:
         """دریافت اکانت‌های یک کاربر"""
         return await self.filter_by(user_id=user_id)
@@ -41,6 +53,13 @@ class AccountRepository(BaseRepository[ClientAccount]):
         """ایجاد اکانت جدید"""
         return await self.create(**kwargs)
 
+    async def create_many(self, rows: List[Dict[str, Any]]) -> List[ClientAccount]:
+        """ایجاد چند اکانت با یک flush (بدون commit)"""
+        accounts = [ClientAccount(**row) for row in rows]
+        self.session.add_all(accounts)
+        await self.session.flush(accounts)
+        return accounts
+
     async def update_account(self, account_id: int, **kwargs) -> Optional[ClientAccount]:
         """به‌روزرسانی اکانت"""
         return await self.update(account_id, **kwargs)
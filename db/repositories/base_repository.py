@@ -4,7 +4,10 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
-from typing import TypeVar, Generic, Type, Optional, List, Any, Dict
+from db.routing import read_only
+from typing import TypeVar, Generic, Type, Optional, List, Any, Dict, Callable, Sequence
+
+from db.repositories.pagination import Page, keyset_paginate
 
 T = TypeVar('T')
 
@@ -12,6 +15,10 @@ class BaseRepository(Generic[T]):
     """
     کلاس پایه برای تمام ریپازیتوری‌ها که عملیات CRUD پایه را فراهم می‌کند
     """
+
+    # پروفایل‌های بارگذاری نام‌دار هر نما: نام -> تابعی که گزینه‌های loader را برمی‌گرداند
+    # (تابع تا رابطه‌ها هنگام import مدل‌ها resolve نشوند)
+    loader_profiles: Dict[str, Callable[[], Sequence[Any]]] = {}
     
     def __init__(self, session: AsyncSession, model: Type[T]):
         """
@@ -31,11 +38,25 @@ class BaseRepository(Generic[T]):
         await self.session.flush()
         return instance
     
-    async def get_by_id(self, id: int) -> Optional[T]:
-        """دریافت رکورد با شناسه"""
-        query = select(self.model).where(self.model.id == id)
+    def loader_options(self, profile: Optional[str]) -> List[Any]:
+        """
+        گزینه‌های loader یک پروفایل نام‌دار (selectinload/joinedload)
+
+        Raises:
+            ValueError: اگر پروفایل برای این ریپازیتوری تعریف نشده باشد
+        """
+        if profile is None:
+            return []
+        try:
+            return list(self.loader_profiles[profile]())
+        except KeyError:
+            raise ValueError(f"Unknown loader profile {profile!r} for {type(self).__name__}") from None
+
+    async def get_by_id(self, id: int, profile: Optional[str] = None) -> Optional[T]:
+        """دریافت رکورد با شناسه (با رابطه‌های پروفایل داده شده در همان کوئری)"""
+        query = select(self.model).where(self.model.id == id).options(*self.loader_options(profile))
         result = await self.session.execute(query)
-        return result.scalar_one_or_none()
+        return result.unique().scalar_one_or_none()
     
     async def get_all(self) -> List[T]:
         """دریافت تمام رکوردها"""
@@ -80,4 +101,35 @@ class BaseRepository(Generic[T]):
         for key, value in kwargs.items():
             query = query.where(getattr(self.model, key) == value)
         result = await self.session.execute(query)
-        return list(result.scalars().all()) 
\ No newline at end of file
+        return list(result.scalars().all())
+
+    @read_only
+    async def paginate(
+        self,
+        *criteria: Any,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        order_by: Optional[str] = None,
+        descending: bool = True,
+        profile: Optional[str] = None,
+    ) -> Page[T]:
+        """
+        دریافت یک صفحه از رکوردها با صفحه‌بندی keyset (بدون OFFSET)
+
+        Args:
+            *criteria: شرط‌های فیلتر لیست
+            cursor: cursor صفحه قبلی (None برای صفحه اول)
+            limit: تعداد رکورد هر صفحه
+            order_by: نام ستون ترتیب (مثلاً created_at)؛ id همیشه به عنوان ستون یکتای آخر اضافه می‌شود
+            descending: ترتیب نزولی
+            profile: پروفایل بارگذاری رابطه‌ها (loader_profiles)
+
+        Returns:
+            Page[T]: رکوردهای صفحه و cursor صفحه‌های بعد و قبل
+
+        Raises:
+            ValueError: در صورت نامعتبر بودن cursor
+        """
+        columns = [getattr(self.model, order_by), self.model.id] if order_by else [self.model.id]
+        query = select(self.model).where(*criteria).options(*self.loader_options(profile))
+        return await keyset_paginate(self.session, query, columns, cursor, limit, descending)
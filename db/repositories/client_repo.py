@@ -2,35 +2,53 @@
 Client account repository for database operations
 """
 
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from datetime import datetime
-from sqlalchemy import select, and_, update, delete
+from sqlalchemy import select, and_, update, delete, case
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from db.models.client_account import ClientAccount, AccountStatus
+from db.models.user import User
+from db.routing import read_only
 from .base_repository import BaseRepository
 
+# پروفایل‌های بارگذاری نماهای اکانت (مشترک بین ClientRepository و AccountRepository)
+CLIENT_ACCOUNT_LOADER_PROFILES = {
+    # لیست «اکانت‌های من»: لوکیشن پنل هر اکانت
+    "account_list": lambda: (joinedload(ClientAccount.panel),),
+    # جزئیات/تمدید اکانت: پنل، inbound و پلن
+    "account_detail": lambda: (
+        joinedload(ClientAccount.panel),
+        joinedload(ClientAccount.inbound),
+        joinedload(ClientAccount.plan),
+    ),
+}
+
 class ClientRepository(BaseRepository[ClientAccount]):
     """Repository for client account database operations"""
+
+    loader_profiles = CLIENT_ACCOUNT_LOADER_PROFILES
     
     def __init__(self, session: AsyncSession):
         super().__init__(session, ClientAccount)
     
-    async def get_by_id(self, account_id: int) -> Optional[ClientAccount]:
+    async def get_by_id(self, account_id: int, profile: Optional[str] = None) -> Optional[ClientAccount]:
         """Get client account by ID"""
-        return await super().get_by_id(account_id)
+        return await super().get_by_id(account_id, profile)
     
-    async def get_active_accounts_by_user_id(self, user_id: int) -> List[ClientAccount]:
-        """Get all active accounts for a user"""
+    @read_only
+    async def get_active_accounts_by_user_id(self, user_id: int, profile: Optional[str] = None) -> List[ClientAccount]:
+        """Get all active accounts for a user (relations of `profile` loaded in the same query)"""
         query = select(self.model).where(
             and_(
                 self.model.user_id == user_id,
                 self.model.status == AccountStatus.ACTIVE,
                 self.model.expires_at > datetime.utcnow()
             )
-        )
+        ).options(*self.loader_options(profile))
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        return list(result.unique().scalars().all())
     
     async def create_account(self, account_data: dict) -> ClientAccount:
         """Create a new client account"""
@@ -63,4 +81,126 @@ class ClientRepository(BaseRepository[ClientAccount]):
     
     async def update_account_traffic(self, account_id: int, traffic_used: int) -> Optional[ClientAccount]:
         """Update account traffic usage"""
-        return await super().update(account_id, {"traffic_used": traffic_used}) 
\ No newline at end of file
+        return await super().update(account_id, {"traffic_used": traffic_used})
+    
+    async def get_traffic_state_by_panel_id(self, panel_id: int) -> List[Any]:
+        """Get lightweight (id, remote_uuid, email_name, data_used) rows for all accounts of a panel"""
+        query = select(
+            self.model.id,
+            self.model.remote_uuid,
+            self.model.email_name,
+            self.model.data_used,
+        ).where(self.model.panel_id == panel_id)
+        result = await self.session.execute(query)
+        return list(result.all())
+    
+    async def bulk_update_traffic(self, usage_by_id: Dict[int, int], chunk_size: int = 500) -> int:
+        """
+        Write data_used (bytes) and traffic_used (GB) for many accounts.
+        Each chunk is a single UPDATE ... SET col = CASE id ... END WHERE id IN (...).
+        Does not commit.
+        """
+        if not usage_by_id:
+            return 0
+        items = list(usage_by_id.items())
+        total = 0
+        for start in range(0, len(items), chunk_size):
+            chunk = dict(items[start:start + chunk_size])
+            stmt = (
+                update(self.model)
+                .where(self.model.id.in_(chunk.keys()))
+                .values(
+                    data_used=case(chunk, value=self.model.id),
+                    traffic_used=case(
+                        {account_id: used // (1024 ** 3) for account_id, used in chunk.items()},
+                        value=self.model.id,
+                    ),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.session.execute(stmt)
+            total += result.rowcount
+        return total
+
+    async def iter_link_targets(self, inbound_id: int, chunk_size: int = 500) -> AsyncIterator[List[Any]]:
+        """
+        Yield (id, remote_uuid, email_name) rows of an inbound's accounts in chunks.
+        Keyset-paginated on id over the inbound_id index, so only one chunk is held in memory.
+        """
+        last_id = 0
+        while True:
+            query = (
+                select(self.model.id, self.model.remote_uuid, self.model.email_name)
+                .where(self.model.inbound_id == inbound_id, self.model.id > last_id)
+                .order_by(self.model.id)
+                .limit(chunk_size)
+            )
+            rows = list((await self.session.execute(query)).all())
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1].id
+
+    async def get_active_recipients_by_inbound(self, inbound_id: int, after_user_id: int = 0, limit: int = 500) -> List[Any]:
+        """
+        Get one keyset page of distinct (user id, telegram_id) rows for users with an
+        active account on an inbound, ordered by user id and starting after `after_user_id`.
+        """
+        query = (
+            select(User.id, User.telegram_id)
+            .join(self.model, self.model.user_id == User.id)
+            .where(
+                self.model.inbound_id == inbound_id,
+                self.model.status == AccountStatus.ACTIVE,
+                User.id > after_user_id,
+            )
+            .group_by(User.id, User.telegram_id)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return list(result.all())
+
+    async def bulk_update_config_urls(self, urls_by_id: Dict[int, str], chunk_size: int = 500) -> int:
+        """
+        Write config_url for many accounts.
+        Each chunk is a single UPDATE ... SET config_url = CASE id ... END WHERE id IN (...).
+        Does not commit.
+        """
+        if not urls_by_id:
+            return 0
+        items = list(urls_by_id.items())
+        total = 0
+        for start in range(0, len(items), chunk_size):
+            chunk = dict(items[start:start + chunk_size])
+            stmt = (
+                update(self.model)
+                .where(self.model.id.in_(chunk.keys()))
+                .values(config_url=case(chunk, value=self.model.id))
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.session.execute(stmt)
+            total += result.rowcount
+        return total
+
+    async def get_by_sub_token(self, sub_token: str) -> Optional[ClientAccount]:
+        """Get the account of a subscription token with its panel and inbound loaded"""
+        query = (
+            select(self.model)
+            .options(joinedload(self.model.panel), joinedload(self.model.inbound))
+            .where(self.model.sub_token == sub_token)
+        )
+        result = await self.session.execute(query)
+        return result.scalars().first()
+
+    async def touch_subscription(self, account_id: int, user_agent: Optional[str]) -> None:
+        """Record the last subscription fetch (time and client User-Agent). Does not commit."""
+        stmt = (
+            update(self.model)
+            .where(self.model.id == account_id)
+            .values(sub_updated_at=datetime.utcnow(), sub_last_user_agent=(user_agent or "")[:255] or None)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
@@ -2,6 +2,7 @@ from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, and_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import SQLAlchemyError
 import logging
@@ -88,6 +89,78 @@ class InboundRepository(BaseRepository[Inbound]):
             logger.error(f"خطا در دریافت inboundهای پنل {panel_id}: {e}", exc_info=True)
             raise
 
+    async def get_by_ids(self, inbound_ids: List[int]) -> List[Inbound]:
+        """
+        دریافت چند inbound با شناسه دیتابیسی آنها.
+
+        Args:
+            inbound_ids (List[int]): شناسه‌های inbound.
+
+        Returns:
+            List[Inbound]: inboundهای یافت شده (به ترتیب شناسه).
+        """
+        if not inbound_ids:
+            return []
+        try:
+            query = select(self.model).where(self.model.id.in_(inbound_ids)).order_by(self.model.id)
+            result = await self.session.execute(query)
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"خطا در دریافت inboundها با شناسه‌های {inbound_ids}: {e}", exc_info=True)
+            raise
+
+    async def get_sync_state_by_panel_id(self, panel_id: int) -> List[Any]:
+        """
+        دریافت وضعیت همگام‌سازی inboundهای یک پنل (فقط ستون‌های سبک، بدون ستون‌های JSON).
+
+        Args:
+            panel_id (int): شناسه پنل.
+
+        Returns:
+            List[Row]: ردیف‌هایی با فیلدهای id، remote_id، content_hash و status.
+        """
+        try:
+            query = select(
+                self.model.id,
+                self.model.remote_id,
+                self.model.content_hash,
+                self.model.status,
+            ).where(self.model.panel_id == panel_id)
+            result = await self.session.execute(query)
+            return list(result.all())
+        except SQLAlchemyError as e:
+            logger.error(f"خطا در دریافت وضعیت همگام‌سازی inboundهای پنل {panel_id}: {e}", exc_info=True)
+            raise
+
+    async def get_link_state_by_remote_ids(self, panel_id: int, remote_ids: List[int]) -> List[Any]:
+        """
+        دریافت ستون‌های سازنده لینک کانفیگ برای چند inbound یک پنل (برای تشخیص تغییر لینک‌ها).
+
+        Args:
+            panel_id (int): شناسه پنل.
+            remote_ids (List[int]): شناسه‌های remote inboundها.
+
+        Returns:
+            List[Row]: ردیف‌هایی با فیلدهای id، remote_id، protocol، port، stream_settings، sniffing و settings_json.
+        """
+        if not remote_ids:
+            return []
+        try:
+            query = select(
+                self.model.id,
+                self.model.remote_id,
+                self.model.protocol,
+                self.model.port,
+                self.model.stream_settings,
+                self.model.sniffing,
+                self.model.settings_json,
+            ).where(self.model.panel_id == panel_id, self.model.remote_id.in_(remote_ids))
+            result = await self.session.execute(query)
+            return list(result.all())
+        except SQLAlchemyError as e:
+            logger.error(f"خطا در دریافت تنظیمات لینک inboundهای پنل {panel_id}: {e}", exc_info=True)
+            raise
+
     async def get_active_inbounds(self) -> List[Inbound]:
         """
         دریافت لیست تمام inboundهای فعال.
@@ -164,9 +237,8 @@ class InboundRepository(BaseRepository[Inbound]):
                 inbounds_to_add.append(Inbound(**data))
 
             self.session.add_all(inbounds_to_add)
-            await self.session.flush()  # ارسال دستورات به دیتابیس، دریافت IDها
-            for inbound in inbounds_to_add:
-                await self.session.refresh(inbound)  # به‌روزرسانی هر آبجکت با مقادیر دیتابیس
+            # flush شناسه‌ها را مقداردهی می‌کند؛ refresh تک به تک (یک SELECT به ازای هر سطر) لازم نیست
+            await self.session.flush()
             logger.info(f"تعداد {len(inbounds_to_add)} inbound با موفقیت ایجاد و flush شدند.")
             return len(inbounds_to_add)
         except SQLAlchemyError as e:
@@ -194,17 +266,16 @@ class InboundRepository(BaseRepository[Inbound]):
             return 0
 
         logger.info(f"در حال آماده سازی آپدیت دسته‌ای برای {len(inbounds_updates)} inbound.")
-        total_rows_affected = 0
         try:
-            # آپدیت تک به تک برای دریافت تعداد رکوردهای تحت تاثیر
+            params = []
             for update_data in inbounds_updates:
                 inbound_id = update_data.get('id')
                 if inbound_id is None:
                     logger.error(f"داده‌های آپدیت inbound فاقد 'id' است. (Inbound update data is missing 'id') Data: {update_data}")
                     raise ValueError("هر آیتم آپدیت inbound باید شامل 'id' باشد.")
 
-                values_to_update = {k: v for k, v in update_data.items() if k != 'id'}
-                if not values_to_update:
+                values_to_update = dict(update_data)
+                if len(values_to_update) == 1:
                     logger.warning(f"هیچ فیلدی برای آپدیت inbound با شناسه {inbound_id} ارائه نشده است.")
                     continue
 
@@ -215,29 +286,92 @@ class InboundRepository(BaseRepository[Inbound]):
                     except KeyError as e:
                         logger.error(f"مقدار وضعیت نامعتبر '{values_to_update['status']}' برای inbound {inbound_id}. خطا: {e}")
                         raise ValueError(f"مقدار وضعیت نامعتبر: {values_to_update['status']}") from e
+                params.append(values_to_update)
 
-                stmt = (
-                    update(Inbound)
-                    .where(Inbound.id == inbound_id)
-                    .values(**values_to_update)
-                    .execution_options(synchronize_session=False)  # عدم همگام‌سازی با وضعیت session
-                )
-                result = await self.session.execute(stmt)
-                rows_affected = result.rowcount
-                if rows_affected > 0:
-                    logger.debug(f"آپدیت برای inbound {inbound_id} اجرا شد، {rows_affected} سطر تحت تاثیر قرار گرفت.")
-                    total_rows_affected += rows_affected
-                else:
-                    logger.warning(f"آپدیت برای inbound {inbound_id} هیچ سطری را تحت تاثیر قرار نداد (ممکن است وجود نداشته باشد).")
-
-            logger.info(f"آپدیت دسته‌ای inboundها تکمیل شد. مجموع سطرهای تحت تاثیر: {total_rows_affected}.")
+            if not params:
+                return 0
+
+            # آپدیت دسته‌ای ORM بر اساس کلید اصلی: یک دستور UPDATE با executemany برای همه سطرها
+            await self.session.execute(
+                update(Inbound).execution_options(synchronize_session=False),
+                params,
+            )
+            logger.info(f"آپدیت دسته‌ای {len(params)} inbound تکمیل شد.")
             # نیازی به flush نیست زیرا execute دستور UPDATE را مستقیماً اجرا می‌کند.
-            return total_rows_affected
+            return len(params)
         except SQLAlchemyError as e:
             logger.error(f"خطا در اجرای آپدیت دسته‌ای inboundها: {e}", exc_info=True)
             # Rollback باید در لایه سرویس انجام شود
             raise
 
+    async def upsert_inbounds(self, inbounds_data: List[Dict[str, Any]]) -> int:
+        """
+        درج یا به‌روزرسانی دسته‌ای inboundها با یک دستور
+        `INSERT ... ON DUPLICATE KEY UPDATE` (کلید یکتا: panel_id, remote_id).
+
+        تمام دیکشنری‌ها باید کلیدهای یکسانی داشته باشند و شامل 'panel_id' و 'remote_id' باشند.
+        این متد `commit` نمی‌کند و آبجکت‌های موجود در session را به‌روز نمی‌کند.
+
+        Args:
+            inbounds_data (List[Dict[str, Any]]): لیستی از دیکشنری‌های داده inbound.
+
+        Returns:
+            int: تعداد inboundهای ارسال شده برای upsert.
+        """
+        if not inbounds_data:
+            return 0
+
+        logger.info(f"در حال upsert دسته‌ای {len(inbounds_data)} inbound.")
+        try:
+            stmt = mysql_insert(Inbound).values(inbounds_data)
+            # ستون‌های کلید (و شناسه) بازنویسی نمی‌شوند
+            update_columns = {
+                key: stmt.inserted[key]
+                for key in inbounds_data[0].keys()
+                if key not in ('id', 'panel_id', 'remote_id')
+            }
+            stmt = stmt.on_duplicate_key_update(**update_columns)
+            await self.session.execute(stmt)
+            logger.info(f"upsert دسته‌ای {len(inbounds_data)} inbound تکمیل شد.")
+            return len(inbounds_data)
+        except SQLAlchemyError as e:
+            logger.error(f"خطا در upsert دسته‌ای inboundها: {e}", exc_info=True)
+            # Rollback باید در لایه سرویس انجام شود
+            raise
+
+    async def deactivate_missing_inbounds(self, panel_id: int, present_remote_ids: List[int]) -> int:
+        """
+        غیرفعال کردن inboundهای یک پنل که دیگر در پنل وجود ندارند، با یک دستور UPDATE.
+
+        Args:
+            panel_id (int): شناسه پنل.
+            present_remote_ids (List[int]): شناسه‌های remote inboundهایی که هنوز در پنل وجود دارند.
+
+        Returns:
+            int: تعداد inboundهایی که غیرفعال شدند.
+        """
+        try:
+            stmt = (
+                update(Inbound)
+                .where(
+                    Inbound.panel_id == panel_id,
+                    Inbound.status != InboundStatus.INACTIVE,
+                )
+                .values(status=InboundStatus.INACTIVE)
+                .execution_options(synchronize_session=False)
+            )
+            if present_remote_ids:
+                stmt = stmt.where(Inbound.remote_id.not_in(present_remote_ids))
+            result = await self.session.execute(stmt)
+            rows_affected = result.rowcount
+            if rows_affected:
+                logger.info(f"{rows_affected} inbound حذف شده از پنل {panel_id} غیرفعال شد. (Deactivated {rows_affected} missing inbounds for panel {panel_id}.)")
+            return rows_affected
+        except SQLAlchemyError as e:
+            logger.error(f"خطا در غیرفعال کردن inboundهای حذف شده پنل {panel_id}: {e}", exc_info=True)
+            # Rollback باید در لایه سرویس انجام شود
+            raise
+
     async def update_inbound_status(self, remote_id: int, panel_id: int, status: InboundStatus) -> bool:
         """
         به‌روزرسانی وضعیت یک inbound بر اساس remote_id و panel_id.
@@ -5,14 +5,22 @@ from datetime import datetime # Added datetime
 from sqlalchemy import update, delete # Added update, delete
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from db.models import Order, OrderStatus # Import OrderStatus from db.models
 from db.repositories.base_repository import BaseRepository
+from db.repositories.pagination import Page
 from db.schemas.order import OrderCreate, OrderUpdate # Assuming these exist and match
 
 logger = logging.getLogger(__name__) # Added logger
 
 class OrderRepository(BaseRepository[Order]): # Inherit from BaseRepository[Order]
+    # Named loader profiles per view (see BaseRepository.loader_options)
+    loader_profiles = {
+        # payment / fulfilment flows: buyer and plan in the same query
+        "order_detail": lambda: (joinedload(Order.user), joinedload(Order.plan)),
+    }
+
     def __init__(self, session: AsyncSession):
         super().__init__(session, Order)
 
@@ -45,23 +53,19 @@ class OrderRepository(BaseRepository[Order]): # Inherit from BaseRepository[Orde
         return await super().update(order_id, {"fulfilled_at": fulfilled_time, "updated_at": datetime.utcnow()})
         
     async def get_by_user_id(
-        self, 
-        user_id: int, 
-        limit: int = 10, 
-        offset: int = 0,
-        order_by: Optional[List[Any]] = None # Example: [Order.created_at.desc()]
-    ) -> List[Order]:
-        """ Fetches orders by user ID with pagination and ordering """
-        query = select(self.model).where(self.model.user_id == user_id)
-        if order_by is not None:
-            query = query.order_by(*order_by)
-        else:
-            query = query.order_by(self.model.created_at.desc()) # Default ordering
-            
-        query = query.offset(offset).limit(limit)
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
-        
+        self,
+        user_id: int,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+    ) -> Page[Order]:
+        """ Fetches one keyset page of a user's orders, newest first (uses ix_orders_user_created) """
+        return await self.paginate(self.model.user_id == user_id, cursor=cursor, limit=limit, order_by="created_at")
+
+    async def get_page(self, status: Optional[OrderStatus] = None, limit: int = 10, cursor: Optional[str] = None) -> Page[Order]:
+        """ Fetches one keyset page of all orders (optionally by status), newest first """
+        criteria = [self.model.status == status] if status is not None else []
+        return await self.paginate(*criteria, cursor=cursor, limit=limit)
+
     async def get_pending_orders(self) -> List[Order]:
         """ Fetches all orders with PENDING status """
         query = select(self.model).where(self.model.status == OrderStatus.PENDING)
@@ -0,0 +1,141 @@
+"""
+صفحه‌بندی keyset (cursor) برای لیست‌های ربات
+
+به جای `OFFSET/LIMIT` که برای صفحه‌های عمیق تمام ردیف‌های قبلی را می‌خواند، هر صفحه
+با شرط `(ستون ترتیب، id) < مقدار آخرین ردیف صفحه قبل` خوانده می‌شود؛ بنابراین هزینه
+صفحه ۵۰۰ با صفحه ۱ برابر است. cursor یک رشته base64 کوتاه (حداکثر ۲۳ کاراکتر) است که در
+`callback_data` تلگرام (۶۴ بایت) جا می‌شود. فیلترهای لیست (مثلاً user_id) همیشه سمت سرور
+اعمال می‌شوند، پس دستکاری cursor فقط جایگاه شروع را تغییر می‌دهد.
+"""
+
+import base64
+import binascii
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import DateTime, Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar('T')
+
+_EPOCH = datetime(1970, 1, 1)
+_BACKWARD = 0x01
+
+
+@dataclass
+class Page(Generic[T]):
+    """یک صفحه از نتایج به همراه cursor صفحه بعد و قبل (None یعنی صفحه‌ای وجود ندارد)"""
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, datetime):
+        return (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+    return int(value)
+
+
+def encode_cursor(values: Sequence[Any], backward: bool = False) -> str:
+    """ساخت cursor از مقادیر ستون‌های ترتیب (datetime یا عدد صحیح)"""
+    raw = struct.pack(f">B{len(values)}q", _BACKWARD if backward else 0, *(_to_int(v) for v in values))
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> Tuple[Tuple[Any, ...], bool]:
+    """
+    خواندن cursor برای ستون‌های ترتیب داده شده.
+
+    Returns:
+        (مقادیر ستون‌ها، جهت عقب‌رو)
+
+    Raises:
+        ValueError: اگر cursor نامعتبر باشد یا با ستون‌ها نخواند.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if len(raw) != 1 + 8 * len(columns):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    flags, *numbers = struct.unpack(f">B{len(columns)}q", raw)
+    values = tuple(
+        _EPOCH + timedelta(microseconds=number) if isinstance(column.type, DateTime) else number
+        for column, number in zip(columns, numbers)
+    )
+    return values, bool(flags & _BACKWARD)
+
+
+def _after(columns: Sequence[Any], values: Sequence[Any], descending: bool):
+    """شرط keyset «بعد از» مقادیر داده شده به صورت OR باز شده (قابل استفاده با ایندکس در MySQL)"""
+    clauses = []
+    for i, column in enumerate(columns):
+        tail = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*(columns[j] == values[j] for j in range(i)), tail))
+    return or_(*clauses)
+
+
+async def keyset_paginate(
+    session: AsyncSession,
+    query: Select,
+    columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    descending: bool = True,
+) -> Page:
+    """
+    اجرای یک صفحه از `query` با صفحه‌بندی keyset.
+
+    Args:
+        session: نشست دیتابیس.
+        query: کوئری SELECT مدل با فیلترهای لیست (بدون order_by/limit).
+        columns: ستون‌های ترتیب؛ آخرین ستون باید یکتا باشد (معمولاً id).
+        cursor: cursor دریافتی از صفحه قبلی (None برای صفحه اول).
+        limit: تعداد ردیف هر صفحه.
+        descending: ترتیب نزولی (جدیدترین‌ها اول).
+
+    Returns:
+        Page شامل ردیف‌ها و cursor صفحه‌های بعد و قبل.
+
+    Raises:
+        ValueError: در صورت نامعتبر بودن cursor.
+    """
+    values: Optional[Tuple[Any, ...]] = None
+    backward = False
+    if cursor:
+        values, backward = decode_cursor(cursor, columns)
+
+    # صفحه قبل: همان کوئری در جهت مخالف و سپس برعکس کردن نتیجه
+    scan_descending = descending != backward
+    if values is not None:
+        query = query.where(_after(columns, values, scan_descending))
+    ordering = [column.desc() if scan_descending else column.asc() for column in columns]
+    result = await session.execute(query.order_by(*ordering).limit(limit + 1))
+    items = list(result.unique().scalars().all())
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    if backward:
+        items.reverse()
+    if not items:
+        return Page(items)
+
+    def _position(item: Any) -> List[Any]:
+        return [getattr(item, column.key) for column in columns]
+
+    # در جهت رو به جلو «بیشتر» یعنی صفحه بعد؛ در جهت عقب‌رو یعنی صفحه قبل
+    has_next = has_more if not backward else True
+    has_prev = (values is not None) if not backward else has_more
+    return Page(
+        items,
+        next_cursor=encode_cursor(_position(items[-1])) if has_next else None,
+        prev_cursor=encode_cursor(_position(items[0]), backward=True) if has_prev else None,
+    )
@@ -11,6 +11,7 @@ from sqlalchemy.orm import selectinload # Added for potential future eager loadi
 
 from db.models.panel import Panel, PanelStatus
 from db.models.inbound import Inbound, InboundStatus
+from db.routing import read_only
 
 # Assume logger is configured elsewhere
 logger = logging.getLogger(__name__)
@@ -194,6 +195,7 @@ class PanelRepository:
             logger.error(f"خطا در دریافت پنل‌ها با وضعیت خام '{raw_status}': {e}. (Error fetching panels with raw status '{raw_status}': {e}).")
             raise
 
+    @read_only
     async def get_active_panels(self) -> List[Panel]:
         """
         دریافت لیستی از تمام پنل‌های فعال.
@@ -452,6 +454,39 @@ class PanelRepository:
             logger.error(f"خطا در آپدیت وضعیت پنل {panel_id}: {e}. (Error updating panel status for panel {panel_id}: {e}).")
             raise # Rollback handled by service layer
 
+    async def set_circuit_open(self, panel_id: int, is_open: bool) -> bool:
+        """
+        ثبت وضعیت مدار circuit breaker یک پنل (بدون تغییر status که متعلق به ادمین است).
+        Records the circuit breaker state of a panel without touching its admin-owned status.
+
+        Args:
+            panel_id (int): شناسه پنل. The ID of the panel.
+            is_open (bool): باز بودن مدار. Whether the circuit is open.
+
+        Returns:
+            bool: True اگر پنل وجود داشت. True if the panel exists.
+        """
+        try:
+            stmt = (
+                update(Panel)
+                .where(Panel.id == panel_id)
+                .values(circuit_open=is_open)
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.session.execute(stmt)
+            return result.rowcount > 0
+        except SQLAlchemyError as e:
+            logger.error(f"خطا در ثبت وضعیت مدار پنل {panel_id}: {e}. (Error updating circuit state for panel {panel_id}: {e}).")
+            raise
+
+    async def get_circuit_open_panel_ids(self) -> List[int]:
+        """
+        شناسه پنل‌هایی که مدارشان در دیتابیس باز ثبت شده است (برای بازیابی پس از ری‌استارت).
+        Returns the IDs of panels whose circuit is recorded as open.
+        """
+        result = await self.session.execute(select(Panel.id).where(Panel.circuit_open.is_(True)).order_by(Panel.id))
+        return list(result.scalars().all())
+
     # --- Delete Operations ---
 
     async def delete_panel(self, panel_id: int) -> bool:
@@ -493,146 +528,9 @@ class PanelRepository:
 
     # --- Bulk Operations ---
 
-    async def bulk_add_inbounds(self, inbounds_data: List[Dict[str, Any]]) -> List[Inbound]:
-        """
-        افزودن دسته‌ای اینباندها به دیتابیس.
-        Bulk adds inbounds to the database.
-
-        این متد لیستی از دیکشنری‌های داده اینباند را دریافت کرده، آبجکت‌های
-        Inbound را ایجاد و به session اضافه می‌کند. سپس `flush` و `refresh`
-        را برای ذخیره در دیتابیس و به‌روزرسانی آبجکت‌ها با ID های تولید شده
-        فراخوانی می‌کند.
-
-        This method receives a list of inbound data dictionaries, creates
-        Inbound objects, adds them to the session, then calls `flush` and
-        `refresh` to save to the database and update the objects with
-        generated IDs.
-
-        Args:
-            inbounds_data (List[Dict[str, Any]]): لیستی از دیکشنری‌های داده اینباند.
-                                                  A list of inbound data dictionaries.
-
-        Returns:
-            List[Inbound]: لیستی از آبجکت‌های Inbound ایجاد شده و به‌روزشده.
-                           A list of the created and refreshed Inbound objects.
-
-        Raises:
-            SQLAlchemyError: در صورت بروز خطا در عملیات دیتابیس.
-                             If a database operation error occurs.
-            ValueError: اگر وضعیت نامعتبر در داده‌ها وجود داشته باشد.
-                        If invalid status is present in the data.
-        """
-        if not inbounds_data:
-            logger.info("لیست خالی برای افزودن دسته‌ای اینباند دریافت شد. (Empty list received for bulk adding inbounds.)")
-            return []
-
-        logger.info(f"در حال افزودن دسته‌ای {len(inbounds_data)} اینباند. (Attempting to bulk add {len(inbounds_data)} inbounds.)")
-        inbounds_to_add = []
-        try:
-            for data in inbounds_data:
-                 # Ensure status is set if provided, otherwise rely on model default
-                if 'status' in data and isinstance(data['status'], str):
-                    try:
-                        data['status'] = InboundStatus[data['status'].upper()]
-                    except KeyError as e:
-                        logger.error(f"مقدار وضعیت نامعتبر '{data.get('status')}' در داده‌های اینباند برای پنل {data.get('panel_id')}. خطا: {e} (Invalid status value '{data.get('status')}' in inbound data for panel {data.get('panel_id')}. Error: {e})")
-                        raise ValueError(f"مقدار وضعیت نامعتبر: {data.get('status')}") from e
-                inbounds_to_add.append(Inbound(**data))
-
-            self.session.add_all(inbounds_to_add)
-            await self.session.flush() # Send inserts to DB, get IDs
-            for inbound in inbounds_to_add: # Refresh each object individually
-                 await self.session.refresh(inbound)
-            logger.info(f"تعداد {len(inbounds_to_add)} اینباند با موفقیت ایجاد و flush/refresh شدند. (Successfully created and flushed/refreshed {len(inbounds_to_add)} inbounds.)")
-            return inbounds_to_add
-        except SQLAlchemyError as e:
-            logger.error(f"خطا در افزودن دسته‌ای اینباندها: {e}. (Error during bulk adding inbounds: {e}).")
-            raise # Rollback handled by service layer
-
-    async def bulk_update_inbounds(self, inbounds_updates: List[Dict[str, Any]]) -> int:
-        """
-        به‌روزرسانی دسته‌ای اینباندها با استفاده از مقادیر ارائه شده.
-        Bulk updates inbounds using the provided values.
-
-        **نکته مهم:** این متد از دستور `UPDATE` مستقیم در دیتابیس استفاده می‌کند
-        و آبجکت‌های Inbound که ممکن است از قبل در session موجود باشند را به‌روز
-        نمی‌کند. اگر نیاز به کار با آبجکت‌های به‌روزشده در همان تراکنش دارید،
-        باید آن‌ها را مجدداً از دیتابیس بخوانید یا از روش آپدیت تکی استفاده کنید.
-        این متد `commit` یا `flush` نمی‌کند.
-
-        **Important Note:** This method uses a direct `UPDATE` statement in the
-        database and does **not** update Inbound objects that might already exist
-        in the current session. If you need to work with the updated objects within
-        the same transaction, you must either re-fetch them from the database or
-        use an individual update approach. This method does not commit or flush.
-
-        Args:
-            inbounds_updates (List[Dict[str, Any]]): لیستی از دیکشنری‌ها. هر دیکشنری
-                باید شامل 'id' اینباند و فیلدهایی باشد که باید آپدیت شوند.
-                A list of dictionaries. Each dictionary must contain the 'id'
-                of the inbound and the fields to be updated.
-
-        Returns:
-            int: تعداد رکوردهایی که تحت تأثیر قرار گرفتند (ممکن است صفر باشد).
-                 The total number of rows affected across all updates (could be zero).
-
-        Raises:
-            SQLAlchemyError: در صورت بروز خطا در عملیات دیتابیس.
-                             If a database operation error occurs.
-            ValueError: اگر داده‌های ورودی نامعتبر باشند (مثلاً 'id' موجود نباشد).
-                        If the input data is invalid (e.g., 'id' is missing).
-        """
-        if not inbounds_updates:
-             logger.info("لیست خالی برای آپدیت دسته‌ای اینباند دریافت شد. (Empty list received for bulk updating inbounds.)")
-             return 0
-
-        logger.info(f"در حال آماده سازی آپدیت دسته‌ای برای {len(inbounds_updates)} اینباند. (Preparing bulk update for {len(inbounds_updates)} inbounds).")
-        total_rows_affected = 0
-        try:
-            # We execute updates one by one to get individual row counts,
-            # though SQLAlchemy 2.0 might offer more direct bulk update mapping later.
-            # This approach avoids complex bulk_update_mappings for now.
-            for update_data in inbounds_updates:
-                inbound_id = update_data.get('id')
-                if inbound_id is None:
-                    logger.error("داده‌های آپدیت اینباند فاقد 'id' است. (Inbound update data is missing 'id.') Data: %s", update_data)
-                    raise ValueError("هر آیتم آپدیت اینباند باید شامل 'id' باشد. (Each inbound update item must include an 'id'.)")
-
-                values_to_update = {k: v for k, v in update_data.items() if k != 'id'}
-                if not values_to_update:
-                    logger.warning(f"هیچ فیلدی برای آپدیت اینباند با شناسه {inbound_id} ارائه نشده است. (No fields provided for update for inbound ID {inbound_id}).")
-                    continue
-
-                 # Handle status enum conversion
-                if 'status' in values_to_update and isinstance(values_to_update['status'], str):
-                    try:
-                        values_to_update['status'] = InboundStatus[values_to_update['status'].upper()]
-                    except KeyError as e:
-                         logger.error(f"مقدار وضعیت نامعتبر '{values_to_update['status']}' برای اینباند {inbound_id}. خطا: {e} (Invalid status value '{values_to_update['status']}' for inbound {inbound_id}. Error: {e})")
-                         raise ValueError(f"مقدار وضعیت نامعتبر: {values_to_update['status']}") from e
-
-                stmt = (
-                    update(Inbound)
-                    .where(Inbound.id == inbound_id)
-                    .values(**values_to_update)
-                    .execution_options(synchronize_session=False) # Important: Don't sync session state
-                )
-                result = await self.session.execute(stmt)
-                rows_affected = result.rowcount
-                if rows_affected > 0:
-                    logger.debug(f"آپدیت برای اینباند {inbound_id} اجرا شد، {rows_affected} سطر تحت تاثیر قرار گرفت. (Update executed for inbound {inbound_id}, {rows_affected} row(s) affected.)")
-                    total_rows_affected += rows_affected
-                else:
-                     logger.warning(f"آپدیت برای اینباند {inbound_id} هیچ سطری را تحت تاثیر قرار نداد (ممکن است وجود نداشته باشد). (Update for inbound {inbound_id} affected 0 rows (might not exist)).")
-
-
-            logger.info(f"آپدیت دسته‌ای اینباندها تکمیل شد. مجموع سطرهای تحت تاثیر: {total_rows_affected}. نیاز به commit در سرویس. (Bulk inbound update completed. Total rows affected: {total_rows_affected}. Commit needed in service.)")
-            # No flush or commit needed here as execute() runs the UPDATE directly.
-            # Session objects are NOT updated by this.
-            return total_rows_affected
-        except SQLAlchemyError as e:
-            logger.error(f"خطا در اجرای آپدیت دسته‌ای اینباندها: {e}. (Error executing bulk inbound update: {e}).")
-            raise # Rollback handled by service layer
+    # عملیات دسته‌ای درج/به‌روزرسانی inboundها در InboundRepository قرار دارد
+    # (bulk_add_inbounds، bulk_update_inbounds، upsert_inbounds، deactivate_missing_inbounds).
+    # Bulk inbound writes live in InboundRepository.
 
     async def update_inbounds_status_by_panel_id(self, panel_id: int, status: InboundStatus) -> int:
         """
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models.plan import Plan, PlanStatus
 from .base_repository import BaseRepository
+from db.routing import read_only
 
 class PlanRepository(BaseRepository[Plan]):
     """کلاس ریپوزیتوری برای عملیات پایگاه داده پلن‌ها"""
@@ -16,12 +17,14 @@ class PlanRepository(BaseRepository[Plan]):
         """مقداردهی اولیه با کلاس مدل Plan"""
         super().__init__(session, Plan)
 
+    @read_only
     async def get_all_active(self) -> List[Plan]:
         """دریافت تمام پلن‌های فعال"""
         query = select(Plan).where(Plan.status == PlanStatus.ACTIVE).order_by(Plan.created_at.desc())
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    @read_only
     async def get_plan_by_id(self, plan_id: int) -> Optional[Plan]:
         """دریافت پلن با شناسه مشخص"""
         return await self.get_by_id(plan_id)
@@ -3,12 +3,27 @@ from typing import Optional, List
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
+from sqlalchemy.orm import joinedload
 
+from db.models.order import Order
 from db.models.receipt_log import ReceiptLog, ReceiptStatus
+from db.routing import read_only
 from db.repositories.base_repository import BaseRepository
+from db.repositories.pagination import Page
 
 class ReceiptLogRepository(BaseRepository[ReceiptLog]):
     """Repository for ReceiptLog operations"""
+
+    # Named loader profiles per view (see BaseRepository.loader_options)
+    loader_profiles = {
+        # admin review: submitter, destination card and the order's plan in one query
+        "receipt_review": lambda: (
+            joinedload(ReceiptLog.user),
+            joinedload(ReceiptLog.bank_card),
+            joinedload(ReceiptLog.order).joinedload(Order.plan),
+        ),
+    }
+
     def __init__(self, session: AsyncSession):
         super().__init__(session, ReceiptLog)
 
@@ -98,6 +113,7 @@ class ReceiptLogRepository(BaseRepository[ReceiptLog]):
         await self.session.refresh(receipt)
         return receipt
         
+    @read_only
     async def get_by_status(
         self,
         status: str,
@@ -108,6 +124,18 @@ class ReceiptLogRepository(BaseRepository[ReceiptLog]):
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
+    @read_only
+    async def get_page_by_status(
+        self,
+        status: Optional[ReceiptStatus] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> Page[ReceiptLog]:
+        """Get one keyset page of receipts (optionally by status), newest first."""
+        if status is None:
+            return await self.paginate(cursor=cursor, limit=limit)
+        return await self.paginate(ReceiptLog.status == status, cursor=cursor, limit=limit, order_by="submitted_at")
+
     async def get_by_tracking_code(
         self,
         tracking_code: str
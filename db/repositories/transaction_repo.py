@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from db.models.transaction import Transaction
+from db.routing import read_only
+from db.repositories.pagination import Page, keyset_paginate
 
 class TransactionRepository:
     """Repository for transaction database operations"""
@@ -48,6 +50,12 @@ class TransactionRepository:
         )
         return list(result.scalars().all())
     
+    @read_only
+    async def get_user_transactions_page(self, user_id: int, cursor: Optional[str] = None, limit: int = 10) -> Page[Transaction]:
+        """Get one keyset page of a user's transactions, newest first (served by the user_id index)"""
+        query = select(Transaction).where(Transaction.user_id == user_id)
+        return await keyset_paginate(self.session, query, [Transaction.id], cursor, limit)
+
     def create_transaction(self, transaction_data: dict) -> Transaction:
         """Create a new transaction"""
         if self._is_async:
@@ -4,14 +4,16 @@ User repository for database operations
 
 from typing import List, Optional, Union
 from decimal import Decimal
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from db.models.user import User
 from db.models.enums import UserRole
+from db.routing import read_only
 from .base_repository import BaseRepository
+from .pagination import Page, keyset_paginate
 
 
 class UserRepository:
@@ -147,6 +149,20 @@ class UserRepository:
         query = select(User)
         result = await self.session.execute(query)
         return list(result.scalars().all())
+
+    @read_only
+    async def get_users_page(self, cursor: Optional[str] = None, limit: int = 10) -> Page[User]:
+        """Get one keyset page of users, newest registrations first (by primary key)"""
+        return await keyset_paginate(self.session, select(User), [User.id], cursor, limit)
+
+    @read_only
+    async def count_users(self, role: Optional[str] = None) -> int:
+        """Count users (optionally by role) without loading them"""
+        query = select(func.count(User.id))
+        if role is not None:
+            query = query.where(User.role == role)
+        result = await self.session.execute(query)
+        return result.scalar_one()
     
     def update_balance(self, user_id: int, new_balance: Decimal) -> bool:
         """بروزرسانی موجودی کیف پول کاربر"""
@@ -0,0 +1,74 @@
+"""
+Warm pool repository for pre-provisioned panel clients
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db.models.enums import WarmPoolStatus
+from db.models.warm_pool_client import WarmPoolClient
+from .base_repository import BaseRepository
+
+
+class WarmPoolRepository(BaseRepository[WarmPoolClient]):
+    """Repository for warm pool clients. Never commits."""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, WarmPoolClient)
+    
+    async def count_available_by_inbound(self) -> Dict[int, int]:
+        """Number of available pooled clients per inbound ID"""
+        query = (
+            select(self.model.inbound_id, func.count(self.model.id))
+            .where(self.model.status == WarmPoolStatus.AVAILABLE)
+            .group_by(self.model.inbound_id)
+        )
+        result = await self.session.execute(query)
+        return {inbound_id: count for inbound_id, count in result.all()}
+    
+    async def add_many(self, clients_data: List[dict]) -> int:
+        """Insert newly pre-created panel clients"""
+        if not clients_data:
+            return 0
+        self.session.add_all([WarmPoolClient(**data) for data in clients_data])
+        await self.session.flush()
+        return len(clients_data)
+    
+    async def claim_available(self, inbound_id: int, user_id: int) -> Optional[WarmPoolClient]:
+        """
+        Atomically claim one available client of an inbound.
+
+        The row is locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent buyers
+        never wait on or receive the same row. The conditional UPDATE guards against
+        databases without SKIP LOCKED. The claim becomes permanent on commit, and a
+        rollback returns the client to the pool.
+        """
+        query = (
+            select(self.model)
+            .where(
+                self.model.inbound_id == inbound_id,
+                self.model.status == WarmPoolStatus.AVAILABLE,
+            )
+            .order_by(self.model.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        pooled = (await self.session.execute(query)).scalar_one_or_none()
+        if pooled is None:
+            return None
+        
+        stmt = (
+            update(self.model)
+            .where(self.model.id == pooled.id, self.model.status == WarmPoolStatus.AVAILABLE)
+            .values(status=WarmPoolStatus.CLAIMED, claimed_at=datetime.utcnow(), claimed_by_user_id=user_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        if result.rowcount != 1:
+            return None
+        set_committed_value(pooled, "status", WarmPoolStatus.CLAIMED)
+        return pooled
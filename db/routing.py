@@ -0,0 +1,192 @@
+"""
+مسیریابی خواندن‌های فقط‌خواندنی ریپازیتوری‌ها به replica های MySQL
+
+متدهایی که با `@read_only` علامت خورده‌اند، کوئری‌های SELECT خود را روی یکی از replica های
+سالم اجرا می‌کنند و بقیه کوئری‌ها (نوشتن‌ها، flush، متن خام SQL و متدهای بدون علامت) روی
+primary می‌مانند. قواعد:
+
+- read-your-writes: وقتی یک نشست چیزی نوشته باشد (flush یا UPDATE/DELETE/INSERT)، تمام
+  خواندن‌های بعدی همان نشست تا پایان عمرش روی primary اجرا می‌شوند.
+- هر نشست در طول عمرش به یک replica ثابت می‌چسبد تا خواندن‌های آن با هم سازگار باشند.
+- replica ها تا اولین بررسی سلامت موفق استفاده نمی‌شوند؛ replica قطع شده یا با تأخیر
+  بیشتر از `REPLICA_MAX_LAG_SECONDS` کنار گذاشته می‌شود و خواندن‌ها به primary برمی‌گردند.
+"""
+
+import functools
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from core.settings import REPLICA_MAX_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+# کلیدهای وضعیت مسیریابی در session.info
+_READ_ONLY_DEPTH = "routing_read_only_depth"
+_HAS_WRITTEN = "routing_has_written"
+_PINNED_REPLICA = "routing_replica"
+
+_LAG_QUERIES = (
+    ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+    ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+)
+
+
+class Replica:
+    """یک replica به همراه وضعیت سلامت و تأخیر آخرین بررسی"""
+
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.healthy = False
+        self.lag: Optional[float] = None
+
+    @property
+    def sync_engine(self) -> Engine:
+        return self.engine.sync_engine
+
+
+async def _replication_lag(conn) -> Optional[float]:
+    """
+    تأخیر replication بر حسب ثانیه.
+
+    Returns:
+        None اگر سرور replica نباشد یا وضعیت قابل خواندن نباشد (مثلاً دو دیتابیس مستقل در تست).
+
+    Raises:
+        ValueError: اگر replication متوقف شده باشد (تأخیر NULL).
+    """
+    for statement, column in _LAG_QUERIES:
+        try:
+            result = await conn.exec_driver_sql(statement)
+        except DBAPIError:
+            # نسخه قدیمی‌تر MySQL یا نبود دسترسی REPLICATION CLIENT
+            continue
+        row = result.mappings().first()
+        if row is None:
+            return None
+        lag = row.get(column)
+        if lag is None:
+            raise ValueError("replication is not running")
+        return float(lag)
+    return None
+
+
+class ReplicaSet:
+    """مجموعه replica ها با انتخاب چرخشی replica های سالم؛ `check` به صورت دوره‌ای اجرا می‌شود"""
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine] = (),
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+    ):
+        self.replicas: List[Replica] = [Replica(f"replica-{i}", engine) for i, engine in enumerate(engines)]
+        self.max_lag = max_lag
+        self._round_robin = itertools.count()
+        for replica in self.replicas:
+            event.listen(replica.sync_engine, "handle_error", functools.partial(self._on_error, replica))
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """یک replica سالم به صورت چرخشی؛ None یعنی خواندن روی primary"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def mark_down(self, replica: Replica, reason: str) -> None:
+        if replica.healthy:
+            logger.warning(
+                f"replica {replica.name} کنار گذاشته شد: {reason} "
+                f"(Replica {replica.name} taken out of rotation: {reason})"
+            )
+        replica.healthy = False
+
+    def _on_error(self, replica: Replica, context) -> None:
+        # قطع اتصال در میانه درخواست: بدون صبر برای بررسی بعدی، خواندن‌های جدید به primary می‌روند
+        if context.is_disconnect:
+            self.mark_down(replica, str(context.original_exception))
+
+    async def check(self) -> None:
+        """بررسی اتصال و تأخیر replication تمام replica ها"""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    await conn.exec_driver_sql("SELECT 1")
+                    lag = await _replication_lag(conn)
+            except (DBAPIError, OSError, ValueError) as e:
+                self.mark_down(replica, str(e))
+                continue
+
+            replica.lag = lag
+            if lag is not None and lag > self.max_lag:
+                self.mark_down(replica, f"lag {lag:.0f}s > {self.max_lag:.0f}s")
+                continue
+            if not replica.healthy:
+                logger.info(f"replica {replica.name} وارد چرخه شد. (Replica {replica.name} is back in rotation, lag={lag}.)")
+            replica.healthy = True
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+class RoutingSession(Session):
+    """Session همگامی که SELECT های داخل متدهای `@read_only` را به replica می‌فرستد"""
+
+    def __init__(self, *args: Any, replicas: Optional[ReplicaSet] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if not self.replicas or self._flushing:
+            return primary
+        if clause is not None and getattr(clause, "is_dml", False):
+            self.info[_HAS_WRITTEN] = True
+            return primary
+        if (
+            not self.info.get(_READ_ONLY_DEPTH)
+            or self.info.get(_HAS_WRITTEN)
+            or not getattr(clause, "is_select", False)
+        ):
+            return primary
+
+        replica = self.info.get(_PINNED_REPLICA)
+        if replica is None or not replica.healthy:
+            replica = self.replicas.choose()
+            if replica is None:
+                return primary
+            self.info[_PINNED_REPLICA] = replica
+        return replica.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_written(session: Session, flush_context) -> None:
+    session.info[_HAS_WRITTEN] = True
+
+
+def read_only(func: F) -> F:
+    """
+    علامت‌گذاری متد async ریپازیتوری/سرویس (دارای `self.session`) به عنوان فقط‌خواندنی
+    تا SELECT های آن در صورت امکان روی replica اجرا شوند.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        info = self.session.info
+        info[_READ_ONLY_DEPTH] = info.get(_READ_ONLY_DEPTH, 0) + 1
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            info[_READ_ONLY_DEPTH] -= 1
+
+    return wrapper  # type: ignore[return-value]
@@ -26,6 +26,7 @@ class ClientAccountBase(BaseModel):
     ip_limit: Optional[int] = None
     sub_updated_at: Optional[datetime] = None
     sub_last_user_agent: Optional[str] = None
+    sub_token: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -0,0 +1,143 @@
+"""
+بررسی پلن اجرای کوئری‌های پرتکرار ریپازیتوری‌ها (EXPLAIN)
+
+هر بررسی یک متد ریپازیتوری را داخل نشستی که در پایان rollback می‌شود اجرا می‌کند، کوئری‌های
+SELECT ارسال شده به دیتابیس را ضبط می‌کند و همان کوئری را با همان پارامترها با `EXPLAIN`
+دوباره اجرا می‌کند. ردیف‌هایی با `type = ALL` (full table scan) گزارش می‌شوند و در صورت
+وجود، اسکریپت با کد خروج 1 پایان می‌یابد تا در CI یا پس از مهاجرت قابل استفاده باشد.
+
+اجرا:
+    python scripts/check_query_plans.py [--allow TABLE ...]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+from typing import Any, Awaitable, Callable, List, Set, Tuple
+
+# افزودن مسیر پروژه به sys.path برای import‌های نسبی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import engine
+from db.models.receipt_log import ReceiptStatus
+from db.repositories.client_repo import ClientRepository
+from db.repositories.inbound_repo import InboundRepository
+from db.repositories.order_repo import OrderRepository
+from db.repositories.panel_repo import PanelRepository
+from db.repositories.receipt_log_repository import ReceiptLogRepository
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# جدول‌های کوچکی که اسکن کامل آنها مشکلی ایجاد نمی‌کند
+DEFAULT_ALLOWED_TABLES = {"panels", "plans", "settings", "bank_cards"}
+
+
+def _base_table(name: Any) -> str:
+    # نام مستعار joinedload (مثلاً panels_1) به نام جدول اصلی
+    return re.sub(r"_\d+$", "", str(name))
+
+
+async def _first_link_chunk(session: AsyncSession) -> Any:
+    async for rows in ClientRepository(session).iter_link_targets(1, 100):
+        return rows
+
+
+# (نام بررسی، تابع اجرای کوئری)
+CHECKS: List[Tuple[str, Callable[[AsyncSession], Awaitable[Any]]]] = [
+    ("client.get_active_accounts_by_user_id", lambda s: ClientRepository(s).get_active_accounts_by_user_id(1)),
+    ("client.get_expired_accounts", lambda s: ClientRepository(s).get_expired_accounts()),
+    ("client.get_traffic_state_by_panel_id", lambda s: ClientRepository(s).get_traffic_state_by_panel_id(1)),
+    ("client.iter_link_targets", _first_link_chunk),
+    ("client.get_active_recipients_by_inbound", lambda s: ClientRepository(s).get_active_recipients_by_inbound(1)),
+    ("client.get_by_sub_token", lambda s: ClientRepository(s).get_by_sub_token("0" * 32)),
+    ("inbound.get_sync_state_by_panel_id", lambda s: InboundRepository(s).get_sync_state_by_panel_id(1)),
+    ("order.get_by_user_id", lambda s: OrderRepository(s).get_by_user_id(1)),
+    ("order.get_pending_orders", lambda s: OrderRepository(s).get_pending_orders()),
+    ("receipt.get_by_status", lambda s: ReceiptLogRepository(s).get_by_status(ReceiptStatus.PENDING.value)),
+    ("panel.get_active_panels", lambda s: PanelRepository(s).get_active_panels()),
+]
+
+
+async def _capture_statements(check: Callable[[AsyncSession], Awaitable[Any]]) -> List[Tuple[str, Any]]:
+    """اجرای یک بررسی و ضبط کوئری‌های SELECT آن (بدون اعمال هیچ تغییری)"""
+    captured: List[Tuple[str, Any]] = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    async with engine.connect() as conn:
+        event.listen(conn.sync_connection, "before_cursor_execute", _before_cursor_execute)
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        try:
+            await check(session)
+        finally:
+            await session.rollback()
+            await session.close()
+            event.remove(conn.sync_connection, "before_cursor_execute", _before_cursor_execute)
+
+        plans = []
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            plans.append((statement, [dict(row._mapping) for row in result]))
+        await conn.rollback()
+    return plans
+
+
+async def check_query_plans(allowed_tables: Set[str]) -> int:
+    """
+    اجرای تمام بررسی‌ها و گزارش full scan ها.
+
+    Returns:
+        تعداد کوئری‌هایی که حداقل یک full scan غیرمجاز دارند.
+    """
+    flagged = 0
+    for name, check in CHECKS:
+        try:
+            plans = await _capture_statements(check)
+        except Exception as e:
+            logger.error(f"❌ {name}: خطا در اجرای بررسی: {e} (check failed: {e})")
+            flagged += 1
+            continue
+
+        for statement, rows in plans:
+            full_scans = [
+                row for row in rows
+                if str(row.get("type", "")).upper() == "ALL" and _base_table(row.get("table")) not in allowed_tables
+            ]
+            if full_scans:
+                flagged += 1
+                tables = ", ".join(str(row.get("table")) for row in full_scans)
+                logger.warning(f"⚠️ {name}: اسکن کامل جدول {tables} (full table scan on {tables})\n{statement}")
+            else:
+                keys = ", ".join(f"{row.get('table')}:{row.get('key') or '-'}" for row in rows)
+                logger.info(f"✅ {name}: {keys}")
+    return flagged
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN repository hot-path queries and flag full table scans.")
+    parser.add_argument("--allow", nargs="*", default=[], help="جدول‌های مجاز برای اسکن کامل (tables allowed to full-scan)")
+    args = parser.parse_args()
+
+    try:
+        flagged = await check_query_plans(DEFAULT_ALLOWED_TABLES | set(args.allow))
+    finally:
+        await engine.dispose()
+
+    if flagged:
+        logger.error(f"{flagged} کوئری بدون ایندکس مناسب پیدا شد. ({flagged} queries without a usable index.)")
+        return 1
+    logger.info("همه کوئری‌ها از ایندکس استفاده می‌کنند. (All checked queries use an index.)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
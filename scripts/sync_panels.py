@@ -10,8 +10,10 @@ import os
 # افزودن مسیر پروژه به sys.path برای import‌های نسبی
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from db import get_async_db
+from db import engine, get_async_db
 from core.services.panel_service import PanelService
+from core.integrations.xui_session_store import panel_session_store
+from core.integrations.xui_transport import panel_transports
 
 # تنظیم لاگر
 logging.basicConfig(level=logging.INFO, 
@@ -49,6 +51,12 @@ async def sync_all_panels():
         if session:
             await session.rollback()
         raise
+    finally:
+        # کوکی سشن پنل‌ها در Redis می‌ماند و اجرای بعدی (یا ربات) دوباره لاگین نمی‌کند
+        await panel_transports.aclose_all()
+        await panel_session_store.close()
+        # بستن اتصال‌های pool پیش از پایان حلقه رویداد
+        await engine.dispose()
 
 def main():
     """تابع اصلی برای اجرای همگام‌سازی"""
@@ -18,7 +18,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.absolute()
 sys.path.append(str(project_root))
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 
@@ -38,8 +38,9 @@ logger = logging.getLogger(__name__)
 
 # اتصال به دیتابیس با استفاده از متغیرهای محیطی
 from core.settings import DATABASE_URL
+from db.engine import create_engine_from_settings
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_engine_from_settings(DATABASE_URL, echo=True)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -19,7 +19,7 @@ from decimal import Decimal
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import select
 
@@ -33,6 +33,7 @@ from db.repositories.transaction_repo import TransactionRepository
 from core.services.user_service import UserService
 from core.services.receipt_service import ReceiptService
 import core.settings as settings
+from db.engine import create_engine_from_settings
 
 # Configure logging
 logging.basicConfig(
@@ -52,7 +53,7 @@ async def init_db():
     """Initialize database connection."""
     database_url = settings.DATABASE_URL
     
-    engine = create_async_engine(database_url, echo=False)
+    engine = create_engine_from_settings(database_url, echo=False)
     async_session = sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False
     )
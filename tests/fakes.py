@@ -0,0 +1,84 @@
+"""
+جایگزین‌های حداقلی مشترک تست‌ها
+
+درایور async برای SQLite جزو وابستگی‌های پروژه نیست؛ سرویس‌ها و ریپازیتوری‌ها در تست‌ها
+روی یک Session همگام SQLite با این نشست async حداقلی اجرا می‌شوند.
+"""
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db.models import Base
+
+
+class AsyncSessionAdapter:
+    """نشست async حداقلی روی Session همگام (فقط متدهای مورد استفاده ریپازیتوری‌ها)"""
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def info(self):
+        return self.sync_session.info
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.sync_session.execute(statement, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return self.sync_session.get(*args, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def flush(self, *args, **kwargs):
+        self.sync_session.flush(*args, **kwargs)
+
+    async def refresh(self, instance, *args, **kwargs):
+        self.sync_session.refresh(instance, *args, **kwargs)
+
+    async def commit(self):
+        self.sync_session.commit()
+
+    async def rollback(self):
+        self.sync_session.rollback()
+
+
+def sqlite_session():
+    """(engine, Session) روی SQLite درون حافظه با اسکیمای کامل مدل‌ها"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine, Session(engine)
+
+
+class MemoryRedis:
+    """Redis حافظه‌ای حداقلی (get/set/delete)؛ با `fail=True` هر دستور خطای اتصال می‌دهد"""
+
+    def __init__(self, fail: bool = False):
+        self.data = {}
+        self.fail = fail
+
+    def _check(self):
+        if self.fail:
+            raise RedisConnectionError("redis down")
+
+    async def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+
+    async def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
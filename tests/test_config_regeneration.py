@@ -0,0 +1,81 @@
+"""
+تست‌های تشخیص تغییر لینک inboundها و بازسازی گروهی لینک اکانت‌ها (core/services/config_regeneration_service.py)
+"""
+
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from core.services.config_regeneration_service import ConfigRegenerationService
+from core.services.panel_service import PanelService
+from core.utils.config_generator import get_config_template
+from db.models.client_account import ClientAccount
+from db.models.inbound import Inbound
+from db.models.panel import Panel
+from db.models.plan import Plan
+from db.models.user import User
+from db.repositories.inbound_repo import InboundRepository
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+STREAM = {"network": "tcp", "security": "none"}
+SETTINGS = {"decryption": "none"}
+ACCOUNT_COUNT = 5
+
+
+@pytest.fixture
+def session():
+    engine, session = sqlite_session()
+    with session:
+        session.add_all([
+            Panel(id=1, name="de", location_name="de", url="https://de.test:2053", username="a", password="b"),
+            Inbound(id=10, panel_id=1, remote_id=3, protocol="vless", tag="in-3", port=443,
+                    stream_settings=STREAM, sniffing={}, settings_json=SETTINGS),
+            Plan(id=1, name="plan", traffic_gb=10, duration_days=30, price=Decimal("100")),
+            User(id=1, telegram_id=1001),
+        ])
+        session.add_all([
+            ClientAccount(id=i, user_id=1, panel_id=1, inbound_id=10, plan_id=1, remote_uuid=f"uuid-{i}",
+                          client_name=f"c{i}", email_name=f"c{i}", expires_at=datetime(2030, 1, 1),
+                          expiry_time=0, traffic_limit=10, data_limit=0, config_url="old")
+            for i in range(1, ACCOUNT_COUNT + 1)
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _payload(**changes):
+    data = {"remote_id": 3, "protocol": "vless", "port": 443, "stream_settings": STREAM,
+            "sniffing": {}, "settings_json": SETTINGS, "remark": "renamed"}
+    data.update(changes)
+    return data
+
+
+def _detect(session, payload):
+    adapter = AsyncSessionAdapter(session)
+    return asyncio.run(PanelService(adapter)._detect_link_changes(1, [payload], InboundRepository(adapter)))
+
+
+def test_changes_without_link_effect_are_ignored(session):
+    assert _detect(session, _payload(sniffing={"enabled": True})) == {}
+
+
+def test_port_change_returns_new_template(session):
+    changed = _detect(session, _payload(port=8443))
+    assert list(changed) == [10]
+    assert changed[10].render("uuid-1", "c1") == "vless://uuid-1@de.test:8443?type=tcp&security=none#c1"
+
+
+def test_regenerates_all_account_links_in_chunks(session):
+    template = get_config_template("de.test", "vless", 8443, STREAM, {}, SETTINGS)
+    service = ConfigRegenerationService(AsyncSessionAdapter(session), chunk_size=2)
+
+    assert asyncio.run(service.regenerate_inbound_links(10, template, notify=False)) == ACCOUNT_COUNT
+    session.expire_all()
+    links = {account.remote_uuid: account.config_url for account in session.query(ClientAccount)}
+    assert links == {
+        f"uuid-{i}": f"vless://uuid-{i}@de.test:8443?type=tcp&security=none#c{i}"
+        for i in range(1, ACCOUNT_COUNT + 1)
+    }
@@ -0,0 +1,82 @@
+"""
+تست‌های قالب‌های از پیش کامپایل شده لینک کانفیگ (core/utils/config_generator.py)
+"""
+
+import base64
+import json
+from types import SimpleNamespace
+
+from core.utils.config_generator import (
+    compile_config_template,
+    generate_config_link,
+    generate_config_links,
+    get_config_template,
+)
+
+REALITY = {
+    "network": "tcp",
+    "security": "reality",
+    "realitySettings": {
+        "serverNames": ["www.example.com"],
+        "settings": {"publicKey": "pbk", "fingerprint": "chrome", "shortIds": ["ab"], "spiderX": "/"},
+    },
+}
+VLESS_SETTINGS = {"decryption": "none", "client_defaults": {"flow": "xtls-rprx-vision"}}
+VMESS_STREAM = {"network": "ws", "security": "none", "wsSettings": {"path": "/ws"}}
+
+
+def _decode_vmess(link):
+    payload = link[len("vmess://"):]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+def test_vless_template_renders_client_links():
+    template = compile_config_template("de.test", "vless", 443, REALITY, {}, VLESS_SETTINGS)
+
+    link = template.render("uuid-1", "moon-1")
+    assert link.startswith("vless://uuid-1@de.test:443?")
+    assert link.endswith("#moon-1")
+    for param in ("security=reality", "sni=www.example.com", "pbk=pbk", "sid=ab", "flow=xtls-rprx-vision"):
+        assert param in link
+    assert template.render("uuid-2", "moon-2") == link.replace("uuid-1", "uuid-2").replace("moon-1", "moon-2")
+
+
+def test_vmess_template_escapes_client_values():
+    template = compile_config_template("de.test", "vmess", 8080, VMESS_STREAM, {}, {"client_defaults": {"alterId": 0}})
+
+    data = _decode_vmess(template.render("uuid-1", 'moon "1"'))
+    assert (data["id"], data["ps"], data["add"], data["port"], data["net"], data["path"]) == (
+        "uuid-1", 'moon "1"', "de.test", "8080", "ws", "/ws",
+    )
+    # مقدار خالی از JSON حذف می‌شود (مثل ساخت مستقیم بدون قالب)
+    assert "ps" not in _decode_vmess(template.render("uuid-1", ""))
+
+
+def test_templates_are_cached_by_link_settings():
+    first = get_config_template("de.test", "vless", 443, REALITY, {}, VLESS_SETTINGS)
+    again = get_config_template("de.test", "vless", 443, json.loads(json.dumps(REALITY)), {}, dict(VLESS_SETTINGS))
+    moved = get_config_template("de.test", "vless", 8443, REALITY, {}, VLESS_SETTINGS)
+
+    assert again is first
+    assert moved is not first and ":8443?" in moved.render("uuid-1", "moon")
+
+
+def test_links_for_many_clients_share_one_template():
+    panel = SimpleNamespace(id=1, url="https://de.test:2053")
+    inbound = SimpleNamespace(remote_id=3, protocol="vless", port=443, stream_settings=REALITY,
+                              sniffing={}, settings_json=VLESS_SETTINGS)
+
+    links = generate_config_links(panel, inbound, [(f"uuid-{i}", f"moon-{i}") for i in range(100)])
+
+    assert len(links) == 100
+    assert links["uuid-7"] == generate_config_link(panel, inbound, "uuid-7", "moon-7")
+    assert links["uuid-7"].startswith("vless://uuid-7@de.test:443?")
+
+
+def test_unsupported_protocol_has_no_template():
+    panel = SimpleNamespace(id=1, url="https://de.test")
+    inbound = SimpleNamespace(remote_id=3, protocol="shadowsocks", port=443, stream_settings={},
+                              sniffing={}, settings_json={})
+
+    assert compile_config_template("de.test", "shadowsocks", 443, {}, {}, {}) is None
+    assert generate_config_links(panel, inbound, [("uuid-1", "moon")]) == {}
@@ -0,0 +1,72 @@
+"""
+تست‌های موتور دیتابیس مشترک و آمار connection pool (db/engine.py)
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from db.engine import PoolMetrics, create_engine_from_settings
+
+
+def _engine(tmp_path, metrics):
+    # موتور واقعی به درایور async نیاز دارد و aiosqlite جزو وابستگی‌های پروژه نیست
+    pytest.importorskip("aiosqlite")
+    return create_engine_from_settings(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", metrics=metrics,
+        pool_size=1, max_overflow=1, pool_timeout=0.05, pool_pre_ping=False,
+    )
+
+
+def test_connections_are_reused_and_checkouts_recorded(tmp_path):
+    metrics = PoolMetrics()
+    engine = _engine(tmp_path, metrics)
+
+    async def scenario():
+        for _ in range(5):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        snapshot = metrics.snapshot()
+        await engine.dispose()
+        return snapshot
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["checkouts"] == 5
+    assert snapshot["connects"] == 1
+    assert (snapshot["size"], snapshot["in_use"], snapshot["idle"], snapshot["overflow"]) == (1, 0, 1, 0)
+    assert snapshot["timeouts"] == 0
+
+
+def test_exhausted_pool_records_timeouts_and_overflow(tmp_path):
+    metrics = PoolMetrics()
+    engine = _engine(tmp_path, metrics)
+
+    async def scenario():
+        async with engine.connect(), engine.connect():
+            busy = metrics.snapshot()
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+        await engine.dispose()
+        return busy
+
+    busy = asyncio.run(scenario())
+    assert (busy["in_use"], busy["overflow"]) == (2, 1)
+    assert metrics.snapshot()["timeouts"] == 1
+    assert metrics.snapshot()["checkouts"] == 2
+
+
+def test_wait_statistics_over_window():
+    metrics = PoolMetrics(window=4)
+    for seconds in (0.5, 0.001, 0.002, 0.003, 0.004):
+        metrics.record_wait(seconds)
+
+    snapshot = metrics.snapshot()
+    # پنجره فقط 4 گرفتن آخر را نگه می‌دارد، ولی بیشینه کل عمر حفظ می‌شود
+    assert snapshot["checkouts"] == 5
+    assert snapshot["wait_avg_ms"] == 2.5
+    assert snapshot["wait_p95_ms"] == 4.0
+    assert snapshot["wait_max_ms"] == 500.0
+    assert "size" not in snapshot
@@ -0,0 +1,179 @@
+"""
+تست‌های مسیریابی خواندن‌های فقط‌خواندنی به replica ها (db/routing.py)
+
+هر دیتابیس (primary و replica ها) یک فایل SQLite جداگانه با یک ردیف متفاوت است؛ بنابراین
+نتیجه هر خواندن نشان می‌دهد کوئری روی کدام دیتابیس اجرا شده است.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import Integer, String, create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from db import routing
+from db.routing import ReplicaSet, RoutingSession, read_only
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class Item(_Base):
+    __tablename__ = "items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    source: Mapped[str] = mapped_column(String(32))
+
+
+class _AsyncConnection:
+    """اتصال async حداقلی روی اتصال همگام (فقط متدهای مورد استفاده ReplicaSet.check)"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    async def exec_driver_sql(self, statement):
+        return self._conn.exec_driver_sql(statement)
+
+
+class _AsyncEngine:
+    """موتور async حداقلی روی موتور همگام SQLite (درایور async برای SQLite جزو وابستگی‌ها نیست)"""
+
+    def __init__(self, sync_engine):
+        self.sync_engine = sync_engine
+
+    @asynccontextmanager
+    async def connect(self):
+        with self.sync_engine.connect() as conn:
+            yield _AsyncConnection(conn)
+
+    async def dispose(self):
+        self.sync_engine.dispose()
+
+
+class ItemRepository:
+    def __init__(self, session):
+        self.session = session
+
+    async def get_sources(self):
+        return [item.source for item in self.session.execute(select(Item)).scalars()]
+
+    @read_only
+    async def get_sources_read_only(self):
+        return await self.get_sources()
+
+
+def _database(tmp_path, name):
+    engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+    _Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Item.__table__.insert(), [{"id": 1, "source": name}])
+    return engine
+
+
+@pytest.fixture
+def primary(tmp_path):
+    engine = _database(tmp_path, "primary")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replicas(tmp_path):
+    replica_set = ReplicaSet([_AsyncEngine(_database(tmp_path, f"replica{i}")) for i in range(2)])
+    yield replica_set
+    asyncio.run(replica_set.dispose())
+
+
+def _healthy(replica_set, *indexes):
+    for i, replica in enumerate(replica_set.replicas):
+        replica.healthy = i in indexes
+
+
+def _read(session, marked=True):
+    repo = ItemRepository(session)
+    return asyncio.run(repo.get_sources_read_only() if marked else repo.get_sources())
+
+
+def test_unmarked_reads_use_primary(primary, replicas):
+    _healthy(replicas, 0, 1)
+    with RoutingSession(bind=primary, replicas=replicas) as session:
+        assert _read(session, marked=False) == ["primary"]
+
+
+def test_read_only_reads_use_healthy_replica(primary, replicas):
+    _healthy(replicas, 1)
+    with RoutingSession(bind=primary, replicas=replicas) as session:
+        assert _read(session) == ["replica1"]
+
+
+def test_replicas_unused_before_first_health_check(primary, replicas):
+    with RoutingSession(bind=primary, replicas=replicas) as session:
+        assert _read(session) == ["primary"]
+
+
+def test_reads_after_flush_stay_on_primary(primary, replicas):
+    _healthy(replicas, 0, 1)
+    with RoutingSession(bind=primary, replicas=replicas) as session:
+        session.add(Item(id=2, source="written"))
+        session.flush()
+        assert _read(session) == ["primary", "written"]
+
+
+def test_session_is_pinned_to_one_replica(primary, replicas):
+    _healthy(replicas, 0, 1)
+    with RoutingSession(bind=primary, replicas=replicas) as session:
+        first = _read(session)
+        assert all(_read(session) == first for _ in range(3))
+    with RoutingSession(bind=primary, replicas=replicas) as other:
+        # نشست جدید replica بعدی را به صورت چرخشی می‌گیرد
+        assert _read(other) != first
+
+
+def test_pinned_replica_down_falls_back(primary, replicas):
+    _healthy(replicas, 0)
+    with RoutingSession(bind=primary, replicas=replicas) as session:
+        assert _read(session) == ["replica0"]
+        replicas.mark_down(replicas.replicas[0], "test")
+        assert _read(session) == ["primary"]
+
+
+def test_health_check_admits_replica_without_status_row(replicas):
+    # SQLite دستور SHOW REPLICA STATUS ندارد؛ مانند دو دیتابیس مستقل، تأخیر نامشخص پذیرفته می‌شود
+    asyncio.run(replicas.check())
+    assert all(replica.healthy for replica in replicas.replicas)
+
+
+def test_health_check_drops_lagging_replica(replicas, monkeypatch):
+    async def _lag(conn):
+        return replicas.max_lag + 1
+
+    monkeypatch.setattr(routing, "_replication_lag", _lag)
+    _healthy(replicas, 0, 1)
+    asyncio.run(replicas.check())
+    assert not any(replica.healthy for replica in replicas.replicas)
+    assert replicas.choose() is None
+
+
+def test_health_check_drops_stopped_replication(replicas, monkeypatch):
+    async def _stopped(conn):
+        raise ValueError("replication is not running")
+
+    monkeypatch.setattr(routing, "_replication_lag", _stopped)
+    _healthy(replicas, 0, 1)
+    asyncio.run(replicas.check())
+    assert replicas.choose() is None
+
+
+def test_disconnect_marks_replica_down(primary, replicas):
+    _healthy(replicas, 0)
+
+    class _Context:
+        is_disconnect = True
+        original_exception = OperationalError("SELECT 1", {}, Exception("gone"))
+
+    replicas._on_error(replicas.replicas[0], _Context())
+    with RoutingSession(bind=primary, replicas=replicas) as session:
+        assert _read(session) == ["primary"]
@@ -0,0 +1,83 @@
+"""
+تست‌های ایندکس‌های ترکیبی مسیرهای پرتکرار (مدل‌ها، migration و پلن اجرای کوئری‌ها)
+"""
+
+import asyncio
+import re
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+from db.models import Base
+from db.models.receipt_log import ReceiptStatus
+from db.repositories.client_repo import ClientRepository
+from db.repositories.order_repo import OrderRepository
+from db.repositories.receipt_log_repository import ReceiptLogRepository
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+MIGRATION = Path(__file__).resolve().parents[1] / "db/migrations/versions/20250506_090000_add_hot_path_indexes.py"
+
+
+def _migration_indexes():
+    upgrade = MIGRATION.read_text(encoding="utf-8").split("def downgrade")[0]
+    return {
+        name: (table, [column.strip(" '") for column in columns.split(",")])
+        for name, table, columns in re.findall(r"op\.create_index\('(\w+)', '(\w+)', \[([^\]]*)\]", upgrade)
+    }
+
+
+def test_models_declare_the_migrated_indexes():
+    expected = _migration_indexes()
+    assert len(expected) == 7
+
+    for name, (table, columns) in expected.items():
+        indexes = {index.name: index for index in Base.metadata.tables[table].indexes}
+        assert name in indexes, name
+        assert [column.name for column in indexes[name].columns] == columns
+    assert Base.metadata.tables["client_accounts"].c.remote_uuid.unique
+
+
+@pytest.fixture
+def plans():
+    """اجرای یک متد ریپازیتوری روی SQLite و برگرداندن EXPLAIN QUERY PLAN کوئری‌های SELECT آن"""
+    engine, session = sqlite_session()
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+
+    def _plans(check):
+        statements.clear()
+        asyncio.run(check(AsyncSessionAdapter(session)))
+        captured = list(statements)
+        connection = session.connection().connection
+        return [
+            " | ".join(row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall())
+            for statement, parameters in captured
+        ]
+
+    yield _plans
+    session.close()
+    engine.dispose()
+
+
+@pytest.mark.parametrize("check, indexes", [
+    # بدون آمار جدول (ANALYZE)، SQLite ممکن است ایندکس (status, expires_at) را برای این کوئری انتخاب کند
+    (lambda s: ClientRepository(s).get_active_accounts_by_user_id(1),
+     ("ix_client_accounts_user_status", "ix_client_accounts_status_expires")),
+    (lambda s: ClientRepository(s).get_expired_accounts(), ("ix_client_accounts_status_expires",)),
+    (lambda s: ClientRepository(s).get_active_recipients_by_inbound(1), ("ix_client_accounts_inbound_status_user",)),
+    (lambda s: OrderRepository(s).get_by_user_id(1), ("ix_orders_user_created",)),
+    (lambda s: ReceiptLogRepository(s).get_by_status(ReceiptStatus.PENDING.value), ("ix_receipt_log_status_submitted",)),
+])
+def test_hot_queries_use_their_index(plans, check, indexes):
+    query_plans = plans(check)
+
+    assert query_plans
+    assert any(index in plan for plan in query_plans for index in indexes), query_plans
+    for table in ("client_accounts", "orders", "receipt_log"):
+        assert not any(re.search(rf"\bSCAN {table}\b(?! USING)", plan) for plan in query_plans), query_plans
@@ -0,0 +1,141 @@
+"""
+تست‌های همگام‌سازی افزایشی inboundهای یک پنل (PanelService._apply_inbound_sync)
+"""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from core.services.panel_service import PanelService, _compact_inbound_settings
+from core.utils.config_generator import compile_config_template
+from db.models.enums import InboundStatus
+from db.models.inbound import Inbound
+from db.models.panel import Panel
+from db.repositories.inbound_repo import InboundRepository
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+
+@pytest.fixture
+def session():
+    engine, session = sqlite_session()
+    with session:
+        session.add(Panel(id=1, name="de", location_name="de", url="https://de.test:2053", username="a", password="b"))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def upserts(monkeypatch):
+    """upsert معادل SQLite (ON CONFLICT) به جای دستور MySQL؛ تعداد ردیف‌های هر فراخوانی ثبت می‌شود"""
+    calls = []
+
+    async def _upsert_inbounds(self, inbounds_data):
+        calls.append(len(inbounds_data))
+        stmt = sqlite_insert(Inbound).values(inbounds_data)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["panel_id", "remote_id"],
+            set_={key: stmt.excluded[key] for key in inbounds_data[0] if key not in ("panel_id", "remote_id")},
+        )
+        await self.session.execute(stmt)
+        return len(inbounds_data)
+
+    monkeypatch.setattr(InboundRepository, "upsert_inbounds", _upsert_inbounds)
+    return calls
+
+
+def _remote(remote_id, **changes):
+    data = {
+        "id": remote_id, "tag": f"in-{remote_id}", "protocol": "vless", "port": 440 + remote_id, "listen": "",
+        "settings": json.dumps({"clients": [{"id": "uuid-1", "email": "c1"}], "decryption": "none"}),
+        "streamSettings": json.dumps({"network": "tcp", "security": "none"}),
+        "sniffing": "{}", "remark": f"inbound {remote_id}", "enable": True, "up": 0, "down": 0,
+    }
+    data.update(changes)
+    return data
+
+
+def _sync(session, remote):
+    counts = asyncio.run(PanelService(AsyncSessionAdapter(session))._apply_inbound_sync(1, remote))
+    session.commit()
+    session.expire_all()
+    return counts
+
+
+def _inbounds(session):
+    return {inbound.remote_id: inbound for inbound in session.query(Inbound)}
+
+
+def test_unchanged_inbounds_are_not_written(session, upserts):
+    assert _sync(session, [_remote(1), _remote(2)])["added"] == 2
+    hashes = {remote_id: inbound.content_hash for remote_id, inbound in _inbounds(session).items()}
+
+    # شمارنده‌های ترافیک جزو اثر انگشت نیستند
+    counts = _sync(session, [_remote(1, up=1024, down=2048), _remote(2)])
+
+    assert counts == {"added": 0, "updated": 0, "unchanged": 2, "deactivated": 0, "relinked": 0}
+    assert upserts == [2]
+    assert {remote_id: inbound.content_hash for remote_id, inbound in _inbounds(session).items()} == hashes
+
+
+def test_only_changed_inbounds_are_updated(session, upserts):
+    _sync(session, [_remote(1), _remote(2)])
+
+    counts = _sync(session, [_remote(1), _remote(2, remark="renamed")])
+
+    assert (counts["updated"], counts["unchanged"]) == (1, 1)
+    assert upserts == [2, 1]
+    assert _inbounds(session)[2].remark == "renamed"
+
+
+def test_missing_inbound_is_deactivated_and_revived(session, upserts):
+    _sync(session, [_remote(1), _remote(2)])
+
+    assert _sync(session, [_remote(1)])["deactivated"] == 1
+    assert _inbounds(session)[2].status == InboundStatus.INACTIVE
+
+    # بازگشت inbound با همان محتوا: اثر انگشت یکسان است ولی باید دوباره فعال شود
+    assert _sync(session, [_remote(1), _remote(2)])["updated"] == 1
+    assert _inbounds(session)[2].status == InboundStatus.ACTIVE
+
+
+def test_upsert_is_one_statement_keyed_on_panel_and_remote_id():
+    statements = []
+
+    class _RecordingSession:
+        async def execute(self, statement):
+            statements.append(statement)
+
+    payload = PanelService(None)._build_inbound_db_payload
+    rows = [dict(payload(1, _remote(remote_id)), content_hash="h") for remote_id in range(1, 51)]
+
+    assert asyncio.run(InboundRepository(_RecordingSession()).upsert_inbounds(rows)) == 50
+    assert len(statements) == 1
+    sql = str(statements[0].compile(dialect=mysql.dialect()))
+    assert sql.startswith("INSERT INTO inbound") and "ON DUPLICATE KEY UPDATE" in sql
+    updated = sql.split("ON DUPLICATE KEY UPDATE", 1)[1]
+    assert "remark = VALUES(remark)" in updated and "content_hash = VALUES(content_hash)" in updated
+    assert "panel_id" not in updated and "remote_id" not in updated
+
+
+def test_synced_settings_keep_no_client_list(session, upserts):
+    clients = [{"id": f"uuid-{i}", "email": f"c{i}", "flow": "xtls-rprx-vision"} for i in range(1000)]
+    _sync(session, [_remote(1, settings=json.dumps({"clients": clients, "decryption": "none"}))])
+
+    assert _inbounds(session)[1].settings_json == {
+        "decryption": "none", "client_count": 1000, "client_defaults": {"flow": "xtls-rprx-vision"},
+    }
+
+
+def test_compact_settings_build_the_same_links():
+    settings = {"clients": [{"id": "uuid-1", "flow": "xtls-rprx-vision", "alterId": 0}], "decryption": "none"}
+    stream = {"network": "tcp", "security": "tls", "tlsSettings": {"serverName": "de.test"}}
+
+    legacy = compile_config_template("de.test", "vless", 443, stream, {}, settings)
+    compact = compile_config_template("de.test", "vless", 443, stream, {}, _compact_inbound_settings(settings))
+
+    assert compact == legacy
+    assert "flow=xtls-rprx-vision" in compact.render("uuid-1", "c1")
@@ -0,0 +1,101 @@
+"""
+تست‌های صفحه‌بندی keyset لیست‌ها (db/repositories/pagination.py)
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from db.models.order import Order
+from db.models.plan import Plan
+from db.models.user import User
+from db.repositories.order_repo import OrderRepository
+from db.repositories.pagination import decode_cursor, encode_cursor
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+ORDER_COUNT = 23
+PAGE_SIZE = 5
+
+
+@pytest.fixture
+def repo():
+    engine, session = sqlite_session()
+    with session:
+        session.add_all([
+            Plan(id=1, name="plan", traffic_gb=10, duration_days=30, price=Decimal("100")),
+            User(id=1, telegram_id=1001),
+            User(id=2, telegram_id=1002),
+        ])
+        start = datetime(2025, 5, 1, 12, 0, 0, 123456)
+        # هر سه سفارش زمان ایجاد یکسان دارند تا ترتیب با id شکسته شود
+        session.add_all([
+            Order(id=i, user_id=1, plan_id=1, location_name="de", amount=Decimal("100"),
+                  created_at=start + timedelta(minutes=i // 3))
+            for i in range(1, ORDER_COUNT + 1)
+        ])
+        session.add_all([
+            Order(id=100 + i, user_id=2, plan_id=1, location_name="de", amount=Decimal("100"), created_at=start)
+            for i in range(3)
+        ])
+        session.commit()
+        yield OrderRepository(AsyncSessionAdapter(session))
+    engine.dispose()
+
+
+def _expected_order(repo):
+    orders = repo.session.sync_session.query(Order).filter_by(user_id=1).all()
+    return [order.id for order in sorted(orders, key=lambda order: (order.created_at, order.id), reverse=True)]
+
+
+def _walk_forward(repo):
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(repo.get_by_user_id(1, limit=PAGE_SIZE, cursor=cursor))
+        pages.append(page)
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+def test_forward_pages_cover_every_order_once_in_order(repo):
+    pages = _walk_forward(repo)
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert [order.id for page in pages for order in page] == _expected_order(repo)
+    assert pages[0].prev_cursor is None
+
+
+def test_prev_cursor_returns_the_previous_page(repo):
+    pages = _walk_forward(repo)
+
+    for previous, page in zip(pages, pages[1:]):
+        back = asyncio.run(repo.get_by_user_id(1, limit=PAGE_SIZE, cursor=page.prev_cursor))
+        assert [order.id for order in back] == [order.id for order in previous]
+        assert back.next_cursor is not None
+    first = asyncio.run(repo.get_by_user_id(1, limit=PAGE_SIZE, cursor=pages[1].prev_cursor))
+    assert first.prev_cursor is None
+
+
+def test_cursor_fits_callback_data_and_round_trips():
+    columns = [Order.created_at, Order.id]
+    values = (datetime(2025, 5, 1, 12, 0, 0, 123456), 2 ** 40)
+    cursor = encode_cursor(values, backward=True)
+
+    assert len(f"orders:page:{cursor}".encode()) <= 64
+    assert decode_cursor(cursor, columns) == (values, True)
+
+
+def test_filters_are_applied_server_side(repo):
+    # cursor دستکاری شده فقط جایگاه شروع را عوض می‌کند، نه فیلتر کاربر
+    cursor = encode_cursor((datetime(2030, 1, 1), 10 ** 6))
+    page = asyncio.run(repo.get_by_user_id(1, limit=50, cursor=cursor))
+    assert {order.user_id for order in page} == {1}
+    assert len(page) == ORDER_COUNT
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor((1,))])
+def test_invalid_cursor_is_rejected(repo, cursor):
+    with pytest.raises(ValueError):
+        asyncio.run(repo.get_by_user_id(1, cursor=cursor))
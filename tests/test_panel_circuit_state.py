@@ -0,0 +1,111 @@
+"""
+تست‌های ثبت وضعیت circuit breaker پنل‌ها در دیتابیس (جدا از status ادمین) و بازگرداندن آن پس از ری‌استارت
+"""
+
+import asyncio
+
+import pytest
+
+from bot import main as bot_main
+from core.integrations import circuit_breaker
+from core.integrations.circuit_breaker import CircuitOpenError, CircuitState, PanelCircuitBreaker
+from core.services import panel_service
+from core.services.panel_service import PanelService
+from db.models.enums import PanelStatus
+from db.models.panel import Panel
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+
+@pytest.fixture
+def session():
+    engine, session = sqlite_session()
+    with session:
+        session.add_all([
+            Panel(id=1, name="de", location_name="de", url="https://de.test", username="a", password="b"),
+            Panel(id=2, name="nl", location_name="nl", url="https://nl.test", username="a", password="b",
+                  status=PanelStatus.INACTIVE),
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = PanelCircuitBreaker(failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(circuit_breaker, "panel_circuit_breaker", breaker)
+    monkeypatch.setattr(panel_service, "panel_circuit_breaker", breaker)
+    return breaker
+
+
+@pytest.fixture
+def messages(session, monkeypatch):
+    sent = []
+
+    async def _notify_admins(message):
+        sent.append(message)
+
+    monkeypatch.setattr(bot_main, "SessionLocal", lambda: AsyncSessionAdapter(session))
+    monkeypatch.setattr(bot_main, "notify_admins", _notify_admins)
+    return sent
+
+
+def _panel(session, panel_id):
+    session.expire_all()
+    return session.get(Panel, panel_id)
+
+
+def test_circuit_change_keeps_admin_status(session, messages):
+    asyncio.run(bot_main.on_panel_circuit_change(2, CircuitState.CLOSED, CircuitState.OPEN))
+    panel = _panel(session, 2)
+    assert panel.circuit_open is True
+    assert panel.status == PanelStatus.INACTIVE
+
+    asyncio.run(bot_main.on_panel_circuit_change(2, CircuitState.HALF_OPEN, CircuitState.CLOSED))
+    panel = _panel(session, 2)
+    # بازیابی مدار، پنلی را که ادمین غیرفعال کرده دوباره فعال نمی‌کند
+    assert panel.circuit_open is False
+    assert panel.status == PanelStatus.INACTIVE
+    assert len(messages) == 2
+
+
+def test_failed_probe_does_not_notify_again(session, messages):
+    asyncio.run(bot_main.on_panel_circuit_change(1, CircuitState.HALF_OPEN, CircuitState.OPEN))
+    assert messages == []
+    assert _panel(session, 1).circuit_open is False
+
+
+def test_restart_restores_open_circuits_for_probing(session, breaker):
+    _panel(session, 1).circuit_open = True
+    session.commit()
+
+    restored = asyncio.run(PanelService(AsyncSessionAdapter(session)).restore_circuit_state())
+
+    assert restored == [1]
+    assert breaker.is_open(1) and not breaker.is_open(2)
+    # پنل بازگردانده شده بلافاصله قابل probe است و دیگر درخواست‌ها تا نتیجه probe رد می‌شوند
+    breaker.before_call(1)
+    assert breaker.health(1).state == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(1)
+
+
+def test_restore_open_does_not_fire_listeners(breaker):
+    changes = []
+
+    async def _listener(*args):
+        changes.append(args)
+
+    async def scenario():
+        breaker.add_listener(_listener)
+        breaker.restore_open(1)
+        await asyncio.sleep(0)
+        breaker.before_call(1)
+        breaker.record_success(1, 0.1)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert [change[1:] for change in changes] == [
+        (CircuitState.OPEN, CircuitState.HALF_OPEN),
+        (CircuitState.HALF_OPEN, CircuitState.CLOSED),
+    ]
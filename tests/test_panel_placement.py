@@ -0,0 +1,95 @@
+"""
+تست‌های انتخاب پنل و inbound بر اساس بار کش شده (core/services/panel_placement.py)
+"""
+
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from core.integrations.circuit_breaker import PanelCircuitBreaker
+from core.services import panel_placement
+from core.services.panel_placement import LeastLoadedStrategy, PanelLoadCache, WeightedStrategy
+from db.models.client_account import AccountStatus, ClientAccount
+from db.models.enums import PanelStatus
+from db.models.inbound import Inbound
+from db.models.panel import Panel
+from db.models.plan import Plan
+from db.models.user import User
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """کش بار ساخته شده از دیتابیس: پنل 1 با 3 از 4، پنل 2 با 1 از 4 و پنل 3 پر؛ پنل 4 غیرفعال است"""
+    monkeypatch.setattr(panel_placement, "panel_circuit_breaker", PanelCircuitBreaker(failure_threshold=1, reset_timeout=60))
+    engine, session = sqlite_session()
+    with session:
+        session.add_all([
+            Plan(id=1, name="plan", traffic_gb=10, duration_days=30, price=Decimal("100")),
+            User(id=1, telegram_id=1001),
+        ])
+        account_id = 0
+        for panel_id, accounts in ((1, 3), (2, 1), (3, 4), (4, 0)):
+            status = PanelStatus.INACTIVE if panel_id == 4 else PanelStatus.ACTIVE
+            session.add(Panel(id=panel_id, name=f"p{panel_id}", location_name="de", url=f"https://p{panel_id}.test",
+                              username="a", password="b", status=status))
+            session.add(Inbound(id=panel_id * 10, panel_id=panel_id, remote_id=1, protocol="vless", tag="in-1",
+                                port=443, max_clients=4))
+            for _ in range(accounts):
+                account_id += 1
+                session.add(ClientAccount(
+                    id=account_id, user_id=1, panel_id=panel_id, inbound_id=panel_id * 10, plan_id=1,
+                    remote_uuid=f"uuid-{account_id}", client_name=f"c{account_id}", expires_at=datetime(2030, 1, 1),
+                    expiry_time=0, traffic_limit=10, data_limit=0, status=AccountStatus.ACTIVE,
+                ))
+        # اکانت منقضی شده در بار حساب نمی‌شود
+        session.add(ClientAccount(
+            id=99, user_id=1, panel_id=2, inbound_id=20, plan_id=1, remote_uuid="uuid-99", client_name="old",
+            expires_at=datetime(2020, 1, 1), expiry_time=0, traffic_limit=10, data_limit=0, status=AccountStatus.EXPIRED,
+        ))
+        session.commit()
+
+        cache = PanelLoadCache(ttl=60)
+        asyncio.run(cache.refresh(AsyncSessionAdapter(session)))
+        yield cache
+    engine.dispose()
+
+
+def test_refresh_counts_active_accounts_of_active_panels(cache):
+    assert not cache.is_stale
+    assert not cache.knows_panel(4)
+    assert cache.select_inbound(1).active_accounts == 3
+    assert cache.select_inbound(2).active_accounts == 1
+    assert cache.select_inbound(3) is None
+
+
+def test_least_loaded_panel_is_chosen_and_placements_are_counted(cache):
+    strategy = LeastLoadedStrategy()
+    assert cache.select_panel("de", strategy).panel_id == 2
+
+    cache.record_placement(2, 20)
+    cache.record_placement(2, 20)
+    # پنل 2 با 3 از 4 هم‌تراز پنل 1 است و شناسه کوچک‌تر برنده می‌شود
+    assert cache.select_panel("de", strategy).panel_id == 1
+    assert cache.select_panel("nl", strategy) is None
+
+
+def test_unhealthy_overloaded_or_tripped_panels_are_skipped(cache):
+    strategy = LeastLoadedStrategy()
+
+    cache.record_server_status(2, {"cpu": 95.0, "mem": {"current": 1, "total": 4}})
+    assert cache.select_panel("de", strategy).panel_id == 1
+
+    cache.record_server_status(2, {"cpu": 10.0, "mem": {"current": 1, "total": 4}})
+    cache.record_server_status(1, None)
+    assert cache.select_panel("de", strategy).panel_id == 2
+
+    panel_placement.panel_circuit_breaker.restore_open(2)
+    assert cache.select_panel("de", strategy) is None
+
+
+def test_weighted_strategy_never_picks_full_panels(cache):
+    chosen = {cache.select_panel("de", WeightedStrategy()).panel_id for _ in range(50)}
+    assert chosen <= {1, 2}
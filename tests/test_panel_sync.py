@@ -0,0 +1,103 @@
+"""
+تست‌های همگام‌سازی هم‌زمان inboundهای پنل‌ها (PanelService.sync_all_panels_inbounds)
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot import main as bot_main
+from core.services import panel_service
+from core.services.panel_service import PanelService, PanelSyncError, get_failed_sync_panels
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+PANEL_COUNT = 6
+
+
+@pytest.fixture
+def sync(monkeypatch):
+    """سرویس با پنل‌های جعلی؛ دریافت inboundها با تأخیر و اعمال در دیتابیس ثبت می‌شود"""
+    engine, session = sqlite_session()
+    state = SimpleNamespace(running=0, peak=0, applied=[], delays={}, errors={})
+
+    async def _get_active_panels(self):
+        return [SimpleNamespace(id=i, name=f"panel-{i}") for i in range(1, PANEL_COUNT + 1)]
+
+    async def _fetch_remote_inbounds(self, panel):
+        state.running += 1
+        state.peak = max(state.peak, state.running)
+        try:
+            await asyncio.sleep(state.delays.get(panel.id, 0.01))
+            if panel.id in state.errors:
+                raise state.errors[panel.id]
+            return [{"id": panel.id}]
+        finally:
+            state.running -= 1
+
+    async def _apply_inbound_sync(self, panel_id, raw):
+        state.applied.append(panel_id)
+        return {"added": len(raw), "updated": 0, "unchanged": 0, "deactivated": 0, "relinked": 0}
+
+    monkeypatch.setattr(PanelService, "get_active_panels", _get_active_panels)
+    monkeypatch.setattr(PanelService, "_fetch_remote_inbounds", _fetch_remote_inbounds)
+    monkeypatch.setattr(PanelService, "_apply_inbound_sync", _apply_inbound_sync)
+    monkeypatch.setattr(panel_service, "async_session_maker", lambda: AsyncSessionAdapter(session))
+    monkeypatch.setattr(panel_service, "PANEL_SYNC_CONCURRENCY", 2)
+    monkeypatch.setattr(panel_service, "PANEL_SYNC_TIMEOUT_SECONDS", 0.2)
+
+    def _run():
+        return asyncio.run(PanelService(AsyncSessionAdapter(session)).sync_all_panels_inbounds())
+
+    state.session = session
+    yield state, _run
+    session.close()
+    engine.dispose()
+
+
+def test_panels_sync_with_bounded_concurrency(sync):
+    state, run = sync
+    results = run()
+
+    assert sorted(results) == list(range(1, PANEL_COUNT + 1))
+    assert state.peak == 2
+    assert sorted(state.applied) == list(range(1, PANEL_COUNT + 1))
+
+
+def test_slow_or_failing_panel_does_not_block_others(sync):
+    state, run = sync
+    state.delays[2] = 5
+    state.errors[3] = PanelSyncError("no inbounds")
+
+    results = run()
+
+    assert "Timed out" in results[2][0]
+    assert "no inbounds" in results[3][0]
+    assert sorted(state.applied) == [1, 4, 5, 6]
+
+
+def test_failed_panels_are_reported(sync):
+    state, run = sync
+    state.errors[4] = PanelSyncError("no inbounds")
+
+    assert list(get_failed_sync_panels(run())) == [4]
+
+
+def test_initial_sync_notifies_admins_about_failed_panels(sync, monkeypatch):
+    state, _ = sync
+    state.errors[5] = PanelSyncError("no inbounds")
+    sent = []
+
+    async def _notify_admins(message):
+        sent.append(message)
+
+    monkeypatch.setattr(bot_main, "SessionLocal", lambda: AsyncSessionAdapter(state.session))
+    monkeypatch.setattr(bot_main, "notify_admins", _notify_admins)
+
+    asyncio.run(bot_main.run_initial_panel_sync())
+    assert len(sent) == 1
+    assert "1 از 6" in sent[0] and "پنل 5" in sent[0]
+
+    state.errors.clear()
+    asyncio.run(bot_main.run_initial_panel_sync())
+    assert len(sent) == 1
@@ -0,0 +1,30 @@
+"""
+تست‌های ساخت QR Code (core/utils/qr_renderer.py)
+"""
+
+import asyncio
+
+from core.utils.qr_renderer import QrRenderer, render_qr_png
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+LINK = "vless://uuid@host:443?type=tcp#moon"
+
+
+def test_render_qr_png_returns_png():
+    png = render_qr_png(LINK)
+    assert png.startswith(PNG_SIGNATURE)
+
+
+def test_renderer_caches_by_content(tmp_path):
+    renderer = QrRenderer(workers=0, cache_size=4, storage_dir=str(tmp_path))
+
+    async def scenario():
+        first, second = await asyncio.gather(renderer.render(LINK), renderer.render(LINK))
+        path = await renderer.save(LINK)
+        return first, second, path
+
+    first, second, path = asyncio.run(scenario())
+    assert first is second
+    assert first.startswith(PNG_SIGNATURE)
+    with open(path, "rb") as f:
+        assert f.read() == first
@@ -0,0 +1,85 @@
+"""
+تست‌های محافظ N+1 (db/query_budget.py) و پروفایل‌های بارگذاری ریپازیتوری‌ها
+"""
+
+import logging
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from db.models import Base
+from db.models.order import Order
+from db.models.plan import Plan
+from db.models.user import User
+from db.query_budget import BUDGET_ATTRIBUTE, QueryBudgetExceeded, query_budget, query_budget_for
+from db.repositories.order_repo import OrderRepository
+
+ORDER_COUNT = 3
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        plan = Plan(id=1, name="plan", traffic_gb=10, duration_days=30, price=Decimal("100"))
+        session.add(plan)
+        for i in range(1, ORDER_COUNT + 1):
+            user = User(id=i, telegram_id=1000 + i)
+            session.add_all([user, Order(id=i, user=user, plan=plan, location_name="de", amount=Decimal("100"))])
+        session.commit()
+        session.expunge_all()
+        yield session
+    engine.dispose()
+
+
+def _touch_relations(orders):
+    return [(order.user.telegram_id, order.plan.name) for order in orders]
+
+
+def test_lazy_loads_exceed_budget_in_strict_mode(session):
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(session, budget=1, label="lazy", strict=True):
+            _touch_relations(session.execute(select(Order)).scalars().all())
+
+
+def test_loader_profile_stays_within_budget(session):
+    options = OrderRepository(session).loader_options("order_detail")
+    with query_budget(session, budget=1, label="order_detail", strict=True) as counter:
+        orders = session.execute(select(Order).options(*options)).unique().scalars().all()
+        assert len(_touch_relations(orders)) == ORDER_COUNT
+    assert counter.count == 1
+    assert counter.relationship_loads == 0
+
+
+def test_exceeded_budget_only_warns_when_not_strict(session, caplog):
+    with caplog.at_level(logging.WARNING, logger="db.query_budget"):
+        with query_budget(session, budget=1, label="lazy", strict=False) as counter:
+            _touch_relations(session.execute(select(Order)).scalars().all())
+    assert counter.exceeded
+    assert counter.relationship_loads > 0
+    assert "lazy" in caplog.text
+
+
+def test_counter_detaches_after_block(session):
+    with query_budget(session, budget=1, strict=True) as counter:
+        session.execute(select(Plan)).all()
+    session.execute(select(Plan)).all()
+    session.execute(select(Plan)).all()
+    assert counter.count == 1
+
+
+def test_unknown_loader_profile_is_rejected(session):
+    with pytest.raises(ValueError):
+        OrderRepository(session).loader_options("missing")
+    assert OrderRepository(session).loader_options(None) == []
+
+
+def test_query_budget_for_sets_handler_budget():
+    @query_budget_for(4)
+    async def handler():
+        pass
+
+    assert getattr(handler, BUDGET_ATTRIBUTE) == 4
@@ -0,0 +1,135 @@
+"""
+تست‌های ادغام درخواست‌های خواندنی هم‌زمان پنل‌ها (core/integrations/single_flight.py)
+"""
+
+import asyncio
+
+import pytest
+
+from core.integrations.single_flight import SingleFlight
+
+HOST = "https://panel.test"
+KEY = (HOST, "inbound.get_list")
+
+
+class _Read:
+    """درخواست خواندنی با شمارش فراخوانی‌ها؛ هر فراخوانی نتیجه جدیدی برمی‌گرداند"""
+
+    def __init__(self, delay=0.01, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"call": call}
+
+
+def test_concurrent_reads_share_one_request():
+    flight = SingleFlight(ttl=0)
+    read = _Read()
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do(KEY, read) for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert read.calls == 1
+    assert all(result is results[0] for result in results)
+    assert not flight._in_flight
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight(ttl=0)
+    read = _Read()
+
+    async def scenario():
+        return await asyncio.gather(flight.do(KEY, read), flight.do((HOST, "server.get_status"), read))
+
+    asyncio.run(scenario())
+    assert read.calls == 2
+
+
+def test_result_is_reused_until_ttl_expires():
+    flight = SingleFlight(ttl=0.05)
+    read = _Read(delay=0)
+
+    async def scenario():
+        first = await flight.do(KEY, read)
+        cached = await flight.do(KEY, read)
+        await asyncio.sleep(0.06)
+        expired = await flight.do(KEY, read)
+        return first, cached, expired
+
+    first, cached, expired = asyncio.run(scenario())
+    assert cached is first
+    assert expired == {"call": 2}
+
+
+def test_forget_drops_only_the_cached_result():
+    flight = SingleFlight(ttl=60)
+    read = _Read(delay=0)
+
+    async def scenario():
+        await flight.do(KEY, read)
+        flight.forget(KEY)
+        return await flight.do(KEY, read)
+
+    assert asyncio.run(scenario()) == {"call": 2}
+
+
+def test_invalidate_detaches_in_flight_reads():
+    flight = SingleFlight(ttl=60)
+    read = _Read(delay=0.05)
+    other_key = ("https://other.test", "inbound.get_list")
+
+    async def scenario():
+        before = asyncio.ensure_future(flight.do(KEY, read))
+        other = asyncio.ensure_future(flight.do(other_key, read))
+        await asyncio.sleep(0.01)
+        # پس از نوشتن روی پنل، خواندن بعدی نباید به درخواست قدیمی در جریان بپیوندد
+        flight.invalidate(HOST)
+        after = await flight.do(KEY, read)
+        cached = await flight.do(KEY, read)
+        return await before, after, cached, await other
+
+    before, after, cached, other = asyncio.run(scenario())
+    assert before == {"call": 1} and after == {"call": 3}
+    # نتیجه درخواست جدا شده جای نتیجه تازه را در کش نمی‌گیرد
+    assert cached is after
+    assert other == {"call": 2}
+    assert flight._results.keys() == {KEY, other_key}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight(ttl=60)
+    read = _Read(error=ConnectionError("panel down"))
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do(KEY, read) for _ in range(3)), return_exceptions=True)
+        read.error = None
+        return results, await flight.do(KEY, read)
+
+    results, recovered = asyncio.run(scenario())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert read.calls == 2
+    assert recovered == {"call": 2}
+
+
+def test_cancelled_caller_does_not_cancel_shared_read():
+    flight = SingleFlight(ttl=0)
+    read = _Read(delay=0.05)
+
+    async def scenario():
+        impatient = asyncio.ensure_future(flight.do(KEY, read))
+        patient = asyncio.ensure_future(flight.do(KEY, read))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(scenario()) == {"call": 1}
@@ -0,0 +1,94 @@
+"""
+تست‌های نمایش آدرس اشتراک و QR آن در پیام موفقیت خرید (core/services/order_service.py)
+"""
+
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from core.services import subscription_service
+from core.services.order_service import OrderService
+from core.services.subscription_service import account_link, build_subscription_url
+from db.models.client_account import ClientAccount
+from db.models.order import Order
+
+CONFIG_URL = "vless://uuid@host:443?type=tcp#moon"
+
+
+class _Repository:
+    def __init__(self, item):
+        self.item = item
+
+    async def get_by_id(self, _id):
+        return self.item
+
+
+class _Notifications:
+    def __init__(self):
+        self.messages = []
+        self.qr_codes = []
+
+    async def send_message(self, user_id, text, parse_mode=None):
+        self.messages.append(text)
+        return True
+
+    async def send_qr_code(self, user_id, data, caption=None):
+        self.qr_codes.append(data)
+        return True
+
+
+@pytest.fixture
+def base_url(monkeypatch):
+    def _set(url):
+        monkeypatch.setattr(subscription_service, "SUBSCRIPTION_BASE_URL", url)
+
+    return _set
+
+
+def _account():
+    return ClientAccount(id=1, sub_token="abc123", config_url=CONFIG_URL)
+
+
+def _order_service():
+    service = OrderService.__new__(OrderService)
+    service.user_repo = _Repository(SimpleNamespace(id=1, telegram_id=1001))
+    service.plan_repo = _Repository(SimpleNamespace(name="plan", traffic_gb=30, duration_days=30))
+    service.notification_service = _Notifications()
+    return service
+
+
+def _notify(service, account):
+    order = Order(id=5, plan_id=1, location_name="de", amount=Decimal("100000"))
+    asyncio.run(service._send_purchase_notifications(1, order, account))
+    return service.notification_service
+
+
+def test_subscription_url_requires_base_url(base_url):
+    base_url("")
+    assert build_subscription_url("abc123") is None
+    assert account_link(_account()) == CONFIG_URL
+
+    base_url("https://sub.example.com/")
+    assert build_subscription_url("abc123") == "https://sub.example.com/sub/abc123"
+    assert build_subscription_url("") is None
+    assert account_link(_account()) == "https://sub.example.com/sub/abc123"
+
+
+def test_purchase_message_shows_subscription_url_and_qr(base_url):
+    base_url("https://sub.example.com")
+    notifications = _notify(_order_service(), _account())
+
+    assert len(notifications.messages) == 1
+    assert "<code>https://sub.example.com/sub/abc123</code>" in notifications.messages[0]
+    assert "30GB" in notifications.messages[0]
+    assert notifications.qr_codes == ["https://sub.example.com/sub/abc123"]
+
+
+def test_purchase_message_falls_back_to_config_link(base_url):
+    base_url("")
+    notifications = _notify(_order_service(), _account())
+
+    assert f"<code>{CONFIG_URL}</code>" in notifications.messages[0]
+    assert notifications.qr_codes == [CONFIG_URL]
@@ -0,0 +1,109 @@
+"""
+تست‌های کش file_id تلگرام (core/integrations/telegram_file_cache.py)
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile
+
+from core.integrations.telegram_file_cache import TelegramFileCache
+from tests.fakes import MemoryRedis
+
+PNG = b"\x89PNG-bytes"
+
+
+class _Bot:
+    """ربات جعلی که هر آپلود را با file_id جدید پاسخ می‌دهد و file_idهای رد شده را نمی‌پذیرد"""
+
+    def __init__(self, bot_id=1):
+        self.id = bot_id
+        self.sent = []
+        self.rejected = set()
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        self.sent.append(photo)
+        if isinstance(photo, str):
+            if photo in self.rejected:
+                raise TelegramBadRequest(method=None, message="Bad Request: wrong file identifier")
+            return SimpleNamespace(photo=[SimpleNamespace(file_id=photo)])
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="thumb"), SimpleNamespace(file_id=f"fid-{len(self.sent)}")])
+
+
+class _Loader:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return PNG
+
+
+@pytest.fixture
+def cache():
+    cache = TelegramFileCache(ttl=60, local_size=8)
+    cache._redis = MemoryRedis()
+    return cache
+
+
+def _send(cache, bot, loader, key="qr:link"):
+    return asyncio.run(cache.send_photo(bot, 42, key, loader, caption="QR"))
+
+
+def test_second_send_reuses_file_id(cache):
+    bot, loader = _Bot(), _Loader()
+
+    _send(cache, bot, loader)
+    _send(cache, bot, loader)
+
+    assert isinstance(bot.sent[0], BufferedInputFile)
+    assert bot.sent[1] == "fid-1"
+    assert loader.calls == 1
+
+
+def test_file_id_survives_restart_through_redis(cache):
+    bot, loader = _Bot(), _Loader()
+    _send(cache, bot, loader)
+
+    restarted = TelegramFileCache(ttl=60)
+    restarted._redis = cache.redis
+    _send(restarted, bot, loader)
+
+    assert bot.sent[-1] == "fid-1" and loader.calls == 1
+
+
+def test_file_ids_are_per_bot(cache):
+    loader = _Loader()
+    _send(cache, _Bot(1), loader)
+    other = _Bot(2)
+    _send(cache, other, loader)
+
+    assert isinstance(other.sent[0], BufferedInputFile)
+    assert loader.calls == 2
+
+
+def test_rejected_file_id_is_uploaded_again(cache):
+    bot, loader = _Bot(), _Loader()
+    _send(cache, bot, loader)
+    bot.rejected.add("fid-1")
+
+    _send(cache, bot, loader)
+    _send(cache, bot, loader)
+
+    assert bot.sent[1:] == ["fid-1", bot.sent[2], "fid-3"]
+    assert isinstance(bot.sent[2], BufferedInputFile)
+    assert loader.calls == 2
+
+
+def test_redis_errors_do_not_block_sending():
+    cache = TelegramFileCache(ttl=60)
+    cache._redis = MemoryRedis(fail=True)
+    bot, loader = _Bot(), _Loader()
+
+    _send(cache, bot, loader)
+    _send(cache, bot, loader)
+
+    # LRU درون پروسه بدون Redis هم آپلود دوباره را حذف می‌کند
+    assert bot.sent[1] == "fid-1" and loader.calls == 1
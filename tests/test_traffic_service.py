@@ -0,0 +1,101 @@
+"""
+تست‌های دریافت دسته‌ای مصرف ترافیک کلاینت‌ها (core/services/traffic_service.py)
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from core.services import traffic_service
+from core.services.panel_service import PanelService, PanelSyncError
+from core.services.traffic_service import TrafficService
+from db.models.client_account import ClientAccount
+from db.models.inbound import Inbound
+from db.models.panel import Panel
+from db.models.plan import Plan
+from db.models.user import User
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+GB = 1024 ** 3
+
+
+@pytest.fixture
+def session():
+    engine, session = sqlite_session()
+    with session:
+        session.add_all([
+            Panel(id=1, name="de", location_name="de", url="https://de.test", username="a", password="b"),
+            Panel(id=2, name="nl", location_name="nl", url="https://nl.test", username="a", password="b"),
+            Inbound(id=10, panel_id=1, remote_id=3, protocol="vless", tag="in-3", port=443),
+            Inbound(id=20, panel_id=2, remote_id=3, protocol="vless", tag="in-3", port=443),
+            Plan(id=1, name="plan", traffic_gb=10, duration_days=30, price=Decimal("100")),
+            User(id=1, telegram_id=1001),
+        ])
+        session.add_all([
+            _account(1, 1, "c1"),
+            _account(2, 1, None),  # بدون email_name: تطبیق از روی UUID
+            _account(3, 1, "gone"),
+            _account(4, 1, "c4", data_used=5 * GB),
+            _account(5, 2, "n5"),
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _account(account_id, panel_id, email, data_used=0):
+    return ClientAccount(
+        id=account_id, user_id=1, panel_id=panel_id, inbound_id=panel_id * 10, plan_id=1,
+        remote_uuid=f"uuid-{account_id}", client_name=f"c{account_id}", email_name=email,
+        expires_at=datetime(2030, 1, 1), expiry_time=0, traffic_limit=10, data_limit=0, data_used=data_used,
+    )
+
+
+def _inbound(*stats):
+    """inbound خام پنل با clientStats و لیست clients در settings"""
+    return {
+        "id": 3,
+        "settings": json.dumps({"clients": [{"id": f"uuid-{i}", "email": f"c{i}"} for i in (1, 2, 4)]}),
+        "clientStats": [{"email": email, "up": up, "down": down} for email, up, down in stats],
+    }
+
+
+def _usage(session):
+    session.expire_all()
+    return {account.id: (account.data_used, account.traffic_used) for account in session.query(ClientAccount)}
+
+
+def test_usage_is_matched_by_email_or_uuid(session):
+    raw = [_inbound(("c1", GB, GB), ("c2", 3 * GB, 0), ("c4", 2 * GB, 3 * GB))]
+
+    counts = asyncio.run(TrafficService(AsyncSessionAdapter(session)).apply_panel_usage(1, raw))
+
+    assert counts == {"updated": 2, "unchanged": 1, "unmatched": 1}
+    usage = _usage(session)
+    assert usage[1] == (2 * GB, 2)
+    assert usage[2] == (3 * GB, 3)
+    assert usage[3] == (0, 0)
+    assert usage[5] == (0, 0)
+
+
+def test_one_failing_panel_does_not_stop_others(session, monkeypatch):
+    async def _get_active_panels(self):
+        return [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+
+    async def _fetch_remote_inbounds(self, panel):
+        if panel.id == 1:
+            raise PanelSyncError("panel down")
+        return [_inbound(("n5", GB, 0))]
+
+    monkeypatch.setattr(PanelService, "get_active_panels", _get_active_panels)
+    monkeypatch.setattr(PanelService, "_fetch_remote_inbounds", _fetch_remote_inbounds)
+    monkeypatch.setattr(traffic_service, "async_session_maker", lambda: AsyncSessionAdapter(session))
+
+    results = asyncio.run(TrafficService(AsyncSessionAdapter(session)).ingest_all_panels())
+
+    assert results == {1: {}, 2: {"updated": 1, "unchanged": 0, "unmatched": 0}}
+    assert _usage(session)[5] == (GB, 1)
@@ -0,0 +1,126 @@
+"""
+تست‌های استخر گرم کلاینت‌های از پیش ساخته شده (core/services/warm_pool_service.py)
+"""
+
+import asyncio
+
+import pytest
+
+from core.integrations.circuit_breaker import PanelCircuitBreaker
+from core.services import warm_pool_service
+from core.services.panel_service import PanelService
+from core.services.warm_pool_service import WarmPoolService
+from db.models.enums import WarmPoolStatus
+from db.models.inbound import Inbound
+from db.models.panel import Panel
+from db.models.warm_pool_client import WarmPoolClient
+from tests.fakes import AsyncSessionAdapter, sqlite_session
+
+POOL_SIZE = 3
+
+
+class _FakeXuiClient:
+    """کلاینت پنل که درخواست‌های ساخت و ویرایش را ثبت می‌کند"""
+
+    def __init__(self):
+        self.batches = []
+        self.updates = []
+        self.reject_first = False
+
+    async def create_clients(self, inbound_id, clients):
+        self.batches.append((inbound_id, [client["id"] for client in clients]))
+        rejected = clients[0]["id"] if self.reject_first else None
+        return {client["id"]: (ValueError("duplicate email") if client["id"] == rejected else None) for client in clients}
+
+    async def update_client(self, client_uuid, inbound_id, data):
+        self.updates.append((client_uuid, inbound_id, data))
+
+
+@pytest.fixture
+def session():
+    engine, session = sqlite_session()
+    with session:
+        session.add_all([
+            Panel(id=1, name="de", location_name="de", url="https://de.test", username="a", password="b"),
+            Inbound(id=10, panel_id=1, remote_id=3, protocol="vless", tag="in-3", port=443),
+            Inbound(id=20, panel_id=1, remote_id=4, protocol="vless", tag="in-4", port=8443),
+            WarmPoolClient(id=1, panel_id=1, inbound_id=10, remote_uuid="uuid-a", email_name="pool-a"),
+            WarmPoolClient(id=2, panel_id=1, inbound_id=10, remote_uuid="uuid-b", email_name="pool-b"),
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def xui(session, monkeypatch):
+    client = _FakeXuiClient()
+
+    async def _get_xui_client(self, panel):
+        return client
+
+    async def _get_xui_client_by_id(self, panel_id):
+        return client
+
+    monkeypatch.setattr(PanelService, "_get_xui_client", _get_xui_client)
+    monkeypatch.setattr(PanelService, "get_xui_client_by_id", _get_xui_client_by_id)
+    monkeypatch.setattr(warm_pool_service, "panel_circuit_breaker", PanelCircuitBreaker(failure_threshold=1, reset_timeout=60))
+    monkeypatch.setattr(warm_pool_service, "async_session_maker", lambda: AsyncSessionAdapter(session))
+    monkeypatch.setattr(warm_pool_service, "WARM_POOL_SIZE", POOL_SIZE)
+    return client
+
+
+def _available(session):
+    session.expire_all()
+    counts = {}
+    for pooled in session.query(WarmPoolClient).filter_by(status=WarmPoolStatus.AVAILABLE):
+        counts[pooled.inbound_id] = counts.get(pooled.inbound_id, 0) + 1
+    return counts
+
+
+def test_refill_tops_up_each_inbound_in_one_batch(session, xui):
+    created = asyncio.run(WarmPoolService(AsyncSessionAdapter(session)).refill_all())
+
+    assert created == {10: 1, 20: 3}
+    assert sorted((inbound_id, len(uuids)) for inbound_id, uuids in xui.batches) == [(3, 1), (4, 3)]
+    assert _available(session) == {10: POOL_SIZE, 20: POOL_SIZE}
+    assert asyncio.run(WarmPoolService(AsyncSessionAdapter(session)).refill_all()) == {}
+
+
+def test_clients_rejected_by_the_panel_are_not_pooled(session, xui):
+    xui.reject_first = True
+
+    created = asyncio.run(WarmPoolService(AsyncSessionAdapter(session)).refill_all())
+
+    assert created == {20: 2}
+    assert _available(session) == {10: 2, 20: 2}
+
+
+def test_claims_hand_out_each_client_once(session, xui):
+    service = WarmPoolService(AsyncSessionAdapter(session))
+
+    async def scenario():
+        return [await service.claim(10, user_id) for user_id in (7, 8, 9)]
+
+    first, second, third = asyncio.run(scenario())
+    assert (first.remote_uuid, second.remote_uuid, third) == ("uuid-a", "uuid-b", None)
+    session.commit()
+    assert _available(session) == {}
+    assert session.get(WarmPoolClient, 2).claimed_by_user_id == 8
+
+
+def test_pool_is_bypassed_when_disabled(session, xui, monkeypatch):
+    monkeypatch.setattr(warm_pool_service, "WARM_POOL_SIZE", 0)
+    service = WarmPoolService(AsyncSessionAdapter(session))
+
+    assert asyncio.run(service.claim(10, 7)) is None
+    assert asyncio.run(service.refill_all()) == {}
+    assert _available(session) == {10: 2}
+
+
+def test_release_disables_the_client_on_the_panel(session, xui):
+    asyncio.run(WarmPoolService(AsyncSessionAdapter(session)).release_on_panel(1, 3, "uuid-a", "pool-a", "sub"))
+
+    assert xui.updates == [("uuid-a", 3, {
+        "id": "uuid-a", "email": "pool-a", "enable": False, "total_gb": 0, "expiry_time": 0, "limit_ip": 1, "sub_id": "sub",
+    })]
@@ -0,0 +1,79 @@
+"""
+تست‌های ساخت دسته‌ای کلاینت‌ها در یک inbound پنل (XuiClient.create_clients)
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from core.integrations import xui_client
+from core.integrations.xui_client import XuiClient, batch_transport_failed
+from core.integrations.xui_snapshot import PanelSnapshotCache
+
+
+class _ClientApi:
+    """api.client جعلی؛ پنل دسته حاوی ایمیل تکراری را رد می‌کند (success=false → ValueError)"""
+
+    def __init__(self):
+        self.requests = []
+        self.down_after = None
+
+    async def add(self, inbound_id, clients):
+        self.requests.append([client.email for client in clients])
+        if self.down_after is not None and len(self.requests) > self.down_after:
+            raise httpx.ConnectError("connection reset")
+        if any(client.email == "taken" for client in clients):
+            raise ValueError("Duplicate email: taken")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(xui_client, "panel_snapshot_cache", PanelSnapshotCache(ttl=60))
+    client = XuiClient("https://panel.test", "admin", "secret")
+    client.api = SimpleNamespace(client=_ClientApi())
+    return client
+
+
+def _clients(*emails):
+    return [{"id": f"uuid-{email}", "email": email, "total_gb": 10, "expiry_time": 0} for email in emails]
+
+
+def _create(client, clients, **kwargs):
+    return asyncio.run(client.create_clients(3, clients, chunk_size=2, **kwargs))
+
+
+def test_clients_are_sent_in_chunks(client):
+    results = _create(client, _clients("a", "b", "c", "d", "e"))
+
+    assert client.api.client.requests == [["a", "b"], ["c", "d"], ["e"]]
+    assert results == {f"uuid-{email}": None for email in "abcde"}
+
+
+def test_rejected_chunk_is_retried_one_by_one(client):
+    results = _create(client, _clients("a", "taken", "c"))
+
+    assert client.api.client.requests == [["a", "taken"], ["a"], ["taken"], ["c"]]
+    assert isinstance(results.pop("uuid-taken"), ValueError)
+    assert set(results.values()) == {None}
+    assert not batch_transport_failed({"uuid-taken": ValueError("Duplicate email: taken")})
+
+
+def test_rejected_chunk_fails_whole_without_isolation(client):
+    results = _create(client, _clients("a", "taken"), isolate_failures=False)
+
+    assert client.api.client.requests == [["a", "taken"]]
+    assert all(isinstance(error, ValueError) for error in results.values())
+
+
+def test_transport_error_fails_remaining_chunks_without_resending(client):
+    client.api.client.down_after = 1
+
+    results = _create(client, _clients("a", "b", "c", "d", "e"))
+
+    # دسته دوم ممکن است در پنل اعمال شده باشد: ارسال مجدد یا ارسال دسته‌های بعدی انجام نمی‌شود
+    assert client.api.client.requests == [["a", "b"], ["c", "d"]]
+    assert results["uuid-a"] is None and results["uuid-b"] is None
+    assert all(isinstance(results[f"uuid-{email}"], httpx.ConnectError) for email in "cde")
+    assert batch_transport_failed(results)
@@ -0,0 +1,127 @@
+"""
+تست‌های رجیستری سراسری کلاینت‌های XUI (core/integrations/xui_registry.py)
+"""
+
+import asyncio
+
+import pytest
+
+from core.integrations import xui_registry
+from core.integrations.circuit_breaker import CircuitOpenError, PanelCircuitBreaker
+from core.integrations.xui_client import XuiConnectionError
+from core.integrations.xui_registry import XuiClientRegistry
+
+URL = "https://panel.test"
+
+
+class _FakeClient:
+    """XuiClient بدون شبکه که تعداد لاگین‌ها را می‌شمارد"""
+
+    fail_login = False
+    stored_session = False
+
+    def __init__(self, host, username, password):
+        self.host, self.username, self.password = host, username, password
+        self.logins = 0
+        self.restores = 0
+        self.logged_in = False
+
+    async def restore_session(self):
+        self.restores += 1
+        self.logged_in = self.stored_session
+        return self.stored_session
+
+    async def login(self, force=False):
+        await asyncio.sleep(0.01)
+        if self.fail_login:
+            raise XuiConnectionError("panel down")
+        self.logins += 1
+        self.logged_in = True
+        return True
+
+    def is_logged_in(self):
+        return self.logged_in
+
+
+@pytest.fixture(autouse=True)
+def fakes(monkeypatch):
+    breaker = PanelCircuitBreaker(failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(xui_registry, "panel_circuit_breaker", breaker)
+    monkeypatch.setattr(xui_registry, "XuiClient", _FakeClient)
+    monkeypatch.setattr(_FakeClient, "fail_login", False)
+    monkeypatch.setattr(_FakeClient, "stored_session", False)
+    return breaker
+
+
+def test_concurrent_gets_share_one_logged_in_client():
+    registry = XuiClientRegistry(session_ttl=3600)
+
+    async def scenario():
+        return await asyncio.gather(*(registry.get_client(1, URL, "admin", "secret") for _ in range(10)))
+
+    clients = asyncio.run(scenario())
+    assert all(client is clients[0] for client in clients)
+    assert clients[0].logins == 1
+
+
+def test_credential_change_builds_new_client():
+    registry = XuiClientRegistry(session_ttl=3600)
+
+    async def scenario():
+        first = await registry.get_client(1, URL, "admin", "secret")
+        same = await registry.get_client(1, URL + "/", "admin", "secret")
+        changed = await registry.get_client(1, URL, "admin", "rotated")
+        return first, same, changed
+
+    first, same, changed = asyncio.run(scenario())
+    assert same is first
+    assert changed is not first
+    assert changed.password == "rotated"
+
+
+def test_expired_or_stale_session_logs_in_again():
+    registry = XuiClientRegistry(session_ttl=3600)
+
+    async def scenario():
+        client = await registry.get_client(1, URL, "admin", "secret")
+        registry.mark_stale(1)
+        await registry.get_client(1, URL, "admin", "secret")
+        registry._entries[1].logged_in_at -= 7200
+        await registry.get_client(1, URL, "admin", "secret")
+        return client
+
+    assert asyncio.run(scenario()).logins == 3
+
+
+def test_stored_session_skips_login():
+    _FakeClient.stored_session = True
+    registry = XuiClientRegistry(session_ttl=3600)
+
+    client = asyncio.run(registry.get_client(1, URL, "admin", "secret"))
+    assert client.restores == 1
+    assert client.logins == 0
+
+
+def test_failed_login_drops_client(fakes):
+    _FakeClient.fail_login = True
+    registry = XuiClientRegistry(session_ttl=3600)
+
+    with pytest.raises(XuiConnectionError):
+        asyncio.run(registry.get_client(1, URL, "admin", "secret"))
+    assert 1 not in registry._entries
+    # failure_threshold=1: مدار باز است و درخواست بعدی بدون تلاش برای لاگین رد می‌شود
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(registry.get_client(1, URL, "admin", "secret"))
+    assert 1 not in registry._entries
+
+
+def test_invalidate_forces_new_client():
+    registry = XuiClientRegistry(session_ttl=3600)
+
+    async def scenario():
+        first = await registry.get_client(1, URL, "admin", "secret")
+        await registry.invalidate(1)
+        return first, await registry.get_client(1, URL, "admin", "secret")
+
+    first, second = asyncio.run(scenario())
+    assert second is not first
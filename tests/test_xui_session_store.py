@@ -0,0 +1,66 @@
+"""
+تست‌های ذخیره سشن پنل‌ها (core/integrations/xui_session_store.py) و بازیابی آن در XuiClient
+"""
+
+import asyncio
+
+import pytest
+
+from core.integrations import xui_client
+from core.integrations.xui_client import XuiClient
+from core.integrations.xui_session_store import PanelSession, PanelSessionStore, _session_key
+from tests.fakes import MemoryRedis
+
+HOST = "https://panel.test"
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = PanelSessionStore(ttl=60, enabled=True)
+    store._redis = MemoryRedis()
+    monkeypatch.setattr(xui_client, "panel_session_store", store)
+    return store
+
+
+def test_session_round_trip_keeps_cookie_name(store):
+    session = PanelSession("session", "cookie-value", "csrf")
+    asyncio.run(store.save(HOST, "admin", session))
+    assert asyncio.run(store.load(HOST, "admin")) == session
+    assert asyncio.run(store.load(HOST, "other")) is None
+
+
+def test_legacy_cookie_only_value_is_ignored(store):
+    # قالب قدیمی فقط مقدار کوکی را داشت؛ بدون نام کوکی قابل استفاده نیست و لاگین انجام می‌شود
+    store.redis.data[_session_key(HOST, "admin")] = b"raw-cookie"
+    assert asyncio.run(store.load(HOST, "admin")) is None
+
+
+def test_delete_keeps_newer_session(store):
+    asyncio.run(store.save(HOST, "admin", PanelSession("3x-ui", "new")))
+    asyncio.run(store.delete(HOST, "admin", "old"))
+    assert asyncio.run(store.load(HOST, "admin")).value == "new"
+    asyncio.run(store.delete(HOST, "admin", "new"))
+    assert asyncio.run(store.load(HOST, "admin")) is None
+
+
+def test_client_restores_cookie_name_and_csrf_token(store):
+    asyncio.run(store.save(HOST, "admin", PanelSession("session", "cookie-value", "csrf")))
+    client = XuiClient(HOST, "admin", "secret")
+
+    assert asyncio.run(client.restore_session())
+    assert client.api.inbound.cookies == {"session": "cookie-value"}
+    assert client.api.inbound.csrf_token == "csrf"
+
+
+def test_client_saves_session_after_login(store, monkeypatch):
+    client = XuiClient(HOST, "admin", "secret")
+
+    async def _authenticate():
+        client.api.cookie_name = "session"
+        client.api.session = "fresh"
+        client.api.csrf_token = "csrf"
+        return True
+
+    monkeypatch.setattr(client, "_authenticate", _authenticate)
+    assert asyncio.run(client.login(force=True))
+    assert asyncio.run(store.load(HOST, "admin")) == PanelSession("session", "fresh", "csrf")
@@ -0,0 +1,131 @@
+"""
+تست‌های snapshot ایندکس شده کلاینت‌های پنل (core/integrations/xui_snapshot.py)
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from core.integrations import xui_client
+from core.integrations.single_flight import SingleFlight
+from core.integrations.xui_client import XuiClient
+from core.integrations.xui_snapshot import PanelSnapshot, PanelSnapshotCache
+
+HOST = "https://panel.test"
+
+
+def _inbounds(*uuids):
+    return [
+        {
+            "id": 3,
+            "protocol": "vless",
+            "settings": json.dumps({"clients": [{"id": uuid, "email": f"{uuid}@moon"} for uuid in uuids]}),
+            "streamSettings": json.dumps({"network": "tcp"}),
+            "sniffing": "{}",
+            "clientStats": [{"email": f"{uuid}@moon", "up": 10, "down": 20} for uuid in uuids],
+        },
+        {
+            "id": 4,
+            "protocol": "trojan",
+            "settings": {"clients": [{"password": "secret", "email": "t@moon"}]},
+            "streamSettings": {},
+            "sniffing": {},
+        },
+    ]
+
+
+class _Loader:
+    """لیست inboundهای پنل با شمارش تعداد درخواست‌ها"""
+
+    def __init__(self, *uuids):
+        self.uuids = list(uuids)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return _inbounds(*self.uuids)
+
+
+def test_snapshot_indexes_clients_by_uuid_email_and_inbound():
+    snapshot = PanelSnapshot.build(_inbounds("u1", "u2"))
+
+    assert snapshot.clients_by_uuid["u1"]["inboundId"] == 3
+    assert snapshot.clients_by_uuid["u2"]["down"] == 20
+    assert snapshot.clients_by_email["u2@moon"] is snapshot.clients_by_uuid["u2"]
+    assert snapshot.clients_by_uuid["secret"]["inboundId"] == 4
+    assert [client["id"] for client in snapshot.clients_by_inbound[3]] == ["u1", "u2"]
+    assert snapshot.inbounds_by_id[3]["streamSettings"] == {"network": "tcp"}
+
+
+def test_cache_builds_once_until_expired_or_invalidated():
+    cache = PanelSnapshotCache(ttl=60)
+    loader = _Loader("u1")
+
+    async def scenario():
+        first = await asyncio.gather(*(cache.get(HOST, loader) for _ in range(5)))
+        cache.invalidate(HOST)
+        second = await cache.get(HOST, loader)
+        cache.ttl = 0
+        third = await cache.get(HOST, loader)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert all(snapshot is first[0] for snapshot in first)
+    assert second is not first[0] and third is not second
+    assert loader.calls == 3
+
+
+def test_concurrent_forced_rebuilds_share_one_request():
+    cache = PanelSnapshotCache(ttl=60)
+    loader = _Loader("u1")
+
+    async def scenario():
+        stale = await cache.get(HOST, loader)
+        fresh = await asyncio.gather(*(cache.get(HOST, loader, force=True) for _ in range(5)))
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+    assert all(snapshot is fresh[0] for snapshot in fresh) and fresh[0] is not stale
+    assert loader.calls == 2
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(xui_client, "panel_snapshot_cache", PanelSnapshotCache(ttl=60))
+    monkeypatch.setattr(xui_client, "panel_read_coalescer", SingleFlight(ttl=60))
+    client = XuiClient(HOST, "admin", "secret")
+    client.loader = _Loader("u1")
+    client.api = SimpleNamespace(inbound=SimpleNamespace(get_list=client.loader))
+    return client
+
+
+def test_lookups_are_served_from_one_panel_request(client):
+    async def scenario():
+        return (
+            await client.find_client_by_uuid("u1"),
+            await client.find_client_by_email("u1@moon"),
+            await client.find_clients_by_inbound(3),
+            await client.find_inbound_by_id(4),
+        )
+
+    by_uuid, by_email, inbound_clients, inbound = asyncio.run(scenario())
+    assert by_uuid is by_email and inbound_clients == [by_uuid]
+    assert inbound["protocol"] == "trojan"
+    assert client.loader.calls == 1
+
+
+def test_missing_client_forces_one_fresh_rebuild(client):
+    async def scenario():
+        await client.find_client_by_uuid("u1")
+        # کلاینت تازه ساخته شده در snapshot قبلی (و نتیجه کش شده خواندن) وجود ندارد
+        client.loader.uuids.append("u2")
+        found = await client.find_client_by_uuid("u2")
+        missing = await client.find_client_by_uuid("u3")
+        return found, missing
+
+    found, missing = asyncio.run(scenario())
+    assert found["id"] == "u2" and missing is None
+    assert client.loader.calls == 3
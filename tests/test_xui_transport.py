@@ -0,0 +1,141 @@
+"""
+تست‌های transport مشترک پنل (core/integrations/xui_transport.py) روی AsyncApi واقعی py3xui
+
+پنل با httpx.MockTransport شبیه‌سازی می‌شود: لاگین CSRF، یک GET و یک POST باید با همان
+هدرها و کوکی‌هایی که py3xui خودش می‌فرستد به پنل برسند.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from py3xui import AsyncApi
+
+from core.integrations.xui_transport import PanelTransportPool
+
+HOST = "https://panel.test"
+CSRF_TOKEN = "csrf-token-value"
+LOGIN_COOKIE = "pre-login"
+SESSION_COOKIE = "logged-in"
+
+
+class _Panel:
+    """پنل 3x-ui حداقلی که درخواست‌ها را ثبت و هدرهای احراز هویت را بررسی می‌کند"""
+
+    def __init__(self, cookie_name="3x-ui"):
+        self.cookie_name = cookie_name
+        self.requests = []
+
+    def _reply(self, obj=None, cookie=None, success=True):
+        headers = {"Set-Cookie": f"{self.cookie_name}={cookie}; Path=/"} if cookie else {}
+        return httpx.Response(200, json={"success": success, "msg": "", "obj": obj}, headers=headers)
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        cookie = request.headers.get("Cookie")
+        if path == "/csrf-token":
+            return self._reply(CSRF_TOKEN, cookie=LOGIN_COOKIE)
+        if request.headers.get("X-CSRF-Token") != CSRF_TOKEN:
+            return httpx.Response(403)
+        if path == "/login":
+            assert cookie == f"{self.cookie_name}={LOGIN_COOKIE}"
+            assert json.loads(request.content) == {"username": "admin", "password": "secret"}
+            return self._reply(cookie=SESSION_COOKIE)
+        if cookie != f"{self.cookie_name}={SESSION_COOKIE}":
+            return httpx.Response(404)
+        if path == "/panel/api/inbounds/list":
+            return self._reply([])
+        if path == "/panel/api/inbounds/del/7":
+            return self._reply()
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def pool():
+    pool = PanelTransportPool()
+    yield pool
+    asyncio.run(pool.aclose_all())
+
+
+def _api(pool, panel):
+    api = AsyncApi(HOST, "admin", "secret")
+    pool.install(api, HOST)
+    pool.get(HOST)._client = httpx.AsyncClient(transport=httpx.MockTransport(panel))
+    return api
+
+
+async def _login_get_post(api):
+    await api.login()
+    inbounds = await api.inbound.get_list()
+    await api.inbound.delete(7)
+    return inbounds
+
+
+@pytest.mark.parametrize("cookie_name", ["3x-ui", "session"])
+def test_login_get_and_post_through_shared_transport(pool, cookie_name):
+    panel = _Panel(cookie_name)
+    api = _api(pool, panel)
+
+    assert asyncio.run(_login_get_post(api)) == []
+    assert api.cookie_name == cookie_name
+    assert api.inbound.cookies == {cookie_name: SESSION_COOKIE}
+    assert [(r.method, r.url.path) for r in panel.requests] == [
+        ("GET", "/csrf-token"),
+        ("POST", "/login"),
+        ("GET", "/panel/api/inbounds/list"),
+        ("POST", "/panel/api/inbounds/del/7"),
+    ]
+    # درخواست دریافت توکن CSRF بدون هدر CSRF ارسال می‌شود
+    assert "X-CSRF-Token" not in panel.requests[0].headers
+
+
+def test_bearer_token_header_is_applied(pool):
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"success": True, "msg": "", "obj": []})
+
+    api = AsyncApi(HOST, token="api-token")
+    pool.install(api, HOST)
+    pool.get(HOST)._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    asyncio.run(api.inbound.get_list())
+    assert seen[0].headers["Authorization"] == "Bearer api-token"
+    assert "Cookie" not in seen[0].headers
+
+
+def test_rejected_session_logs_in_again_with_new_headers(pool):
+    panel = _Panel()
+    api = _api(pool, panel)
+    logins = []
+
+    async def on_session_rejected(rejected):
+        logins.append(rejected)
+        await api.login()
+
+    pool.install(api, HOST, on_session_rejected=on_session_rejected)
+
+    async def scenario():
+        await api.login()
+        # سشن منقضی شده: پنل کوکی را نمی‌پذیرد و لاگین مجدد کوکی و توکن تازه می‌دهد
+        api.session = "expired"
+        return await api.inbound.get_list()
+
+    assert asyncio.run(scenario()) == []
+    assert logins == ["expired"]
+    assert panel.requests[-1].headers["Cookie"] == f"3x-ui={SESSION_COOKIE}"
+
+
+def test_failed_response_is_checked_unless_skipped(pool):
+    def handler(request):
+        return httpx.Response(200, json={"success": False, "msg": "bad", "obj": None})
+
+    api = AsyncApi(HOST, token="api-token")
+    pool.install(api, HOST)
+    pool.get(HOST)._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    with pytest.raises(ValueError):
+        asyncio.run(api.inbound.get_list())